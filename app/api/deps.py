@@ -31,62 +31,18 @@ from sqlalchemy.orm import Session
 from app.core.security import verify_cognito_token
 from app.db.session import get_db
 from app.services.messaging.kafka_producer import (
-    GeofencesKafkaProducer,
-    RulesKafkaProducer,
-    UserDevicesKafkaProducer,
+    KafkaEventProducer,
+    get_kafka_event_producer,
 )
 from app.services.organization import OrganizationService
 from app.utils.paseto_token import decode_service_token
 
 security = HTTPBearer()
-_rules_kafka_producer: Optional[RulesKafkaProducer] = None
-_geofences_kafka_producer: Optional[GeofencesKafkaProducer] = None
-_user_devices_kafka_producer: Optional[UserDevicesKafkaProducer] = None
 
 
-def get_rules_kafka_producer() -> RulesKafkaProducer:
-    """Retorna una instancia singleton del producer de reglas."""
-    global _rules_kafka_producer
-    if _rules_kafka_producer is None:
-        _rules_kafka_producer = RulesKafkaProducer()
-    return _rules_kafka_producer
-
-
-def get_user_devices_kafka_producer() -> UserDevicesKafkaProducer:
-    """Retorna una instancia singleton del producer de user devices."""
-    global _user_devices_kafka_producer
-    if _user_devices_kafka_producer is None:
-        _user_devices_kafka_producer = UserDevicesKafkaProducer()
-    return _user_devices_kafka_producer
-
-
-def get_geofences_kafka_producer() -> GeofencesKafkaProducer:
-    """Retorna una instancia singleton del producer de geocercas."""
-    global _geofences_kafka_producer
-    if _geofences_kafka_producer is None:
-        _geofences_kafka_producer = GeofencesKafkaProducer()
-    return _geofences_kafka_producer
-
-
-def close_rules_kafka_producer() -> None:
-    global _rules_kafka_producer
-    if _rules_kafka_producer is not None:
-        _rules_kafka_producer.close()
-        _rules_kafka_producer = None
-
-
-def close_user_devices_kafka_producer() -> None:
-    global _user_devices_kafka_producer
-    if _user_devices_kafka_producer is not None:
-        _user_devices_kafka_producer.close()
-        _user_devices_kafka_producer = None
-
-
-def close_geofences_kafka_producer() -> None:
-    global _geofences_kafka_producer
-    if _geofences_kafka_producer is not None:
-        _geofences_kafka_producer.close()
-        _geofences_kafka_producer = None
+def get_kafka_producer() -> KafkaEventProducer:
+    """Retorna el producer Kafka compartido del proceso (todos los topics)."""
+    return get_kafka_event_producer()
 
 
 @dataclass
@@ -1,13 +1,14 @@
 import logging
-from datetime import datetime, timezone
+from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user_full, get_rules_kafka_producer
+from app.api.deps import get_current_user_full
+from app.core.config import settings
 from app.db.session import get_db
 from app.models.alert import Alert
 from app.models.alert_rule import AlertRule, AlertRuleUnit
@@ -15,6 +16,7 @@ from app.models.organization import Organization, OrganizationStatus
 from app.models.unit import Unit
 from app.models.user import User
 from app.schemas.alert_rule import (
+    AlertRuleChangesResponse,
     AlertRuleCreate,
     AlertRuleDeleteOut,
     AlertRuleOut,
@@ -23,63 +25,31 @@ from app.schemas.alert_rule import (
     AlertRuleUnitsUnassign,
     AlertRuleUpdate,
 )
-from app.services.messaging.kafka_producer import RulesKafkaProducer
+from app.services.entity_changes import (
+    ENTITY_ALERT_RULE,
+    build_list_etag,
+    etag_matches,
+    get_current_version,
+    list_changed_entities,
+)
+from app.services.messaging.rule_events import build_upsert_event, load_rule_units
+from app.services.outbox import enqueue_outbox_event
+from app.utils.datetime import to_utc_iso_z
 from app.utils.json_normalization import generate_fingerprint, normalize_json
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-def _to_utc_iso_z(value: datetime | None) -> str:
-    dt = value or datetime.utcnow()
-    if dt.tzinfo is not None:
-        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
-    return dt.isoformat() + "Z"
-
-
 def _build_upsert_event_payload(db: Session, rule: AlertRule) -> dict:
-    rule_out = _build_rule_out(db, rule)
-
-    # Get units with their names
-    unit_rows = (
-        db.query(Unit.id, Unit.name)
-        .join(AlertRuleUnit, AlertRuleUnit.unit_id == Unit.id)
-        .filter(AlertRuleUnit.rule_id == rule.id)
-        .order_by(AlertRuleUnit.created_at.asc())
-        .all()
-    )
-
-    units_context = [
-        {
-            "id": str(row.id),
-            "name": row.name,
-        }
-        for row in unit_rows
-    ]
-
-    return {
-        "operation": "UPSERT",
-        "rule": {
-            "id": str(rule_out.id),
-            "organization_id": str(rule_out.organization_id),
-            "name": rule_out.name,
-            "type": rule_out.type,
-            "config": rule_out.config,
-            "unit_ids": [str(unit_id) for unit_id in rule_out.unit_ids],
-            "is_active": rule_out.is_active,
-            "updated_at": _to_utc_iso_z(rule_out.updated_at),
-        },
-        "context": {
-            "units": units_context,
-        },
-    }
+    return build_upsert_event(rule, load_rule_units(db, [rule.id])[rule.id])
 
 
 def _build_delete_event_payload(rule: AlertRule) -> dict:
     return {
         "operation": "DELETE",
         "rule_id": str(rule.id),
-        "updated_at": _to_utc_iso_z(rule.updated_at),
+        "updated_at": to_utc_iso_z(rule.updated_at),
     }
 
 
@@ -111,41 +81,14 @@ def _duplicate_rule_response(existing: AlertRule | None) -> JSONResponse:
     )
 
 
-def _publish_rule_event(
-    producer: RulesKafkaProducer,
-    payload: dict,
-    endpoint: str,
-    organization_id: UUID,
-) -> None:
+def _enqueue_rule_event(db: Session, payload: dict) -> None:
     rule_id = payload.get("rule_id") or payload.get("rule", {}).get("id")
-    try:
-        published = producer.publish_rule_update(payload=payload, key=rule_id)
-    except Exception:
-        logger.exception(
-            "[ALERT RULES] Excepcion inesperada publicando evento en Kafka.",
-            extra={
-                "extra_data": {
-                    "endpoint": endpoint,
-                    "operation": payload.get("operation"),
-                    "rule_id": rule_id,
-                    "organization_id": str(organization_id),
-                }
-            },
-        )
-        return
-
-    if not published:
-        logger.error(
-            "[ALERT RULES] Fallo publicando evento en Kafka.",
-            extra={
-                "extra_data": {
-                    "endpoint": endpoint,
-                    "operation": payload.get("operation"),
-                    "rule_id": rule_id,
-                    "organization_id": str(organization_id),
-                }
-            },
-        )
+    enqueue_outbox_event(
+        db,
+        topic=settings.KAFKA_RULES_UPDATES_TOPIC,
+        payload=payload,
+        key=rule_id,
+    )
 
 
 def _organization_is_active(db: Session, organization_id: UUID) -> bool:
@@ -191,14 +134,7 @@ def _validate_unit_ids(
     return unique_unit_ids
 
 
-def _build_rule_out(db: Session, rule: AlertRule) -> AlertRuleOut:
-    unit_rows = (
-        db.query(AlertRuleUnit.unit_id)
-        .filter(AlertRuleUnit.rule_id == rule.id)
-        .order_by(AlertRuleUnit.created_at.asc())
-        .all()
-    )
-
+def _rule_out(rule: AlertRule, unit_ids: list[UUID]) -> AlertRuleOut:
     return AlertRuleOut(
         id=rule.id,
         organization_id=rule.organization_id,
@@ -206,13 +142,40 @@ def _build_rule_out(db: Session, rule: AlertRule) -> AlertRuleOut:
         name=rule.name,
         type=rule.type,
         config=rule.config,
-        unit_ids=[row.unit_id for row in unit_rows],
+        unit_ids=unit_ids,
         is_active=rule.is_active,
         created_at=rule.created_at,
         updated_at=rule.updated_at,
     )
 
 
+def _build_rule_out(db: Session, rule: AlertRule) -> AlertRuleOut:
+    unit_rows = (
+        db.query(AlertRuleUnit.unit_id)
+        .filter(AlertRuleUnit.rule_id == rule.id)
+        .order_by(AlertRuleUnit.created_at.asc())
+        .all()
+    )
+
+    return _rule_out(rule, [row.unit_id for row in unit_rows])
+
+
+def _build_rule_outs(db: Session, rules: list[AlertRule]) -> list[AlertRuleOut]:
+    """Construye varias reglas cargando sus unidades en una sola consulta."""
+    unit_ids: dict[UUID, list[UUID]] = {rule.id: [] for rule in rules}
+    if rules:
+        unit_rows = (
+            db.query(AlertRuleUnit.rule_id, AlertRuleUnit.unit_id)
+            .filter(AlertRuleUnit.rule_id.in_(list(unit_ids)))
+            .order_by(AlertRuleUnit.created_at.asc())
+            .all()
+        )
+        for row in unit_rows:
+            unit_ids[row.rule_id].append(row.unit_id)
+
+    return [_rule_out(rule, unit_ids[rule.id]) for rule in rules]
+
+
 def _get_active_rule_or_404(
     db: Session, rule_id: UUID, organization_id: UUID
 ) -> AlertRule:
@@ -240,7 +203,6 @@ def create_alert_rule(
     payload: AlertRuleCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_full),
-    rules_kafka_producer: RulesKafkaProducer = Depends(get_rules_kafka_producer),
 ):
     normalized_config = normalize_json(payload.config)
     fingerprint = generate_fingerprint(
@@ -272,23 +234,20 @@ def create_alert_rule(
         )
         for unit_id in valid_unit_ids:
             db.add(AlertRuleUnit(rule_id=rule.id, unit_id=unit_id))
+        # El payload lee las unidades de la BD (sesión sin autoflush)
+        db.flush()
 
+    _enqueue_rule_event(db, _build_upsert_event_payload(db, rule))
     db.commit()
     db.refresh(rule)
 
-    kafka_payload = _build_upsert_event_payload(db, rule)
-    _publish_rule_event(
-        rules_kafka_producer,
-        kafka_payload,
-        endpoint="create_alert_rule",
-        organization_id=current_user.organization_id,
-    )
-
     return _build_rule_out(db, rule)
 
 
 @router.get("", response_model=list[AlertRuleOut])
 def list_alert_rules(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_full),
     type_filter: str | None = Query(None, alias="type"),
@@ -297,6 +256,16 @@ def list_alert_rules(
     if not _organization_is_active(db, current_user.organization_id):
         return []
 
+    # El ETag cambia con cada alta/edición/baja de reglas de la organización
+    # (asignar o desasignar unidades también actualiza la regla).
+    version = get_current_version(db, current_user.organization_id, ENTITY_ALERT_RULE)
+    etag = build_list_etag(current_user.organization_id, version, request)
+    if etag_matches(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    response.headers["ETag"] = etag
+
     query = db.query(AlertRule).filter(
         AlertRule.organization_id == current_user.organization_id,
         AlertRule.is_active.is_(True),
@@ -312,7 +281,53 @@ def list_alert_rules(
         )
 
     rules = query.order_by(AlertRule.created_at.desc()).all()
-    return [_build_rule_out(db, rule) for rule in rules]
+    return _build_rule_outs(db, rules)
+
+
+@router.get("/changes", response_model=AlertRuleChangesResponse)
+def list_alert_rule_changes(
+    since: int = Query(0, ge=0, description="Última versión sincronizada (0 = todo)"),
+    limit: int = Query(500, ge=1, le=1000, description="Reglas por página"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_full),
+):
+    """
+    Reglas creadas, modificadas o eliminadas después de `since`.
+
+    Las reglas eliminadas (hard delete) se reportan en `deleted`. El cliente
+    guarda `version` y la envía como `since` en la siguiente llamada; si
+    `has_more` es true debe repetir la llamada de inmediato.
+    """
+    if not _organization_is_active(db, current_user.organization_id):
+        return AlertRuleChangesResponse(since=since, version=since, has_more=False)
+
+    changes, has_more = list_changed_entities(
+        db, current_user.organization_id, ENTITY_ALERT_RULE, since, limit
+    )
+    changed_ids = [entity_id for entity_id, _ in changes]
+
+    active: dict[UUID, AlertRule] = {}
+    if changed_ids:
+        active = {
+            rule.id: rule
+            for rule in db.query(AlertRule)
+            .filter(
+                AlertRule.id.in_(changed_ids),
+                AlertRule.organization_id == current_user.organization_id,
+                AlertRule.is_active.is_(True),
+            )
+            .all()
+        }
+
+    return AlertRuleChangesResponse(
+        since=since,
+        version=changes[-1][1] if changes else since,
+        upserted=_build_rule_outs(
+            db, [active[entity_id] for entity_id in changed_ids if entity_id in active]
+        ),
+        deleted=[entity_id for entity_id in changed_ids if entity_id not in active],
+        has_more=has_more,
+    )
 
 
 @router.get("/{rule_id}", response_model=AlertRuleOut)
@@ -338,7 +353,6 @@ def update_alert_rule(
     payload: AlertRuleUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_full),
-    rules_kafka_producer: RulesKafkaProducer = Depends(get_rules_kafka_producer),
 ):
     rule = _get_active_rule_or_404(db, rule_id, current_user.organization_id)
 
@@ -365,7 +379,7 @@ def update_alert_rule(
 
     db.add(rule)
     try:
-        db.commit()
+        db.flush()
     except IntegrityError:
         db.rollback()
         fingerprint = rule.fingerprint
@@ -379,16 +393,10 @@ def update_alert_rule(
         )
         return _duplicate_rule_response(existing)
 
+    _enqueue_rule_event(db, _build_upsert_event_payload(db, rule))
+    db.commit()
     db.refresh(rule)
 
-    kafka_payload = _build_upsert_event_payload(db, rule)
-    _publish_rule_event(
-        rules_kafka_producer,
-        kafka_payload,
-        endpoint="update_alert_rule",
-        organization_id=current_user.organization_id,
-    )
-
     return _build_rule_out(db, rule)
 
 
@@ -397,7 +405,6 @@ def delete_alert_rule(
     rule_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_full),
-    rules_kafka_producer: RulesKafkaProducer = Depends(get_rules_kafka_producer),
 ):
     rule = _get_active_rule_or_404(db, rule_id, current_user.organization_id)
 
@@ -413,15 +420,9 @@ def delete_alert_rule(
         synchronize_session=False,
     )
     db.delete(rule)
+    _enqueue_rule_event(db, kafka_payload)
     db.commit()
 
-    _publish_rule_event(
-        rules_kafka_producer,
-        kafka_payload,
-        endpoint="delete_alert_rule",
-        organization_id=current_user.organization_id,
-    )
-
     return AlertRuleDeleteOut(
         message="Regla eliminada exitosamente",
         rule_id=rule_id,
@@ -435,7 +436,6 @@ def assign_units_to_rule(
     payload: AlertRuleUnitsAssign,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_full),
-    rules_kafka_producer: RulesKafkaProducer = Depends(get_rules_kafka_producer),
 ):
     rule = _get_active_rule_or_404(db, rule_id, current_user.organization_id)
     valid_unit_ids = _validate_unit_ids(
@@ -458,17 +458,11 @@ def assign_units_to_rule(
 
     rule.updated_at = datetime.utcnow()
     db.add(rule)
+    # El payload lee las unidades de la BD (sesión sin autoflush)
+    db.flush()
+    _enqueue_rule_event(db, _build_upsert_event_payload(db, rule))
     db.commit()
 
-    db.refresh(rule)
-    kafka_payload = _build_upsert_event_payload(db, rule)
-    _publish_rule_event(
-        rules_kafka_producer,
-        kafka_payload,
-        endpoint="assign_units_to_rule",
-        organization_id=current_user.organization_id,
-    )
-
     return AlertRuleUnitsOut(rule_id=rule.id, unit_ids=valid_unit_ids)
 
 
@@ -478,7 +472,6 @@ def unassign_units_from_rule(
     payload: AlertRuleUnitsUnassign,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_full),
-    rules_kafka_producer: RulesKafkaProducer = Depends(get_rules_kafka_producer),
 ):
     rule = _get_active_rule_or_404(db, rule_id, current_user.organization_id)
     target_ids = list(dict.fromkeys(payload.unit_ids))
@@ -490,15 +483,7 @@ def unassign_units_from_rule(
 
     rule.updated_at = datetime.utcnow()
     db.add(rule)
+    _enqueue_rule_event(db, _build_upsert_event_payload(db, rule))
     db.commit()
 
-    db.refresh(rule)
-    kafka_payload = _build_upsert_event_payload(db, rule)
-    _publish_rule_event(
-        rules_kafka_producer,
-        kafka_payload,
-        endpoint="unassign_units_from_rule",
-        organization_id=current_user.organization_id,
-    )
-
     return AlertRuleUnitsOut(rule_id=rule.id, unit_ids=target_ids)
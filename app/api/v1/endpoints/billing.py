@@ -23,7 +23,6 @@ from decimal import Decimal
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_organization_id
@@ -41,71 +40,33 @@ from app.schemas.billing import (
     PaymentOut,
     PaymentsListOut,
 )
+from app.services.billing_aggregates import PaymentAggregates, get_payment_aggregates
 from app.services.subscription_query import get_primary_active_subscription
 
 router = APIRouter()
 
+_EMPTY_AGGREGATES = PaymentAggregates(
+    total_paid=Decimal(0),
+    payments_count=0,
+    pending_amount=Decimal(0),
+    last_payment_date=None,
+    last_payment_amount=None,
+)
+
 
-def _get_billing_stats(db: Session, organization_id: UUID) -> BillingStats:
+def _get_billing_stats(aggregates: PaymentAggregates) -> BillingStats:
     """
-    Calcula estadísticas de facturación para una organización.
+    Estadísticas de facturación a partir de los agregados del account.
     """
-    # Total pagado (solo SUCCESS)
-    total_result = (
-        db.query(func.sum(Payment.amount))
-        .filter(
-            Payment.client_id == organization_id,
-            Payment.status == PaymentStatus.SUCCESS.value,
-        )
-        .scalar()
-    )
-    total_paid = Decimal(total_result or 0)
-
-    # Conteo de pagos exitosos
-    payments_count = (
-        db.query(Payment)
-        .filter(
-            Payment.client_id == organization_id,
-            Payment.status == PaymentStatus.SUCCESS.value,
-        )
-        .count()
-    )
-
-    # Último pago
-    last_payment = (
-        db.query(Payment)
-        .filter(
-            Payment.client_id == organization_id,
-            Payment.status == PaymentStatus.SUCCESS.value,
-        )
-        .order_by(Payment.paid_at.desc())
-        .first()
-    )
-
     return BillingStats(
-        total_paid=total_paid,
-        payments_count=payments_count,
-        last_payment_date=last_payment.paid_at if last_payment else None,
-        last_payment_amount=last_payment.amount if last_payment else None,
+        total_paid=aggregates.total_paid,
+        payments_count=aggregates.payments_count,
+        last_payment_date=aggregates.last_payment_date,
+        last_payment_amount=aggregates.last_payment_amount,
         currency="MXN",
     )
 
 
-def _get_pending_amount(db: Session, organization_id: UUID) -> Decimal:
-    """
-    Calcula el monto pendiente de pago.
-    """
-    pending_result = (
-        db.query(func.sum(Payment.amount))
-        .filter(
-            Payment.client_id == organization_id,
-            Payment.status == PaymentStatus.PENDING.value,
-        )
-        .scalar()
-    )
-    return Decimal(pending_result or 0)
-
-
 @router.get("/summary", response_model=BillingSummaryOut)
 def get_billing_summary(
     organization_id: UUID = Depends(get_current_organization_id),
@@ -120,6 +81,10 @@ def get_billing_summary(
     - Estadísticas de pagos históricos
     - Balance pendiente
 
+    Las estadísticas y el balance salen de una sola consulta sobre los
+    pagos del account de la organización, en caché por
+    BILLING_AGGREGATES_TTL_SECONDS.
+
     Notas:
         - Este endpoint es READ-ONLY
         - La integración con PSP aún no está implementada
@@ -152,17 +117,19 @@ def get_billing_summary(
                 currency="MXN",
             )
 
-    # Estadísticas
-    stats = _get_billing_stats(db, organization_id)
-    pending_amount = _get_pending_amount(db, organization_id)
+    # Estadísticas y balance pendiente: los pagos pertenecen al account
+    if organization:
+        aggregates = get_payment_aggregates(db, organization.account_id)
+    else:
+        aggregates = _EMPTY_AGGREGATES
 
     return BillingSummaryOut(
         organization_id=organization_id,
         organization_name=organization.name if organization else "Unknown",
         has_active_subscription=active_sub is not None,
         current_plan=current_plan,
-        pending_amount=pending_amount,
-        stats=stats,
+        pending_amount=aggregates.pending_amount,
+        stats=_get_billing_stats(aggregates),
         billing_email=organization.billing_email if organization else None,
     )
 
@@ -1,39 +1,86 @@
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user_full, get_geofences_kafka_producer
+from app.api.deps import (
+    AuthResult,
+    get_auth_cognito_or_paseto,
+    get_current_user_full,
+)
+from app.core.config import settings
 from app.db.session import get_db
+from app.models.device import Device
 from app.models.geofence import Geofence, GeofenceCell
 from app.models.user import User
 from app.schemas.geofence import (
+    GeofenceCellsMode,
+    GeofenceCellsPage,
+    GeofenceChangesResponse,
     GeofenceCreate,
     GeofenceDeleteOut,
+    GeofenceLookupRequest,
+    GeofenceLookupResponse,
+    GeofenceLookupResult,
     GeofenceOut,
     GeofenceUpdate,
+    GeofenceVisitListResponse,
+)
+from app.services.entity_changes import (
+    ENTITY_GEOFENCE,
+    build_list_etag,
+    etag_matches,
+    get_current_version,
+    list_changed_entities,
 )
-from app.services.messaging.kafka_producer import GeofencesKafkaProducer
+from app.services.geofence_cells import (
+    insert_geofence_cells,
+    load_geofence_cells,
+    sync_geofence_cells,
+)
+from app.services.geofence_index import lookup_points, notify_geofence_index_changed
+from app.services.geofence_visits import find_geofence_visits, load_geofence_matcher
+from app.services.messaging.geofence_events import build_upsert_event_messages
+from app.services.outbox import enqueue_outbox_event
+from app.utils.datetime import to_utc_iso_z
+from app.utils.h3_cells import compact_cells_or_none, is_h3_available
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+MAX_VISITS_RANGE = timedelta(days=31)
+
+# Dependencia para autenticación dual (Cognito o PASETO) del lookup por punto
+get_auth_for_geofence_lookup = get_auth_cognito_or_paseto(
+    required_service="gac",
+    required_role="GAC_ADMIN",
+)
 
-def _unique_h3_indexes(h3_indexes: list[int]) -> list[int]:
-    return list(dict.fromkeys(h3_indexes))
 
+def _count_geofence_cells(db: Session, geofence_ids: list[UUID]) -> dict[UUID, int]:
+    if not geofence_ids:
+        return {}
 
-def _build_geofence_out(db: Session, geofence: Geofence) -> GeofenceOut:
     rows = (
-        db.query(GeofenceCell.h3_index)
-        .filter(GeofenceCell.geofence_id == geofence.id)
-        .order_by(GeofenceCell.h3_index.asc())
+        db.query(GeofenceCell.geofence_id, func.count().label("cell_count"))
+        .filter(GeofenceCell.geofence_id.in_(geofence_ids))
+        .group_by(GeofenceCell.geofence_id)
         .all()
     )
+    return {row.geofence_id: row.cell_count for row in rows}
+
 
+def _build_geofence_out(
+    geofence: Geofence,
+    h3_indexes: list[int],
+    cell_count: int,
+    cells_mode: GeofenceCellsMode = GeofenceCellsMode.FULL,
+) -> GeofenceOut:
     return GeofenceOut(
         id=geofence.id,
         organization_id=geofence.organization_id,
@@ -41,39 +88,66 @@ def _build_geofence_out(db: Session, geofence: Geofence) -> GeofenceOut:
         name=geofence.name,
         description=geofence.description,
         config=geofence.config,
-        h3_indexes=[row.h3_index for row in rows],
+        h3_indexes=h3_indexes,
+        cells_mode=cells_mode,
+        cell_count=cell_count,
         is_active=geofence.is_active,
         created_at=geofence.created_at,
         updated_at=geofence.updated_at,
     )
 
 
-def _to_utc_iso_z(value: datetime | None) -> str:
-    dt = value or datetime.utcnow()
-    if dt.tzinfo is not None:
-        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
-    return dt.isoformat() + "Z"
+def _build_geofence_outs(
+    db: Session,
+    geofences: list[Geofence],
+    cells_mode: GeofenceCellsMode = GeofenceCellsMode.FULL,
+) -> list[GeofenceOut]:
+    geofence_ids = [geofence.id for geofence in geofences]
+
+    if cells_mode == GeofenceCellsMode.COUNT:
+        counts = _count_geofence_cells(db, geofence_ids)
+        return [
+            _build_geofence_out(geofence, [], counts.get(geofence.id, 0), cells_mode)
+            for geofence in geofences
+        ]
+
+    cells = load_geofence_cells(db, geofence_ids)
+    outs = []
+    for geofence in geofences:
+        geofence_cells = cells[geofence.id]
+        h3_indexes = geofence_cells
+        geofence_mode = cells_mode
+        if cells_mode == GeofenceCellsMode.COMPACT:
+            compacted = compact_cells_or_none(geofence_cells)
+            if compacted is None:
+                # Celdas guardadas antes de validar la escritura: se
+                # entregan completas en lugar de fallar toda la página
+                logger.warning(
+                    "[GEOFENCES] Celdas no compactables; se responden completas.",
+                    extra={"extra_data": {"geofence_id": str(geofence.id)}},
+                )
+                geofence_mode = GeofenceCellsMode.FULL
+            else:
+                h3_indexes = compacted
+        outs.append(
+            _build_geofence_out(
+                geofence, h3_indexes, len(geofence_cells), geofence_mode
+            )
+        )
+    return outs
 
 
-def _build_upsert_event_payload(db: Session, geofence: Geofence) -> dict:
-    geofence_out = _build_geofence_out(db, geofence)
-    return {
-        "event_id": str(uuid4()),
-        "event_type": "UPSERT",
-        "entity": "geofence",
-        "timestamp": _to_utc_iso_z(datetime.utcnow()),
-        "organization_id": str(geofence_out.organization_id),
-        "data": {
-            "id": str(geofence_out.id),
-            "created_by": str(geofence_out.created_by),
-            "name": geofence_out.name,
-            "description": geofence_out.description or "",
-            "is_active": geofence_out.is_active,
-            "config": geofence_out.config,
-            "cells": geofence_out.h3_indexes,
-            "updated_at": _to_utc_iso_z(geofence_out.updated_at),
-        },
-    }
+def _require_h3_for_mode(cells_mode: GeofenceCellsMode) -> None:
+    if cells_mode == GeofenceCellsMode.COMPACT and not is_h3_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Modo 'compact' no disponible: falta la librería h3",
+        )
+
+
+def _build_upsert_event_messages(db: Session, geofence: Geofence) -> list[dict]:
+    cells = load_geofence_cells(db, [geofence.id])[geofence.id]
+    return build_upsert_event_messages(geofence, cells)
 
 
 def _build_delete_event_payload(geofence_id: UUID, organization_id: UUID) -> dict:
@@ -81,7 +155,7 @@ def _build_delete_event_payload(geofence_id: UUID, organization_id: UUID) -> dic
         "event_id": str(uuid4()),
         "event_type": "DELETE",
         "entity": "geofence",
-        "timestamp": _to_utc_iso_z(datetime.utcnow()),
+        "timestamp": to_utc_iso_z(datetime.utcnow()),
         "organization_id": str(organization_id),
         "data": {
             "id": str(geofence_id),
@@ -89,42 +163,17 @@ def _build_delete_event_payload(geofence_id: UUID, organization_id: UUID) -> dic
     }
 
 
-def _publish_geofence_event(
-    producer: GeofencesKafkaProducer,
-    payload: dict,
-    endpoint: str,
-    geofence_id: UUID,
-    organization_id: UUID,
+def _enqueue_geofence_events(
+    db: Session, messages: list[dict], geofence_id: UUID
 ) -> None:
-    try:
-        published = producer.publish_update(payload=payload, key=str(geofence_id))
-    except Exception:
-        logger.exception(
-            "[GEOFENCES] Excepcion inesperada publicando evento en Kafka.",
-            extra={
-                "extra_data": {
-                    "endpoint": endpoint,
-                    "event_type": payload.get("event_type"),
-                    "event_id": payload.get("event_id"),
-                    "geofence_id": str(geofence_id),
-                    "organization_id": str(organization_id),
-                }
-            },
-        )
-        return
-
-    if not published:
-        logger.error(
-            "[GEOFENCES] Fallo publicando evento en Kafka.",
-            extra={
-                "extra_data": {
-                    "endpoint": endpoint,
-                    "event_type": payload.get("event_type"),
-                    "event_id": payload.get("event_id"),
-                    "geofence_id": str(geofence_id),
-                    "organization_id": str(organization_id),
-                }
-            },
+    # Los chunks comparten key y se insertan en orden: el relay los publica
+    # en ese orden
+    for message in messages:
+        enqueue_outbox_event(
+            db,
+            topic=settings.KAFKA_GEOFENCES_UPDATES_TOPIC,
+            payload=message,
+            key=str(geofence_id),
         )
 
 
@@ -150,14 +199,43 @@ def _get_active_geofence_or_404(
     return geofence
 
 
+def _resolve_lookup_organization(
+    auth: AuthResult, organization_id: Optional[UUID]
+) -> UUID:
+    if auth.auth_type == "cognito":
+        return auth.organization_id
+
+    if organization_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'organization_id' es requerido con token de servicio",
+        )
+    return organization_id
+
+
+def _lookup_response(
+    db: Session, organization_id: UUID, points: list[tuple[float, float]]
+) -> GeofenceLookupResponse:
+    if not is_h3_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Lookup de geocercas no disponible: falta la librería h3",
+        )
+
+    matches = lookup_points(db, organization_id, points)
+    return GeofenceLookupResponse(
+        results=[
+            GeofenceLookupResult(lat=lat, lng=lng, geofence_ids=geofence_ids)
+            for (lat, lng), geofence_ids in zip(points, matches, strict=True)
+        ]
+    )
+
+
 @router.post("", response_model=GeofenceOut, status_code=status.HTTP_201_CREATED)
 def create_geofence(
     payload: GeofenceCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_full),
-    geofences_kafka_producer: GeofencesKafkaProducer = Depends(
-        get_geofences_kafka_producer
-    ),
 ):
     geofence = Geofence(
         organization_id=current_user.organization_id,
@@ -172,9 +250,12 @@ def create_geofence(
         db.add(geofence)
         db.flush()
 
-        for h3_index in _unique_h3_indexes(payload.h3_indexes):
-            db.add(GeofenceCell(geofence_id=geofence.id, h3_index=h3_index))
+        insert_geofence_cells(db, geofence.id, payload.h3_indexes)
+        _enqueue_geofence_events(
+            db, _build_upsert_event_messages(db, geofence), geofence.id
+        )
 
+        notify_geofence_index_changed(db, geofence.organization_id)
         db.commit()
         db.refresh(geofence)
     except IntegrityError:
@@ -184,23 +265,32 @@ def create_geofence(
             detail="No se pudo crear la geocerca por conflicto de integridad",
         )
 
-    kafka_payload = _build_upsert_event_payload(db, geofence)
-    _publish_geofence_event(
-        geofences_kafka_producer,
-        kafka_payload,
-        endpoint="create_geofence",
-        geofence_id=geofence.id,
-        organization_id=current_user.organization_id,
-    )
-
-    return _build_geofence_out(db, geofence)
+    (geofence_out,) = _build_geofence_outs(db, [geofence])
+    return geofence_out
 
 
 @router.get("", response_model=list[GeofenceOut])
 def list_geofences(
+    request: Request,
+    response: Response,
+    cells_mode: GeofenceCellsMode = Query(
+        GeofenceCellsMode.FULL,
+        description="Representación de celdas: full, compact (H3 compactado) o count",
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_full),
 ):
+    _require_h3_for_mode(cells_mode)
+
+    # El ETag cambia con cada alta/edición/baja de geocercas de la organización
+    version = get_current_version(db, current_user.organization_id, ENTITY_GEOFENCE)
+    etag = build_list_etag(current_user.organization_id, version, request)
+    if etag_matches(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    response.headers["ETag"] = etag
+
     geofences = (
         db.query(Geofence)
         .filter(
@@ -211,19 +301,201 @@ def list_geofences(
         .all()
     )
 
-    return [_build_geofence_out(db, geofence) for geofence in geofences]
+    return _build_geofence_outs(db, geofences, cells_mode)
+
+
+@router.get("/changes", response_model=GeofenceChangesResponse)
+def list_geofence_changes(
+    since: int = Query(0, ge=0, description="Última versión sincronizada (0 = todo)"),
+    limit: int = Query(500, ge=1, le=1000, description="Geocercas por página"),
+    cells_mode: GeofenceCellsMode = Query(
+        GeofenceCellsMode.FULL,
+        description="Representación de celdas: full, compact (H3 compactado) o count",
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_full),
+):
+    """
+    Geocercas creadas, modificadas o desactivadas después de `since`.
+
+    Las desactivadas (soft delete) se reportan en `deleted`. El cliente guarda
+    `version` y la envía como `since` en la siguiente llamada; si `has_more`
+    es true debe repetir la llamada de inmediato.
+    """
+    _require_h3_for_mode(cells_mode)
+
+    changes, has_more = list_changed_entities(
+        db, current_user.organization_id, ENTITY_GEOFENCE, since, limit
+    )
+    changed_ids = [entity_id for entity_id, _ in changes]
+
+    active: dict[UUID, Geofence] = {}
+    if changed_ids:
+        active = {
+            geofence.id: geofence
+            for geofence in db.query(Geofence)
+            .filter(
+                Geofence.id.in_(changed_ids),
+                Geofence.organization_id == current_user.organization_id,
+                Geofence.is_active.is_(True),
+            )
+            .all()
+        }
+
+    return GeofenceChangesResponse(
+        since=since,
+        version=changes[-1][1] if changes else since,
+        upserted=_build_geofence_outs(
+            db,
+            [active[entity_id] for entity_id in changed_ids if entity_id in active],
+            cells_mode,
+        ),
+        deleted=[entity_id for entity_id in changed_ids if entity_id not in active],
+        has_more=has_more,
+    )
+
+
+@router.get("/lookup", response_model=GeofenceLookupResponse)
+def lookup_geofences_by_point(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    organization_id: Optional[UUID] = Query(
+        None, description="Solo PASETO; Cognito usa la organización del usuario"
+    ),
+    db: Session = Depends(get_db),
+    auth: AuthResult = Depends(get_auth_for_geofence_lookup),
+):
+    organization_id = _resolve_lookup_organization(auth, organization_id)
+    return _lookup_response(db, organization_id, [(lat, lng)])
+
+
+@router.post("/lookup", response_model=GeofenceLookupResponse)
+def lookup_geofences_by_points(
+    payload: GeofenceLookupRequest,
+    db: Session = Depends(get_db),
+    auth: AuthResult = Depends(get_auth_for_geofence_lookup),
+):
+    organization_id = _resolve_lookup_organization(auth, payload.organization_id)
+    return _lookup_response(
+        db, organization_id, [(point.lat, point.lng) for point in payload.points]
+    )
 
 
 @router.get("/{geofence_id}", response_model=GeofenceOut)
 def get_geofence(
     geofence_id: UUID,
+    cells_mode: GeofenceCellsMode = Query(
+        GeofenceCellsMode.FULL,
+        description="Representación de celdas: full, compact (H3 compactado) o count",
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_full),
+):
+    _require_h3_for_mode(cells_mode)
+
+    geofence = _get_active_geofence_or_404(
+        db, geofence_id, current_user.organization_id
+    )
+    (geofence_out,) = _build_geofence_outs(db, [geofence], cells_mode)
+    return geofence_out
+
+
+@router.get("/{geofence_id}/cells", response_model=GeofenceCellsPage)
+def list_geofence_cells(
+    geofence_id: UUID,
+    limit: int = Query(5000, ge=1, le=50000, description="Celdas por página"),
+    cursor: Optional[int] = Query(
+        None, description="Último h3_index de la página anterior"
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_full),
+):
+    geofence = _get_active_geofence_or_404(
+        db, geofence_id, current_user.organization_id
+    )
+
+    query = db.query(GeofenceCell.h3_index).filter(
+        GeofenceCell.geofence_id == geofence.id
+    )
+    if cursor is not None:
+        query = query.filter(GeofenceCell.h3_index > cursor)
+
+    rows = query.order_by(GeofenceCell.h3_index.asc()).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    h3_indexes = [row.h3_index for row in rows[:limit]]
+
+    return GeofenceCellsPage(
+        geofence_id=geofence.id,
+        h3_indexes=h3_indexes,
+        limit=limit,
+        cursor=h3_indexes[-1] if has_more else None,
+        has_more=has_more,
+    )
+
+
+@router.get("/{geofence_id}/visits", response_model=GeofenceVisitListResponse)
+def list_geofence_visits(
+    geofence_id: UUID,
+    start_date: datetime = Query(..., description="Inicio del rango (inclusivo)"),
+    end_date: datetime = Query(..., description="Fin del rango (exclusivo)"),
+    unit_id: Optional[UUID] = Query(None, description="Filtrar por unidad"),
+    device_id: Optional[str] = Query(None, description="Filtrar por dispositivo"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_full),
 ):
+    from app.api.v1.endpoints.trips import resolve_scope_device_ids
+
+    if not is_h3_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Historial de visitas no disponible: falta la librería h3",
+        )
+
+    if start_date.tzinfo is None:
+        start_date = start_date.replace(tzinfo=timezone.utc)
+    if end_date.tzinfo is None:
+        end_date = end_date.replace(tzinfo=timezone.utc)
+
+    if start_date >= end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'start_date' debe ser anterior a 'end_date'",
+        )
+    if end_date - start_date > MAX_VISITS_RANGE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango máximo es de {MAX_VISITS_RANGE.days} días",
+        )
+
     geofence = _get_active_geofence_or_404(
         db, geofence_id, current_user.organization_id
     )
-    return _build_geofence_out(db, geofence)
+
+    device_ids = resolve_scope_device_ids(db, current_user, unit_id, device_id)
+    if device_ids is None:
+        device_ids = [
+            d[0]
+            for d in db.query(Device.device_id)
+            .filter(Device.organization_id == current_user.organization_id)
+            .all()
+        ]
+
+    visits = find_geofence_visits(
+        db,
+        load_geofence_matcher(db, geofence.id),
+        device_ids=device_ids,
+        start=start_date,
+        end=end_date,
+    )
+
+    return GeofenceVisitListResponse(
+        geofence_id=geofence.id,
+        start_date=start_date,
+        end_date=end_date,
+        device_count=len(device_ids),
+        visits=visits,
+    )
 
 
 @router.patch("/{geofence_id}", response_model=GeofenceOut)
@@ -232,9 +504,6 @@ def update_geofence(
     payload: GeofenceUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_full),
-    geofences_kafka_producer: GeofencesKafkaProducer = Depends(
-        get_geofences_kafka_producer
-    ),
 ):
     geofence = _get_active_geofence_or_404(
         db, geofence_id, current_user.organization_id
@@ -248,14 +517,16 @@ def update_geofence(
 
     try:
         if h3_indexes is not None:
-            db.query(GeofenceCell).filter(
-                GeofenceCell.geofence_id == geofence.id
-            ).delete(synchronize_session=False)
-            for h3_index in _unique_h3_indexes(h3_indexes):
-                db.add(GeofenceCell(geofence_id=geofence.id, h3_index=h3_index))
+            sync_geofence_cells(db, geofence.id, h3_indexes)
 
         geofence.updated_at = datetime.utcnow()
         db.add(geofence)
+        db.flush()
+        _enqueue_geofence_events(
+            db, _build_upsert_event_messages(db, geofence), geofence.id
+        )
+
+        notify_geofence_index_changed(db, geofence.organization_id)
         db.commit()
         db.refresh(geofence)
     except IntegrityError:
@@ -265,16 +536,8 @@ def update_geofence(
             detail="No se pudo actualizar la geocerca por conflicto de integridad",
         )
 
-    kafka_payload = _build_upsert_event_payload(db, geofence)
-    _publish_geofence_event(
-        geofences_kafka_producer,
-        kafka_payload,
-        endpoint="update_geofence",
-        geofence_id=geofence.id,
-        organization_id=current_user.organization_id,
-    )
-
-    return _build_geofence_out(db, geofence)
+    (geofence_out,) = _build_geofence_outs(db, [geofence])
+    return geofence_out
 
 
 @router.delete("/{geofence_id}", response_model=GeofenceDeleteOut)
@@ -282,9 +545,6 @@ def delete_geofence(
     geofence_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_full),
-    geofences_kafka_producer: GeofencesKafkaProducer = Depends(
-        get_geofences_kafka_producer
-    ),
 ):
     geofence = _get_active_geofence_or_404(
         db, geofence_id, current_user.organization_id
@@ -294,19 +554,18 @@ def delete_geofence(
     geofence.updated_at = datetime.utcnow()
 
     db.add(geofence)
-    db.commit()
-
-    kafka_payload = _build_delete_event_payload(
-        geofence_id=geofence.id,
-        organization_id=current_user.organization_id,
-    )
-    _publish_geofence_event(
-        geofences_kafka_producer,
-        kafka_payload,
-        endpoint="delete_geofence",
-        geofence_id=geofence.id,
-        organization_id=current_user.organization_id,
+    _enqueue_geofence_events(
+        db,
+        [
+            _build_delete_event_payload(
+                geofence_id=geofence.id,
+                organization_id=current_user.organization_id,
+            )
+        ],
+        geofence.id,
     )
+    notify_geofence_index_changed(db, geofence.organization_id)
+    db.commit()
 
     return GeofenceDeleteOut(
         message="Geocerca desactivada exitosamente",
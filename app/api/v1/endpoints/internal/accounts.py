@@ -21,18 +21,20 @@ Endpoints disponibles:
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
 from app.api.deps import AuthResult, get_auth_cognito_or_paseto
 from app.db.session import get_db
 from app.models.account import Account, AccountStatus
 from app.models.account_user import AccountRole, AccountUser
-from app.models.device import Device
 from app.models.organization import Organization
-from app.models.unit_device import UnitDevice
+from app.models.subscription import Subscription
 from app.models.user import User
+from app.services.internal_stats import STATS_ACCOUNTS, get_stats
+from app.services.subscription_query import get_primary_active_subscriptions
+from app.utils.pagination import NEXT_CURSOR_HEADER, paginate_keyset
 
 router = APIRouter()
 
@@ -43,18 +45,46 @@ get_auth_for_internal_accounts = get_auth_cognito_or_paseto(
 )
 
 
+def _primary_subscription_fields(subscription: Optional[Subscription]) -> dict:
+    if subscription is None:
+        return {
+            "plan_id": None,
+            "plan_code": None,
+            "plan_name": None,
+            "subscription_status": None,
+            "subscription_expires_at": None,
+        }
+    return {
+        "plan_id": str(subscription.plan_id),
+        "plan_code": subscription.plan.code,
+        "plan_name": subscription.plan.name,
+        "subscription_status": subscription.status,
+        "subscription_expires_at": (
+            subscription.expires_at.isoformat() if subscription.expires_at else None
+        ),
+    }
+
+
 @router.get("")
 def list_all_accounts(
+    response: Response,
     db: Session = Depends(get_db),
     auth: AuthResult = Depends(get_auth_for_internal_accounts),
     status_filter: Optional[AccountStatus] = Query(
         None, alias="status", description="Filtrar por estado del account"
     ),
     search: Optional[str] = Query(
-        None, description="Buscar por nombre (parcial, case-insensitive)"
+        None,
+        description="Buscar por nombre, email de facturación o email del owner "
+        "(parcial, case-insensitive)",
     ),
     limit: int = Query(50, ge=1, le=200, description="Límite de resultados"),
-    offset: int = Query(0, ge=0, description="Offset para paginación"),
+    cursor: Optional[str] = Query(
+        None, description=f"Cursor de la página anterior (header {NEXT_CURSOR_HEADER})"
+    ),
+    offset: int = Query(
+        0, ge=0, description="DEPRECATED: usar cursor. Se ignora si se envía cursor"
+    ),
 ):
     """
     Lista todos los accounts del sistema con estadísticas.
@@ -64,90 +94,94 @@ def list_all_accounts(
     - owner_email: email del usuario owner
     - total_organizations: cantidad de organizaciones del account
     - total_users: cantidad de usuarios en todas las organizaciones del account
+
+    Paginación keyset por (created_at DESC, id DESC): si hay más resultados,
+    el header X-Next-Cursor trae el cursor de la página siguiente. Los
+    conteos y el owner se calculan solo para los accounts de la página.
     """
-    # Subquery para contar organizaciones por account
-    org_count_subq = (
-        db.query(
-            Organization.account_id,
-            func.count(Organization.id).label("org_count"),
+    query = db.query(Account)
+
+    # Aplicar filtros
+    if status_filter:
+        query = query.filter(Account.status == status_filter)
+
+    if search:
+        pattern = f"%{search}%"
+        owner_match = (
+            db.query(AccountUser.account_id)
+            .join(User, User.id == AccountUser.user_id)
+            .filter(
+                AccountUser.account_id == Account.id,
+                AccountUser.role == AccountRole.OWNER.value,
+                User.email.ilike(pattern),
+            )
+            .exists()
+        )
+        query = query.filter(
+            or_(
+                Account.name.ilike(pattern),
+                Account.billing_email.ilike(pattern),
+                owner_match,
+            )
         )
-        .group_by(Organization.account_id)
-        .subquery()
-    )
 
-    # Subquery para contar usuarios por account (a través de organizations)
-    user_count_subq = (
-        db.query(
-            Organization.account_id,
-            func.count(User.id).label("user_count"),
+    try:
+        accounts, next_cursor = paginate_keyset(
+            query, Account.created_at, Account.id, limit, cursor, offset
         )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    account_ids = [account.id for account in accounts]
+    if not account_ids:
+        return []
+
+    # Conteos y owner restringidos a los accounts de la página
+    org_counts = dict(
+        db.query(Organization.account_id, func.count(Organization.id))
+        .filter(Organization.account_id.in_(account_ids))
+        .group_by(Organization.account_id)
+        .all()
+    )
+    user_counts = dict(
+        db.query(Organization.account_id, func.count(User.id))
         .join(User, User.organization_id == Organization.id)
+        .filter(Organization.account_id.in_(account_ids))
         .group_by(Organization.account_id)
-        .subquery()
+        .all()
     )
-
-    # Subquery para obtener el email del owner (desde account_users)
-    owner_subq = (
-        db.query(
-            AccountUser.account_id,
-            User.email.label("owner_email"),
-        )
+    owner_emails = dict(
+        db.query(AccountUser.account_id, User.email)
         .join(User, User.id == AccountUser.user_id)
-        .filter(AccountUser.role == AccountRole.OWNER.value)
-        .distinct(AccountUser.account_id)
-        .subquery()
-    )
-
-    # Query principal
-    query = (
-        db.query(
-            Account.id,
-            Account.name.label("account_name"),
-            Account.billing_email,
-            Account.status,
-            Account.created_at,
-            Account.updated_at,
-            owner_subq.c.owner_email,
-            func.coalesce(org_count_subq.c.org_count, 0).label("total_organizations"),
-            func.coalesce(user_count_subq.c.user_count, 0).label("total_users"),
+        .filter(
+            AccountUser.account_id.in_(account_ids),
+            AccountUser.role == AccountRole.OWNER.value,
         )
-        .outerjoin(org_count_subq, Account.id == org_count_subq.c.account_id)
-        .outerjoin(user_count_subq, Account.id == user_count_subq.c.account_id)
-        .outerjoin(owner_subq, Account.id == owner_subq.c.account_id)
+        .distinct(AccountUser.account_id)
+        .all()
     )
 
-    # Aplicar filtros
-    if status_filter:
-        query = query.filter(Account.status == status_filter)
-
-    if search:
-        query = query.filter(Account.name.ilike(f"%{search}%"))
-
-    # Ordenar y paginar
-    query = query.order_by(Account.created_at.desc())
-    query = query.offset(offset).limit(limit)
-
-    # Ejecutar query
-    results = query.all()
-
-    # Construir respuesta
-    accounts = []
-    for row in results:
-        accounts.append(
-            {
-                "id": str(row.id),
-                "account_name": row.account_name,
-                "billing_email": row.billing_email,
-                "status": row.status,
-                "created_at": row.created_at.isoformat() if row.created_at else None,
-                "updated_at": row.updated_at.isoformat() if row.updated_at else None,
-                "owner_email": row.owner_email,
-                "total_organizations": row.total_organizations,
-                "total_users": row.total_users,
-            }
-        )
-
-    return accounts
+    return [
+        {
+            "id": str(account.id),
+            "account_name": account.name,
+            "billing_email": account.billing_email,
+            "status": account.status,
+            "created_at": (
+                account.created_at.isoformat() if account.created_at else None
+            ),
+            "updated_at": (
+                account.updated_at.isoformat() if account.updated_at else None
+            ),
+            "owner_email": owner_emails.get(account.id),
+            "total_organizations": org_counts.get(account.id, 0),
+            "total_users": user_counts.get(account.id, 0),
+        }
+        for account in accounts
+    ]
 
 
 # IMPORTANTE: /stats debe estar ANTES de /{account_id} para evitar que FastAPI
@@ -165,63 +199,11 @@ def get_accounts_stats(
     - Total de devices y por estado
     - Devices instalados (asignados a unidades)
     - Total de usuarios
-    """
-    # Estadísticas de Accounts
-    total_accounts = db.query(Account).count()
-    accounts_active = (
-        db.query(Account).filter(Account.status == AccountStatus.ACTIVE).count()
-    )
-    accounts_suspended = (
-        db.query(Account).filter(Account.status == AccountStatus.SUSPENDED).count()
-    )
-    accounts_deleted = (
-        db.query(Account).filter(Account.status == AccountStatus.DELETED).count()
-    )
-
-    # Estadísticas de Devices
-    total_devices = db.query(Device).count()
-    devices_nuevo = db.query(Device).filter(Device.status == "nuevo").count()
-    devices_preparado = db.query(Device).filter(Device.status == "preparado").count()
-    devices_enviado = db.query(Device).filter(Device.status == "enviado").count()
-    devices_entregado = db.query(Device).filter(Device.status == "entregado").count()
-    devices_asignado = db.query(Device).filter(Device.status == "asignado").count()
-    devices_devuelto = db.query(Device).filter(Device.status == "devuelto").count()
-    devices_inactivo = db.query(Device).filter(Device.status == "inactivo").count()
-
-    # Devices instalados (asignados a unidades activas)
-    devices_instalados = (
-        db.query(UnitDevice).filter(UnitDevice.unassigned_at.is_(None)).count()
-    )
-
-    # Total de usuarios
-    total_users = db.query(User).count()
 
-    return {
-        "accounts": {
-            "total": total_accounts,
-            "by_status": {
-                "active": accounts_active,
-                "suspended": accounts_suspended,
-                "deleted": accounts_deleted,
-            },
-        },
-        "devices": {
-            "total": total_devices,
-            "instalados": devices_instalados,
-            "by_status": {
-                "nuevo": devices_nuevo,
-                "preparado": devices_preparado,
-                "enviado": devices_enviado,
-                "entregado": devices_entregado,
-                "asignado": devices_asignado,
-                "devuelto": devices_devuelto,
-                "inactivo": devices_inactivo,
-            },
-        },
-        "users": {
-            "total": total_users,
-        },
-    }
+    Se calcula con una consulta por tabla y se sirve desde un snapshot en
+    caché de INTERNAL_STATS_TTL_SECONDS.
+    """
+    return get_stats(db, STATS_ACCOUNTS)
 
 
 @router.get("/{account_id}")
@@ -297,6 +279,8 @@ def get_account_organizations(
     Retorna para cada organización:
     - id, name, status, billing_email, country, timezone
     - total_users: cantidad de usuarios en la organización
+    - plan_id, plan_code, plan_name, subscription_status,
+      subscription_expires_at: suscripción activa principal (null si no hay)
     - created_at, updated_at
     """
     # Verificar que el account existe
@@ -328,6 +312,10 @@ def get_account_organizations(
         .all()
     )
 
+    subscriptions = get_primary_active_subscriptions(
+        db, [org.id for org in organizations], load_plan=True
+    )
+
     return [
         {
             "id": str(org.id),
@@ -337,6 +325,7 @@ def get_account_organizations(
             "country": org.country,
             "timezone": org.timezone,
             "total_users": org.total_users,
+            **_primary_subscription_fields(subscriptions.get(org.id)),
             "created_at": org.created_at.isoformat() if org.created_at else None,
             "updated_at": org.updated_at.isoformat() if org.updated_at else None,
         }
@@ -15,14 +15,26 @@ Organization = Raíz operativa (permisos, uso diario)
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from app.api.deps import AuthResult, get_auth_cognito_or_paseto
 from app.db.session import get_db
 from app.models.organization import Organization, OrganizationStatus
+from app.models.subscription import Subscription
 from app.models.user import User
-from app.schemas.organization import OrganizationOut
+from app.schemas.capability import (
+    EffectiveCapabilitiesBulkRequest,
+    EffectiveCapabilitiesBulkResponse,
+    OrganizationEffectiveCapabilitiesOut,
+    ResolvedCapabilityOut,
+)
+from app.schemas.organization import InternalOrganizationOut, OrganizationOut
+from app.services.effective_capabilities import get_effective_capabilities_bulk
+from app.services.internal_stats import STATS_ORGANIZATIONS, get_stats
+from app.services.subscription_query import get_primary_active_subscriptions
+from app.utils.pagination import NEXT_CURSOR_HEADER, paginate_keyset
 
 router = APIRouter()
 
@@ -33,18 +45,39 @@ get_auth_for_internal_organizations = get_auth_cognito_or_paseto(
 )
 
 
-@router.get("", response_model=list[OrganizationOut])
+def _with_primary_subscription(
+    organization: Organization, subscription: Optional[Subscription]
+) -> InternalOrganizationOut:
+    out = InternalOrganizationOut.model_validate(organization)
+    if subscription is not None:
+        out.plan_id = subscription.plan_id
+        out.plan_code = subscription.plan.code
+        out.plan_name = subscription.plan.name
+        out.subscription_status = subscription.status
+        out.subscription_expires_at = subscription.expires_at
+    return out
+
+
+@router.get("", response_model=list[InternalOrganizationOut])
 def list_all_organizations(
+    response: Response,
     db: Session = Depends(get_db),
     auth: AuthResult = Depends(get_auth_for_internal_organizations),
     status_filter: Optional[OrganizationStatus] = Query(
         None, alias="status", description="Filtrar por estado de la organización"
     ),
     search: Optional[str] = Query(
-        None, description="Buscar por nombre (parcial, case-insensitive)"
+        None,
+        description="Buscar por nombre o email de facturación "
+        "(parcial, case-insensitive)",
     ),
     limit: int = Query(50, ge=1, le=200, description="Límite de resultados"),
-    offset: int = Query(0, ge=0, description="Offset para paginación"),
+    cursor: Optional[str] = Query(
+        None, description=f"Cursor de la página anterior (header {NEXT_CURSOR_HEADER})"
+    ),
+    offset: int = Query(
+        0, ge=0, description="DEPRECATED: usar cursor. Se ignora si se envía cursor"
+    ),
 ):
     """
     Lista todas las organizaciones del sistema.
@@ -53,9 +86,14 @@ def list_all_organizations(
 
     Parámetros de filtrado:
     - status: Filtrar por estado (PENDING, ACTIVE, SUSPENDED, DELETED)
-    - search: Buscar por nombre (búsqueda parcial)
+    - search: Buscar por nombre o email de facturación (búsqueda parcial)
     - limit: Máximo de resultados (default: 50, max: 200)
-    - offset: Para paginación
+    - cursor: Paginación keyset; el header X-Next-Cursor trae el cursor de
+      la página siguiente
+    - offset: DEPRECATED, se ignora si se envía cursor
+
+    Cada organización incluye el plan y estado de su suscripción activa
+    principal (una consulta para toda la página).
     """
     query = db.query(Organization)
 
@@ -64,15 +102,31 @@ def list_all_organizations(
         query = query.filter(Organization.status == status_filter)
 
     if search:
-        query = query.filter(Organization.name.ilike(f"%{search}%"))
+        pattern = f"%{search}%"
+        query = query.filter(
+            or_(
+                Organization.name.ilike(pattern),
+                Organization.billing_email.ilike(pattern),
+            )
+        )
 
-    # Ordenar por fecha de creación descendente
-    query = query.order_by(Organization.created_at.desc())
+    try:
+        organizations, next_cursor = paginate_keyset(
+            query, Organization.created_at, Organization.id, limit, cursor, offset
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
 
-    # Aplicar paginación
-    organizations = query.offset(offset).limit(limit).all()
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
-    return organizations
+    subscriptions = get_primary_active_subscriptions(
+        db, [organization.id for organization in organizations], load_plan=True
+    )
+    return [
+        _with_primary_subscription(organization, subscriptions.get(organization.id))
+        for organization in organizations
+    ]
 
 
 @router.get("/stats")
@@ -83,39 +137,53 @@ def get_organizations_stats(
     """
     Obtiene estadísticas generales de las organizaciones.
 
-    Retorna conteo por estado y total de organizaciones.
+    Retorna conteo por estado y total de organizaciones, calculados en una
+    consulta y servidos desde un snapshot en caché de
+    INTERNAL_STATS_TTL_SECONDS.
     """
-    total = db.query(Organization).count()
-    pending = (
-        db.query(Organization)
-        .filter(Organization.status == OrganizationStatus.PENDING)
-        .count()
-    )
-    active = (
-        db.query(Organization)
-        .filter(Organization.status == OrganizationStatus.ACTIVE)
-        .count()
-    )
-    suspended = (
-        db.query(Organization)
-        .filter(Organization.status == OrganizationStatus.SUSPENDED)
-        .count()
-    )
-    deleted = (
-        db.query(Organization)
-        .filter(Organization.status == OrganizationStatus.DELETED)
-        .count()
-    )
+    return get_stats(db, STATS_ORGANIZATIONS)
 
-    return {
-        "total": total,
-        "by_status": {
-            "pending": pending,
-            "active": active,
-            "suspended": suspended,
-            "deleted": deleted,
-        },
-    }
+
+@router.post("/capabilities/bulk", response_model=EffectiveCapabilitiesBulkResponse)
+def get_organizations_capabilities_bulk(
+    data: EffectiveCapabilitiesBulkRequest,
+    db: Session = Depends(get_db),
+    auth: AuthResult = Depends(get_auth_for_internal_organizations),
+):
+    """
+    Obtiene las capabilities efectivas de varias organizaciones.
+
+    Lee la tabla materializada organization_effective_capabilities (hasta
+    5000 organizaciones por llamada). Las organizaciones sin materializar o
+    con un override vencido se recalculan antes de responder.
+    """
+    rows_by_organization = get_effective_capabilities_bulk(db, data.organization_ids)
+
+    organizations = [
+        OrganizationEffectiveCapabilitiesOut(
+            organization_id=organization_id,
+            capabilities={
+                row.capability_code: ResolvedCapabilityOut(
+                    code=row.capability_code,
+                    value=row.get_value(),
+                    source=row.source,
+                    plan_id=row.plan_id,
+                    expires_at=row.expires_at,
+                )
+                for row in rows
+            },
+        )
+        for organization_id, rows in rows_by_organization.items()
+    ]
+
+    return EffectiveCapabilitiesBulkResponse(
+        organizations=organizations,
+        not_found=[
+            organization_id
+            for organization_id in dict.fromkeys(data.organization_ids)
+            if organization_id not in rows_by_organization
+        ],
+    )
 
 
 @router.get("/{organization_id}", response_model=OrganizationOut)
@@ -49,6 +49,8 @@ from app.schemas.plan import (
     ProductsListOut,
     ProductUpdate,
 )
+from app.services.effective_capabilities import capabilities_changed
+from app.services.plan_catalog import catalog_changed
 
 logger = logging.getLogger(__name__)
 
@@ -193,6 +195,8 @@ def _sync_plan_capabilities(
         )
         db.add(plan_cap)
 
+    capabilities_changed(db, plan_id=plan.id)
+
 
 def _sync_plan_products(
     db: Session,
@@ -322,6 +326,7 @@ def create_plan(
             _sync_plan_products(db, plan, data.product_codes)
 
         db.commit()
+        catalog_changed(db)
         db.refresh(plan)
 
         logger.info(
@@ -398,6 +403,7 @@ def update_plan(
             _sync_plan_products(db, plan, product_codes)
 
         db.commit()
+        catalog_changed(db)
         db.refresh(plan)
 
         logger.info(
@@ -455,6 +461,7 @@ def delete_plan(
     # Eliminar el plan
     db.delete(plan)
     db.commit()
+    catalog_changed(db)
 
     logger.info(
         f"[PLAN DELETE] Plan '{plan.code}' eliminado por servicio '{auth.service}'"
@@ -551,7 +558,9 @@ def add_plan_capability(
         existing.value_int = data.value_int
         existing.value_bool = data.value_bool
         existing.value_text = data.value_text
+        capabilities_changed(db, plan_id=plan_id)
         db.commit()
+        catalog_changed(db)
         db.refresh(existing)
         plan_cap = existing
     else:
@@ -565,7 +574,9 @@ def add_plan_capability(
             created_at=datetime.utcnow(),
         )
         db.add(plan_cap)
+        capabilities_changed(db, plan_id=plan_id)
         db.commit()
+        catalog_changed(db)
         db.refresh(plan_cap)
 
     logger.info(
@@ -618,7 +629,9 @@ def remove_plan_capability(
         )
 
     db.delete(plan_cap)
+    capabilities_changed(db, plan_id=plan_id)
     db.commit()
+    catalog_changed(db)
 
     logger.info(
         f"[PLAN CAP DELETE] Plan '{plan.code}' capability '{capability_code}' eliminada"
@@ -714,6 +727,7 @@ def add_product_to_plan(
     )
     db.add(plan_product)
     db.commit()
+    catalog_changed(db)
 
     logger.info(
         f"[PLAN PRODUCT ADD] Plan '{plan.code}' producto '{product_code}' agregado"
@@ -765,6 +779,7 @@ def remove_product_from_plan(
 
     db.delete(plan_product)
     db.commit()
+    catalog_changed(db)
 
     logger.info(
         f"[PLAN PRODUCT DELETE] Plan '{plan.code}' producto '{product_code}' eliminado"
@@ -836,6 +851,7 @@ def create_product(
     )
     db.add(product)
     db.commit()
+    catalog_changed(db)
     db.refresh(product)
 
     logger.info(f"[PRODUCT CREATE] Producto '{data.code}' creado")
@@ -882,6 +898,7 @@ def update_product(
         setattr(product, field, value)
 
     db.commit()
+    catalog_changed(db)
     db.refresh(product)
 
     logger.info(f"[PRODUCT UPDATE] Producto '{product.code}' actualizado")
@@ -918,6 +935,7 @@ def delete_product(
 
     db.delete(product)
     db.commit()
+    catalog_changed(db)
 
     logger.info(f"[PRODUCT DELETE] Producto '{product.code}' eliminado")
 
@@ -31,6 +31,7 @@ from app.schemas.product import (
     ProductsListOut,
     ProductUpdate,
 )
+from app.services.plan_catalog import catalog_changed
 
 logger = logging.getLogger(__name__)
 
@@ -125,6 +126,7 @@ def create_product(
 
         db.add(product)
         db.commit()
+        catalog_changed(db)
         db.refresh(product)
 
         logger.info(f"Producto creado: {product.id} - {product.code}")
@@ -180,6 +182,7 @@ def update_product(
             setattr(product, field, value)
 
         db.commit()
+        catalog_changed(db)
         db.refresh(product)
 
         logger.info(f"Producto actualizado: {product.id} - {product.code}")
@@ -215,6 +218,7 @@ def delete_product(
     try:
         product.is_active = False
         db.commit()
+        catalog_changed(db)
 
         logger.info(f"Producto desactivado: {product.id} - {product.code}")
 
@@ -0,0 +1,60 @@
+"""
+Endpoints internos para republicar el estado de reglas y geocercas.
+
+Requiere: Token PASETO con service="gac" y role="GAC_ADMIN"
+
+Uso: reconstruir el estado de un consumidor de Kafka (motor de alertas,
+matcher de geocercas) tras un reinicio o un rebalanceo de particiones sin
+editar cada entidad. Ver app.services.snapshots.
+"""
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.api.deps import AuthResult, get_auth_cognito_or_paseto, get_kafka_producer
+from app.db.session import get_db
+from app.schemas.snapshot import SnapshotRequest, SnapshotResponse
+from app.services.messaging.kafka_producer import KafkaEventProducer
+from app.services.snapshots import republish_snapshot
+
+router = APIRouter()
+
+get_auth_for_internal_snapshots = get_auth_cognito_or_paseto(
+    required_service="gac",
+    required_role="GAC_ADMIN",
+)
+
+
+@router.post("", response_model=SnapshotResponse)
+def create_snapshot(
+    request: SnapshotRequest,
+    db: Session = Depends(get_db),
+    producer: KafkaEventProducer = Depends(get_kafka_producer),
+    auth: AuthResult = Depends(get_auth_for_internal_snapshots),
+):
+    """
+    Publica todas las reglas y geocercas activas como eventos UPSERT con
+    marcador `snapshot`.
+
+    - organization_id: limita a una organización (vacío = todas)
+    - entities: alert_rule, geofence o ambas
+    - max_events_per_second: ritmo máximo de publicación
+
+    La respuesta se devuelve al terminar; `failed` > 0 indica eventos que
+    Kafka no confirmó (se puede repetir el snapshot).
+    """
+    result = republish_snapshot(
+        db,
+        producer,
+        organization_id=request.organization_id,
+        entities=request.entities,
+        max_events_per_second=request.max_events_per_second,
+    )
+    return SnapshotResponse(
+        snapshot_id=result.snapshot_id,
+        organization_id=result.organization_id,
+        events=result.events,
+        published=result.published,
+        failed=result.failed,
+        duration_ms=result.duration_ms,
+    )
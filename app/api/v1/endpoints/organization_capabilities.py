@@ -31,6 +31,7 @@ from app.schemas.capability import (
 )
 from app.services.audit import AuditService
 from app.services.capabilities import CapabilityService
+from app.services.effective_capabilities import capabilities_changed
 
 logger = logging.getLogger(__name__)
 
@@ -250,6 +251,7 @@ def create_or_update_capability_override(
             user_agent=request.headers.get("user-agent"),
         )
 
+        capabilities_changed(db, organization_id)
         db.commit()
         db.refresh(existing)
 
@@ -296,6 +298,7 @@ def create_or_update_capability_override(
             user_agent=request.headers.get("user-agent"),
         )
 
+        capabilities_changed(db, organization_id)
         db.commit()
         db.refresh(org_cap)
 
@@ -374,6 +377,7 @@ def delete_capability_override(
 
     # Eliminar el override
     db.delete(org_cap)
+    capabilities_changed(db, organization_id)
     db.commit()
 
     logger.info(
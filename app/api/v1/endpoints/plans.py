@@ -14,100 +14,37 @@ IMPORTANTE:
 
 Estos endpoints son públicos para que el frontend pueda mostrar
 el catálogo de planes sin requerir autenticación.
-"""
 
-from uuid import UUID
+Las respuestas se sirven desde el snapshot en memoria del catálogo
+(app.services.plan_catalog), ya serializadas y con ETag.
+"""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
-from app.models.capability import PlanCapability
-from app.models.plan import Plan
-from app.schemas.plan import (
-    BillingCycle,
-    PlanDetailOut,
-    PlanPricing,
-    PlansListOut,
-)
+from app.schemas.plan import PlanDetailOut, PlansListOut
+from app.services.entity_changes import etag_matches
+from app.services.plan_catalog import CatalogResponse, get_catalog_snapshot
 
 router = APIRouter()
 
-
-def _get_plan_capabilities(db: Session, plan_id: UUID) -> dict:
-    """
-    Obtiene las capabilities de un plan como diccionario.
-    """
-    plan_caps = db.query(PlanCapability).filter(PlanCapability.plan_id == plan_id).all()
-
-    capabilities = {}
-    for pc in plan_caps:
-        if pc.capability:
-            capabilities[pc.capability.code] = pc.get_value()
-
-    return capabilities
+# El catálogo cambia poco; el ETag permite revalidar sin descargarlo
+CATALOG_CACHE_CONTROL = "public, max-age=60"
 
 
-def _generate_highlighted_features(capabilities: dict) -> list[str]:
-    """
-    Genera lista de features destacados basado en capabilities.
-    """
-    features = []
-
-    if "max_devices" in capabilities:
-        features.append(f"Hasta {capabilities['max_devices']} dispositivos")
-    if "max_geofences" in capabilities:
-        features.append(f"{capabilities['max_geofences']} geocercas")
-    if "max_users" in capabilities:
-        features.append(f"Hasta {capabilities['max_users']} usuarios")
-    if "history_days" in capabilities:
-        features.append(f"{capabilities['history_days']} días de historial")
-    if capabilities.get("ai_features"):
-        features.append("Funciones de IA incluidas")
-    if capabilities.get("analytics_tools"):
-        features.append("Herramientas de analytics")
-    if capabilities.get("api_access"):
-        features.append("Acceso a API")
-    if capabilities.get("priority_support"):
-        features.append("Soporte prioritario")
-
-    return features
-
-
-def _plan_to_detail(db: Session, plan: Plan) -> PlanDetailOut:
-    """
-    Convierte un Plan a PlanDetailOut con toda la información.
-    """
-    capabilities = _get_plan_capabilities(db, plan.id)
-
-    # Calcular ahorro anual
-    monthly_annual = float(plan.price_monthly) * 12
-    yearly_price = float(plan.price_yearly)
-    savings_percent = 0
-    if monthly_annual > 0 and yearly_price < monthly_annual:
-        savings_percent = int(((monthly_annual - yearly_price) / monthly_annual) * 100)
-
-    return PlanDetailOut(
-        id=plan.id,
-        name=plan.name,
-        code=plan.code,
-        description=plan.description,
-        pricing=PlanPricing(
-            monthly=plan.price_monthly,
-            yearly=plan.price_yearly,
-            yearly_savings_percent=savings_percent,
-        ),
-        billing_cycles=[BillingCycle.MONTHLY, BillingCycle.YEARLY],
-        capabilities=capabilities,
-        highlighted_features=_generate_highlighted_features(capabilities),
-        is_popular=(plan.code == "pro"),  # Marcar "pro" como popular por defecto
-        created_at=plan.created_at,
-        updated_at=plan.updated_at,
+def _catalog_response(request: Request, response: CatalogResponse) -> Response:
+    headers = {"ETag": response.etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if etag_matches(request, response.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=response.body, media_type="application/json", headers=headers
     )
 
 
 @router.get("", response_model=PlansListOut)
 def list_plans(
+    request: Request,
     db: Session = Depends(get_db),
 ):
     """
@@ -124,19 +61,15 @@ def list_plans(
         - Para ver qué puede hacer una organización, usar /capabilities
         - Para ver suscripciones activas, usar /subscriptions
         - Para gestión de planes, usar la API Internal (/internal/plans)
+        - Responde 304 si If-None-Match coincide con el ETag del catálogo
     """
-    plans = (
-        db.query(Plan).filter(Plan.is_active).order_by(Plan.price_monthly.asc()).all()
-    )
-
-    plans_detail = [_plan_to_detail(db, plan) for plan in plans]
-
-    return PlansListOut(plans=plans_detail, total=len(plans_detail))
+    return _catalog_response(request, get_catalog_snapshot(db).plans_list)
 
 
 @router.get("/{plan_identifier}", response_model=PlanDetailOut)
 def get_plan(
     plan_identifier: str,
+    request: Request,
     db: Session = Depends(get_db),
 ):
     """
@@ -152,14 +85,7 @@ def get_plan(
         - Este endpoint es público
         - Los planes son INFORMATIVOS, la lógica está en subscriptions y capabilities
     """
-    # Intentar como UUID primero
-    plan = None
-    try:
-        plan_uuid = UUID(plan_identifier)
-        plan = db.query(Plan).filter(Plan.id == plan_uuid).first()
-    except ValueError:
-        # No es UUID, buscar por código
-        plan = db.query(Plan).filter(Plan.code == plan_identifier).first()
+    plan = get_catalog_snapshot(db).get_plan(plan_identifier)
 
     if not plan:
         raise HTTPException(
@@ -167,4 +93,4 @@ def get_plan(
             detail=f"Plan '{plan_identifier}' no encontrado",
         )
 
-    return _plan_to_detail(db, plan)
+    return _catalog_response(request, plan)
@@ -36,6 +36,7 @@ from app.schemas.subscription import (
     SubscriptionsListOut,
     SubscriptionWithPlanOut,
 )
+from app.services.effective_capabilities import capabilities_changed
 
 router = APIRouter()
 
@@ -293,6 +294,8 @@ def cancel_subscription(
         # Se mantiene activa hasta que expire
         subscription.status = SubscriptionStatus.CANCELLED
 
+    # El plan activo (y sus capabilities) puede cambiar
+    capabilities_changed(db, subscription.organization_id)
     db.commit()
     db.refresh(subscription)
 
@@ -1,27 +1,37 @@
 import re
-from datetime import datetime, time
+from datetime import date, datetime, time, timedelta
 from typing import List, Optional, Tuple
 from uuid import UUID
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import and_, or_
+from sqlalchemy import Float, Numeric, cast, extract, func, select
 from sqlalchemy.orm import Session
 
 from app.api.deps import AuthResult, get_auth_cognito_or_paseto
 from app.db.session import get_db
+from app.models.device import Device
 from app.models.trip import Trip, TripAlert, TripEvent, TripPoint
-from app.models.unit import Unit
 from app.models.unit_device import UnitDevice
 from app.models.user import User
 from app.schemas.trip import (
     TripAlertOut,
+    TripDailySummaryListResponse,
     TripDetail,
+    TripHeatmapResponse,
     TripListResponse,
     TripOut,
     TripPointOut,
 )
 from app.services.access_control import get_accessible_unit_ids
+from app.services.trip_heatmap import (
+    MAX_HEATMAP_RESOLUTION,
+    MIN_HEATMAP_RESOLUTION,
+    build_trip_heatmap,
+)
+from app.services.trip_summaries import list_daily_summaries
+from app.services.trip_units import TripUnit, resolve_trip_units
+from app.utils.h3_cells import is_h3_available
 
 router = APIRouter()
 
@@ -31,6 +41,12 @@ get_auth_for_trips = get_auth_cognito_or_paseto(
     required_role="GAC_ADMIN",
 )
 
+# Rango máximo (en días) para consultas de resúmenes diarios
+MAX_SUMMARY_RANGE_DAYS = 366
+
+# Rango máximo (en días) para el heatmap H3
+MAX_HEATMAP_RANGE_DAYS = 31
+
 
 # ============================================
 # Helper Functions
@@ -109,6 +125,68 @@ def check_unit_access(db: Session, unit_id: UUID, user: User) -> bool:
     return unit_id in accessible_units
 
 
+def resolve_scope_device_ids(
+    db: Session,
+    current_user: Optional[User],
+    unit_id: Optional[UUID] = None,
+    device_id: Optional[str] = None,
+) -> Optional[List[str]]:
+    """
+    Resuelve los dispositivos de una consulta de flota según permisos y filtros.
+
+    - Usuario no maestro: dispositivos accesibles
+    - `unit_id`: dispositivos que han estado asignados a la unidad
+    - `device_id`: un dispositivo específico
+
+    Returns:
+        None si no hay restricción por dispositivo (maestro/PASETO sin filtros),
+        o la lista de dispositivos (vacía si no hay ninguno accesible)
+
+    Raises:
+        HTTPException 403: Si el usuario no tiene acceso a la unidad/dispositivo
+    """
+    device_ids: Optional[List[str]] = None
+    if current_user and not current_user.is_master:
+        device_ids = get_accessible_device_ids(db, current_user)
+        if not device_ids:
+            return []
+
+    if unit_id:
+        # Verificar acceso a la unidad solo si es Cognito
+        if current_user and not check_unit_access(db, unit_id, current_user):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes acceso a esta unidad",
+            )
+
+        unit_device_ids = [
+            d[0]
+            for d in db.query(UnitDevice.device_id)
+            .filter(UnitDevice.unit_id == unit_id)
+            .distinct()
+            .all()
+        ]
+        if device_ids is not None:
+            allowed = set(device_ids)
+            unit_device_ids = [d for d in unit_device_ids if d in allowed]
+        if not unit_device_ids:
+            return []
+        device_ids = unit_device_ids
+
+    if device_id:
+        # Verificar acceso al dispositivo solo si es Cognito
+        if current_user and not check_device_access(db, device_id, current_user):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes acceso a este dispositivo",
+            )
+        if device_ids is not None and device_id not in device_ids:
+            return []
+        device_ids = [device_id]
+
+    return device_ids
+
+
 def parse_day_to_date_range(day: str, tz: str = "UTC") -> Tuple[datetime, datetime]:
     """
     Convierte un día (YYYY-MM-DD) y una zona horaria a un rango de fechas en UTC.
@@ -155,96 +233,148 @@ def parse_day_to_date_range(day: str, tz: str = "UTC") -> Tuple[datetime, dateti
     return start_utc, end_utc
 
 
-def build_trip_out(trip: Trip) -> TripOut:
+# Columnas proyectadas para TripOut. Duración y distancia se calculan en SQL
+# para no materializar entidades Trip (identity map) solo para copiar campos.
+TRIP_OUT_COLUMNS = (
+    Trip.trip_id.label("trip_id"),
+    Trip.device_id.label("device_id"),
+    Trip.start_time.label("start_timestamp"),
+    Trip.end_time.label("end_timestamp"),
+    cast(
+        func.round(
+            cast(extract("epoch", Trip.end_time - Trip.start_time) / 60, Numeric), 2
+        ),
+        Float,
+    ).label("duration_minutes"),
+    Trip.start_lat.label("start_lat"),
+    Trip.start_lng.label("start_lon"),
+    Trip.end_lat.label("end_lat"),
+    Trip.end_lng.label("end_lon"),
+    cast(func.round(cast(Trip.distance_meters, Numeric) / 1000, 2), Float).label(
+        "distance_km"
+    ),
+)
+
+
+def build_trip_out(row) -> TripOut:
     """
-    Construye un objeto TripOut a partir de un modelo Trip de la BD.
-    Calcula la duración y convierte distancia de metros a kilómetros.
+    Construye un objeto TripOut a partir de una fila proyectada con
+    TRIP_OUT_COLUMNS. Los valores ya vienen calculados y tipados desde SQL,
+    por lo que se omite la validación de Pydantic.
     """
-    duration_minutes = None
-    if trip.start_time and trip.end_time:
-        duration_seconds = (trip.end_time - trip.start_time).total_seconds()
-        duration_minutes = round(duration_seconds / 60, 2)
-
-    distance_km = None
-    if trip.distance_meters is not None:
-        distance_km = round(trip.distance_meters / 1000, 2)
-
-    return TripOut(
-        trip_id=trip.trip_id,
-        device_id=trip.device_id,
-        start_timestamp=trip.start_time,
-        end_timestamp=trip.end_time,
-        duration_minutes=duration_minutes,
-        start_lat=trip.start_lat,
-        start_lon=trip.start_lng,
-        end_lat=trip.end_lat,
-        end_lon=trip.end_lng,
-        distance_km=distance_km,
+    return TripOut.model_construct(**row)
+
+
+def fetch_trip_page(
+    db: Session,
+    conditions: list,
+    limit: int,
+    cursor: Optional[datetime] = None,
+) -> Tuple[List[TripOut], int, bool]:
+    """
+    Ejecuta el listado paginado de trips con un SELECT de columnas.
+
+    Args:
+        db: Sesión de base de datos
+        conditions: Filtros WHERE sobre Trip
+        limit: Tamaño de página
+        cursor: start_time del último trip de la página anterior
+
+    Returns:
+        Tuple[trips, total, has_more]
+    """
+    if cursor:
+        conditions = [*conditions, Trip.start_time < cursor]
+
+    total = db.execute(
+        select(func.count()).select_from(Trip).where(*conditions)
+    ).scalar_one()
+
+    rows = (
+        db.execute(
+            select(*TRIP_OUT_COLUMNS)
+            .where(*conditions)
+            .order_by(Trip.start_time.desc())
+            .limit(limit + 1)
+        )
+        .mappings()
+        .all()
     )
 
+    has_more = len(rows) > limit
+    trips = [build_trip_out(row) for row in rows[:limit]]
 
-def build_trip_detail(
+    return trips, total, has_more
+
+
+def build_trip_list_response(
     db: Session,
-    trip: Trip,
+    trips: List[TripOut],
+    total: int,
+    limit: int,
+    has_more: bool,
     include_alerts: bool = False,
     include_points: bool = False,
     include_events: bool = False,
-) -> TripDetail:
+) -> TripListResponse:
     """
-    Construye un objeto TripDetail con expansiones opcionales.
+    Construye la respuesta paginada, cargando expansiones solo si se piden.
     """
-    # Calcular campos básicos
-    duration_minutes = None
-    if trip.start_time and trip.end_time:
-        duration_seconds = (trip.end_time - trip.start_time).total_seconds()
-        duration_minutes = round(duration_seconds / 60, 2)
-
-    distance_km = None
-    if trip.distance_meters is not None:
-        distance_km = round(trip.distance_meters / 1000, 2)
-
-    # Obtener información de la unidad asignada
-    unit_id = None
-    unit_name = None
-    unit_assignment = (
-        db.query(UnitDevice, Unit)
-        .join(Unit, Unit.id == UnitDevice.unit_id)
-        .filter(
-            UnitDevice.device_id == trip.device_id,
-            or_(
-                # Asignación activa
-                UnitDevice.unassigned_at.is_(None),
-                # O asignación que estaba activa durante el trip
-                and_(
-                    UnitDevice.assigned_at <= trip.end_time,
-                    or_(
-                        UnitDevice.unassigned_at.is_(None),
-                        UnitDevice.unassigned_at >= trip.start_time,
-                    ),
-                ),
-            ),
+    if include_alerts or include_points or include_events:
+        # Usar TripDetail con expansiones; unidades resueltas en una sola query
+        units = resolve_trip_units(
+            db,
+            [(t.device_id, t.start_timestamp, t.end_timestamp) for t in trips],
         )
-        .first()
+        trip_list = [
+            build_trip_detail(
+                db,
+                trip,
+                unit,
+                include_alerts=include_alerts,
+                include_points=include_points,
+                include_events=include_events,
+            )
+            for trip, unit in zip(trips, units, strict=True)
+        ]
+    else:
+        # Usar TripOut básico
+        trip_list = trips
+
+    # Calcular nuevo cursor
+    new_cursor = None
+    if trips and has_more:
+        new_cursor = trips[-1].start_timestamp.isoformat()
+
+    return TripListResponse(
+        trips=trip_list,
+        total=total,
+        limit=limit,
+        cursor=new_cursor,
+        has_more=has_more,
     )
 
-    if unit_assignment:
-        unit_id = unit_assignment.Unit.id
-        unit_name = unit_assignment.Unit.name
 
+def build_trip_detail(
+    db: Session,
+    trip: TripOut,
+    unit: Optional[TripUnit],
+    include_alerts: bool = False,
+    include_points: bool = False,
+    include_events: bool = False,
+) -> TripDetail:
+    """
+    Construye un objeto TripDetail con expansiones opcionales a partir de un
+    TripOut (ver build_trip_out) y la unidad resuelta con resolve_trip_units.
+    """
     # Construir objeto base
-    trip_detail = TripDetail(
-        trip_id=trip.trip_id,
-        device_id=trip.device_id,
-        start_timestamp=trip.start_time,
-        end_timestamp=trip.end_time,
-        duration_minutes=duration_minutes,
-        start_lat=trip.start_lat,
-        start_lon=trip.start_lng,
-        end_lat=trip.end_lat,
-        end_lon=trip.end_lng,
-        distance_km=distance_km,
-        unit_id=unit_id,
-        unit_name=unit_name,
+    trip_detail = TripDetail.model_construct(
+        **dict(trip),
+        unit_id=unit.unit_id if unit else None,
+        unit_name=unit.unit_name if unit else None,
+        alerts=None,
+        points=None,
+        events=None,
     )
 
     # Cargar expansiones si se solicitan
@@ -368,8 +498,8 @@ def list_trips(
                 detail=str(e),
             )
 
-    # Construir query base
-    query = db.query(Trip)
+    # Construir filtros base
+    conditions = []
 
     # Aplicar filtros de permisos solo si es autenticación Cognito
     if current_user:
@@ -382,7 +512,7 @@ def list_trips(
                 trips=[], total=0, limit=limit, cursor=None, has_more=False
             )
 
-        query = query.filter(Trip.device_id.in_(accessible_device_ids))
+        conditions.append(Trip.device_id.in_(accessible_device_ids))
 
     # Aplicar filtros
     if unit_id:
@@ -407,7 +537,7 @@ def list_trips(
                 trips=[], total=0, limit=limit, cursor=None, has_more=False
             )
 
-        query = query.filter(Trip.device_id.in_(unit_device_ids))
+        conditions.append(Trip.device_id.in_(unit_device_ids))
 
     if device_id:
         # Verificar acceso al dispositivo solo si es Cognito
@@ -416,68 +546,219 @@ def list_trips(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="No tienes acceso a este dispositivo",
             )
-        query = query.filter(Trip.device_id == device_id)
+        conditions.append(Trip.device_id == device_id)
 
     # Aplicar filtros de fecha
     if filter_by_end_time:
         # Cuando se usa 'day', filtramos por end_time
         if start_date:
-            query = query.filter(Trip.end_time >= start_date)
+            conditions.append(Trip.end_time >= start_date)
         if end_date:
-            query = query.filter(Trip.end_time <= end_date)
+            conditions.append(Trip.end_time <= end_date)
     else:
         # Comportamiento original: filtrar por start_time
         if start_date:
-            query = query.filter(Trip.start_time >= start_date)
+            conditions.append(Trip.start_time >= start_date)
         if end_date:
-            query = query.filter(Trip.start_time <= end_date)
+            conditions.append(Trip.start_time <= end_date)
 
-    # Aplicar cursor de paginación
-    if cursor:
-        query = query.filter(Trip.start_time < cursor)
+    trips, total, has_more = fetch_trip_page(db, conditions, limit, cursor)
 
-    # Contar total (antes de aplicar limit)
-    total = query.count()
+    return build_trip_list_response(
+        db,
+        trips,
+        total,
+        limit,
+        has_more,
+        include_alerts=include_alerts,
+        include_points=include_points,
+        include_events=include_events,
+    )
 
-    # Ordenar y limitar
-    trips = query.order_by(Trip.start_time.desc()).limit(limit + 1).all()
 
-    # Determinar si hay más resultados
-    has_more = len(trips) > limit
-    if has_more:
-        trips = trips[:limit]
+@router.get("/daily-summaries", response_model=TripDailySummaryListResponse)
+def list_trip_daily_summaries(
+    db: Session = Depends(get_db),
+    auth: AuthResult = Depends(get_auth_for_trips),
+    from_day: date = Query(..., description="Primer día del rango (YYYY-MM-DD)"),
+    to_day: date = Query(..., description="Último día del rango (YYYY-MM-DD)"),
+    unit_id: Optional[UUID] = Query(None, description="Filtrar por unidad"),
+    device_id: Optional[str] = Query(None, description="Filtrar por dispositivo"),
+    organization_id: Optional[UUID] = Query(
+        None,
+        description="Filtrar por organización (solo PASETO; Cognito usa la del usuario)",
+    ),
+    limit: int = Query(100, ge=1, le=1000, description="Límite de resultados"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor de paginación (día|device_id de la última fila)"
+    ),
+):
+    """
+    Lista los resúmenes diarios de conducción (km, minutos de manejo, velocidad
+    máxima y alertas) por dispositivo.
 
-    # Construir respuesta
-    if include_alerts or include_points or include_events:
-        # Usar TripDetail con expansiones
-        trip_list = [
-            build_trip_detail(
-                db,
-                trip,
-                include_alerts=include_alerts,
-                include_points=include_points,
-                include_events=include_events,
-            )
-            for trip in trips
-        ]
-    else:
-        # Usar TripOut básico
-        trip_list = [build_trip_out(trip) for trip in trips]
+    Los datos provienen del rollup `trip_daily_summaries`, mantenido en segundo
+    plano a partir de trips y trip_alerts. El día se calcula en la zona horaria
+    de la organización. Un reporte mensual de flota es un único range scan.
 
-    # Calcular nuevo cursor
-    new_cursor = None
-    if trips:
-        new_cursor = trips[-1].start_time.isoformat()
+    **Autenticación:**
+    - Token de Cognito: Usuario autenticado del sistema (aplican permisos)
+    - Token PASETO: Requiere service="gac" y role="GAC_ADMIN" (acceso total)
 
-    return TripListResponse(
-        trips=trip_list,
-        total=total,
+    **Filtros:**
+    - `from_day` / `to_day`: Rango de días, inclusivo (máximo 366 días)
+    - `unit_id`: Dispositivos que han estado asignados a la unidad
+    - `device_id`: Un dispositivo específico
+    - Sin `unit_id` ni `device_id`: toda la flota accesible
+
+    **Paginación:** orden (day DESC, device_id ASC) con cursor keyset.
+    """
+    if from_day > to_day:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from_day' debe ser anterior o igual a 'to_day'",
+        )
+    if (to_day - from_day).days >= MAX_SUMMARY_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango máximo es de {MAX_SUMMARY_RANGE_DAYS} días",
+        )
+
+    empty_response = TripDailySummaryListResponse(
+        summaries=[], limit=limit, cursor=None, has_more=False
+    )
+
+    # Obtener usuario si es Cognito, None si es PASETO
+    current_user = get_user_from_auth(db, auth)
+
+    if current_user:
+        organization_id = current_user.organization_id
+
+    device_ids = resolve_scope_device_ids(db, current_user, unit_id, device_id)
+    if device_ids is not None and not device_ids:
+        return empty_response
+
+    try:
+        summaries, next_cursor, has_more = list_daily_summaries(
+            db,
+            from_day=from_day,
+            to_day=to_day,
+            limit=limit,
+            organization_id=organization_id,
+            device_ids=device_ids,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    return TripDailySummaryListResponse(
+        summaries=summaries,
         limit=limit,
-        cursor=new_cursor if has_more else None,
+        cursor=next_cursor,
         has_more=has_more,
     )
 
 
+@router.get("/heatmap", response_model=TripHeatmapResponse)
+def get_trips_heatmap(
+    db: Session = Depends(get_db),
+    auth: AuthResult = Depends(get_auth_for_trips),
+    start_date: datetime = Query(..., description="Inicio del rango (inclusivo)"),
+    end_date: datetime = Query(..., description="Fin del rango (exclusivo)"),
+    resolution: int = Query(
+        9,
+        ge=MIN_HEATMAP_RESOLUTION,
+        le=MAX_HEATMAP_RESOLUTION,
+        description="Resolución H3 de las celdas",
+    ),
+    unit_id: Optional[UUID] = Query(None, description="Filtrar por unidad"),
+    device_id: Optional[str] = Query(None, description="Filtrar por dispositivo"),
+    organization_id: Optional[UUID] = Query(
+        None,
+        description="Filtrar por organización (solo PASETO; Cognito usa la del usuario)",
+    ),
+):
+    """
+    Heatmap de puntos GPS de trips agregados en celdas H3.
+
+    Cada celda incluye el número de puntos y la velocidad promedio, útil para
+    ver dónde circulan o se detienen los vehículos. Los días UTC cerrados se
+    sirven desde caché; solo los tramos recientes se recalculan.
+
+    **Autenticación:**
+    - Token de Cognito: Usuario autenticado del sistema (aplican permisos)
+    - Token PASETO: Requiere service="gac" y role="GAC_ADMIN"; debe indicar
+      `organization_id`, `unit_id` o `device_id`
+
+    **Filtros:**
+    - `start_date` / `end_date`: Rango de tiempo (máximo 31 días). Sin zona
+      horaria se interpretan en UTC
+    - `resolution`: Resolución H3 (0-12)
+    - `unit_id` / `device_id`: Restringen los dispositivos incluidos
+    """
+    if not is_h3_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Heatmap no disponible: falta la librería h3",
+        )
+
+    if start_date.tzinfo is None:
+        start_date = start_date.replace(tzinfo=ZoneInfo("UTC"))
+    if end_date.tzinfo is None:
+        end_date = end_date.replace(tzinfo=ZoneInfo("UTC"))
+
+    if start_date >= end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'start_date' debe ser anterior a 'end_date'",
+        )
+    # end_date es exclusivo: un mes de 31 días completo está permitido
+    if end_date - start_date > timedelta(days=MAX_HEATMAP_RANGE_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango máximo es de {MAX_HEATMAP_RANGE_DAYS} días",
+        )
+
+    # Obtener usuario si es Cognito, None si es PASETO
+    current_user = get_user_from_auth(db, auth)
+    if current_user:
+        organization_id = current_user.organization_id
+
+    device_ids = resolve_scope_device_ids(db, current_user, unit_id, device_id)
+    if device_ids is None:
+        if organization_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Debe indicar 'organization_id', 'unit_id' o 'device_id'",
+            )
+        device_ids = [
+            d[0]
+            for d in db.query(Device.device_id)
+            .filter(Device.organization_id == organization_id)
+            .all()
+        ]
+
+    cells = build_trip_heatmap(
+        db,
+        device_ids=device_ids,
+        start=start_date,
+        end=end_date,
+        resolution=resolution,
+    )
+
+    return TripHeatmapResponse(
+        resolution=resolution,
+        start_date=start_date,
+        end_date=end_date,
+        device_count=len(device_ids),
+        total_points=sum(cell.points for cell in cells),
+        cells=cells,
+    )
+
+
 @router.get("/{trip_id}", response_model=TripDetail)
 def get_trip(
     trip_id: UUID,
@@ -513,14 +794,20 @@ def get_trip(
     current_user = get_user_from_auth(db, auth)
 
     # Buscar el trip
-    trip = db.query(Trip).filter(Trip.trip_id == trip_id).first()
+    trip_row = (
+        db.execute(select(*TRIP_OUT_COLUMNS).where(Trip.trip_id == trip_id))
+        .mappings()
+        .first()
+    )
 
-    if not trip:
+    if not trip_row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Trip no encontrado",
         )
 
+    trip = build_trip_out(trip_row)
+
     # Verificar acceso al dispositivo solo si es Cognito
     if current_user and not check_device_access(db, trip.device_id, current_user):
         raise HTTPException(
@@ -529,9 +816,13 @@ def get_trip(
         )
 
     # Construir respuesta con expansiones
+    (unit,) = resolve_trip_units(
+        db, [(trip.device_id, trip.start_timestamp, trip.end_timestamp)]
+    )
     return build_trip_detail(
         db,
         trip,
+        unit,
         include_alerts=include_alerts,
         include_points=include_points,
         include_events=include_events,
@@ -1281,7 +1281,7 @@ def get_unit_trips(
     **Nota:** Este endpoint devuelve trips de todos los dispositivos que han estado
     asignados a la unidad (tanto asignaciones activas como históricas).
     """
-    from app.api.v1.endpoints.trips import build_trip_detail, build_trip_out
+    from app.api.v1.endpoints.trips import build_trip_list_response, fetch_trip_page
     from app.models.trip import Trip
     from app.schemas.trip import TripListResponse
 
@@ -1302,54 +1302,24 @@ def get_unit_trips(
             trips=[], total=0, limit=limit, cursor=None, has_more=False
         )
 
-    # Construir query con filtros obligatorios de fecha
-    query = db.query(Trip).filter(
+    # Filtros obligatorios de fecha
+    conditions = [
         Trip.device_id.in_(unit_device_ids),
         Trip.start_time >= start_date,
         Trip.start_time <= end_date,
-    )
-
-    # Aplicar cursor de paginación
-    if cursor:
-        query = query.filter(Trip.start_time < cursor)
-
-    # Contar total
-    total = query.count()
-
-    # Ordenar y limitar
-    trips = query.order_by(Trip.start_time.desc()).limit(limit + 1).all()
-
-    # Determinar si hay más resultados
-    has_more = len(trips) > limit
-    if has_more:
-        trips = trips[:limit]
-
-    # Construir respuesta
-    if include_alerts or include_points or include_events:
-        trip_list = [
-            build_trip_detail(
-                db,
-                trip,
-                include_alerts=include_alerts,
-                include_points=include_points,
-                include_events=include_events,
-            )
-            for trip in trips
-        ]
-    else:
-        trip_list = [build_trip_out(trip) for trip in trips]
-
-    # Calcular nuevo cursor
-    new_cursor = None
-    if trips:
-        new_cursor = trips[-1].start_time.isoformat()
-
-    return TripListResponse(
-        trips=trip_list,
-        total=total,
-        limit=limit,
-        cursor=new_cursor if has_more else None,
-        has_more=has_more,
+    ]
+
+    trips, total, has_more = fetch_trip_page(db, conditions, limit, cursor)
+
+    return build_trip_list_response(
+        db,
+        trips,
+        total,
+        limit,
+        has_more,
+        include_alerts=include_alerts,
+        include_points=include_points,
+        include_events=include_events,
     )
 
 
@@ -7,7 +7,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user_full, get_user_devices_kafka_producer
+from app.api.deps import get_current_user_full
+from app.core.config import settings
 from app.db.session import get_db
 from app.models.user import User
 from app.models.user_device import UserDevice
@@ -18,20 +19,14 @@ from app.schemas.user_device import (
     DeviceRegisterIn,
     DeviceRegisterOut,
 )
-from app.services.messaging.kafka_producer import UserDevicesKafkaProducer
+from app.services.outbox import enqueue_outbox_event
 from app.services.sns import get_or_recreate_endpoint
+from app.utils.datetime import to_utc_iso_z
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-def _to_utc_iso_z(value: datetime | None) -> str:
-    dt = value or datetime.utcnow()
-    if dt.tzinfo is not None:
-        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
-    return dt.isoformat() + "Z"
-
-
 def _build_user_device_event_payload(
     event_type: str,
     user_id: UUID,
@@ -48,7 +43,7 @@ def _build_user_device_event_payload(
         "endpoint_arn": endpoint_arn,
         "unit_id": str(unit_id) if unit_id else None,
         "is_active": is_active,
-        "updated_at": _to_utc_iso_z(updated_at),
+        "updated_at": to_utc_iso_z(updated_at),
     }
 
 
@@ -64,41 +59,24 @@ def _resolve_user_unit_id(db: Session, user_id: UUID) -> UUID | None:
     return row.unit_id
 
 
-def _publish_user_device_event(
-    producer: UserDevicesKafkaProducer,
-    payload: dict,
-    endpoint: str,
+def _enqueue_user_device_event(
+    db: Session, event_type: str, device: UserDevice, is_active: bool
 ) -> None:
-    try:
-        published = producer.publish_update(
-            payload=payload, key=payload.get("device_id")
-        )
-    except Exception:
-        logger.exception(
-            "[USER DEVICES] Excepcion inesperada publicando evento en Kafka.",
-            extra={
-                "extra_data": {
-                    "endpoint": endpoint,
-                    "type": payload.get("type"),
-                    "user_id": payload.get("user_id"),
-                    "device_id": payload.get("device_id"),
-                }
-            },
-        )
-        return
-
-    if not published:
-        logger.error(
-            "[USER DEVICES] Fallo publicando evento en Kafka.",
-            extra={
-                "extra_data": {
-                    "endpoint": endpoint,
-                    "type": payload.get("type"),
-                    "user_id": payload.get("user_id"),
-                    "device_id": payload.get("device_id"),
-                }
-            },
-        )
+    payload = _build_user_device_event_payload(
+        event_type=event_type,
+        user_id=device.user_id,
+        device_id=device.device_token,
+        endpoint_arn=device.endpoint_arn,
+        unit_id=_resolve_user_unit_id(db, device.user_id),
+        is_active=is_active,
+        updated_at=device.updated_at,
+    )
+    enqueue_outbox_event(
+        db,
+        topic=settings.KAFKA_USER_DEVICES_UPDATES_TOPIC,
+        payload=payload,
+        key=payload["device_id"],
+    )
 
 
 @router.post("/register", response_model=DeviceRegisterOut)
@@ -106,9 +84,6 @@ def register_user_device(
     payload: DeviceRegisterIn,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_full),
-    user_devices_kafka_producer: UserDevicesKafkaProducer = Depends(
-        get_user_devices_kafka_producer
-    ),
 ):
     now = datetime.now(timezone.utc)
     created_new = False
@@ -148,6 +123,8 @@ def register_user_device(
             )
             db.add(device)
             try:
+                db.flush()
+                _enqueue_user_device_event(db, "UPSERT", device, device.is_active)
                 db.commit()
                 db.refresh(device)
                 created_new = True
@@ -163,21 +140,6 @@ def register_user_device(
                     raise
 
             if created_new:
-                kafka_payload = _build_user_device_event_payload(
-                    event_type="UPSERT",
-                    user_id=device.user_id,
-                    device_id=device.device_token,
-                    endpoint_arn=device.endpoint_arn,
-                    unit_id=_resolve_user_unit_id(db, device.user_id),
-                    is_active=device.is_active,
-                    updated_at=device.updated_at,
-                )
-                _publish_user_device_event(
-                    user_devices_kafka_producer,
-                    kafka_payload,
-                    endpoint="register_user_device",
-                )
-
                 return DeviceRegisterOut(
                     device_token=device.device_token,
                     platform=device.platform,
@@ -204,6 +166,8 @@ def register_user_device(
 
         db.add(device)
         try:
+            db.flush()
+            _enqueue_user_device_event(db, "UPSERT", device, device.is_active)
             db.commit()
             db.refresh(device)
         except IntegrityError:
@@ -224,24 +188,10 @@ def register_user_device(
             device.updated_at = now
 
             db.add(device)
+            _enqueue_user_device_event(db, "UPSERT", device, device.is_active)
             db.commit()
             db.refresh(device)
 
-        kafka_payload = _build_user_device_event_payload(
-            event_type="UPSERT",
-            user_id=device.user_id,
-            device_id=device.device_token,
-            endpoint_arn=device.endpoint_arn,
-            unit_id=_resolve_user_unit_id(db, device.user_id),
-            is_active=device.is_active,
-            updated_at=device.updated_at,
-        )
-        _publish_user_device_event(
-            user_devices_kafka_producer,
-            kafka_payload,
-            endpoint="register_user_device",
-        )
-
         return DeviceRegisterOut(
             device_token=device.device_token,
             platform=device.platform,
@@ -264,9 +214,6 @@ def register_user_device(
 def deactivate_user_device(
     payload: DeviceDeactivateIn,
     db: Session = Depends(get_db),
-    user_devices_kafka_producer: UserDevicesKafkaProducer = Depends(
-        get_user_devices_kafka_producer
-    ),
 ):
     device = (
         db.query(UserDevice)
@@ -283,23 +230,9 @@ def deactivate_user_device(
     device.updated_at = datetime.now(timezone.utc)
 
     db.add(device)
+    _enqueue_user_device_event(db, "DELETE", device, is_active=False)
     db.commit()
 
-    kafka_payload = _build_user_device_event_payload(
-        event_type="DELETE",
-        user_id=device.user_id,
-        device_id=device.device_token,
-        endpoint_arn=device.endpoint_arn,
-        unit_id=_resolve_user_unit_id(db, device.user_id),
-        is_active=False,
-        updated_at=device.updated_at,
-    )
-    _publish_user_device_event(
-        user_devices_kafka_producer,
-        kafka_payload,
-        endpoint="deactivate_user_device",
-    )
-
     return DeviceDeactivateOut(
         message="Dispositivo desactivado exitosamente",
         device_token=payload.device_token,
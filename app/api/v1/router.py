@@ -64,6 +64,7 @@ from app.api.v1.endpoints.internal import accounts as internal_accounts
 from app.api.v1.endpoints.internal import organizations as internal_organizations
 from app.api.v1.endpoints.internal import plans as internal_plans
 from app.api.v1.endpoints.internal import products as internal_products
+from app.api.v1.endpoints.internal import snapshots as internal_snapshots
 
 api_router = APIRouter()
 
@@ -183,3 +184,10 @@ api_router.include_router(
     prefix="/internal/products",
     tags=["internal-products"],
 )
+
+# Internal Snapshots (republicación de reglas y geocercas a Kafka)
+api_router.include_router(
+    internal_snapshots.router,
+    prefix="/internal/snapshots",
+    tags=["internal-snapshots"],
+)
@@ -62,6 +62,90 @@ class Settings(BaseSettings):
     KAFKA_SASL_PASSWORD: Optional[str] = "eventsalertconsumerpassword"
     KAFKA_SASL_MECHANISM: str = "SCRAM-SHA-256"
     KAFKA_SECURITY_PROTOCOL: str = "SASL_PLAINTEXT"
+    # El cliente agrupa mensajes (linger/batch) con reintentos.
+    # Un solo cliente por proceso para todos los topics; la compresión (gzip,
+    # snappy, lz4, zstd; vacío = sin compresión) aplica a todos los mensajes
+    KAFKA_PRODUCER_LINGER_MS: int = 20
+    KAFKA_PRODUCER_BATCH_SIZE: int = 65536
+    KAFKA_PRODUCER_COMPRESSION_TYPE: str = "gzip"
+    KAFKA_PRODUCER_RETRIES: int = 3
+    KAFKA_PRODUCER_CLOSE_TIMEOUT_SECONDS: int = 10
+    # Formato del valor (orjson | json | msgpack) y versión del esquema de
+    # eventos, enviados en los headers content-type y schema-version
+    KAFKA_VALUE_SERIALIZER: str = "orjson"
+    KAFKA_SCHEMA_VERSION: int = 1
+
+    # Outbox - relay de outbox_events a Kafka. 0 deshabilita el relay en este
+    # proceso. Reintentos con backoff exponencial (base * 2^n, hasta MAX)
+    OUTBOX_RELAY_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_SEND_TIMEOUT_SECONDS: int = 10
+    OUTBOX_RETRY_BASE_SECONDS: int = 2
+    OUTBOX_RETRY_MAX_SECONDS: int = 300
+    OUTBOX_RETENTION_HOURS: int = 24
+
+    # Snapshot de reglas y geocercas (POST /internal/snapshots): filas por
+    # viaje al cursor y ritmo máximo de eventos (0 = sin límite)
+    SNAPSHOT_BATCH_SIZE: int = 500
+    SNAPSHOT_MAX_EVENTS_PER_SECOND: int = 2000
+    # Geocercas: codificación de celdas (raw | compact) y máximo de celdas
+    # por mensaje antes de trocear el evento (0 = sin troceo)
+    KAFKA_GEOFENCES_CELLS_ENCODING: str = "raw"
+    KAFKA_GEOFENCES_CHUNK_CELLS: int = 5000
+
+    # Capabilities - caché por organización (0 deshabilita) y canal de
+    # LISTEN/NOTIFY para invalidar entre workers
+    CAPABILITY_CACHE_TTL_SECONDS: int = 300
+    CAPABILITY_INVALIDATION_CHANNEL: str = "capabilities_invalidated"
+
+    # Catálogo público de planes en memoria: intervalo de verificación de
+    # cambios hechos en otros workers (0 deshabilita la verificación)
+    PLAN_CATALOG_REFRESH_SECONDS: int = 60
+
+    # Estadísticas internas (/internal/*/stats): vigencia del snapshot en
+    # caché (0 deshabilita) y recalculo en segundo plano (0 deshabilita)
+    INTERNAL_STATS_TTL_SECONDS: int = 30
+    INTERNAL_STATS_REFRESH_SECONDS: int = 0
+
+    # Billing - agregados de pagos por account en caché (0 deshabilita) y
+    # canal de LISTEN/NOTIFY para invalidar entre workers
+    BILLING_AGGREGATES_TTL_SECONDS: int = 60
+    BILLING_AGGREGATES_INVALIDATION_CHANNEL: str = "billing_aggregates_invalidated"
+
+    # Barrido de expiraciones (device_services y subscriptions): intervalo
+    # (0 deshabilita) y filas por lote (un UPDATE y un commit por lote)
+    EXPIRY_SWEEP_INTERVAL_SECONDS: int = 3600
+    EXPIRY_SWEEP_BATCH_SIZE: int = 1000
+
+    # Scheduler en proceso (app/services/scheduler.py). Los jobs que escriben
+    # en BD corren solo en el worker que obtiene el advisory lock de líder
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_LEADER_LOCK_KEY: int = 7_310_452_001
+    SCHEDULER_LEADER_CHECK_SECONDS: int = 15
+    SCHEDULER_MAX_WORKERS: int = 4
+    SCHEDULER_JOB_TIMEOUT_SECONDS: int = 600
+    # Recalculo de capabilities materializadas con overrides vencidos (0
+    # deshabilita) y purgas programadas (cron UTC; vacío deshabilita)
+    EFFECTIVE_CAPABILITIES_REFRESH_SECONDS: int = 300
+    OUTBOX_PURGE_CRON: str = "7 * * * *"
+    TOKEN_PURGE_CRON: str = "30 3 * * *"
+
+    # Health - verificación en segundo plano de BD, Kafka, JWKS de Cognito y
+    # SES (0 deshabilita). /health/ready exige las dependencias listadas
+    HEALTH_PROBE_INTERVAL_SECONDS: int = 30
+    HEALTH_PROBE_TIMEOUT_SECONDS: int = 3
+    HEALTH_READY_DEPENDENCIES: str = "database"
+
+    # Trips - Rollup diario (trip_daily_summaries). 0 deshabilita el refresco
+    TRIP_SUMMARIES_REFRESH_INTERVAL_SECONDS: int = 300
+
+    # Trips - Heatmap H3. Entradas (device_id, día, resolución) en caché
+    TRIP_HEATMAP_CACHE_MAX_ENTRIES: int = 20000
+
+    # Geocercas - Índice en memoria celda H3 → geocercas: vigencia máxima y
+    # canal de LISTEN/NOTIFY para invalidar entre workers
+    GEOFENCE_INDEX_TTL_SECONDS: int = 60
+    GEOFENCE_INDEX_INVALIDATION_CHANNEL: str = "geofence_index_invalidated"
 
     @field_validator(
         "AWS_ACCESS_KEY_ID",
@@ -0,0 +1,94 @@
+"""Add trip_daily_summaries rollup and rollup_watermarks
+
+Revision ID: 015_trip_daily_summaries
+Revises: 014_rename_users_client_id
+Create Date: 2026-10-19
+
+Cambios principales:
+- Crea tabla trip_daily_summaries (rollup diario por dispositivo)
+- Crea tabla rollup_watermarks (marca de agua de procesos incrementales)
+- Índice (organization_id, day) para reportes de flota por rango de días
+
+CONTEXTO:
+    Los reportes de "km y horas de manejo por unidad por día" listaban todos
+    los trips y sumaban del lado del cliente. El rollup se mantiene de forma
+    incremental desde trips/trip_alerts (app.services.trip_summaries), por lo
+    que un reporte mensual de flota es un range scan sobre el índice.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision = "015_trip_daily_summaries"
+down_revision = "014_rename_users_client_id"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Crea las tablas trip_daily_summaries y rollup_watermarks
+    """
+
+    # ============================================
+    # PASO 1: Crear tabla trip_daily_summaries
+    # ============================================
+    op.create_table(
+        "trip_daily_summaries",
+        sa.Column("device_id", sa.String(20), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("organization_id", UUID(as_uuid=True), nullable=True),
+        sa.Column("timezone", sa.Text(), nullable=False, server_default="UTC"),
+        sa.Column("trip_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "distance_meters", sa.BigInteger(), nullable=False, server_default="0"
+        ),
+        sa.Column("driving_minutes", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("max_speed", sa.Float(), nullable=True),
+        sa.Column("alert_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.PrimaryKeyConstraint("device_id", "day"),
+    )
+
+    # ============================================
+    # PASO 2: Índice para reportes de flota
+    # ============================================
+    op.create_index(
+        "idx_trip_daily_summaries_org_day",
+        "trip_daily_summaries",
+        ["organization_id", "day"],
+    )
+
+    # ============================================
+    # PASO 3: Crear tabla rollup_watermarks
+    # ============================================
+    op.create_table(
+        "rollup_watermarks",
+        sa.Column("name", sa.Text(), primary_key=True),
+        sa.Column("processed_until", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+
+
+def downgrade() -> None:
+    """
+    Revierte los cambios eliminando las tablas
+    """
+    op.drop_table("rollup_watermarks")
+    op.drop_index(
+        "idx_trip_daily_summaries_org_day", table_name="trip_daily_summaries"
+    )
+    op.drop_table("trip_daily_summaries")
@@ -0,0 +1,139 @@
+"""Add entity_changes log for versioned delta sync
+
+Revision ID: 016_entity_changes
+Revises: 015_trip_daily_summaries
+Create Date: 2026-10-19
+
+Cambios principales:
+- Crea tabla entity_changes (versión BIGSERIAL por cambio de entidad)
+- Registra una versión por cada geocerca y regla existente (backfill)
+- Función record_entity_change() y triggers en geofences y alert_rules
+- Índice (organization_id, entity_type, version) para sync incremental
+
+CONTEXTO:
+    Clientes móviles/edge descargaban GET /geofences y GET /alert-rules
+    completos en cada arranque. Con entity_changes, GET /{recurso}/changes
+    ?since=<version> retorna solo lo modificado o eliminado desde esa versión.
+
+    Las versiones vienen de una secuencia global, por lo que son monotónicas
+    por organización. El trigger toma un advisory lock por
+    (organización, tipo de entidad) antes de asignar la versión: dentro de una
+    organización las versiones se confirman en orden y un cliente nunca ve la
+    versión N sin ver antes todas las menores.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision = "016_entity_changes"
+down_revision = "015_trip_daily_summaries"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Crea entity_changes y los triggers que la alimentan
+    """
+
+    # ============================================
+    # PASO 1: Crear tabla entity_changes
+    # ============================================
+    op.create_table(
+        "entity_changes",
+        sa.Column("version", sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column("organization_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("entity_type", sa.Text(), nullable=False),
+        sa.Column("entity_id", UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            "changed_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+
+    op.create_index(
+        "idx_entity_changes_org_type_version",
+        "entity_changes",
+        ["organization_id", "entity_type", "version"],
+    )
+
+    # ============================================
+    # PASO 2: Backfill de entidades existentes
+    # ============================================
+    # Sin esto, since=0 no retornaría lo creado antes de la migración
+    op.execute(
+        """
+        INSERT INTO entity_changes (organization_id, entity_type, entity_id)
+        SELECT organization_id, 'geofence', id FROM geofences
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO entity_changes (organization_id, entity_type, entity_id)
+        SELECT organization_id, 'alert_rule', id FROM alert_rules
+        """
+    )
+
+    # ============================================
+    # PASO 3: Función de registro de cambios
+    # ============================================
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION record_entity_change() RETURNS trigger AS $$
+        DECLARE
+            changed RECORD;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed := OLD;
+            ELSE
+                changed := NEW;
+            END IF;
+
+            -- Serializa escritores de la misma organización y tipo para que
+            -- las versiones se confirmen en orden.
+            PERFORM pg_advisory_xact_lock(
+                hashtextextended(changed.organization_id::text || ':' || TG_ARGV[0], 0)
+            );
+
+            INSERT INTO entity_changes (organization_id, entity_type, entity_id)
+            VALUES (changed.organization_id, TG_ARGV[0], changed.id);
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+
+    # ============================================
+    # PASO 4: Triggers en geofences y alert_rules
+    # ============================================
+    op.execute(
+        """
+        CREATE TRIGGER trg_geofences_entity_change
+        AFTER INSERT OR UPDATE OR DELETE ON geofences
+        FOR EACH ROW EXECUTE FUNCTION record_entity_change('geofence');
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_alert_rules_entity_change
+        AFTER INSERT OR UPDATE OR DELETE ON alert_rules
+        FOR EACH ROW EXECUTE FUNCTION record_entity_change('alert_rule');
+        """
+    )
+
+
+def downgrade() -> None:
+    """
+    Revierte los cambios eliminando triggers, función y tabla
+    """
+    op.execute("DROP TRIGGER IF EXISTS trg_alert_rules_entity_change ON alert_rules")
+    op.execute("DROP TRIGGER IF EXISTS trg_geofences_entity_change ON geofences")
+    op.execute("DROP FUNCTION IF EXISTS record_entity_change()")
+    op.drop_index("idx_entity_changes_org_type_version", table_name="entity_changes")
+    op.drop_table("entity_changes")
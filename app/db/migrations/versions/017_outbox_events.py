@@ -0,0 +1,89 @@
+"""Add outbox_events for transactional Kafka publishing
+
+Revision ID: 017_outbox_events
+Revises: 016_entity_changes
+Create Date: 2026-10-19
+
+Cambios principales:
+- Crea tabla outbox_events (evento pendiente de publicar en Kafka)
+- Índice parcial de eventos pendientes por next_attempt_at
+- Índice parcial (topic, key, id) para respetar el orden por key
+
+CONTEXTO:
+    Los eventos de geocercas, reglas y user devices se publicaban después de
+    db.commit(); si el proceso moría o Kafka no respondía, el evento se perdía.
+    Ahora se insertan en outbox_events en la misma transacción que el cambio
+    de la entidad y un relay en segundo plano los publica (at-least-once,
+    event_id único para que los consumidores descarten duplicados).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+
+# revision identifiers, used by Alembic.
+revision = "017_outbox_events"
+down_revision = "016_entity_changes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Crea outbox_events y sus índices de pendientes
+    """
+
+    # ============================================
+    # PASO 1: Crear tabla outbox_events
+    # ============================================
+    op.create_table(
+        "outbox_events",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column("event_id", UUID(as_uuid=True), nullable=False, unique=True),
+        sa.Column("topic", sa.Text(), nullable=False),
+        sa.Column("key", sa.Text(), nullable=True),
+        sa.Column("payload", JSONB(), nullable=False),
+        sa.Column(
+            "attempts", sa.Integer(), nullable=False, server_default=sa.text("0")
+        ),
+        sa.Column(
+            "next_attempt_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column("published_at", sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+
+    # ============================================
+    # PASO 2: Índices parciales sobre pendientes
+    # ============================================
+    op.create_index(
+        "idx_outbox_events_pending",
+        "outbox_events",
+        ["next_attempt_at", "id"],
+        postgresql_where=sa.text("published_at IS NULL"),
+    )
+    op.create_index(
+        "idx_outbox_events_pending_key",
+        "outbox_events",
+        ["topic", "key", "id"],
+        postgresql_where=sa.text("published_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """
+    Revierte los cambios eliminando índices y tabla
+    """
+    op.drop_index("idx_outbox_events_pending_key", table_name="outbox_events")
+    op.drop_index("idx_outbox_events_pending", table_name="outbox_events")
+    op.drop_table("outbox_events")
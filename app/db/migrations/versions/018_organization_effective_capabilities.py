@@ -0,0 +1,83 @@
+"""Add organization_effective_capabilities (resolved capabilities per org)
+
+Revision ID: 018_org_effective_capabilities
+Revises: 017_outbox_events
+Create Date: 2026-10-19
+
+Cambios principales:
+- Crea tabla organization_effective_capabilities con el valor resuelto de
+  cada capability por organización, su origen (organization, plan, default),
+  el plan de origen y la expiración del override
+- Índice parcial por expires_at para recalcular overrides vencidos
+
+CONTEXTO:
+    Otros servicios (GAC, motor de alertas) necesitan las capabilities de
+    miles de organizaciones. En lugar de reimplementar
+    override ?? plan ?? default, leen esta tabla, que la API recalcula en los
+    eventos que afectan la resolución (overrides, plan_capabilities,
+    suscripciones) y expone en POST /internal/organizations/capabilities/bulk.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision = "018_org_effective_capabilities"
+down_revision = "017_outbox_events"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Crea organization_effective_capabilities y su índice de expiración
+    """
+
+    # ============================================
+    # PASO 1: Crear tabla organization_effective_capabilities
+    # ============================================
+    op.create_table(
+        "organization_effective_capabilities",
+        sa.Column(
+            "organization_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("organizations.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("capability_code", sa.Text(), primary_key=True),
+        sa.Column("value_int", sa.Integer(), nullable=True),
+        sa.Column("value_bool", sa.Boolean(), nullable=True),
+        sa.Column("value_text", sa.Text(), nullable=True),
+        sa.Column("source", sa.Text(), nullable=False),
+        sa.Column("plan_id", UUID(as_uuid=True), nullable=True),
+        sa.Column("expires_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column(
+            "computed_at",
+            sa.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+
+    # ============================================
+    # PASO 2: Índice parcial de overrides con expiración
+    # ============================================
+    op.create_index(
+        "idx_org_effective_capabilities_expires_at",
+        "organization_effective_capabilities",
+        ["expires_at"],
+        postgresql_where=sa.text("expires_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    """
+    Revierte los cambios eliminando índice y tabla
+    """
+    op.drop_index(
+        "idx_org_effective_capabilities_expires_at",
+        table_name="organization_effective_capabilities",
+    )
+    op.drop_table("organization_effective_capabilities")
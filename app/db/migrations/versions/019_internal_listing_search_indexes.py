@@ -0,0 +1,95 @@
+"""Add pg_trgm search and keyset indexes for internal listings
+
+Revision ID: 019_internal_listing_indexes
+Revises: 018_org_effective_capabilities
+Create Date: 2026-10-19
+
+Cambios principales:
+- Habilita la extensión pg_trgm
+- Índices GIN (gin_trgm_ops) para búsquedas ILIKE '%texto%' en nombre y
+  email de accounts, organizations y users
+- Índices (created_at DESC, id DESC) para la paginación keyset de
+  /internal/accounts y /internal/organizations (en organizations sobre
+  COALESCE(created_at, '1970-01-01'), porque la columna admite NULL)
+
+CONTEXTO:
+    Los listados del back-office buscaban con ILIKE '%texto%' (sin índice
+    utilizable por B-tree) y paginaban con OFFSET: ambos costos crecían con
+    la tabla. Con trigramas la búsqueda usa el índice GIN y el cursor keyset
+    recorre el índice ordenado desde la última fila entregada.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "019_internal_listing_indexes"
+down_revision = "018_org_effective_capabilities"
+branch_labels = None
+depends_on = None
+
+
+# (índice, tabla, columna)
+TRIGRAM_INDEXES = [
+    ("idx_accounts_name_trgm", "accounts", "name"),
+    ("idx_accounts_billing_email_trgm", "accounts", "billing_email"),
+    ("idx_organizations_name_trgm", "organizations", "name"),
+    ("idx_organizations_billing_email_trgm", "organizations", "billing_email"),
+    ("idx_users_email_trgm", "users", "email"),
+]
+
+# (índice, tabla, expresión de created_at). organizations.created_at admite
+# NULL: se indexa la misma expresión COALESCE que usa paginate_keyset
+KEYSET_INDEXES = [
+    ("idx_accounts_created_at_id", "accounts", "created_at"),
+    (
+        "idx_organizations_created_at_id",
+        "organizations",
+        "COALESCE(created_at, '1970-01-01 00:00:00'::timestamp)",
+    ),
+]
+
+
+def upgrade() -> None:
+    """
+    Crea la extensión pg_trgm y los índices de búsqueda y paginación
+    """
+
+    # ============================================
+    # PASO 1: Extensión pg_trgm
+    # ============================================
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # ============================================
+    # PASO 2: Índices GIN de trigramas
+    # ============================================
+    for index_name, table, column in TRIGRAM_INDEXES:
+        op.create_index(
+            index_name,
+            table,
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+    # ============================================
+    # PASO 3: Índices para paginación keyset
+    # ============================================
+    for index_name, table, created_at in KEYSET_INDEXES:
+        op.create_index(
+            index_name,
+            table,
+            [sa.text(f"{created_at} DESC"), sa.text("id DESC")],
+        )
+
+
+def downgrade() -> None:
+    """
+    Revierte los cambios eliminando los índices (la extensión se conserva)
+    """
+    for index_name, table, _created_at in KEYSET_INDEXES:
+        op.drop_index(index_name, table_name=table)
+
+    for index_name, table, _column in TRIGRAM_INDEXES:
+        op.drop_index(index_name, table_name=table)
@@ -1,15 +1,30 @@
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.deps import (
-    close_geofences_kafka_producer,
-    close_rules_kafka_producer,
-    close_user_devices_kafka_producer,
-)
 from app.api.v1.router import api_router
 from app.core.config import settings
 from app.core.logging_config import setup_logging
-from app.services.health import check_kafka_accessibility
+from app.services.billing_aggregates import (
+    start_payment_aggregates_listener,
+    stop_payment_aggregates_listener,
+)
+from app.services.capability_cache import (
+    start_capability_invalidation_listener,
+    stop_capability_invalidation_listener,
+)
+from app.services.geofence_index import (
+    start_geofence_index_listener,
+    stop_geofence_index_listener,
+)
+from app.services.health import (
+    get_health_snapshot,
+    is_ready,
+    start_health_probes,
+    stop_health_probes,
+)
+from app.services.messaging.kafka_producer import close_kafka_event_producer
+from app.services.outbox import start_outbox_relay, stop_outbox_relay
+from app.services.scheduler import start_scheduler, stop_scheduler
 from app.startup import print_startup_banner
 
 setup_logging()
@@ -77,20 +92,53 @@ def root():
 @app.get("/health")
 def health_check():
     """Health check endpoint para Docker y monitoring"""
-    return {"status": "healthy", "service": "siscom-admin-api"}
+    return {
+        "status": "healthy",
+        "service": "siscom-admin-api",
+        "ready": is_ready(),
+        "dependencies": get_health_snapshot(),
+    }
+
+
+@app.get("/health/live")
+def liveness_check():
+    """Liveness: el proceso atiende requests (no consulta dependencias)."""
+    return {"status": "alive", "service": "siscom-admin-api"}
+
+
+@app.get("/health/ready")
+def readiness_check(response: Response):
+    """Readiness: lee el estado en caché de las verificaciones en segundo plano."""
+    ready = is_ready()
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": "ready" if ready else "not_ready",
+        "service": "siscom-admin-api",
+        "dependencies": get_health_snapshot(),
+    }
 
 
 @app.on_event("startup")
 def on_startup() -> None:
-    """Verifica accesibilidad de servicios externos al iniciar la aplicación."""
+    """Inicia tareas en segundo plano; no espera a los servicios externos."""
     setup_logging()
     print_startup_banner()
-    check_kafka_accessibility()
+    start_health_probes()
+    start_capability_invalidation_listener()
+    start_geofence_index_listener()
+    start_payment_aggregates_listener()
+    start_outbox_relay()
+    start_scheduler()
 
 
 @app.on_event("shutdown")
 def on_shutdown() -> None:
     """Cierra recursos compartidos al apagar la aplicación."""
-    close_rules_kafka_producer()
-    close_geofences_kafka_producer()
-    close_user_devices_kafka_producer()
+    stop_health_probes()
+    stop_capability_invalidation_listener()
+    stop_geofence_index_listener()
+    stop_payment_aggregates_listener()
+    stop_scheduler()
+    stop_outbox_relay()
+    close_kafka_event_producer()
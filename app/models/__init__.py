@@ -56,6 +56,7 @@ from app.models.device_service import (
     DeviceServiceStatus,
     SubscriptionType,
 )
+from app.models.entity_change import EntityChange
 from app.models.geofence import Geofence, GeofenceCell
 from app.models.invitation import Invitation
 from app.models.order import Order, OrderStatus
@@ -65,7 +66,11 @@ from app.models.order_item import OrderItem, OrderItemType
 from app.models.organization import Organization, OrganizationStatus
 
 # Organization Users (roles)
+from app.models.organization_effective_capability import (
+    OrganizationEffectiveCapability,
+)
 from app.models.organization_user import OrganizationRole, OrganizationUser
+from app.models.outbox_event import OutboxEvent
 
 # Payments & Orders
 from app.models.payment import Payment, PaymentStatus
@@ -86,6 +91,7 @@ from app.models.token_confirmacion import TokenConfirmacion, TokenType
 
 # Trips
 from app.models.trip import Trip, TripAlert, TripEvent, TripPoint
+from app.models.trip_daily_summary import RollupWatermark, TripDailySummary
 from app.models.unified_sim_profile import UnifiedSimProfile
 
 # Units & Devices
@@ -122,6 +128,7 @@ __all__ = [
     "CapabilityValueType",
     "PlanCapability",
     "OrganizationCapability",
+    "OrganizationEffectiveCapability",
     # Users
     "User",
     "Invitation",
@@ -156,6 +163,8 @@ __all__ = [
     "SubscriptionType",
     "Geofence",
     "GeofenceCell",
+    "EntityChange",
+    "OutboxEvent",
     # Tokens
     "TokenConfirmacion",
     "TokenType",
@@ -164,6 +173,8 @@ __all__ = [
     "TripPoint",
     "TripAlert",
     "TripEvent",
+    "TripDailySummary",
+    "RollupWatermark",
     # SIM Cards
     "SimCard",
     "SimKoreProfile",
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import BIGINT, Column, Identity, Text, text
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlmodel import Field, Index, SQLModel
+
+
+class EntityChange(SQLModel, table=True):
+    """
+    Registro de cambios de entidades sincronizables (geocercas, reglas).
+
+    Alimentado por el trigger record_entity_change() en cada INSERT, UPDATE o
+    DELETE; `version` es monotónica por organización (ver migración 016).
+    """
+
+    __tablename__ = "entity_changes"
+    __table_args__ = (
+        Index(
+            "idx_entity_changes_org_type_version",
+            "organization_id",
+            "entity_type",
+            "version",
+        ),
+    )
+
+    version: Optional[int] = Field(
+        default=None, sa_column=Column(BIGINT, Identity(), primary_key=True)
+    )
+
+    organization_id: UUID = Field(
+        sa_column=Column(PGUUID(as_uuid=True), nullable=False)
+    )
+
+    entity_type: str = Field(sa_column=Column(Text, nullable=False))
+
+    entity_id: UUID = Field(sa_column=Column(PGUUID(as_uuid=True), nullable=False))
+
+    changed_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            TIMESTAMP(timezone=True), server_default=text("now()"), nullable=False
+        ),
+    )
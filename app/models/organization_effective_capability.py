@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, Text, text
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlmodel import Field, SQLModel
+
+
+class OrganizationEffectiveCapability(SQLModel, table=True):
+    """
+    Capability resuelta (override ?? plan ?? default) de una organización.
+
+    Tabla derivada: la mantiene app.services.effective_capabilities; no se
+    escribe desde los endpoints.
+    """
+
+    __tablename__ = "organization_effective_capabilities"
+
+    organization_id: UUID = Field(
+        sa_column=Column(
+            PGUUID(as_uuid=True),
+            ForeignKey("organizations.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+    )
+    capability_code: str = Field(sa_column=Column(Text, primary_key=True))
+    value_int: Optional[int] = Field(
+        default=None, sa_column=Column(Integer, nullable=True)
+    )
+    value_bool: Optional[bool] = Field(
+        default=None, sa_column=Column(Boolean, nullable=True)
+    )
+    value_text: Optional[str] = Field(
+        default=None, sa_column=Column(Text, nullable=True)
+    )
+    source: str = Field(sa_column=Column(Text, nullable=False))
+    plan_id: Optional[UUID] = Field(
+        default=None, sa_column=Column(PGUUID(as_uuid=True), nullable=True)
+    )
+    expires_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(TIMESTAMP(timezone=True), nullable=True)
+    )
+    computed_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            TIMESTAMP(timezone=True), server_default=text("now()"), nullable=False
+        ),
+    )
+
+    def get_value(self):
+        """Retorna el valor según el tipo."""
+        if self.value_int is not None:
+            return self.value_int
+        if self.value_bool is not None:
+            return self.value_bool
+        if self.value_text is not None:
+            return self.value_text
+        return None
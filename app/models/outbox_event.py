@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import BIGINT, Column, Identity, Integer, Text, text
+from sqlalchemy.dialects.postgresql import JSONB, TIMESTAMP
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlmodel import Field, SQLModel
+
+
+class OutboxEvent(SQLModel, table=True):
+    """
+    Evento pendiente de publicar en Kafka (patrón transactional outbox).
+
+    Se inserta en la misma transacción que el cambio de la entidad; el relay
+    de app.services.outbox lo publica y marca published_at.
+    """
+
+    __tablename__ = "outbox_events"
+
+    id: Optional[int] = Field(
+        default=None, sa_column=Column(BIGINT, Identity(), primary_key=True)
+    )
+
+    event_id: UUID = Field(
+        sa_column=Column(PGUUID(as_uuid=True), nullable=False, unique=True)
+    )
+
+    topic: str = Field(sa_column=Column(Text, nullable=False))
+
+    key: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+
+    payload: dict = Field(sa_column=Column(JSONB, nullable=False))
+
+    attempts: int = Field(
+        default=0,
+        sa_column=Column(Integer, nullable=False, server_default=text("0")),
+    )
+
+    next_attempt_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            TIMESTAMP(timezone=True), server_default=text("now()"), nullable=False
+        ),
+    )
+
+    last_error: Optional[str] = Field(
+        default=None, sa_column=Column(Text, nullable=True)
+    )
+
+    created_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            TIMESTAMP(timezone=True), server_default=text("now()"), nullable=False
+        ),
+    )
+
+    published_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(TIMESTAMP(timezone=True), nullable=True)
+    )
@@ -0,0 +1,86 @@
+from datetime import date, datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import BIGINT, Column, Date, Float, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlmodel import Field, Index, SQLModel
+
+
+class TripDailySummary(SQLModel, table=True):
+    """
+    Resumen diario de conducción por dispositivo.
+
+    Rollup mantenido por siscom-admin-api a partir de trips/trip_alerts
+    (ver app.services.trip_summaries). El día se calcula en la zona horaria
+    de la organización dueña del dispositivo al momento del cálculo.
+    """
+
+    __tablename__ = "trip_daily_summaries"
+    __table_args__ = (
+        Index("idx_trip_daily_summaries_org_day", "organization_id", "day"),
+    )
+
+    device_id: str = Field(sa_column=Column(String(20), primary_key=True))
+
+    day: date = Field(sa_column=Column(Date, primary_key=True))
+
+    organization_id: Optional[UUID] = Field(
+        default=None, sa_column=Column(PGUUID(as_uuid=True), nullable=True)
+    )
+
+    timezone: str = Field(
+        default="UTC", sa_column=Column(Text, nullable=False, server_default="UTC")
+    )
+
+    trip_count: int = Field(
+        default=0, sa_column=Column(Integer, nullable=False, server_default="0")
+    )
+
+    distance_meters: int = Field(
+        default=0, sa_column=Column(BIGINT, nullable=False, server_default="0")
+    )
+
+    driving_minutes: float = Field(
+        default=0, sa_column=Column(Float, nullable=False, server_default="0")
+    )
+
+    max_speed: Optional[float] = Field(
+        default=None, sa_column=Column(Float, nullable=True)
+    )
+
+    alert_count: int = Field(
+        default=0, sa_column=Column(Integer, nullable=False, server_default="0")
+    )
+
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            TIMESTAMP(timezone=True), server_default=text("now()"), nullable=False
+        ),
+    )
+
+
+class RollupWatermark(SQLModel, table=True):
+    """
+    Marca de agua de procesos incrementales (rollups, snapshots).
+
+    Guarda hasta qué instante de created_at se procesaron los datos de origen
+    para que cada corrida solo recalcule lo nuevo.
+    """
+
+    __tablename__ = "rollup_watermarks"
+
+    name: str = Field(sa_column=Column(Text, primary_key=True))
+
+    processed_until: datetime = Field(
+        sa_column=Column(TIMESTAMP(timezone=True), nullable=False)
+    )
+
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            TIMESTAMP(timezone=True), server_default=text("now()"), nullable=False
+        ),
+    )
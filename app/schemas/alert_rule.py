@@ -43,6 +43,14 @@ class AlertRuleOut(AlertRuleBase):
         from_attributes = True
 
 
+class AlertRuleChangesResponse(BaseModel):
+    since: int
+    version: int = Field(..., description="Valor de `since` para la siguiente página")
+    upserted: list[AlertRuleOut] = Field(default_factory=list)
+    deleted: list[UUID] = Field(default_factory=list)
+    has_more: bool
+
+
 class AlertRuleDeleteOut(BaseModel):
     message: str
     rule_id: UUID
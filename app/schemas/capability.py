@@ -263,3 +263,58 @@ class ValidateLimitResponse(BaseModel):
                 "remaining": 2,
             }
         }
+
+
+class EffectiveCapabilitiesBulkRequest(BaseModel):
+    """Request para consultar capabilities efectivas de varias organizaciones."""
+
+    organization_ids: list[UUID] = Field(
+        ..., min_length=1, max_length=5000, description="IDs de organizaciones"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "organization_ids": [
+                    "123e4567-e89b-12d3-a456-426614174000",
+                    "223e4567-e89b-12d3-a456-426614174000",
+                ]
+            }
+        }
+
+
+class OrganizationEffectiveCapabilitiesOut(BaseModel):
+    """Capabilities efectivas materializadas de una organización."""
+
+    organization_id: UUID
+    capabilities: dict[str, ResolvedCapabilityOut]
+
+
+class EffectiveCapabilitiesBulkResponse(BaseModel):
+    """Response de la consulta en bloque de capabilities efectivas."""
+
+    organizations: list[OrganizationEffectiveCapabilitiesOut]
+    not_found: list[UUID] = Field(
+        default_factory=list, description="IDs de organizaciones inexistentes"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "organizations": [
+                    {
+                        "organization_id": "123e4567-e89b-12d3-a456-426614174000",
+                        "capabilities": {
+                            "max_devices": {
+                                "code": "max_devices",
+                                "value": 50,
+                                "source": "plan",
+                                "plan_id": "323e4567-e89b-12d3-a456-426614174000",
+                                "expires_at": None,
+                            }
+                        },
+                    }
+                ],
+                "not_found": ["223e4567-e89b-12d3-a456-426614174000"],
+            }
+        }
@@ -1,8 +1,19 @@
 from datetime import datetime
+from enum import Enum
 from typing import Any, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+from app.utils.h3_cells import validate_cells
+
+
+class GeofenceCellsMode(str, Enum):
+    """Representación de las celdas H3 en las respuestas de geocercas"""
+
+    FULL = "full"  # Todas las celdas almacenadas
+    COMPACT = "compact"  # Conjunto compactado con h3.compact_cells
+    COUNT = "count"  # Solo el número de celdas (ver GET /{id}/cells)
 
 
 class GeofenceBase(BaseModel):
@@ -14,6 +25,12 @@ class GeofenceBase(BaseModel):
 class GeofenceCreate(GeofenceBase):
     h3_indexes: list[int] = Field(default_factory=list)
 
+    @field_validator("h3_indexes")
+    @classmethod
+    def validate_h3_indexes(cls, v: list[int]) -> list[int]:
+        validate_cells(v)
+        return v
+
 
 class GeofenceUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=255)
@@ -22,12 +39,21 @@ class GeofenceUpdate(BaseModel):
     is_active: Optional[bool] = None
     h3_indexes: Optional[list[int]] = None
 
+    @field_validator("h3_indexes")
+    @classmethod
+    def validate_h3_indexes(cls, v: Optional[list[int]]) -> Optional[list[int]]:
+        if v is not None:
+            validate_cells(v)
+        return v
+
 
 class GeofenceOut(GeofenceBase):
     id: UUID
     organization_id: UUID
     created_by: UUID
     h3_indexes: list[int] = Field(default_factory=list)
+    cells_mode: GeofenceCellsMode = GeofenceCellsMode.FULL
+    cell_count: int = 0
     is_active: bool
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
@@ -36,7 +62,61 @@ class GeofenceOut(GeofenceBase):
         from_attributes = True
 
 
+class GeofenceCellsPage(BaseModel):
+    geofence_id: UUID
+    h3_indexes: list[int] = Field(default_factory=list)
+    limit: int
+    cursor: Optional[int] = None
+    has_more: bool
+
+
+class GeofenceChangesResponse(BaseModel):
+    since: int
+    version: int = Field(..., description="Valor de `since` para la siguiente página")
+    upserted: list[GeofenceOut] = Field(default_factory=list)
+    deleted: list[UUID] = Field(default_factory=list)
+    has_more: bool
+
+
 class GeofenceDeleteOut(BaseModel):
     message: str
     geofence_id: UUID
     is_active: bool
+
+
+class GeofenceVisitOut(BaseModel):
+    device_id: str
+    trip_id: UUID
+    entered_at: datetime
+    exited_at: datetime
+    points: int
+
+
+class GeofenceVisitListResponse(BaseModel):
+    geofence_id: UUID
+    start_date: datetime
+    end_date: datetime
+    device_count: int
+    visits: list[GeofenceVisitOut] = Field(default_factory=list)
+
+
+class GeofenceLookupPoint(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+
+
+class GeofenceLookupRequest(BaseModel):
+    points: list[GeofenceLookupPoint] = Field(..., min_length=1, max_length=1000)
+    organization_id: Optional[UUID] = Field(
+        None, description="Solo PASETO; Cognito usa la organización del usuario"
+    )
+
+
+class GeofenceLookupResult(BaseModel):
+    lat: float
+    lng: float
+    geofence_ids: list[UUID] = Field(default_factory=list)
+
+
+class GeofenceLookupResponse(BaseModel):
+    results: list[GeofenceLookupResult] = Field(default_factory=list)
@@ -85,6 +85,16 @@ class OrganizationOut(OrganizationBase):
         }
 
 
+class InternalOrganizationOut(OrganizationOut):
+    """Organización en listados internos, con su suscripción activa principal."""
+
+    plan_id: Optional[UUID] = None
+    plan_code: Optional[str] = None
+    plan_name: Optional[str] = None
+    subscription_status: Optional[str] = None
+    subscription_expires_at: Optional[datetime] = None
+
+
 class OrganizationUpdate(BaseModel):
     """Schema para actualizar una organización."""
 
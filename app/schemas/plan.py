@@ -80,6 +80,13 @@ class PlanOut(PlanBase):
         }
 
 
+class PlanProductOut(BaseModel):
+    """Producto incluido en un plan (catálogo público)."""
+
+    code: str
+    name: str
+
+
 class PlanDetailOut(PlanBase):
     """
     Plan con detalle completo para frontend.
@@ -88,6 +95,7 @@ class PlanDetailOut(PlanBase):
     - Precios estructurados
     - Ciclos de facturación disponibles
     - Capabilities del plan
+    - Productos incluidos
     - Features destacados (para UI)
     """
 
@@ -101,6 +109,9 @@ class PlanDetailOut(PlanBase):
         default_factory=dict,
         description="Capabilities incluidas en el plan (límites y features)",
     )
+    products: list[PlanProductOut] = Field(
+        default_factory=list, description="Productos activos incluidos en el plan"
+    )
     highlighted_features: list[str] = Field(
         default_factory=list, description="Features destacados para mostrar en UI"
     )
@@ -132,6 +143,7 @@ class PlanDetailOut(PlanBase):
                     "ai_features": True,
                     "analytics_tools": True,
                 },
+                "products": [{"code": "gps_tracker", "name": "GPS Tracker"}],
                 "highlighted_features": [
                     "Hasta 50 dispositivos",
                     "100 geocercas",
@@ -0,0 +1,31 @@
+from typing import Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+SnapshotEntity = Literal["alert_rule", "geofence"]
+
+
+class SnapshotRequest(BaseModel):
+    organization_id: Optional[UUID] = Field(
+        None, description="Organización a publicar; vacío publica todas"
+    )
+    entities: list[SnapshotEntity] = Field(
+        default_factory=lambda: ["alert_rule", "geofence"], min_length=1
+    )
+    max_events_per_second: Optional[int] = Field(
+        None,
+        ge=0,
+        description="Ritmo máximo; por defecto SNAPSHOT_MAX_EVENTS_PER_SECOND",
+    )
+
+
+class SnapshotResponse(BaseModel):
+    snapshot_id: UUID
+    organization_id: Optional[UUID] = None
+    events: dict[str, int] = Field(
+        ..., description="Eventos publicados por tipo de entidad (incluye chunks)"
+    )
+    published: int
+    failed: int
+    duration_ms: int
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional
 from uuid import UUID
 
@@ -213,3 +213,103 @@ class TripListResponse(BaseModel):
                 "has_more": False,
             }
         }
+
+
+# ============================================
+# Trip Daily Summary Schemas
+# ============================================
+
+
+class TripDailySummaryOut(BaseModel):
+    """Schema de salida para el resumen diario de conducción de un dispositivo"""
+
+    device_id: str = Field(..., description="ID del dispositivo")
+    day: date = Field(
+        ..., description="Día en la zona horaria de la organización (YYYY-MM-DD)"
+    )
+    timezone: str = Field(..., description="Zona horaria usada para calcular el día")
+    trip_count: int = Field(..., description="Número de viajes iniciados en el día")
+    distance_km: float = Field(..., description="Distancia recorrida en kilómetros")
+    driving_minutes: float = Field(..., description="Minutos de manejo en el día")
+    max_speed: Optional[float] = Field(
+        None, description="Velocidad máxima registrada (km/h)"
+    )
+    alert_count: int = Field(..., description="Número de alertas de los viajes")
+
+    class Config:
+        from_attributes = True
+
+
+class TripDailySummaryListResponse(BaseModel):
+    """Schema de respuesta para listado de resúmenes diarios con paginación"""
+
+    summaries: List[TripDailySummaryOut] = Field(
+        ..., description="Resúmenes ordenados por día (desc) y dispositivo"
+    )
+    limit: int = Field(..., description="Límite de resultados por página")
+    cursor: Optional[str] = Field(
+        None, description="Cursor para la siguiente página (día|device_id)"
+    )
+    has_more: bool = Field(..., description="Indica si hay más resultados disponibles")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "summaries": [
+                    {
+                        "device_id": "864537040123456",
+                        "day": "2025-11-29",
+                        "timezone": "America/Mexico_City",
+                        "trip_count": 6,
+                        "distance_km": 84.3,
+                        "driving_minutes": 192.5,
+                        "max_speed": 98.0,
+                        "alert_count": 2,
+                    }
+                ],
+                "limit": 100,
+                "cursor": None,
+                "has_more": False,
+            }
+        }
+
+
+class TripHeatmapCell(BaseModel):
+    """Celda H3 del heatmap de trips"""
+
+    h3_index: int = Field(..., description="Índice H3 de la celda (entero)")
+    points: int = Field(..., description="Número de puntos GPS en la celda")
+    avg_speed: Optional[float] = Field(
+        None, description="Velocidad promedio de los puntos (km/h)"
+    )
+
+
+class TripHeatmapResponse(BaseModel):
+    """Schema de respuesta del heatmap H3 de trips"""
+
+    resolution: int = Field(..., description="Resolución H3 de las celdas")
+    start_date: datetime = Field(..., description="Inicio del rango (inclusivo)")
+    end_date: datetime = Field(..., description="Fin del rango (exclusivo)")
+    device_count: int = Field(..., description="Dispositivos incluidos")
+    total_points: int = Field(..., description="Total de puntos agregados")
+    cells: List[TripHeatmapCell] = Field(
+        ..., description="Celdas ordenadas por número de puntos (desc)"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "resolution": 9,
+                "start_date": "2025-11-01T00:00:00Z",
+                "end_date": "2025-12-01T00:00:00Z",
+                "device_count": 12,
+                "total_points": 48210,
+                "cells": [
+                    {
+                        "h3_index": 617733123456789503,
+                        "points": 1520,
+                        "avg_speed": 3.4,
+                    }
+                ],
+            }
+        }
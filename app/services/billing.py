@@ -7,6 +7,8 @@ from sqlalchemy.orm import Session
 from app.models.device import Device
 from app.models.device_service import DeviceService, DeviceServiceStatus
 from app.models.payment import Payment, PaymentStatus
+from app.services.billing_aggregates import notify_payment_aggregates_changed
+from app.services.expiry_sweep import expire_device_services
 
 
 def confirm_payment(
@@ -70,6 +72,9 @@ def confirm_payment(
         device.active = True
         db.add(device)
 
+    # Los totales de /billing/summary cambian con el pago confirmado
+    notify_payment_aggregates_changed(db, payment.account_id)
+
     db.commit()
     db.refresh(payment)
 
@@ -79,7 +84,10 @@ def confirm_payment(
 def check_expired_services(db: Session) -> int:
     """
     Marca como EXPIRED los servicios cuyo expires_at ya pasó y auto_renew es False.
-    Esta función está diseñada para ejecutarse como un cron job.
+
+    Delega en el barrido por lotes de app.services.expiry_sweep, que además
+    expira suscripciones y se ejecuta periódicamente con
+    EXPIRY_SWEEP_INTERVAL_SECONDS.
 
     Args:
         db: Sesión de base de datos
@@ -87,48 +95,7 @@ def check_expired_services(db: Session) -> int:
     Returns:
         Cantidad de servicios marcados como expirados
     """
-    now = datetime.utcnow()
-
-    # Buscar servicios ACTIVE que ya expiraron y no tienen auto_renew
-    expired_services = (
-        db.query(DeviceService)
-        .filter(
-            DeviceService.status == DeviceServiceStatus.ACTIVE.value,
-            DeviceService.expires_at <= now,
-            not DeviceService.auto_renew,
-        )
-        .all()
-    )
-
-    count = 0
-    for service in expired_services:
-        service.status = DeviceServiceStatus.EXPIRED.value
-        db.add(service)
-
-        # Verificar si el dispositivo tiene otros servicios activos
-        other_active = (
-            db.query(DeviceService)
-            .filter(
-                DeviceService.device_id == service.device_id,
-                DeviceService.status == DeviceServiceStatus.ACTIVE.value,
-                DeviceService.id != service.id,
-            )
-            .first()
-        )
-
-        # Si no hay otros servicios activos, marcar device.active = False
-        if not other_active:
-            device = db.query(Device).filter(Device.id == service.device_id).first()
-            if device:
-                device.active = False
-                db.add(device)
-
-        count += 1
-
-    if count > 0:
-        db.commit()
-
-    return count
+    return expire_device_services(db)
 
 
 def cancel_device_service(
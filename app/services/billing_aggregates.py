@@ -0,0 +1,172 @@
+"""
+Agregados de pagos para /billing/summary.
+
+Los pagos pertenecen al Account (ver app.models.payment), así que los
+agregados se calculan y se guardan en caché por account_id: todas las
+organizaciones del account comparten la misma entrada.
+
+  - Una sola consulta sobre payments: totales con SUM/COUNT FILTER (WHERE
+    status = ...) y el último pago exitoso con row_number() sobre el mismo
+    recorrido, en lugar de cuatro consultas por petición.
+  - La entrada vence a los BILLING_AGGREGATES_TTL_SECONDS (0 deshabilita la
+    caché). confirm_payment() llama a notify_payment_aggregates_changed()
+    antes del commit: invalida la entrada en este proceso y emite pg_notify;
+    al confirmarse, el listener de cada worker invalida su copia (ver
+    pg_notifications).
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.payment import Payment, PaymentStatus
+from app.services.pg_notifications import NotificationListener
+from app.utils.generation_cache import GenerationCache
+from app.utils.metrics import increment_counter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PaymentAggregates:
+    total_paid: Decimal
+    payments_count: int
+    pending_amount: Decimal
+    last_payment_date: Optional[datetime]
+    last_payment_amount: Optional[Decimal]
+
+
+def compute_payment_aggregates(db: Session, account_id: UUID) -> PaymentAggregates:
+    """Totales pagados/pendientes y último pago exitoso en una consulta."""
+    ranked = (
+        db.query(
+            Payment.amount,
+            Payment.status,
+            Payment.paid_at,
+            func.row_number()
+            .over(
+                partition_by=Payment.status,
+                order_by=Payment.paid_at.desc().nulls_last(),
+            )
+            .label("position"),
+        )
+        .filter(Payment.account_id == account_id)
+        .subquery()
+    )
+    is_success = ranked.c.status == PaymentStatus.SUCCESS.value
+    is_last_success = and_(is_success, ranked.c.position == 1)
+
+    row = db.query(
+        func.sum(ranked.c.amount).filter(is_success).label("total_paid"),
+        func.count().filter(is_success).label("payments_count"),
+        func.sum(ranked.c.amount)
+        .filter(ranked.c.status == PaymentStatus.PENDING.value)
+        .label("pending_amount"),
+        func.max(ranked.c.paid_at).filter(is_last_success).label("last_paid_at"),
+        func.max(ranked.c.amount).filter(is_last_success).label("last_amount"),
+    ).one()
+
+    return PaymentAggregates(
+        total_paid=Decimal(row.total_paid or 0),
+        payments_count=row.payments_count or 0,
+        pending_amount=Decimal(row.pending_amount or 0),
+        last_payment_date=row.last_paid_at,
+        last_payment_amount=(
+            Decimal(row.last_amount) if row.last_amount is not None else None
+        ),
+    )
+
+
+# Una invalidación durante el cálculo descarta el resultado calculado con
+# datos previos a la confirmación del pago (ver GenerationCache).
+_cache: GenerationCache[UUID, PaymentAggregates] = GenerationCache()
+
+_ALL_ACCOUNTS = "*"
+
+
+def get_payment_aggregates(db: Session, account_id: UUID) -> PaymentAggregates:
+    """Retorna los agregados del account desde caché o los recalcula."""
+    ttl = settings.BILLING_AGGREGATES_TTL_SECONDS
+    if ttl <= 0:
+        return compute_payment_aggregates(db, account_id)
+
+    aggregates = _cache.get(account_id)
+    if aggregates is not None:
+        increment_counter("billing.aggregates.cache.hit")
+        return aggregates
+
+    increment_counter("billing.aggregates.cache.miss")
+    generation = _cache.generation(account_id)
+    aggregates = compute_payment_aggregates(db, account_id)
+    _cache.store(account_id, aggregates, ttl, generation)
+    return aggregates
+
+
+def invalidate_payment_aggregates(account_id: Optional[UUID] = None) -> None:
+    """Descarta la entrada del account (o todas con account_id None)."""
+    _cache.invalidate(account_id)
+
+
+def notify_payment_aggregates_changed(db: Session, account_id: UUID) -> None:
+    """
+    Invalida la entrada local y notifica a los demás workers al hacer commit.
+
+    Debe llamarse antes del commit del cambio de pagos.
+    """
+    invalidate_payment_aggregates(account_id)
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {
+            "channel": settings.BILLING_AGGREGATES_INVALIDATION_CHANNEL,
+            "payload": str(account_id),
+        },
+    )
+
+
+def handle_notification(payload: str) -> None:
+    if payload == _ALL_ACCOUNTS:
+        invalidate_payment_aggregates()
+        return
+    try:
+        invalidate_payment_aggregates(UUID(payload))
+    except ValueError:
+        logger.warning(
+            "[BILLING] Notificación de invalidación inválida.",
+            extra={"extra_data": {"payload": payload}},
+        )
+
+
+_listener: Optional[NotificationListener] = None
+
+
+def start_payment_aggregates_listener() -> None:
+    """Inicia el listener si la caché está habilitada (TTL > 0)."""
+    global _listener
+    if settings.BILLING_AGGREGATES_TTL_SECONDS <= 0 or _listener is not None:
+        return
+
+    _listener = NotificationListener(
+        settings.BILLING_AGGREGATES_INVALIDATION_CHANNEL,
+        on_notify=handle_notification,
+        on_connect=invalidate_payment_aggregates,
+        name="billing-aggregates-listener",
+    )
+    _listener.start()
+
+
+def stop_payment_aggregates_listener() -> None:
+    global _listener
+    if _listener is None:
+        return
+
+    _listener.stop()
+    _listener = None
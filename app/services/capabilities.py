@@ -15,16 +15,29 @@ USO:
     # Validar límite antes de crear
     if not CapabilityService.validate_limit(db, org_id, "max_geofences", current_count):
         raise HTTPException(403, "Límite de geocercas alcanzado")
+
+CACHÉ:
+    Las consultas por organización usan EffectiveCapabilities en caché (ver
+    app.services.capability_cache). Todo cambio que altere la resolución debe
+    llamar effective_capabilities.capabilities_changed() antes del commit:
+    recalcula la tabla organization_effective_capabilities e invalida la
+    caché de todos los workers.
 """
 
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Optional, Union
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional, Sequence, Union
 from uuid import UUID
 
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models.capability import Capability, OrganizationCapability, PlanCapability
+from app.services import capability_cache
+from app.services.subscription_query import (
+    active_plan_id_subquery,
+    get_active_plan_ids,
+)
 from app.services.subscription_query import get_active_plan_id as _get_active_plan_id
 
 
@@ -83,6 +96,85 @@ DEFAULT_CAPABILITIES: dict[str, Any] = {
 }
 
 
+def _resolve(
+    code: str,
+    org_override: Optional[OrganizationCapability],
+    plan_cap: Optional[PlanCapability],
+) -> ResolvedCapability:
+    """Aplica override ?? plan ?? default sobre filas ya cargadas."""
+    if org_override and not org_override.is_expired():
+        return ResolvedCapability(
+            code=code,
+            value=org_override.get_value(),
+            source="organization",
+            expires_at=org_override.expires_at,
+        )
+
+    if plan_cap:
+        return ResolvedCapability(
+            code=code,
+            value=plan_cap.get_value(),
+            source="plan",
+            plan_id=plan_cap.plan_id,
+        )
+
+    return ResolvedCapability(
+        code=code, value=DEFAULT_CAPABILITIES.get(code), source="default"
+    )
+
+
+def _resolve_all(
+    capabilities: Iterable[Capability],
+    overrides: dict[UUID, OrganizationCapability],
+    plan_caps: dict[UUID, PlanCapability],
+) -> dict[str, ResolvedCapability]:
+    """Resuelve todas las capabilities; overrides/plan_caps por capability_id."""
+    result = {
+        cap.code: _resolve(cap.code, overrides.get(cap.id), plan_caps.get(cap.id))
+        for cap in capabilities
+    }
+
+    # Agregar defaults que no están en la BD
+    for code, default_value in DEFAULT_CAPABILITIES.items():
+        if code not in result:
+            result[code] = ResolvedCapability(
+                code=code, value=default_value, source="default"
+            )
+
+    return result
+
+
+@dataclass(frozen=True)
+class EffectiveCapabilities:
+    """Mapa resuelto de capabilities de una organización (inmutable)."""
+
+    organization_id: UUID
+    capabilities: dict[str, ResolvedCapability]
+
+    def get(self, capability_code: str) -> ResolvedCapability:
+        resolved = self.capabilities.get(capability_code)
+        if resolved is None:
+            return ResolvedCapability(
+                code=capability_code,
+                value=DEFAULT_CAPABILITIES.get(capability_code),
+                source="default",
+            )
+        return resolved
+
+    def ttl_seconds(self, max_ttl: float) -> float:
+        """TTL de caché: no más allá del override que expira primero."""
+        now = datetime.utcnow()
+        ttl = max_ttl
+        for resolved in self.capabilities.values():
+            expires_at = resolved.expires_at
+            if resolved.source != "organization" or expires_at is None:
+                continue
+            if expires_at.tzinfo is not None:
+                expires_at = expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+            ttl = min(ttl, (expires_at - now).total_seconds())
+        return max(ttl, 0)
+
+
 class CapabilityService:
     """
     Servicio centralizado para resolución de capabilities.
@@ -123,64 +215,38 @@ class CapabilityService:
         Returns:
             ResolvedCapability con el valor y metadatos
         """
-        _now = datetime.utcnow()
-
-        # 1. Buscar la definición de la capability
-        capability = (
-            db.query(Capability).filter(Capability.code == capability_code).first()
+        return CapabilityService.get_effective_capabilities(db, organization_id).get(
+            capability_code
         )
 
-        if not capability:
-            # Capability no existe, usar default si lo hay
-            default_value = DEFAULT_CAPABILITIES.get(capability_code)
-            return ResolvedCapability(
-                code=capability_code, value=default_value, source="default"
-            )
+    @staticmethod
+    def get_effective_capabilities(
+        db: Session,
+        organization_id: UUID,
+    ) -> EffectiveCapabilities:
+        """
+        Retorna las capabilities efectivas de la organización desde caché.
 
-        # 2. Buscar override de organización (no expirado)
-        org_override = (
-            db.query(OrganizationCapability)
-            .filter(
-                OrganizationCapability.organization_id == organization_id,
-                OrganizationCapability.capability_id == capability.id,
-            )
-            .first()
+        En un fallo de caché se resuelven con get_all_capabilities y se
+        guardan por CAPABILITY_CACHE_TTL_SECONDS (o hasta que expire el
+        override más próximo).
+        """
+        cached = capability_cache.get_cached(organization_id)
+        if cached is not None:
+            return cached
+
+        generation = capability_cache.current_generation(organization_id)
+        effective = EffectiveCapabilities(
+            organization_id=organization_id,
+            capabilities=CapabilityService.get_all_capabilities(db, organization_id),
         )
-
-        if org_override and not org_override.is_expired():
-            return ResolvedCapability(
-                code=capability_code,
-                value=org_override.get_value(),
-                source="organization",
-                expires_at=org_override.expires_at,
-            )
-
-        # 3. Buscar en plan de suscripción activa
-        plan_id = CapabilityService.get_active_plan_id(db, organization_id)
-
-        if plan_id:
-            plan_cap = (
-                db.query(PlanCapability)
-                .filter(
-                    PlanCapability.plan_id == plan_id,
-                    PlanCapability.capability_id == capability.id,
-                )
-                .first()
-            )
-
-            if plan_cap:
-                return ResolvedCapability(
-                    code=capability_code,
-                    value=plan_cap.get_value(),
-                    source="plan",
-                    plan_id=plan_id,
-                )
-
-        # 4. Usar valor por defecto
-        default_value = DEFAULT_CAPABILITIES.get(capability_code)
-        return ResolvedCapability(
-            code=capability_code, value=default_value, source="default"
+        capability_cache.store(
+            organization_id,
+            effective,
+            effective.ttl_seconds(settings.CAPABILITY_CACHE_TTL_SECONDS),
+            generation,
         )
+        return effective
 
     @staticmethod
     def get_all_capabilities(
@@ -190,26 +256,84 @@ class CapabilityService:
         """
         Obtiene todas las capabilities resueltas para una organización.
 
+        Resuelve el mapa completo en tres consultas (definiciones, overrides
+        de la organización y plan_capabilities del plan activo) y aplica
+        override ?? plan ?? default en memoria.
+
         Returns:
             Diccionario con código -> ResolvedCapability
         """
-        result = {}
-
-        # Obtener todas las capabilities definidas
         capabilities = db.query(Capability).all()
 
-        for cap in capabilities:
-            resolved = CapabilityService.get_capability(db, organization_id, cap.code)
-            result[cap.code] = resolved
+        overrides = {
+            override.capability_id: override
+            for override in db.query(OrganizationCapability)
+            .filter(OrganizationCapability.organization_id == organization_id)
+            .all()
+        }
+
+        plan_caps = {
+            plan_cap.capability_id: plan_cap
+            for plan_cap in db.query(PlanCapability)
+            .filter(
+                PlanCapability.plan_id == active_plan_id_subquery(db, organization_id)
+            )
+            .all()
+        }
+
+        return _resolve_all(capabilities, overrides, plan_caps)
+
+    @staticmethod
+    def get_all_capabilities_bulk(
+        db: Session,
+        organization_ids: Sequence[UUID],
+    ) -> dict[UUID, dict[str, ResolvedCapability]]:
+        """
+        Resuelve el mapa completo de capabilities de varias organizaciones.
+
+        Usa cuatro consultas sin importar la cantidad de organizaciones
+        (definiciones, overrides, plan activo por organización y
+        plan_capabilities de esos planes); lo usa la tabla materializada
+        organization_effective_capabilities.
+
+        Returns:
+            Diccionario organization_id -> (código -> ResolvedCapability)
+        """
+        if not organization_ids:
+            return {}
+
+        capabilities = db.query(Capability).all()
 
-        # Agregar defaults que no están en la BD
-        for code, default_value in DEFAULT_CAPABILITIES.items():
-            if code not in result:
-                result[code] = ResolvedCapability(
-                    code=code, value=default_value, source="default"
-                )
+        overrides: dict[UUID, dict[UUID, OrganizationCapability]] = {}
+        for override in (
+            db.query(OrganizationCapability)
+            .filter(OrganizationCapability.organization_id.in_(organization_ids))
+            .all()
+        ):
+            overrides.setdefault(override.organization_id, {})[
+                override.capability_id
+            ] = override
+
+        plan_ids = get_active_plan_ids(db, organization_ids)
+        plan_caps: dict[UUID, dict[UUID, PlanCapability]] = {}
+        if plan_ids:
+            for plan_cap in (
+                db.query(PlanCapability)
+                .filter(PlanCapability.plan_id.in_(set(plan_ids.values())))
+                .all()
+            ):
+                plan_caps.setdefault(plan_cap.plan_id, {})[
+                    plan_cap.capability_id
+                ] = plan_cap
 
-        return result
+        return {
+            organization_id: _resolve_all(
+                capabilities,
+                overrides.get(organization_id, {}),
+                plan_caps.get(plan_ids.get(organization_id), {}),
+            )
+            for organization_id in organization_ids
+        }
 
     @staticmethod
     def has_capability(
@@ -293,7 +417,9 @@ class CapabilityService:
         Returns:
             Diccionario con límites y features agrupados
         """
-        all_caps = CapabilityService.get_all_capabilities(db, organization_id)
+        all_caps = CapabilityService.get_effective_capabilities(
+            db, organization_id
+        ).capabilities
 
         limits = {}
         features = {}
@@ -0,0 +1,128 @@
+"""
+Caché en memoria de capabilities efectivas por organización.
+
+  - Cada entrada vence a los CAPABILITY_CACHE_TTL_SECONDS o antes, si un
+    override de la organización expira primero (ver
+    EffectiveCapabilities.ttl_seconds).
+  - notify_capabilities_changed() invalida la entrada en este proceso y
+    emite pg_notify en la transacción del llamador; al confirmarse, el
+    listener de cada worker (incluido este) invalida su copia.
+  - organization_id None invalida todas las organizaciones (cambios de
+    plan_capabilities afectan a todas las que usan el plan).
+
+Si el listener pierde la conexión se limpia toda la caché al reconectar,
+porque pudo perder notificaciones.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.pg_notifications import NotificationListener
+from app.utils.generation_cache import Generation, GenerationCache
+from app.utils.metrics import increment_counter
+
+logger = logging.getLogger(__name__)
+
+_ALL_ORGANIZATIONS = "*"
+
+# Una invalidación durante la construcción descarta la entrada construida
+# con datos previos (ver GenerationCache).
+_cache: GenerationCache[UUID, Any] = GenerationCache()
+
+
+def get_cached(organization_id: UUID) -> Optional[Any]:
+    value = _cache.get(organization_id)
+    if value is None:
+        increment_counter("capabilities.cache.miss")
+        return None
+
+    increment_counter("capabilities.cache.hit")
+    return value
+
+
+def current_generation(organization_id: UUID) -> Generation:
+    return _cache.generation(organization_id)
+
+
+def store(
+    organization_id: UUID,
+    value: Any,
+    ttl_seconds: float,
+    generation: Generation,
+) -> None:
+    """Guarda la entrada si no hubo invalidaciones desde `generation`."""
+    _cache.store(organization_id, value, ttl_seconds, generation)
+
+
+def invalidate(organization_id: Optional[UUID] = None) -> None:
+    _cache.invalidate(organization_id)
+
+
+def notify_capabilities_changed(
+    db: Session, organization_id: Optional[UUID] = None
+) -> None:
+    """
+    Invalida la caché local y notifica a los demás workers al hacer commit.
+
+    Debe llamarse antes del commit del cambio (organization_capabilities,
+    plan_capabilities o estado de suscripciones).
+    """
+    invalidate(organization_id)
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {
+            "channel": settings.CAPABILITY_INVALIDATION_CHANNEL,
+            "payload": str(organization_id) if organization_id else _ALL_ORGANIZATIONS,
+        },
+    )
+
+
+def handle_notification(payload: str) -> None:
+    if payload == _ALL_ORGANIZATIONS:
+        invalidate()
+        return
+    try:
+        invalidate(UUID(payload))
+    except ValueError:
+        logger.warning(
+            "[CAPABILITIES] Notificación de invalidación inválida.",
+            extra={"extra_data": {"payload": payload}},
+        )
+
+
+# ---------------------------------------------------------------------------
+# Listener de invalidaciones entre workers (LISTEN/NOTIFY)
+# ---------------------------------------------------------------------------
+
+_listener: Optional[NotificationListener] = None
+
+
+def start_capability_invalidation_listener() -> None:
+    """Inicia el listener si la caché está habilitada (TTL > 0)."""
+    global _listener
+    if settings.CAPABILITY_CACHE_TTL_SECONDS <= 0 or _listener is not None:
+        return
+
+    _listener = NotificationListener(
+        settings.CAPABILITY_INVALIDATION_CHANNEL,
+        on_notify=handle_notification,
+        on_connect=invalidate,
+        name="capability-invalidation-listener",
+    )
+    _listener.start()
+
+
+def stop_capability_invalidation_listener() -> None:
+    global _listener
+    if _listener is None:
+        return
+
+    _listener.stop()
+    _listener = None
@@ -0,0 +1,265 @@
+"""
+Capabilities efectivas materializadas por organización.
+
+La tabla organization_effective_capabilities guarda el resultado de
+override ?? plan ?? default para cada organización, con su origen, plan y
+expiración. Los consumidores externos (GAC, motor de alertas) la leen en
+bloque con POST /internal/organizations/capabilities/bulk en lugar de
+reimplementar la resolución.
+
+Recalculo:
+  - capabilities_changed() se llama antes del commit en cada evento que
+    altera la resolución (overrides, plan_capabilities, suscripciones);
+    recalcula las filas afectadas en la misma transacción e invalida la
+    caché en memoria de todos los workers.
+  - Los overrides con expires_at vencen sin un evento: las filas con
+    expires_at <= now() se recalculan al leerlas
+    (get_effective_capabilities_bulk) o con refresh_expired_effective_capabilities.
+
+Los defaults viven en código (DEFAULT_CAPABILITIES), por eso el recalculo lo
+hace la API y no una vista materializada de PostgreSQL.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Iterator, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.organization import Organization
+from app.models.organization_effective_capability import (
+    OrganizationEffectiveCapability,
+)
+from app.services.capabilities import CapabilityService, ResolvedCapability
+from app.services.capability_cache import notify_capabilities_changed
+from app.services.subscription_query import get_organization_ids_with_active_plan
+from app.utils.metrics import increment_counter, record_timing
+
+logger = logging.getLogger(__name__)
+
+REFRESH_CHUNK_SIZE = 1000
+
+
+def _chunks(values: Sequence[UUID], size: int) -> Iterator[Sequence[UUID]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _row(organization_id: UUID, resolved: ResolvedCapability) -> dict[str, Any]:
+    value = resolved.value
+    return {
+        "organization_id": organization_id,
+        "capability_code": resolved.code,
+        # bool antes que int: bool es subclase de int
+        "value_bool": value if isinstance(value, bool) else None,
+        "value_int": (
+            value if isinstance(value, int) and not isinstance(value, bool) else None
+        ),
+        "value_text": value if isinstance(value, str) else None,
+        "source": resolved.source,
+        "plan_id": resolved.plan_id,
+        "expires_at": resolved.expires_at,
+        "computed_at": datetime.now(timezone.utc),
+    }
+
+
+def _refresh_chunk(db: Session, organization_ids: Sequence[UUID]) -> int:
+    resolved = CapabilityService.get_all_capabilities_bulk(db, organization_ids)
+    rows = [
+        _row(organization_id, capability)
+        for organization_id, capabilities in resolved.items()
+        for capability in capabilities.values()
+    ]
+
+    # Capabilities eliminadas del catálogo no deben quedar materializadas
+    db.query(OrganizationEffectiveCapability).filter(
+        OrganizationEffectiveCapability.organization_id.in_(organization_ids)
+    ).delete(synchronize_session=False)
+
+    if rows:
+        # ON CONFLICT: dos recalculos concurrentes de la misma organización
+        # no fallan; gana el último en confirmar
+        statement = insert(OrganizationEffectiveCapability.__table__)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["organization_id", "capability_code"],
+                set_={
+                    column: statement.excluded[column]
+                    for column in (
+                        "value_int",
+                        "value_bool",
+                        "value_text",
+                        "source",
+                        "plan_id",
+                        "expires_at",
+                        "computed_at",
+                    )
+                },
+            ),
+            rows,
+        )
+    return len(rows)
+
+
+def refresh_effective_capabilities(
+    db: Session,
+    organization_ids: Optional[Sequence[UUID]] = None,
+) -> int:
+    """
+    Recalcula las capabilities materializadas (no hace commit).
+
+    Args:
+        organization_ids: Organizaciones a recalcular; None recalcula todas
+
+    Returns:
+        int: Filas escritas
+    """
+    started = time.monotonic()
+    if organization_ids is None:
+        organization_ids = (
+            db.execute(select(Organization.id).order_by(Organization.id))
+            .scalars()
+            .all()
+        )
+    organization_ids = list(dict.fromkeys(organization_ids))
+
+    written = 0
+    for chunk in _chunks(organization_ids, REFRESH_CHUNK_SIZE):
+        written += _refresh_chunk(db, chunk)
+
+    increment_counter(
+        "capabilities.materialized.organizations", value=len(organization_ids)
+    )
+    record_timing(
+        "capabilities.materialized.refresh_ms", (time.monotonic() - started) * 1000
+    )
+    return written
+
+
+def capabilities_changed(
+    db: Session,
+    organization_id: Optional[UUID] = None,
+    plan_id: Optional[UUID] = None,
+    organization_ids: Optional[Sequence[UUID]] = None,
+) -> None:
+    """
+    Propaga un cambio que altera la resolución de capabilities.
+
+    Debe llamarse antes del commit del cambio, después de aplicarlo en la
+    sesión:
+      - organization_id: overrides o suscripciones de esa organización.
+      - organization_ids: cambios en lote (barrido de expiraciones); se
+        recalculan esas organizaciones y se invalida la caché completa con
+        una sola notificación.
+      - plan_id: plan_capabilities; se recalculan las organizaciones con una
+        suscripción activa al plan.
+      - ninguno: se recalculan todas las organizaciones.
+    """
+    # La sesión no hace autoflush: el recalculo debe ver el cambio pendiente
+    db.flush()
+
+    if organization_id is not None:
+        refresh_effective_capabilities(db, [organization_id])
+    elif organization_ids is not None:
+        refresh_effective_capabilities(db, list(organization_ids))
+    elif plan_id is not None:
+        refresh_effective_capabilities(
+            db, get_organization_ids_with_active_plan(db, plan_id)
+        )
+    else:
+        refresh_effective_capabilities(db)
+
+    notify_capabilities_changed(db, organization_id)
+
+
+def refresh_expired_effective_capabilities(db: Session) -> int:
+    """
+    Recalcula las organizaciones con algún override materializado vencido
+    y hace commit.
+
+    Returns:
+        int: Organizaciones recalculadas
+    """
+    organization_ids = (
+        db.execute(
+            select(OrganizationEffectiveCapability.organization_id)
+            .where(
+                OrganizationEffectiveCapability.expires_at <= datetime.now(timezone.utc)
+            )
+            .distinct()
+        )
+        .scalars()
+        .all()
+    )
+    if not organization_ids:
+        return 0
+
+    refresh_effective_capabilities(db, organization_ids)
+    for organization_id in organization_ids:
+        notify_capabilities_changed(db, organization_id)
+    db.commit()
+    return len(organization_ids)
+
+
+def get_effective_capabilities_bulk(
+    db: Session,
+    organization_ids: Sequence[UUID],
+) -> dict[UUID, list[OrganizationEffectiveCapability]]:
+    """
+    Lee las capabilities materializadas de varias organizaciones.
+
+    Las organizaciones sin filas (aún no materializadas) o con un override
+    vencido se recalculan antes de responder.
+
+    Returns:
+        Diccionario organization_id -> filas; las organizaciones que no
+        existen no aparecen
+    """
+    organization_ids = list(dict.fromkeys(organization_ids))
+    if not organization_ids:
+        return {}
+
+    now = datetime.now(timezone.utc)
+    result: dict[UUID, list[OrganizationEffectiveCapability]] = {}
+    stale: set[UUID] = set()
+    for row in (
+        db.query(OrganizationEffectiveCapability)
+        .filter(OrganizationEffectiveCapability.organization_id.in_(organization_ids))
+        .all()
+    ):
+        result.setdefault(row.organization_id, []).append(row)
+        if row.expires_at is not None and row.expires_at <= now:
+            stale.add(row.organization_id)
+
+    missing = [
+        organization_id
+        for organization_id in organization_ids
+        if organization_id not in result
+    ]
+    if missing:
+        stale.update(
+            db.execute(select(Organization.id).where(Organization.id.in_(missing)))
+            .scalars()
+            .all()
+        )
+
+    if stale:
+        refresh_effective_capabilities(db, list(stale))
+        db.commit()
+        increment_counter("capabilities.materialized.lazy_refresh", value=len(stale))
+        for organization_id in stale:
+            result.pop(organization_id, None)
+        for row in (
+            db.query(OrganizationEffectiveCapability)
+            .filter(OrganizationEffectiveCapability.organization_id.in_(stale))
+            .all()
+        ):
+            result.setdefault(row.organization_id, []).append(row)
+
+    return result
@@ -0,0 +1,90 @@
+"""
+Sincronización incremental (delta sync) de entidades por organización.
+
+entity_changes se alimenta por trigger en cada INSERT/UPDATE/DELETE de
+geofences y alert_rules (migración 016). Este módulo expone:
+
+  - La versión actual de una organización/tipo (base de los ETags de los
+    listados completos).
+  - Los IDs de entidades cambiadas desde una versión, con su última versión,
+    paginados por versión ascendente.
+
+El endpoint decide si cada ID es un upsert o un delete consultando el estado
+actual de la entidad (inexistente o is_active=False → delete).
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import List, Tuple
+from uuid import UUID
+
+from fastapi import Request
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.entity_change import EntityChange
+
+ENTITY_GEOFENCE = "geofence"
+ENTITY_ALERT_RULE = "alert_rule"
+
+
+def get_current_version(db: Session, organization_id: UUID, entity_type: str) -> int:
+    """Última versión registrada para la organización y tipo (0 si no hay)."""
+    version = (
+        db.query(func.max(EntityChange.version))
+        .filter(
+            EntityChange.organization_id == organization_id,
+            EntityChange.entity_type == entity_type,
+        )
+        .scalar()
+    )
+    return version or 0
+
+
+def list_changed_entities(
+    db: Session,
+    organization_id: UUID,
+    entity_type: str,
+    since: int,
+    limit: int,
+) -> Tuple[List[Tuple[UUID, int]], bool]:
+    """
+    Entidades cambiadas después de `since`, una vez cada una con su última
+    versión, ordenadas por esa versión.
+
+    Returns:
+        Tuple[[(entity_id, version)], has_more]
+    """
+    last_version = func.max(EntityChange.version).label("version")
+    rows = (
+        db.query(EntityChange.entity_id, last_version)
+        .filter(
+            EntityChange.organization_id == organization_id,
+            EntityChange.entity_type == entity_type,
+            EntityChange.version > since,
+        )
+        .group_by(EntityChange.entity_id)
+        .order_by(last_version.asc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    has_more = len(rows) > limit
+    return [(row.entity_id, row.version) for row in rows[:limit]], has_more
+
+
+def build_list_etag(organization_id: UUID, version: int, request: Request) -> str:
+    """ETag débil de un listado: versión + organización + query string."""
+    digest = hashlib.sha1(
+        f"{organization_id}|{request.url.query}".encode("utf-8")
+    ).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
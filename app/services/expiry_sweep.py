@@ -0,0 +1,142 @@
+"""
+Barrido de expiraciones: servicios de dispositivo y suscripciones vencidas.
+
+Cada lote es un UPDATE ... WHERE id IN (SELECT ... LIMIT n FOR UPDATE SKIP
+LOCKED) RETURNING, con commit por lote: ninguna fila pasa por Python antes
+de actualizarse y un barrido concurrente (otro worker) toma filas distintas
+en lugar de esperar los bloqueos.
+
+  - device_services ACTIVE con expires_at <= ahora y auto_renew falso pasan
+    a EXPIRED (las de auto_renew esperan al flujo de renovación).
+  - subscriptions ACTIVE/TRIAL con expires_at <= ahora pasan a EXPIRED: la
+    regla de suscripción activa (app.services.subscription_query) ya las
+    excluye por fecha; el barrido alinea el status y recalcula las
+    capabilities materializadas de las organizaciones afectadas.
+
+Con EXPIRY_SWEEP_INTERVAL_SECONDS > 0 el job expiry-sweep del scheduler
+ejecuta el barrido en el worker líder.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.device_service import DeviceService, DeviceServiceStatus
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.services.effective_capabilities import capabilities_changed
+from app.utils.metrics import increment_counter, record_timing
+
+logger = logging.getLogger(__name__)
+
+
+def _record_sweep(kind: str, rows: int, started: float) -> None:
+    elapsed = time.monotonic() - started
+    increment_counter("expiry_sweep.rows", value=rows, tags={"kind": kind})
+    record_timing("expiry_sweep.duration_ms", elapsed * 1000, tags={"kind": kind})
+
+
+def expire_device_services(db: Session, batch_size: Optional[int] = None) -> int:
+    """
+    Marca como EXPIRED los servicios vencidos sin auto_renew, por lotes.
+
+    Returns:
+        int: Servicios marcados como expirados
+    """
+    batch_size = batch_size or settings.EXPIRY_SWEEP_BATCH_SIZE
+    started = time.monotonic()
+    now = datetime.utcnow()
+    total = 0
+
+    while True:
+        expired_ids = (
+            select(DeviceService.id)
+            .where(
+                DeviceService.status == DeviceServiceStatus.ACTIVE.value,
+                DeviceService.expires_at <= now,
+                DeviceService.auto_renew.is_(False),
+            )
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        expired = (
+            db.execute(
+                update(DeviceService)
+                .where(DeviceService.id.in_(expired_ids))
+                .values(status=DeviceServiceStatus.EXPIRED.value)
+                .returning(DeviceService.id)
+                .execution_options(synchronize_session=False)
+            )
+            .scalars()
+            .all()
+        )
+        db.commit()
+
+        total += len(expired)
+        if len(expired) < batch_size:
+            break
+
+    _record_sweep("device_services", total, started)
+    return total
+
+
+def expire_subscriptions(db: Session, batch_size: Optional[int] = None) -> int:
+    """
+    Marca como EXPIRED las suscripciones vencidas, por lotes, y recalcula
+    las capabilities de sus organizaciones en la misma transacción.
+
+    Returns:
+        int: Suscripciones marcadas como expiradas
+    """
+    batch_size = batch_size or settings.EXPIRY_SWEEP_BATCH_SIZE
+    started = time.monotonic()
+    now = datetime.utcnow()
+    total = 0
+
+    while True:
+        expired_ids = (
+            select(Subscription.id)
+            .where(
+                Subscription.status.in_(
+                    [SubscriptionStatus.ACTIVE.value, SubscriptionStatus.TRIAL.value]
+                ),
+                Subscription.expires_at <= now,
+            )
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        organization_ids = (
+            db.execute(
+                update(Subscription)
+                .where(Subscription.id.in_(expired_ids))
+                .values(status=SubscriptionStatus.EXPIRED.value)
+                .returning(Subscription.organization_id)
+                .execution_options(synchronize_session=False)
+            )
+            .scalars()
+            .all()
+        )
+        if organization_ids:
+            capabilities_changed(db, organization_ids=set(organization_ids))
+        db.commit()
+
+        total += len(organization_ids)
+        if len(organization_ids) < batch_size:
+            break
+
+    _record_sweep("subscriptions", total, started)
+    return total
+
+
+def run_expiry_sweep(db: Session) -> dict[str, int]:
+    """Ejecuta ambos barridos y retorna las filas actualizadas por tipo."""
+    return {
+        "device_services": expire_device_services(db),
+        "subscriptions": expire_subscriptions(db),
+    }
@@ -0,0 +1,106 @@
+"""
+Lectura y escritura de celdas H3 de geocercas (geofence_cells).
+
+Las celdas se escriben con sentencias set-based: el arreglo completo viaja
+como un solo parámetro bigint[] y PostgreSQL lo expande con unnest. En una
+actualización solo se borran las celdas que salieron del conjunto y solo se
+insertan las nuevas; las celdas sin cambio no generan escrituras ni WAL.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple, Sequence
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.geofence import GeofenceCell
+
+_INSERT_CELLS_SQL = text(
+    """
+    INSERT INTO geofence_cells (geofence_id, h3_index)
+    SELECT :geofence_id, cell
+    FROM unnest(CAST(:cells AS bigint[])) AS cell
+    """
+)
+
+_DELETE_REMOVED_CELLS_SQL = text(
+    """
+    DELETE FROM geofence_cells
+    WHERE geofence_id = :geofence_id
+      AND h3_index <> ALL(CAST(:cells AS bigint[]))
+    """
+)
+
+_INSERT_ADDED_CELLS_SQL = text(
+    """
+    INSERT INTO geofence_cells (geofence_id, h3_index)
+    SELECT :geofence_id, cell
+    FROM (
+        SELECT unnest(CAST(:cells AS bigint[])) AS cell
+        EXCEPT
+        SELECT h3_index FROM geofence_cells WHERE geofence_id = :geofence_id
+    ) added
+    """
+)
+
+
+class CellChanges(NamedTuple):
+    added: int
+    removed: int
+
+
+def unique_h3_indexes(h3_indexes: Sequence[int]) -> list[int]:
+    return list(dict.fromkeys(h3_indexes))
+
+
+def load_geofence_cells(
+    db: Session, geofence_ids: Sequence[UUID]
+) -> dict[UUID, list[int]]:
+    """Carga en una sola consulta las celdas de varias geocercas."""
+    cells: dict[UUID, list[int]] = {geofence_id: [] for geofence_id in geofence_ids}
+    if not geofence_ids:
+        return cells
+
+    rows = (
+        db.query(GeofenceCell.geofence_id, GeofenceCell.h3_index)
+        .filter(GeofenceCell.geofence_id.in_(list(geofence_ids)))
+        .order_by(GeofenceCell.geofence_id.asc(), GeofenceCell.h3_index.asc())
+        .all()
+    )
+    for row in rows:
+        cells[row.geofence_id].append(row.h3_index)
+    return cells
+
+
+def insert_geofence_cells(
+    db: Session, geofence_id: UUID, h3_indexes: Sequence[int]
+) -> int:
+    """
+    Inserta las celdas de una geocerca nueva en una sola sentencia.
+
+    Returns:
+        int: Número de celdas insertadas
+    """
+    cells = unique_h3_indexes(h3_indexes)
+    if not cells:
+        return 0
+
+    db.execute(_INSERT_CELLS_SQL, {"geofence_id": geofence_id, "cells": cells})
+    return len(cells)
+
+
+def sync_geofence_cells(
+    db: Session, geofence_id: UUID, h3_indexes: Sequence[int]
+) -> CellChanges:
+    """
+    Deja en geofence_cells exactamente el conjunto h3_indexes aplicando solo
+    la diferencia contra las celdas almacenadas. No hace commit.
+    """
+    params = {"geofence_id": geofence_id, "cells": unique_h3_indexes(h3_indexes)}
+
+    removed = db.execute(_DELETE_REMOVED_CELLS_SQL, params).rowcount
+    added = db.execute(_INSERT_ADDED_CELLS_SQL, params).rowcount
+
+    return CellChanges(added=added or 0, removed=removed or 0)
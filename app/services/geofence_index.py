@@ -0,0 +1,200 @@
+"""
+Índice en memoria de geocercas por organización (celda H3 → geocercas).
+
+Responde "qué geocercas contienen este punto" sin consultar la BD en cada
+petición:
+
+  - Se construye de forma perezosa desde geofence_cells (geocercas activas)
+    la primera vez que se consulta una organización.
+  - Las celdas se agrupan por resolución; un punto se convierte a la
+    resolución más fina y se buscan sus padres en las resoluciones más
+    gruesas, por lo que los conjuntos compactados funcionan sin expandirlos.
+  - Las celdas inválidas (guardadas antes de validar la escritura) se
+    omiten y se cuentan en geofence_index.invalid_cells.
+  - create/update/delete de geocercas llaman a notify_geofence_index_changed
+    antes del commit: invalida el índice en este proceso y emite pg_notify;
+    al confirmarse, el listener de cada worker invalida su copia (ver
+    pg_notifications). GEOFENCE_INDEX_TTL_SECONDS acota además la vigencia.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.geofence import Geofence, GeofenceCell
+from app.services.pg_notifications import NotificationListener
+from app.utils.generation_cache import GenerationCache
+from app.utils.h3_cells import h3, is_valid_cell
+from app.utils.metrics import increment_counter
+
+logger = logging.getLogger(__name__)
+
+
+class OrganizationGeofenceIndex:
+    """Mapa inmutable celda H3 → IDs de geocercas de una organización."""
+
+    def __init__(self, rows: Iterable[Tuple[UUID, int]]) -> None:
+        get_resolution = h3.get_resolution
+        by_resolution: Dict[int, Dict[int, List[UUID]]] = {}
+        geofence_ids = set()
+        self.skipped_cells = 0
+        for geofence_id, cell in rows:
+            if not is_valid_cell(cell):
+                self.skipped_cells += 1
+                continue
+            by_resolution.setdefault(get_resolution(cell), {}).setdefault(
+                cell, []
+            ).append(geofence_id)
+            geofence_ids.add(geofence_id)
+
+        self._cells = {
+            resolution: {cell: tuple(ids) for cell, ids in cells.items()}
+            for resolution, cells in by_resolution.items()
+        }
+        self.resolutions = sorted(self._cells, reverse=True)
+        self.geofence_count = len(geofence_ids)
+
+    def lookup(self, lat: float, lng: float) -> List[UUID]:
+        if not self.resolutions:
+            return []
+
+        finest = self.resolutions[0]
+        cell = h3.latlng_to_cell(lat, lng, finest)
+        matches: List[UUID] = []
+        for resolution in self.resolutions:
+            key = cell if resolution == finest else h3.cell_to_parent(cell, resolution)
+            matches.extend(self._cells[resolution].get(key, ()))
+        return list(dict.fromkeys(matches))
+
+
+# Una invalidación durante la construcción descarta el índice construido con
+# datos previos (ver GenerationCache).
+_indexes: GenerationCache[UUID, OrganizationGeofenceIndex] = GenerationCache()
+
+
+def _load_rows(db: Session, organization_id: UUID) -> List[Tuple[UUID, int]]:
+    return [
+        (row.geofence_id, row.h3_index)
+        for row in db.query(GeofenceCell.geofence_id, GeofenceCell.h3_index)
+        .join(Geofence, Geofence.id == GeofenceCell.geofence_id)
+        .filter(
+            Geofence.organization_id == organization_id,
+            Geofence.is_active.is_(True),
+        )
+        .all()
+    ]
+
+
+def get_geofence_index(db: Session, organization_id: UUID) -> OrganizationGeofenceIndex:
+    """Retorna el índice de la organización, construyéndolo si hace falta."""
+    index = _indexes.get(organization_id)
+    if index is not None:
+        return index
+
+    generation = _indexes.generation(organization_id)
+    index = OrganizationGeofenceIndex(_load_rows(db, organization_id))
+    ttl = settings.GEOFENCE_INDEX_TTL_SECONDS
+    # TTL 0: sin vencimiento, solo invalidaciones
+    _indexes.store(organization_id, index, ttl if ttl > 0 else None, generation)
+
+    if index.skipped_cells:
+        increment_counter("geofence_index.invalid_cells", value=index.skipped_cells)
+        logger.warning(
+            "[GEOFENCE INDEX] Celdas H3 inválidas omitidas.",
+            extra={
+                "extra_data": {
+                    "organization_id": str(organization_id),
+                    "skipped_cells": index.skipped_cells,
+                }
+            },
+        )
+
+    logger.info(
+        "[GEOFENCE INDEX] Índice construido.",
+        extra={
+            "extra_data": {
+                "organization_id": str(organization_id),
+                "geofences": index.geofence_count,
+                "resolutions": index.resolutions,
+            }
+        },
+    )
+    return index
+
+
+def invalidate_geofence_index(organization_id: UUID) -> None:
+    _indexes.invalidate(organization_id)
+
+
+def clear_geofence_indexes() -> None:
+    _indexes.invalidate()
+
+
+def notify_geofence_index_changed(db: Session, organization_id: UUID) -> None:
+    """
+    Invalida el índice local y notifica a los demás workers al hacer commit.
+
+    Debe llamarse antes del commit del cambio de geocercas.
+    """
+    invalidate_geofence_index(organization_id)
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {
+            "channel": settings.GEOFENCE_INDEX_INVALIDATION_CHANNEL,
+            "payload": str(organization_id),
+        },
+    )
+
+
+def handle_notification(payload: str) -> None:
+    try:
+        invalidate_geofence_index(UUID(payload))
+    except ValueError:
+        logger.warning(
+            "[GEOFENCE INDEX] Notificación de invalidación inválida.",
+            extra={"extra_data": {"payload": payload}},
+        )
+
+
+_listener: Optional[NotificationListener] = None
+
+
+def start_geofence_index_listener() -> None:
+    global _listener
+    if _listener is not None:
+        return
+
+    _listener = NotificationListener(
+        settings.GEOFENCE_INDEX_INVALIDATION_CHANNEL,
+        on_notify=handle_notification,
+        # Pudo perder notificaciones mientras no escuchaba
+        on_connect=clear_geofence_indexes,
+        name="geofence-index-listener",
+    )
+    _listener.start()
+
+
+def stop_geofence_index_listener() -> None:
+    global _listener
+    if _listener is None:
+        return
+
+    _listener.stop()
+    _listener = None
+
+
+def lookup_points(
+    db: Session,
+    organization_id: UUID,
+    points: Sequence[Tuple[float, float]],
+    index: Optional[OrganizationGeofenceIndex] = None,
+) -> List[List[UUID]]:
+    """Geocercas que contienen cada punto (lat, lng), alineado con points."""
+    index = index or get_geofence_index(db, organization_id)
+    return [index.lookup(lat, lng) for lat, lng in points]
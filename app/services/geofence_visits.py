@@ -0,0 +1,152 @@
+"""
+Servicio de Historial de Visitas a Geocercas.
+
+Calcula qué trips entraron a una geocerca y cuándo, intersectando las celdas
+H3 de los trip_points con las celdas de geofence_cells.
+
+Estrategia:
+  1. SQL recorre trip_points por (device_id, timestamp) con
+     idx_trip_points_device_time y numera los puntos de cada dispositivo;
+     solo viajan a Python los puntos dentro del bounding box de la geocerca.
+  2. Python procesa los puntos en lotes: cada coordenada se convierte a su
+     celda H3 y se prueba contra el conjunto de celdas (hash-set, con
+     búsqueda por padres si el conjunto está compactado).
+  3. Una visita es una racha de puntos consecutivos del mismo trip dentro de
+     la geocerca; un hueco en la numeración significa que el dispositivo
+     salió del bounding box.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.geofence import GeofenceCell
+from app.schemas.geofence import GeofenceVisitOut
+from app.utils.h3_cells import CellMatcher
+
+_BATCH_SIZE = 5000
+
+_VISIT_POINTS_SQL = text(
+    """
+    SELECT device_id, trip_id, timestamp, lat, lng, seq
+    FROM (
+        SELECT
+            p.device_id,
+            p.trip_id,
+            p.timestamp,
+            p.lat,
+            p.lng,
+            row_number() OVER (
+                PARTITION BY p.device_id ORDER BY p.timestamp
+            ) AS seq
+        FROM trip_points p
+        WHERE p.device_id = ANY(:device_ids)
+          AND p.timestamp >= :start
+          AND p.timestamp < :end
+    ) pts
+    WHERE pts.lat BETWEEN :min_lat AND :max_lat
+      AND pts.lng BETWEEN :min_lng AND :max_lng
+    ORDER BY device_id, timestamp
+    """
+)
+
+
+def load_geofence_matcher(db: Session, geofence_id: UUID) -> CellMatcher:
+    rows = (
+        db.query(GeofenceCell.h3_index)
+        .filter(GeofenceCell.geofence_id == geofence_id)
+        .all()
+    )
+    return CellMatcher(row.h3_index for row in rows)
+
+
+def detect_visits(rows: Iterable, matcher: CellMatcher) -> List[GeofenceVisitOut]:
+    """
+    Agrupa puntos ordenados por (device_id, timestamp) en visitas.
+
+    Args:
+        rows: Filas con device_id, trip_id, timestamp, lat, lng y seq
+        matcher: Celdas de la geocerca
+    """
+    visits: List[GeofenceVisitOut] = []
+    current: Optional[GeofenceVisitOut] = None
+    prev_row = None
+
+    for row in rows:
+        inside = matcher.contains(row.lat, row.lng)
+        contiguous = (
+            prev_row is not None
+            and row.device_id == prev_row.device_id
+            and row.trip_id == prev_row.trip_id
+            and row.seq == prev_row.seq + 1
+        )
+
+        if current is not None and (not inside or not contiguous):
+            visits.append(current)
+            current = None
+
+        if inside:
+            if current is None:
+                current = GeofenceVisitOut(
+                    device_id=row.device_id,
+                    trip_id=row.trip_id,
+                    entered_at=row.timestamp,
+                    exited_at=row.timestamp,
+                    points=0,
+                )
+            current.exited_at = row.timestamp
+            current.points += 1
+
+        prev_row = row
+
+    if current is not None:
+        visits.append(current)
+
+    return visits
+
+
+def _iter_batches(result) -> Iterable:
+    while True:
+        batch = result.fetchmany(_BATCH_SIZE)
+        if not batch:
+            return
+        yield from batch
+
+
+def find_geofence_visits(
+    db: Session,
+    matcher: CellMatcher,
+    device_ids: Sequence[str],
+    start: datetime,
+    end: datetime,
+) -> List[GeofenceVisitOut]:
+    """
+    Retorna las visitas de los dispositivos a la geocerca en [start, end),
+    ordenadas por hora de entrada.
+    """
+    if not matcher or not device_ids:
+        return []
+
+    min_lat, min_lng, max_lat, max_lng = matcher.bbox
+    result = db.execute(
+        _VISIT_POINTS_SQL,
+        {
+            "device_ids": list(device_ids),
+            "start": start,
+            "end": end,
+            "min_lat": min_lat,
+            "max_lat": max_lat,
+            "min_lng": min_lng,
+            "max_lng": max_lng,
+        },
+        execution_options={"stream_results": True},
+    )
+
+    visits = detect_visits(_iter_batches(result), matcher)
+    visits.sort(key=lambda visit: visit.entered_at)
+    return visits
@@ -1,15 +1,31 @@
 """
 Verificadores de salud de servicios externos.
 
-Este módulo proporciona funciones para verificar la accesibilidad
-de servicios como Kafka, bases de datos, etc.
+Las dependencias (BD, Kafka, JWKS de Cognito, SES) se verifican en un hilo
+en segundo plano cada HEALTH_PROBE_INTERVAL_SECONDS; el startup no espera a
+ninguna. Los resultados quedan en caché y los leen los endpoints:
+
+  - /health/live:  el proceso responde (no consulta dependencias).
+  - /health/ready: 503 mientras alguna dependencia de
+    HEALTH_READY_DEPENDENCIES no tenga una verificación exitosa.
+
+Los cambios de estado de cada dependencia se registran en el log (no cada
+verificación).
 """
 
 import importlib
 import logging
-from typing import Any
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+import requests
+from sqlalchemy import text
 
 from app.core.config import settings
+from app.utils.metrics import record_gauge, record_timing
 
 logger = logging.getLogger(__name__)
 
@@ -19,45 +35,45 @@ try:
 except Exception:  # pragma: no cover
     KafkaProducer = None
 
+PROBE_DATABASE = "database"
+PROBE_KAFKA = "kafka"
+PROBE_COGNITO_JWKS = "cognito_jwks"
+PROBE_SES = "ses"
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    ok: bool
+    checked_at: datetime
+    latency_ms: int
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "status": "up" if self.ok else "down",
+            "checked_at": self.checked_at.isoformat(),
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+        }
+
+
+def check_database() -> None:
+    from app.db.session import engine
 
-def check_kafka_accessibility() -> bool:
-    """
-    Verifica si Kafka es accesible con las credenciales configuradas.
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
 
-    Intenta crear una conexión al broker de Kafka con un timeout corto
-    para evitar bloqueos al startup. Registra el resultado en el log.
 
-    Returns:
-        bool: True si Kafka es accesible, False en caso contrario
-    """
+def check_kafka_accessibility() -> None:
+    """Conecta al broker de Kafka con las credenciales configuradas."""
     if KafkaProducer is None:
-        logger.warning(
-            "[STARTUP] Cliente kafka-python no disponible. "
-            "Instala kafka-python para habilitar verificación de Kafka.",
-            extra={
-                "extra_data": {
-                    "service": "kafka",
-                    "status": "unavailable",
-                }
-            },
-        )
-        return False
+        raise RuntimeError("Cliente kafka-python no disponible")
 
     brokers = [
         broker.strip() for broker in settings.KAFKA_BROKERS.split(",") if broker.strip()
     ]
-
     if not brokers:
-        logger.error(
-            "[STARTUP] No hay brokers de Kafka configurados.",
-            extra={
-                "extra_data": {
-                    "service": "kafka",
-                    "status": "unconfigured",
-                }
-            },
-        )
-        return False
+        raise RuntimeError("No hay brokers de Kafka configurados")
 
     config: dict[str, Any] = {
         "bootstrap_servers": brokers,
@@ -78,32 +94,152 @@ def check_kafka_accessibility() -> bool:
     if settings.KAFKA_SASL_MECHANISM:
         config["sasl_mechanism"] = settings.KAFKA_SASL_MECHANISM
 
+    producer = KafkaProducer(**config)
+    producer.close()
+
+
+def check_cognito_jwks() -> None:
+    from app.core.security import JWKS_URL
+
+    response = requests.get(JWKS_URL, timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    if not response.json().get("keys"):
+        raise RuntimeError("JWKS sin llaves")
+
+
+def check_ses() -> None:
+    from app.services.notifications import ses_client
+
+    ses_client.get_send_quota()
+
+
+# El orden importa: la BD se verifica primero para que /health/ready quede
+# disponible sin esperar a las verificaciones lentas
+PROBES: dict[str, Callable[[], None]] = {
+    PROBE_DATABASE: check_database,
+    PROBE_KAFKA: check_kafka_accessibility,
+    PROBE_COGNITO_JWKS: check_cognito_jwks,
+    PROBE_SES: check_ses,
+}
+
+_results: dict[str, ProbeResult] = {}
+_results_lock = threading.Lock()
+
+
+def run_probe(name: str) -> ProbeResult:
+    """Ejecuta una verificación y guarda su resultado en caché."""
+    started = time.monotonic()
+    error = None
     try:
-        producer = KafkaProducer(**config)
-        producer.close()
-        logger.info(
-            "[STARTUP] Kafka es accesible.",
+        PROBES[name]()
+    except Exception as ex:
+        error = str(ex) or repr(ex)
+
+    result = ProbeResult(
+        ok=error is None,
+        checked_at=datetime.now(timezone.utc),
+        latency_ms=int((time.monotonic() - started) * 1000),
+        error=error,
+    )
+
+    with _results_lock:
+        previous = _results.get(name)
+        _results[name] = result
+
+    tags = {"dependency": name}
+    record_timing("health.probe_ms", result.latency_ms, tags=tags)
+    record_gauge("health.up", 1 if result.ok else 0, tags=tags)
+
+    if previous is None or previous.ok != result.ok:
+        log = logger.info if result.ok else logger.error
+        log(
+            f"[HEALTH] {name} {'accesible' if result.ok else 'NO accesible'}.",
             extra={
                 "extra_data": {
-                    "service": "kafka",
-                    "status": "accessible",
-                    "brokers": brokers,
-                    "security_protocol": settings.KAFKA_SECURITY_PROTOCOL,
+                    "service": name,
+                    "status": "accessible" if result.ok else "not_accessible",
+                    "error": result.error,
+                    "latency_ms": result.latency_ms,
                 }
             },
         )
+    return result
+
+
+def run_probes() -> None:
+    for name in PROBES:
+        run_probe(name)
+
+
+def _ready_dependencies() -> list[str]:
+    return [
+        name.strip()
+        for name in settings.HEALTH_READY_DEPENDENCIES.split(",")
+        if name.strip()
+    ]
+
+
+def get_health_snapshot() -> dict[str, Any]:
+    """Estado en caché de cada dependencia; `pending` si aún no se verificó."""
+    with _results_lock:
+        results = dict(_results)
+    return {
+        name: results[name].as_dict() if name in results else {"status": "pending"}
+        for name in PROBES
+    }
+
+
+def is_ready() -> bool:
+    if settings.HEALTH_PROBE_INTERVAL_SECONDS <= 0:
+        # Verificaciones deshabilitadas: no se bloquea el tráfico
         return True
-    except Exception as ex:
-        logger.error(
-            f"[STARTUP] Kafka NO es accesible: {str(ex)}",
-            extra={
-                "extra_data": {
-                    "service": "kafka",
-                    "status": "not_accessible",
-                    "brokers": brokers,
-                    "error": str(ex),
-                    "security_protocol": settings.KAFKA_SECURITY_PROTOCOL,
-                }
-            },
+    with _results_lock:
+        return all(
+            name in _results and _results[name].ok for name in _ready_dependencies()
         )
-        return False
+
+
+# ---------------------------------------------------------------------------
+# Verificación periódica en segundo plano
+# ---------------------------------------------------------------------------
+
+_probes_thread: Optional[threading.Thread] = None
+_probes_stop = threading.Event()
+
+
+def _run_probes_loop(interval_seconds: int) -> None:
+    while True:
+        try:
+            run_probes()
+        except Exception:
+            logger.exception("[HEALTH] Error verificando dependencias.")
+        if _probes_stop.wait(interval_seconds):
+            return
+
+
+def start_health_probes() -> None:
+    """Inicia las verificaciones si HEALTH_PROBE_INTERVAL_SECONDS > 0."""
+    global _probes_thread
+    interval = settings.HEALTH_PROBE_INTERVAL_SECONDS
+    if interval <= 0 or _probes_thread is not None:
+        return
+
+    _probes_stop.clear()
+    _probes_thread = threading.Thread(
+        target=_run_probes_loop,
+        args=(interval,),
+        name="health-probes",
+        daemon=True,
+    )
+    _probes_thread.start()
+
+
+def stop_health_probes() -> None:
+    global _probes_thread
+    if _probes_thread is None:
+        return
+
+    _probes_stop.set()
+    # Una verificación en curso puede tardar; el hilo es daemon
+    _probes_thread.join(timeout=1)
+    _probes_thread = None
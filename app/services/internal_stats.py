@@ -0,0 +1,175 @@
+"""
+Estadísticas del back-office (/internal/accounts/stats y
+/internal/organizations/stats).
+
+Cada tabla se recorre una sola vez: los conteos por estado se calculan en
+la misma consulta con COUNT(*) FILTER (WHERE ...).
+
+El resultado se guarda como snapshot por INTERNAL_STATS_TTL_SECONDS (0
+deshabilita la caché): el dashboard de GAC consulta las estadísticas en
+cada carga y unos segundos de atraso no cambian la lectura. Con
+INTERNAL_STATS_REFRESH_SECONDS > 0 un job del scheduler recalcula los snapshots antes
+de que venzan, así ninguna petición paga el cálculo.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.account import Account, AccountStatus
+from app.models.device import Device
+from app.models.organization import Organization, OrganizationStatus
+from app.models.unit_device import UnitDevice
+from app.models.user import User
+from app.utils.metrics import increment_counter, record_timing
+
+logger = logging.getLogger(__name__)
+
+STATS_ACCOUNTS = "accounts"
+STATS_ORGANIZATIONS = "organizations"
+
+DEVICE_STATUSES = (
+    "nuevo",
+    "preparado",
+    "enviado",
+    "entregado",
+    "asignado",
+    "devuelto",
+    "inactivo",
+)
+
+
+def _count_where(condition):
+    return func.count().filter(condition)
+
+
+def compute_accounts_stats(db: Session) -> dict[str, Any]:
+    """Accounts, devices, devices instalados y usuarios: una consulta por tabla."""
+    accounts = db.query(
+        func.count().label("total"),
+        _count_where(Account.status == AccountStatus.ACTIVE).label("active"),
+        _count_where(Account.status == AccountStatus.SUSPENDED).label("suspended"),
+        _count_where(Account.status == AccountStatus.DELETED).label("deleted"),
+    ).one()
+
+    devices = db.query(
+        func.count().label("total"),
+        *(
+            _count_where(Device.status == device_status).label(device_status)
+            for device_status in DEVICE_STATUSES
+        ),
+    ).one()
+
+    # Devices instalados (asignados a unidades activas)
+    devices_instalados = (
+        db.query(func.count())
+        .select_from(UnitDevice)
+        .filter(UnitDevice.unassigned_at.is_(None))
+        .scalar()
+    )
+
+    total_users = db.query(func.count()).select_from(User).scalar()
+
+    return {
+        "accounts": {
+            "total": accounts.total,
+            "by_status": {
+                "active": accounts.active,
+                "suspended": accounts.suspended,
+                "deleted": accounts.deleted,
+            },
+        },
+        "devices": {
+            "total": devices.total,
+            "instalados": devices_instalados,
+            "by_status": {
+                device_status: getattr(devices, device_status)
+                for device_status in DEVICE_STATUSES
+            },
+        },
+        "users": {
+            "total": total_users,
+        },
+    }
+
+
+def compute_organizations_stats(db: Session) -> dict[str, Any]:
+    """Conteo total y por estado de organizaciones en una consulta."""
+    row = db.query(
+        func.count().label("total"),
+        *(
+            _count_where(Organization.status == organization_status).label(
+                organization_status.value.lower()
+            )
+            for organization_status in (
+                OrganizationStatus.PENDING,
+                OrganizationStatus.ACTIVE,
+                OrganizationStatus.SUSPENDED,
+                OrganizationStatus.DELETED,
+            )
+        ),
+    ).one()
+
+    return {
+        "total": row.total,
+        "by_status": {
+            "pending": row.pending,
+            "active": row.active,
+            "suspended": row.suspended,
+            "deleted": row.deleted,
+        },
+    }
+
+
+_COMPUTE: dict[str, Callable[[Session], dict[str, Any]]] = {
+    STATS_ACCOUNTS: compute_accounts_stats,
+    STATS_ORGANIZATIONS: compute_organizations_stats,
+}
+
+_snapshots: dict[str, tuple[dict[str, Any], float]] = {}
+_lock = threading.Lock()
+
+
+def refresh_stats(db: Session, name: str) -> dict[str, Any]:
+    """Recalcula un snapshot y lo guarda en caché."""
+    started = time.monotonic()
+    stats = _COMPUTE[name](db)
+    elapsed = time.monotonic() - started
+    record_timing("internal_stats.compute_ms", elapsed * 1000, tags={"stats": name})
+
+    with _lock:
+        _snapshots[name] = (
+            stats,
+            time.monotonic() + settings.INTERNAL_STATS_TTL_SECONDS,
+        )
+    return stats
+
+
+def get_stats(db: Session, name: str) -> dict[str, Any]:
+    """Retorna el snapshot vigente o lo recalcula si venció."""
+    if settings.INTERNAL_STATS_TTL_SECONDS > 0:
+        with _lock:
+            entry = _snapshots.get(name)
+        if entry is not None and time.monotonic() < entry[1]:
+            increment_counter("internal_stats.cache.hit", tags={"stats": name})
+            return entry[0]
+
+    increment_counter("internal_stats.cache.miss", tags={"stats": name})
+    return refresh_stats(db, name)
+
+
+def refresh_all_stats(db: Session) -> None:
+    for name in _COMPUTE:
+        refresh_stats(db, name)
+
+
+def clear_stats_cache() -> None:
+    with _lock:
+        _snapshots.clear()
@@ -1,6 +1,6 @@
 from app.services.messaging.kafka_producer import (
-    RulesKafkaProducer,
-    UserDevicesKafkaProducer,
+    KafkaEventProducer,
+    get_kafka_event_producer,
 )
 
-__all__ = ["RulesKafkaProducer", "UserDevicesKafkaProducer"]
+__all__ = ["KafkaEventProducer", "get_kafka_event_producer"]
@@ -0,0 +1,157 @@
+"""
+Eventos de geocercas para Kafka: codificación de celdas y troceo.
+
+Un UPSERT con más de KAFKA_GEOFENCES_CHUNK_CELLS celdas se publica como:
+
+  1. Encabezado: el UPSERT normal con `data.cells = []` y `data.chunking`
+     ({version, chunk_count, cell_count}).
+  2. `chunk_count` eventos UPSERT_CELLS_CHUNK con las celdas en orden
+     (`chunk_index` 0..chunk_count-1), misma key que el encabezado para que
+     caigan en la misma partición y se consuman en orden.
+
+El consumidor reensambla cuando recibió todos los chunks de la misma
+`version` y descarta chunks de versiones anteriores.
+
+Los eventos de un snapshot (ver app.services.snapshots) llevan además el
+marcador `snapshot` en el encabezado y en cada chunk.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Optional, Sequence
+from uuid import uuid4
+
+from app.core.config import settings
+from app.models.geofence import Geofence
+from app.utils.datetime import to_utc_iso_z
+from app.utils.h3_cells import compact_cells_or_none, h3
+
+CELLS_ENCODING_RAW = "raw"
+CELLS_ENCODING_COMPACT = "compact"
+
+CHUNK_EVENT_TYPE = "UPSERT_CELLS_CHUNK"
+
+
+def encode_event_cells(cells: Sequence[int]) -> tuple[list[int], str]:
+    """
+    Aplica la codificación configurada en KAFKA_GEOFENCES_CELLS_ENCODING.
+
+    Returns:
+        Tuple[cells, encoding]; sin la librería h3, o si las celdas no se
+        pueden compactar (inválidas o de resoluciones mixtas), se publica
+        "raw"
+    """
+    if settings.KAFKA_GEOFENCES_CELLS_ENCODING == CELLS_ENCODING_COMPACT and h3:
+        compacted = compact_cells_or_none(cells)
+        if compacted is not None:
+            return compacted, CELLS_ENCODING_COMPACT
+    return list(cells), CELLS_ENCODING_RAW
+
+
+def event_version(geofence: Geofence) -> int:
+    """Versión monotónica de la geocerca: updated_at en milisegundos."""
+    dt = geofence.updated_at or datetime.utcnow()
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def build_upsert_event(
+    geofence: Geofence,
+    h3_indexes: Sequence[int],
+    snapshot: Optional[dict[str, Any]] = None,
+) -> dict[str, Any]:
+    """Evento UPSERT con el estado completo de la geocerca (sin trocear)."""
+    cells, cells_encoding = encode_event_cells(h3_indexes)
+    payload = {
+        "event_id": str(uuid4()),
+        "event_type": "UPSERT",
+        "entity": "geofence",
+        "timestamp": to_utc_iso_z(datetime.utcnow()),
+        "organization_id": str(geofence.organization_id),
+        "data": {
+            "id": str(geofence.id),
+            "created_by": str(geofence.created_by),
+            "name": geofence.name,
+            "description": geofence.description or "",
+            "is_active": geofence.is_active,
+            "config": geofence.config,
+            "cells": cells,
+            "cells_encoding": cells_encoding,
+            "updated_at": to_utc_iso_z(geofence.updated_at),
+        },
+    }
+    if snapshot is not None:
+        payload["snapshot"] = snapshot
+    return payload
+
+
+def build_upsert_event_messages(
+    geofence: Geofence,
+    h3_indexes: Sequence[int],
+    snapshot: Optional[dict[str, Any]] = None,
+) -> list[dict[str, Any]]:
+    """UPSERT de la geocerca troceado según KAFKA_GEOFENCES_CHUNK_CELLS."""
+    return split_upsert_event(
+        build_upsert_event(geofence, h3_indexes, snapshot=snapshot),
+        version=event_version(geofence),
+        chunk_cells=settings.KAFKA_GEOFENCES_CHUNK_CELLS,
+    )
+
+
+def split_upsert_event(
+    payload: dict[str, Any], version: int, chunk_cells: int
+) -> list[dict[str, Any]]:
+    """
+    Divide un UPSERT en encabezado + chunks ordenados si supera chunk_cells.
+
+    Args:
+        payload: Evento UPSERT completo
+        version: Versión monotónica de la geocerca (updated_at en ms)
+        chunk_cells: Máximo de celdas por mensaje (0 deshabilita el troceo)
+    """
+    data = payload["data"]
+    cells = data["cells"]
+    if chunk_cells <= 0 or len(cells) <= chunk_cells:
+        return [payload]
+
+    chunk_count = (len(cells) + chunk_cells - 1) // chunk_cells
+    header = {
+        **payload,
+        "data": {
+            **data,
+            "cells": [],
+            "chunking": {
+                "version": version,
+                "chunk_count": chunk_count,
+                "cell_count": len(cells),
+            },
+        },
+    }
+
+    extra = {"snapshot": payload["snapshot"]} if "snapshot" in payload else {}
+    chunks = [
+        {
+            **extra,
+            "event_id": str(uuid4()),
+            "event_type": CHUNK_EVENT_TYPE,
+            "entity": payload["entity"],
+            "timestamp": payload["timestamp"],
+            "organization_id": payload["organization_id"],
+            "data": {
+                "id": data["id"],
+                "header_event_id": payload["event_id"],
+                "version": version,
+                "chunk_index": chunk_index,
+                "chunk_count": chunk_count,
+                "cells_encoding": data.get("cells_encoding", CELLS_ENCODING_RAW),
+                "cells": cells[
+                    chunk_index * chunk_cells : (chunk_index + 1) * chunk_cells
+                ],
+            },
+        }
+        for chunk_index in range(chunk_count)
+    ]
+
+    return [header, *chunks]
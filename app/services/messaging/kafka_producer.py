@@ -1,9 +1,23 @@
+"""
+Producer Kafka compartido por proceso.
+
+Un solo cliente kafka-python (una conexión por broker) publica en todos los
+topics: eventos de reglas, geocercas y user devices (vía outbox) y los
+snapshots. La compresión, el lote (linger/batch) y el serializador
+(KAFKA_VALUE_SERIALIZER) se configuran a nivel de producer.
+
+send_batch() publica un lote y espera su confirmación; el relay de outbox lo
+usa para marcar cada evento como publicado o reintentarlo.
+"""
+
 import importlib
-import json
 import logging
-from typing import Any, Optional
+import threading
+from typing import Any, Optional, Protocol, Sequence
+from uuid import UUID
 
 from app.core.config import settings
+from app.services.messaging.serializers import ValueSerializer, get_value_serializer
 
 logger = logging.getLogger(__name__)
 
@@ -16,148 +30,35 @@ except (
     KafkaProducer = None
 
 
-class RulesKafkaProducer:
-    """Producer reusable para publicar cambios de reglas en Kafka."""
-
-    def __init__(self) -> None:
-        self.topic = settings.KAFKA_RULES_UPDATES_TOPIC
-        self.group_id = settings.KAFKA_RULES_UPDATES_GROUP_ID
-        self.brokers = [
-            broker.strip()
-            for broker in settings.KAFKA_BROKERS.split(",")
-            if broker.strip()
-        ]
-        self.security_protocol = settings.KAFKA_SECURITY_PROTOCOL
-        self.sasl_username = settings.KAFKA_SASL_USERNAME
-        self.sasl_password = settings.KAFKA_SASL_PASSWORD
-        self.sasl_mechanism = settings.KAFKA_SASL_MECHANISM
-        self._producer: Optional[Any] = None
-
-    def _build_client_config(self) -> dict[str, Any]:
-        config: dict[str, Any] = {
-            "bootstrap_servers": self.brokers,
-            "acks": "all",
-            "retries": 0,
-            "request_timeout_ms": 3000,
-            "max_block_ms": 3000,
-            "api_version_auto_timeout_ms": 2000,
-            "value_serializer": lambda value: json.dumps(
-                value, ensure_ascii=False
-            ).encode("utf-8"),
-            "key_serializer": lambda value: value.encode("utf-8") if value else None,
-        }
-
-        if self.security_protocol:
-            config["security_protocol"] = self.security_protocol
-
-        if self.sasl_username:
-            config["sasl_plain_username"] = self.sasl_username
-
-        if self.sasl_password:
-            config["sasl_plain_password"] = self.sasl_password
-
-        if self.sasl_mechanism:
-            config["sasl_mechanism"] = self.sasl_mechanism
-
-        return config
-
-    def _get_or_create(self):
-        if self._producer is not None:
-            return self._producer
+def build_batching_config() -> dict[str, Any]:
+    """Opciones del cliente kafka-python para envío por lotes."""
+    config: dict[str, Any] = {
+        "linger_ms": settings.KAFKA_PRODUCER_LINGER_MS,
+        "batch_size": settings.KAFKA_PRODUCER_BATCH_SIZE,
+        "retries": settings.KAFKA_PRODUCER_RETRIES,
+        # Con reintentos, un solo request en vuelo conserva el orden por key
+        "max_in_flight_requests_per_connection": 1,
+    }
 
-        if KafkaProducer is None:
-            logger.error(
-                "[KAFKA RULES] Cliente kafka-python no disponible. "
-                "Instala dependencia para habilitar publicaciones.",
-                extra={
-                    "extra_data": {
-                        "topic": self.topic,
-                        "brokers": self.brokers,
-                    }
-                },
-            )
-            return None
+    if settings.KAFKA_PRODUCER_COMPRESSION_TYPE:
+        config["compression_type"] = settings.KAFKA_PRODUCER_COMPRESSION_TYPE
 
-        if not self.brokers:
-            logger.error(
-                "[KAFKA RULES] No hay brokers configurados; se omite publicacion.",
-                extra={"extra_data": {"topic": self.topic}},
-            )
-            return None
+    return config
 
-        try:
-            self._producer = KafkaProducer(**self._build_client_config())
-            return self._producer
-        except Exception:
-            logger.exception(
-                "[KAFKA RULES] Error inicializando producer.",
-                extra={
-                    "extra_data": {
-                        "topic": self.topic,
-                        "brokers": self.brokers,
-                        "security_protocol": self.security_protocol,
-                        "group_id": self.group_id,
-                    }
-                },
-            )
-            return None
 
-    def publish_rule_update(
-        self, payload: dict[str, Any], key: Optional[str] = None
-    ) -> bool:
-        producer = self._get_or_create()
-        if producer is None:
-            return False
-
-        try:
-            logger.info(
-                f"Publishing rule update: {json.dumps(payload, ensure_ascii=False)}",
-                extra={
-                    "extra_data": {
-                        "topic": self.topic,
-                        "key": key,
-                        "payload": payload,
-                    }
-                },
-            )
-            future = producer.send(self.topic, key=key, value=payload)
-            future.get(timeout=3)
-            producer.flush(timeout=3)
-            return True
-        except Exception:
-            logger.exception(
-                "[KAFKA RULES] Error publicando evento de regla.",
-                extra={
-                    "extra_data": {
-                        "topic": self.topic,
-                        "key": key,
-                        "operation": payload.get("operation"),
-                        "rule_id": payload.get("rule_id")
-                        or payload.get("rule", {}).get("id"),
-                        "group_id": self.group_id,
-                    }
-                },
-            )
-            return False
-
-    def close(self) -> None:
-        if self._producer is None:
-            return
+class OutboxMessage(Protocol):
+    """Mensaje a publicar por el relay (ver app.models.outbox_event)."""
 
-        try:
-            self._producer.flush(timeout=3)
-            self._producer.close(timeout=3)
-        except Exception:
-            logger.exception("[KAFKA RULES] Error cerrando producer.")
-        finally:
-            self._producer = None
+    event_id: UUID
+    topic: str
+    key: Optional[str]
+    payload: dict[str, Any]
 
 
-class UserDevicesKafkaProducer:
-    """Producer reusable para publicar cambios de user devices en Kafka."""
+class KafkaEventProducer:
+    """Producer genérico: un cliente Kafka compartido entre topics."""
 
-    def __init__(self) -> None:
-        self.topic = settings.KAFKA_USER_DEVICES_UPDATES_TOPIC
+    def __init__(self, serializer: Optional[ValueSerializer] = None) -> None:
         self.brokers = [
             broker.strip()
             for broker in settings.KAFKA_BROKERS.split(",")
@@ -167,19 +68,18 @@ class UserDevicesKafkaProducer:
         self.sasl_username = settings.KAFKA_SASL_USERNAME
         self.sasl_password = settings.KAFKA_SASL_PASSWORD
         self.sasl_mechanism = settings.KAFKA_SASL_MECHANISM
+        self.serializer = serializer or get_value_serializer()
         self._producer: Optional[Any] = None
+        self._lock = threading.Lock()
 
     def _build_client_config(self) -> dict[str, Any]:
         config: dict[str, Any] = {
             "bootstrap_servers": self.brokers,
             "acks": "all",
-            "retries": 0,
-            "request_timeout_ms": 3000,
+            "request_timeout_ms": 10000,
             "max_block_ms": 3000,
             "api_version_auto_timeout_ms": 2000,
-            "value_serializer": lambda value: json.dumps(
-                value, ensure_ascii=False
-            ).encode("utf-8"),
+            "value_serializer": self.serializer.dumps,
             "key_serializer": lambda value: value.encode("utf-8") if value else None,
         }
 
@@ -195,6 +95,8 @@ class UserDevicesKafkaProducer:
         if self.sasl_mechanism:
             config["sasl_mechanism"] = self.sasl_mechanism
 
+        config.update(build_batching_config())
+
         return config
 
     def _get_or_create(self):
@@ -203,197 +105,118 @@ class UserDevicesKafkaProducer:
 
         if KafkaProducer is None:
             logger.error(
-                "[KAFKA USER DEVICES] Cliente kafka-python no disponible.",
-                extra={
-                    "extra_data": {
-                        "topic": self.topic,
-                        "brokers": self.brokers,
-                    }
-                },
+                "[KAFKA] Cliente kafka-python no disponible. "
+                "Instala dependencia para habilitar publicaciones.",
+                extra={"extra_data": {"brokers": self.brokers}},
             )
             return None
 
         if not self.brokers:
-            logger.error(
-                "[KAFKA USER DEVICES] No hay brokers configurados; se omite publicacion.",
-                extra={"extra_data": {"topic": self.topic}},
-            )
+            logger.error("[KAFKA] No hay brokers configurados; se omite publicacion.")
             return None
 
-        try:
-            self._producer = KafkaProducer(**self._build_client_config())
-            return self._producer
-        except Exception:
-            logger.exception(
-                "[KAFKA USER DEVICES] Error inicializando producer.",
-                extra={
-                    "extra_data": {
-                        "topic": self.topic,
-                        "brokers": self.brokers,
-                        "security_protocol": self.security_protocol,
-                    }
-                },
-            )
-            return None
-
-    def publish_update(
-        self, payload: dict[str, Any], key: Optional[str] = None
-    ) -> bool:
+        with self._lock:
+            if self._producer is not None:
+                return self._producer
+
+            try:
+                self._producer = KafkaProducer(**self._build_client_config())
+                return self._producer
+            except Exception:
+                logger.exception(
+                    "[KAFKA] Error inicializando producer.",
+                    extra={
+                        "extra_data": {
+                            "brokers": self.brokers,
+                            "security_protocol": self.security_protocol,
+                        }
+                    },
+                )
+                return None
+
+    def _headers(self, event_id: Optional[str] = None) -> list[tuple[str, bytes]]:
+        headers = self.serializer.headers()
+        if event_id:
+            headers.append(("event_id", str(event_id).encode("utf-8")))
+        return headers
+
+    def send_batch(
+        self, messages: Sequence[OutboxMessage], timeout: float
+    ) -> list[Optional[str]]:
+        """
+        Publica los mensajes en orden y espera hasta `timeout` segundos.
+
+        Returns:
+            list: None por mensaje confirmado o la descripción del error,
+            alineada con `messages`.
+        """
         producer = self._get_or_create()
         if producer is None:
-            return False
+            return ["Producer Kafka no disponible"] * len(messages)
+
+        futures: list[Any] = []
+        for message in messages:
+            try:
+                futures.append(
+                    producer.send(
+                        message.topic,
+                        key=message.key,
+                        value=message.payload,
+                        headers=self._headers(message.event_id),
+                    )
+                )
+            except Exception as exc:
+                futures.append(exc)
 
         try:
-            future = producer.send(self.topic, key=key, value=payload)
-            future.get(timeout=3)
-            producer.flush(timeout=3)
-            return True
+            producer.flush(timeout=timeout)
         except Exception:
-            logger.exception(
-                "[KAFKA USER DEVICES] Error publicando evento.",
-                extra={
-                    "extra_data": {
-                        "topic": self.topic,
-                        "key": key,
-                        "type": payload.get("type"),
-                        "user_id": payload.get("user_id"),
-                        "device_id": payload.get("device_id"),
-                    }
-                },
-            )
-            return False
+            logger.exception("[KAFKA] Error esperando confirmación del lote.")
+
+        errors: list[Optional[str]] = []
+        for future in futures:
+            if isinstance(future, Exception):
+                errors.append(repr(future))
+            elif not future.is_done:
+                errors.append("Timeout esperando confirmación de Kafka")
+            elif future.failed():
+                errors.append(repr(future.exception))
+            else:
+                errors.append(None)
+        return errors
 
     def close(self) -> None:
         if self._producer is None:
             return
 
         try:
-            self._producer.flush(timeout=3)
-            self._producer.close(timeout=3)
+            # Entrega lo que quede en el buffer antes de cerrar
+            timeout = settings.KAFKA_PRODUCER_CLOSE_TIMEOUT_SECONDS
+            self._producer.flush(timeout=timeout)
+            self._producer.close(timeout=timeout)
         except Exception:
-            logger.exception("[KAFKA USER DEVICES] Error cerrando producer.")
+            logger.exception("[KAFKA] Error cerrando producer.")
         finally:
             self._producer = None
 
 
-class GeofencesKafkaProducer:
-    """Producer reusable para publicar cambios de geocercas en Kafka."""
+_kafka_event_producer: Optional[KafkaEventProducer] = None
+_singleton_lock = threading.Lock()
 
-    def __init__(self) -> None:
-        self.topic = settings.KAFKA_GEOFENCES_UPDATES_TOPIC
-        self.brokers = [
-            broker.strip()
-            for broker in settings.KAFKA_BROKERS.split(",")
-            if broker.strip()
-        ]
-        self.security_protocol = settings.KAFKA_SECURITY_PROTOCOL
-        self.sasl_username = settings.KAFKA_SASL_USERNAME
-        self.sasl_password = settings.KAFKA_SASL_PASSWORD
-        self.sasl_mechanism = settings.KAFKA_SASL_MECHANISM
-        self._producer: Optional[Any] = None
 
-    def _build_client_config(self) -> dict[str, Any]:
-        config: dict[str, Any] = {
-            "bootstrap_servers": self.brokers,
-            "acks": "all",
-            "retries": 0,
-            "request_timeout_ms": 3000,
-            "max_block_ms": 3000,
-            "api_version_auto_timeout_ms": 2000,
-            "value_serializer": lambda value: json.dumps(
-                value, ensure_ascii=False
-            ).encode("utf-8"),
-            "key_serializer": lambda value: value.encode("utf-8") if value else None,
-        }
-
-        if self.security_protocol:
-            config["security_protocol"] = self.security_protocol
+def get_kafka_event_producer() -> KafkaEventProducer:
+    """Retorna el producer compartido del proceso."""
+    global _kafka_event_producer
+    if _kafka_event_producer is None:
+        with _singleton_lock:
+            if _kafka_event_producer is None:
+                _kafka_event_producer = KafkaEventProducer()
+    return _kafka_event_producer
 
-        if self.sasl_username:
-            config["sasl_plain_username"] = self.sasl_username
-
-        if self.sasl_password:
-            config["sasl_plain_password"] = self.sasl_password
 
-        if self.sasl_mechanism:
-            config["sasl_mechanism"] = self.sasl_mechanism
-
-        return config
-
-    def _get_or_create(self):
-        if self._producer is not None:
-            return self._producer
-
-        if KafkaProducer is None:
-            logger.error(
-                "[KAFKA GEOFENCES] Cliente kafka-python no disponible.",
-                extra={
-                    "extra_data": {
-                        "topic": self.topic,
-                        "brokers": self.brokers,
-                    }
-                },
-            )
-            return None
-
-        if not self.brokers:
-            logger.error(
-                "[KAFKA GEOFENCES] No hay brokers configurados; se omite publicacion.",
-                extra={"extra_data": {"topic": self.topic}},
-            )
-            return None
-
-        try:
-            self._producer = KafkaProducer(**self._build_client_config())
-            return self._producer
-        except Exception:
-            logger.exception(
-                "[KAFKA GEOFENCES] Error inicializando producer.",
-                extra={
-                    "extra_data": {
-                        "topic": self.topic,
-                        "brokers": self.brokers,
-                        "security_protocol": self.security_protocol,
-                    }
-                },
-            )
-            return None
-
-    def publish_update(
-        self, payload: dict[str, Any], key: Optional[str] = None
-    ) -> bool:
-        producer = self._get_or_create()
-        if producer is None:
-            return False
-
-        try:
-            future = producer.send(self.topic, key=key, value=payload)
-            future.get(timeout=3)
-            producer.flush(timeout=3)
-            return True
-        except Exception:
-            logger.exception(
-                "[KAFKA GEOFENCES] Error publicando evento.",
-                extra={
-                    "extra_data": {
-                        "topic": self.topic,
-                        "key": key,
-                        "event_type": payload.get("event_type"),
-                        "event_id": payload.get("event_id"),
-                        "entity": payload.get("entity"),
-                    }
-                },
-            )
-            return False
-
-    def close(self) -> None:
-        if self._producer is None:
-            return
-
-        try:
-            self._producer.flush(timeout=3)
-            self._producer.close(timeout=3)
-        except Exception:
-            logger.exception("[KAFKA GEOFENCES] Error cerrando producer.")
-        finally:
-            self._producer = None
+def close_kafka_event_producer() -> None:
+    global _kafka_event_producer
+    with _singleton_lock:
+        producer, _kafka_event_producer = _kafka_event_producer, None
+    if producer is not None:
+        producer.close()
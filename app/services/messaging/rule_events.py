@@ -0,0 +1,64 @@
+"""
+Eventos de reglas de alerta para Kafka.
+
+El UPSERT lleva el estado completo de la regla y el contexto de sus unidades
+(id y nombre) en el orden en que se asignaron. Los eventos de un snapshot
+(ver app.services.snapshots) llevan además el marcador `snapshot`.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.alert_rule import AlertRule, AlertRuleUnit
+from app.models.unit import Unit
+from app.utils.datetime import to_utc_iso_z
+
+
+def load_rule_units(
+    db: Session, rule_ids: Sequence[UUID]
+) -> dict[UUID, list[tuple[UUID, str]]]:
+    """Carga en una sola consulta las unidades (id, nombre) de varias reglas."""
+    units: dict[UUID, list[tuple[UUID, str]]] = {rule_id: [] for rule_id in rule_ids}
+    if not rule_ids:
+        return units
+
+    rows = (
+        db.query(AlertRuleUnit.rule_id, Unit.id, Unit.name)
+        .join(Unit, AlertRuleUnit.unit_id == Unit.id)
+        .filter(AlertRuleUnit.rule_id.in_(list(rule_ids)))
+        .order_by(AlertRuleUnit.rule_id.asc(), AlertRuleUnit.created_at.asc())
+        .all()
+    )
+    for row in rows:
+        units[row.rule_id].append((row.id, row.name))
+    return units
+
+
+def build_upsert_event(
+    rule: AlertRule,
+    units: Sequence[tuple[UUID, str]],
+    snapshot: Optional[dict[str, Any]] = None,
+) -> dict[str, Any]:
+    payload = {
+        "operation": "UPSERT",
+        "rule": {
+            "id": str(rule.id),
+            "organization_id": str(rule.organization_id),
+            "name": rule.name,
+            "type": rule.type,
+            "config": rule.config,
+            "unit_ids": [str(unit_id) for unit_id, _ in units],
+            "is_active": rule.is_active,
+            "updated_at": to_utc_iso_z(rule.updated_at),
+        },
+        "context": {
+            "units": [{"id": str(unit_id), "name": name} for unit_id, name in units],
+        },
+    }
+    if snapshot is not None:
+        payload["snapshot"] = snapshot
+    return payload
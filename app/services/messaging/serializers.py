@@ -0,0 +1,76 @@
+"""
+Serializadores de valores para Kafka.
+
+KAFKA_VALUE_SERIALIZER elige el formato:
+
+  - "orjson" (default): JSON compacto con orjson; mismo contrato que "json".
+  - "json": json.dumps de la librería estándar.
+  - "msgpack": binario, más compacto para eventos con muchas celdas H3.
+
+Cada mensaje lleva los headers `content-type` y `schema-version`
+(KAFKA_SCHEMA_VERSION) para que los consumidores elijan el decodificador.
+Si la librería configurada no está instalada se usa "json".
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    orjson = importlib.import_module("orjson")
+except Exception:  # pragma: no cover - import guard para entornos sin orjson
+    orjson = None
+
+try:
+    msgpack = importlib.import_module("msgpack")
+except Exception:  # pragma: no cover - import guard para entornos sin msgpack
+    msgpack = None
+
+
+@dataclass(frozen=True)
+class ValueSerializer:
+    name: str
+    content_type: str
+    dumps: Callable[[Any], bytes]
+
+    def headers(self) -> list[tuple[str, bytes]]:
+        return [
+            ("content-type", self.content_type.encode("utf-8")),
+            ("schema-version", str(settings.KAFKA_SCHEMA_VERSION).encode("utf-8")),
+        ]
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+JSON_SERIALIZER = ValueSerializer("json", "application/json", _json_dumps)
+
+
+def get_value_serializer(name: Optional[str] = None) -> ValueSerializer:
+    name = (name or settings.KAFKA_VALUE_SERIALIZER).lower()
+
+    if name == "orjson" and orjson is not None:
+        return ValueSerializer("orjson", "application/json", orjson.dumps)
+
+    if name == "msgpack" and msgpack is not None:
+        return ValueSerializer(
+            "msgpack",
+            "application/msgpack",
+            lambda value: msgpack.packb(value, use_bin_type=True),
+        )
+
+    if name != "json":
+        logger.warning(
+            "[KAFKA] Serializador no disponible; se usa json.",
+            extra={"extra_data": {"serializer": name}},
+        )
+    return JSON_SERIALIZER
@@ -0,0 +1,246 @@
+"""
+Transactional outbox para eventos de Kafka.
+
+Responsabilidades:
+  1. Registrar eventos en outbox_events dentro de la transacción del endpoint
+     (enqueue_outbox_event); el request termina con el commit de BD.
+  2. Drenar los pendientes a Kafka por lotes (drain_outbox) desde un hilo en
+     segundo plano (relay).
+  3. Purgar eventos ya publicados con más de OUTBOX_RETENTION_HOURS.
+
+Garantías:
+  - At-least-once: un evento se marca publicado solo tras el ack de Kafka. Cada
+    evento lleva un event_id único (payload y header) para que los
+    consumidores descarten duplicados.
+  - Orden por key: un evento no se envía mientras exista uno anterior de la
+    misma (topic, key) esperando reintento, y si un evento falla los
+    siguientes de la misma key en el lote también se reintentan.
+  - Un solo relay activo a la vez: cada drenado toma
+    pg_try_advisory_xact_lock; los demás workers omiten la corrida.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import exists, func, text
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.models.outbox_event import OutboxEvent
+from app.services.messaging.kafka_producer import (
+    KafkaEventProducer,
+    get_kafka_event_producer,
+)
+from app.utils.metrics import increment_counter
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock que serializa a los relays de todos los workers
+OUTBOX_RELAY_LOCK_KEY = 0x0B0C5E1A
+
+_MAX_ERROR_LENGTH = 2000
+
+
+def enqueue_outbox_event(
+    db: Session,
+    topic: str,
+    payload: dict[str, Any],
+    key: Optional[str] = None,
+) -> OutboxEvent:
+    """
+    Agrega el evento a la sesión; se persiste con el commit del llamador.
+
+    Si el payload no trae `event_id` se genera uno y se incluye en el payload.
+    """
+    event_id = payload.get("event_id") or str(uuid4())
+    event = OutboxEvent(
+        event_id=UUID(event_id),
+        topic=topic,
+        key=key,
+        payload={**payload, "event_id": event_id},
+    )
+    db.add(event)
+    return event
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff exponencial: base * 2^(intentos-1), acotado al máximo."""
+    seconds = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def _load_due_events(db: Session, now: datetime, limit: int) -> list[OutboxEvent]:
+    previous = aliased(OutboxEvent)
+    waiting_predecessor = exists().where(
+        previous.published_at.is_(None),
+        previous.topic == OutboxEvent.topic,
+        previous.key == OutboxEvent.key,
+        previous.id < OutboxEvent.id,
+        previous.next_attempt_at > now,
+    )
+    return (
+        db.query(OutboxEvent)
+        .filter(
+            OutboxEvent.published_at.is_(None),
+            OutboxEvent.next_attempt_at <= now,
+            ~waiting_predecessor,
+        )
+        .order_by(OutboxEvent.id.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+def drain_outbox(
+    db: Session,
+    producer: KafkaEventProducer,
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Publica un lote de eventos pendientes y confirma la transacción.
+
+    Returns:
+        int: Eventos procesados (publicados o reprogramados); 0 si no hay
+        pendientes u otro worker tiene el lock.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    acquired = db.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key)"),
+        {"key": OUTBOX_RELAY_LOCK_KEY},
+    ).scalar()
+    if not acquired:
+        db.rollback()
+        return 0
+
+    now = datetime.now(timezone.utc)
+    events = _load_due_events(db, now, batch_size)
+    if not events:
+        db.rollback()
+        return 0
+
+    errors = producer.send_batch(events, timeout=settings.OUTBOX_SEND_TIMEOUT_SECONDS)
+
+    failed_keys: set[tuple[str, str]] = set()
+    published = 0
+    for event, error in zip(events, errors, strict=True):
+        ordering_key = (event.topic, event.key) if event.key is not None else None
+        if error is None and ordering_key not in failed_keys:
+            event.published_at = now
+            published += 1
+            continue
+
+        if ordering_key is not None:
+            failed_keys.add(ordering_key)
+        event.attempts += 1
+        event.next_attempt_at = now + retry_delay(event.attempts)
+        event.last_error = (error or "Evento anterior de la misma key falló")[
+            :_MAX_ERROR_LENGTH
+        ]
+
+    db.commit()
+
+    failed = len(events) - published
+    increment_counter("outbox.published", value=published)
+    if failed:
+        increment_counter("outbox.failed", value=failed)
+        logger.warning(
+            "[OUTBOX] Eventos reprogramados por error de publicación.",
+            extra={
+                "extra_data": {
+                    "published": published,
+                    "failed": failed,
+                    "keys": len(failed_keys),
+                }
+            },
+        )
+    return len(events)
+
+
+def purge_published_events(db: Session, older_than: datetime) -> int:
+    deleted = (
+        db.query(OutboxEvent)
+        .filter(
+            OutboxEvent.published_at.isnot(None),
+            OutboxEvent.published_at < older_than,
+        )
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def count_pending_events(db: Session) -> int:
+    return (
+        db.query(func.count(OutboxEvent.id))
+        .filter(OutboxEvent.published_at.is_(None))
+        .scalar()
+    ) or 0
+
+
+# ---------------------------------------------------------------------------
+# Relay en segundo plano
+# ---------------------------------------------------------------------------
+
+_relay_thread: Optional[threading.Thread] = None
+_relay_stop = threading.Event()
+
+
+def run_relay_cycle(db: Session, producer: KafkaEventProducer) -> int:
+    """Drena lotes hasta vaciar los pendientes vencidos (o hasta detenerse)."""
+    processed = 0
+    batch_size = settings.OUTBOX_BATCH_SIZE
+    while not _relay_stop.is_set():
+        count = drain_outbox(db, producer, batch_size)
+        processed += count
+        if count < batch_size:
+            break
+    return processed
+
+
+def _run_relay(interval_seconds: float) -> None:
+    from app.db.session import SessionLocal
+
+    # El cliente es el compartido del proceso; se cierra en el shutdown de la app
+    producer = get_kafka_event_producer()
+    while not _relay_stop.wait(interval_seconds):
+        db = SessionLocal()
+        try:
+            # La purga de publicados es el job outbox-purge del scheduler
+            run_relay_cycle(db, producer)
+        except Exception:
+            db.rollback()
+            logger.exception("[OUTBOX] Error drenando outbox.")
+        finally:
+            db.close()
+
+
+def start_outbox_relay() -> None:
+    """Inicia el relay si OUTBOX_RELAY_INTERVAL_SECONDS > 0."""
+    global _relay_thread
+    interval = settings.OUTBOX_RELAY_INTERVAL_SECONDS
+    if interval <= 0 or _relay_thread is not None:
+        return
+
+    _relay_stop.clear()
+    _relay_thread = threading.Thread(
+        target=_run_relay,
+        args=(interval,),
+        name="outbox-relay",
+        daemon=True,
+    )
+    _relay_thread.start()
+
+
+def stop_outbox_relay() -> None:
+    global _relay_thread
+    if _relay_thread is None:
+        return
+
+    _relay_stop.set()
+    _relay_thread.join(timeout=settings.OUTBOX_SEND_TIMEOUT_SECONDS + 5)
+    _relay_thread = None
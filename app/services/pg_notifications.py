@@ -0,0 +1,97 @@
+"""
+Listener de LISTEN/NOTIFY de PostgreSQL para invalidar cachés en memoria
+entre workers.
+
+Cada caché emite pg_notify en la transacción del llamador y arranca un
+NotificationListener con su canal: un hilo con una conexión dedicada (fuera
+del pool) que entrega cada payload a on_notify. Al (re)conectar, ya con el
+LISTEN activo, se llama a on_connect, porque pudo haber cambios mientras no
+se escuchaba.
+"""
+
+from __future__ import annotations
+
+import logging
+import select
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_RECONNECT_SECONDS = 5
+
+
+class NotificationListener:
+    """Hilo que escucha un canal y entrega los payloads recibidos."""
+
+    def __init__(
+        self,
+        channel: str,
+        on_notify: Callable[[str], None],
+        on_connect: Callable[[], None],
+        name: str,
+    ) -> None:
+        self.channel = channel
+        self.on_notify = on_notify
+        self.on_connect = on_connect
+        self.name = name
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _subscribe(self, connection) -> None:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+
+    def _poll(self, connection) -> None:
+        while not self._stop.is_set():
+            if select.select([connection], [], [], 1.0) == ([], [], []):
+                continue
+            connection.poll()
+            while connection.notifies:
+                self.on_notify(connection.notifies.pop(0).payload)
+
+    def _run(self) -> None:
+        from app.db.session import engine
+
+        while not self._stop.is_set():
+            connection = None
+            try:
+                # Conexión dedicada fuera del pool: queda en LISTEN todo el tiempo
+                proxied = engine.raw_connection()
+                proxied.detach()
+                connection = proxied.dbapi_connection
+                self._subscribe(connection)
+                # Pudo haber cambios mientras no se escuchaba. Se invalida
+                # después del LISTEN: un NOTIFY confirmado desde aquí queda
+                # en la conexión y lo entrega _poll
+                self.on_connect()
+                self._poll(connection)
+            except Exception:
+                logger.exception(
+                    "[PG NOTIFY] Error en listener de invalidaciones.",
+                    extra={"extra_data": {"channel": self.channel}},
+                )
+                self._stop.wait(_RECONNECT_SECONDS)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
@@ -0,0 +1,262 @@
+"""
+Snapshot en memoria del catálogo público de planes.
+
+El catálogo (planes, plan_capabilities y productos de cada plan) solo cambia
+cuando un administrador lo edita en /internal/plans o /internal/products,
+pero GET /plans y GET /plans/{id} se consultan en cada visita a la página
+de precios. Cada worker mantiene un CatalogSnapshot inmutable con las
+respuestas ya serializadas y su ETag:
+
+  - Se construye en tres consultas (planes, plan_capabilities y productos),
+    sin importar la cantidad de planes.
+  - catalog_changed() lo reconstruye después del commit de cada cambio
+    administrativo; los demás workers lo reconstruyen en la verificación
+    periódica (job plan-catalog-refresh, PLAN_CATALOG_REFRESH_SECONDS).
+  - El reemplazo es atómico (una asignación): una petición en curso sigue
+    usando el snapshot que leyó.
+  - La versión solo aumenta si el contenido cambió; el ETag depende del
+    contenido, así que es el mismo en todos los workers.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.capability import Capability, PlanCapability
+from app.models.plan import Plan
+from app.models.product import PlanProduct, Product
+from app.schemas.plan import (
+    BillingCycle,
+    PlanDetailOut,
+    PlanPricing,
+    PlanProductOut,
+    PlansListOut,
+)
+from app.utils.metrics import increment_counter, record_gauge
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogResponse:
+    """Respuesta JSON serializada y su ETag."""
+
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_model(cls, model: Any) -> "CatalogResponse":
+        body = model.model_dump_json().encode("utf-8")
+        return cls(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Catálogo inmutable de planes.
+
+    Attributes:
+        version: Aumenta en cada cambio de contenido (por proceso)
+        fingerprint: Hash del contenido completo
+        plans_list: Respuesta de GET /plans (planes activos)
+        plans: Respuestas de GET /plans/{id}, por ID y por código
+    """
+
+    version: int
+    fingerprint: str
+    built_at: datetime
+    plans_list: CatalogResponse
+    plans: Mapping[str, CatalogResponse]
+
+    def get_plan(self, plan_identifier: str) -> Optional[CatalogResponse]:
+        """Busca un plan por UUID o por código."""
+        try:
+            return self.plans.get(str(UUID(plan_identifier)))
+        except ValueError:
+            return self.plans.get(plan_identifier)
+
+
+def _generate_highlighted_features(capabilities: dict) -> list[str]:
+    """
+    Genera lista de features destacados basado en capabilities.
+    """
+    features = []
+
+    if "max_devices" in capabilities:
+        features.append(f"Hasta {capabilities['max_devices']} dispositivos")
+    if "max_geofences" in capabilities:
+        features.append(f"{capabilities['max_geofences']} geocercas")
+    if "max_users" in capabilities:
+        features.append(f"Hasta {capabilities['max_users']} usuarios")
+    if "history_days" in capabilities:
+        features.append(f"{capabilities['history_days']} días de historial")
+    if capabilities.get("ai_features"):
+        features.append("Funciones de IA incluidas")
+    if capabilities.get("analytics_tools"):
+        features.append("Herramientas de analytics")
+    if capabilities.get("api_access"):
+        features.append("Acceso a API")
+    if capabilities.get("priority_support"):
+        features.append("Soporte prioritario")
+
+    return features
+
+
+def _plan_to_detail(
+    plan: Plan, capabilities: dict[str, Any], products: list[PlanProductOut]
+) -> PlanDetailOut:
+    """
+    Convierte un Plan a PlanDetailOut con toda la información.
+    """
+    # Calcular ahorro anual
+    monthly_annual = float(plan.price_monthly) * 12
+    yearly_price = float(plan.price_yearly)
+    savings_percent = 0
+    if monthly_annual > 0 and yearly_price < monthly_annual:
+        savings_percent = int(((monthly_annual - yearly_price) / monthly_annual) * 100)
+
+    return PlanDetailOut(
+        id=plan.id,
+        name=plan.name,
+        code=plan.code,
+        description=plan.description,
+        pricing=PlanPricing(
+            monthly=plan.price_monthly,
+            yearly=plan.price_yearly,
+            yearly_savings_percent=savings_percent,
+        ),
+        billing_cycles=[BillingCycle.MONTHLY, BillingCycle.YEARLY],
+        capabilities=capabilities,
+        products=products,
+        highlighted_features=_generate_highlighted_features(capabilities),
+        is_popular=(plan.code == "pro"),  # Marcar "pro" como popular por defecto
+        created_at=plan.created_at,
+        updated_at=plan.updated_at,
+    )
+
+
+def build_catalog_snapshot(db: Session, version: int = 1) -> CatalogSnapshot:
+    """Lee el catálogo completo y serializa las respuestas públicas."""
+    plans = db.query(Plan).order_by(Plan.price_monthly.asc(), Plan.code.asc()).all()
+
+    capabilities: dict[UUID, dict[str, Any]] = {}
+    for plan_cap, code in (
+        db.query(PlanCapability, Capability.code)
+        .join(Capability, Capability.id == PlanCapability.capability_id)
+        .order_by(Capability.code)
+        .all()
+    ):
+        capabilities.setdefault(plan_cap.plan_id, {})[code] = plan_cap.get_value()
+
+    products: dict[UUID, list[PlanProductOut]] = {}
+    for plan_id, product in (
+        db.query(PlanProduct.plan_id, Product)
+        .join(Product, Product.id == PlanProduct.product_id)
+        .filter(Product.is_active.is_(True))
+        .order_by(Product.code)
+        .all()
+    ):
+        products.setdefault(plan_id, []).append(
+            PlanProductOut(code=product.code, name=product.name)
+        )
+
+    details = {
+        plan.id: _plan_to_detail(
+            plan, capabilities.get(plan.id, {}), products.get(plan.id, [])
+        )
+        for plan in plans
+    }
+
+    active = [details[plan.id] for plan in plans if plan.is_active]
+    plans_list = CatalogResponse.from_model(
+        PlansListOut(plans=active, total=len(active))
+    )
+
+    responses: dict[str, CatalogResponse] = {}
+    digest = hashlib.sha256(plans_list.body)
+    for plan in plans:
+        response = CatalogResponse.from_model(details[plan.id])
+        responses[str(plan.id)] = response
+        responses[plan.code] = response
+        digest.update(response.body)
+
+    return CatalogSnapshot(
+        version=version,
+        fingerprint=digest.hexdigest(),
+        built_at=datetime.now(timezone.utc),
+        plans_list=plans_list,
+        plans=MappingProxyType(responses),
+    )
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_rebuild_lock = threading.Lock()
+
+
+def refresh_catalog_snapshot(db: Session) -> CatalogSnapshot:
+    """
+    Reconstruye el snapshot y lo publica si el contenido cambió.
+
+    Returns:
+        CatalogSnapshot: El snapshot vigente después de la reconstrucción
+    """
+    global _snapshot
+    with _rebuild_lock:
+        current = _snapshot
+        candidate = build_catalog_snapshot(
+            db, version=current.version + 1 if current else 1
+        )
+        if current is not None and current.fingerprint == candidate.fingerprint:
+            return current
+
+        _snapshot = candidate
+
+    increment_counter("plan_catalog.rebuilt")
+    record_gauge("plan_catalog.version", candidate.version)
+    logger.info(
+        "[PLAN CATALOG] Snapshot actualizado.",
+        extra={
+            "extra_data": {
+                "version": candidate.version,
+                "fingerprint": candidate.fingerprint[:12],
+                "plans": len(candidate.plans) // 2,
+            }
+        },
+    )
+    return candidate
+
+
+def get_catalog_snapshot(db: Session) -> CatalogSnapshot:
+    """Retorna el snapshot vigente; lo construye en la primera consulta."""
+    snapshot = _snapshot
+    if snapshot is not None:
+        return snapshot
+    return refresh_catalog_snapshot(db)
+
+
+def catalog_changed(db: Session) -> None:
+    """
+    Reconstruye el snapshot después del commit de un cambio del catálogo.
+
+    Un error no afecta la operación administrativa: el snapshot se corrige
+    en la siguiente verificación periódica.
+    """
+    try:
+        refresh_catalog_snapshot(db)
+    except Exception:
+        logger.exception("[PLAN CATALOG] Error reconstruyendo snapshot.")
+
+
+def reset_catalog_snapshot() -> None:
+    global _snapshot
+    with _rebuild_lock:
+        _snapshot = None
@@ -0,0 +1,173 @@
+"""
+Jobs periódicos de la API registrados en el scheduler en proceso.
+
+Los jobs con intervalo 0 (o cron vacío) en la configuración no se
+registran. leader_only=False se usa para los que refrescan estado en
+memoria de cada worker (catálogo de planes, estadísticas internas); el
+resto escribe en la BD y corre solo en el worker líder.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.token_confirmacion import TokenConfirmacion
+from app.services.effective_capabilities import refresh_expired_effective_capabilities
+from app.services.expiry_sweep import run_expiry_sweep
+from app.services.internal_stats import refresh_all_stats
+from app.services.outbox import count_pending_events, purge_published_events
+from app.services.plan_catalog import refresh_catalog_snapshot
+from app.services.scheduler import CronTrigger, IntervalTrigger, Job, Scheduler
+from app.services.trip_summaries import refresh_trip_daily_summaries
+from app.utils.metrics import increment_counter, record_gauge
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PURGE_BATCH_SIZE = 5000
+
+
+def purge_expired_confirmation_tokens(db: Session) -> int:
+    """
+    Elimina por lotes los tokens de confirmación vencidos.
+
+    Returns:
+        int: Tokens eliminados
+    """
+    now = datetime.utcnow()
+    total = 0
+    while True:
+        expired_ids = (
+            select(TokenConfirmacion.id)
+            .where(TokenConfirmacion.expires_at < now)
+            .limit(TOKEN_PURGE_BATCH_SIZE)
+        )
+        deleted = db.execute(
+            delete(TokenConfirmacion)
+            .where(TokenConfirmacion.id.in_(expired_ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+
+        total += deleted
+        if deleted < TOKEN_PURGE_BATCH_SIZE:
+            break
+
+    increment_counter("tokens.purged", value=total)
+    logger.info(
+        "[SCHEDULER] Tokens de confirmación vencidos eliminados.",
+        extra={"extra_data": {"deleted": total}},
+    )
+    return total
+
+
+def purge_outbox(db: Session) -> int:
+    """Purga eventos publicados fuera de la retención y reporta pendientes."""
+    purged = purge_published_events(
+        db,
+        datetime.now(timezone.utc) - timedelta(hours=settings.OUTBOX_RETENTION_HOURS),
+    )
+    record_gauge("outbox.pending", count_pending_events(db))
+    logger.info(
+        "[OUTBOX] Eventos publicados purgados.",
+        extra={"extra_data": {"purged": purged}},
+    )
+    return purged
+
+
+def refresh_trip_summaries(db: Session) -> int:
+    rows = refresh_trip_daily_summaries(db)
+    logger.info(
+        "[TRIP SUMMARIES] Rollup actualizado.",
+        extra={"extra_data": {"rows": rows}},
+    )
+    return rows
+
+
+def expire_services_and_subscriptions(db: Session) -> dict[str, int]:
+    expired = run_expiry_sweep(db)
+    logger.info(
+        "[EXPIRY SWEEP] Barrido completado.",
+        extra={"extra_data": expired},
+    )
+    return expired
+
+
+def _interval_job(name, func, seconds, **options) -> list[Job]:
+    if seconds <= 0:
+        return []
+    return [Job(name=name, func=func, trigger=IntervalTrigger(seconds), **options)]
+
+
+def _cron_job(name, func, expression, **options) -> list[Job]:
+    if not expression:
+        return []
+    return [Job(name=name, func=func, trigger=CronTrigger(expression), **options)]
+
+
+def default_jobs() -> list[Job]:
+    timeout = settings.SCHEDULER_JOB_TIMEOUT_SECONDS
+    return [
+        # Estado en memoria: corre en cada worker
+        *_interval_job(
+            "plan-catalog-refresh",
+            refresh_catalog_snapshot,
+            settings.PLAN_CATALOG_REFRESH_SECONDS,
+            jitter_seconds=5,
+            timeout_seconds=timeout,
+            leader_only=False,
+        ),
+        *_interval_job(
+            "internal-stats-refresh",
+            refresh_all_stats,
+            settings.INTERNAL_STATS_REFRESH_SECONDS,
+            jitter_seconds=2,
+            timeout_seconds=timeout,
+            leader_only=False,
+        ),
+        # Escrituras en BD: solo el líder
+        *_interval_job(
+            "trip-summaries-refresh",
+            refresh_trip_summaries,
+            settings.TRIP_SUMMARIES_REFRESH_INTERVAL_SECONDS,
+            jitter_seconds=10,
+            timeout_seconds=timeout,
+        ),
+        *_interval_job(
+            "expiry-sweep",
+            expire_services_and_subscriptions,
+            settings.EXPIRY_SWEEP_INTERVAL_SECONDS,
+            jitter_seconds=30,
+            timeout_seconds=timeout,
+        ),
+        *_interval_job(
+            "effective-capabilities-expired",
+            refresh_expired_effective_capabilities,
+            settings.EFFECTIVE_CAPABILITIES_REFRESH_SECONDS,
+            jitter_seconds=10,
+            timeout_seconds=timeout,
+        ),
+        *_cron_job(
+            "outbox-purge",
+            purge_outbox,
+            settings.OUTBOX_PURGE_CRON,
+            jitter_seconds=30,
+            timeout_seconds=timeout,
+        ),
+        *_cron_job(
+            "confirmation-tokens-purge",
+            purge_expired_confirmation_tokens,
+            settings.TOKEN_PURGE_CRON,
+            jitter_seconds=60,
+            timeout_seconds=timeout,
+        ),
+    ]
+
+
+def register_default_jobs(scheduler: Scheduler) -> None:
+    for job in default_jobs():
+        scheduler.add_job(job)
@@ -0,0 +1,470 @@
+"""
+Scheduler en proceso para tareas periódicas.
+
+  - Triggers por intervalo (IntervalTrigger) o expresión cron de 5 campos
+    en UTC (CronTrigger). jitter_seconds suma un retraso aleatorio a cada
+    disparo para que los workers no golpeen la BD al mismo tiempo.
+  - Cada ejecución corre en un pool de hilos con su propia sesión de BD
+    (las tareas usan la sesión síncrona) y se espera hasta timeout_seconds.
+    Un hilo no se puede interrumpir: al vencer el timeout se registra y el
+    job no se vuelve a disparar hasta que la ejecución en curso termine.
+  - Elección de líder: el worker que obtiene
+    pg_try_advisory_lock(SCHEDULER_LEADER_LOCK_KEY) lo mantiene en una
+    conexión dedicada; solo él ejecuta los jobs leader_only. Si la conexión
+    se pierde, PostgreSQL libera el lock y otro worker (de cualquier proceso
+    o nodo) lo toma en la siguiente verificación. Los jobs que refrescan
+    estado en memoria (leader_only=False) corren en todos los workers.
+
+Métricas: scheduler.job.runs (tags job, outcome: success | error |
+timeout), scheduler.job.duration_ms, scheduler.job.skipped y
+scheduler.leader (gauge 1/0 por worker).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Protocol
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.utils.metrics import increment_counter, record_gauge, record_timing
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Triggers
+# ---------------------------------------------------------------------------
+
+
+class Trigger(Protocol):
+    def next_fire(self, after: datetime) -> datetime: ...
+
+
+class IntervalTrigger:
+    """Dispara cada `seconds` segundos desde la ejecución anterior."""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError(f"Intervalo inválido: {seconds}")
+        self.seconds = seconds
+
+    def next_fire(self, after: datetime) -> datetime:
+        return after + timedelta(seconds=self.seconds)
+
+    def __repr__(self) -> str:
+        return f"IntervalTrigger({self.seconds}s)"
+
+
+def _parse_cron_field(spec: str, low: int, high: int) -> frozenset[int]:
+    """Campo cron: '*', 'n', 'a-b', con '/paso' opcional y listas con ','."""
+    values: set[int] = set()
+    for part in spec.split(","):
+        base, _, step_part = part.partition("/")
+        step = int(step_part) if step_part else 1
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start_part, end_part = base.split("-", 1)
+            start, end = int(start_part), int(end_part)
+        else:
+            start = int(base)
+            end = high if step_part else start
+        if step <= 0 or start < low or end > high or start > end:
+            raise ValueError
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronTrigger:
+    """
+    Expresión cron de 5 campos (minuto hora día-mes mes día-semana) en UTC.
+
+    Día de la semana 0-7 (0 y 7 = domingo). Si día-mes y día-semana están
+    restringidos basta con que coincida uno, como en cron.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        try:
+            if len(fields) != 5:
+                raise ValueError
+            self.minutes = _parse_cron_field(fields[0], 0, 59)
+            self.hours = _parse_cron_field(fields[1], 0, 23)
+            self.days = _parse_cron_field(fields[2], 1, 31)
+            self.months = _parse_cron_field(fields[3], 1, 12)
+            self.weekdays = frozenset(
+                day % 7 for day in _parse_cron_field(fields[4], 0, 7)
+            )
+        except ValueError:
+            raise ValueError(f"Expresión cron inválida: '{expression}'")
+        self.expression = expression
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_match = moment.day in self.days
+        # weekday(): lunes = 0; en cron domingo = 0
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def next_fire(self, after: datetime) -> datetime:
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Cinco años cubren expresiones como el 29 de febrero
+        limit = moment + timedelta(days=5 * 366)
+        while moment < limit:
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(
+                    year=moment.year + year, month=month + 1, day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"La expresión cron nunca se cumple: '{self.expression}'")
+
+    def __repr__(self) -> str:
+        return f"CronTrigger('{self.expression}')"
+
+
+# ---------------------------------------------------------------------------
+# Jobs
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[Session], Any]
+    trigger: Trigger
+    jitter_seconds: float = 0
+    timeout_seconds: Optional[float] = None
+    leader_only: bool = True
+    next_run_at: Optional[datetime] = field(default=None, init=False)
+    running: bool = field(default=False, init=False)
+
+    def schedule_next(self, now: datetime) -> None:
+        self.next_run_at = self.trigger.next_fire(now) + timedelta(
+            seconds=random.uniform(0, self.jitter_seconds)
+        )
+
+
+def _run_in_session(job: Job) -> Any:
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return job.func(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ---------------------------------------------------------------------------
+# Elección de líder (pg_try_advisory_lock)
+# ---------------------------------------------------------------------------
+
+
+class AdvisoryLockLeader:
+    """
+    Liderazgo basado en un advisory lock de sesión.
+
+    El lock vive mientras la conexión siga abierta, por eso se usa una
+    conexión dedicada en AUTOCOMMIT (sin transacción abierta que un
+    idle_in_transaction_session_timeout pudiera cortar).
+    """
+
+    def __init__(self, lock_key: int, connect: Optional[Callable[[], Any]] = None):
+        self.lock_key = lock_key
+        self._connect = connect or self._default_connect
+        self._connection = None
+
+    @staticmethod
+    def _default_connect():
+        from app.db.session import engine
+
+        return engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+    @property
+    def is_leader(self) -> bool:
+        return self._connection is not None
+
+    def _close(self, invalidate: bool = False) -> None:
+        """
+        Cierra la conexión del líder.
+
+        Con invalidate=True la conexión se descarta en lugar de volver al
+        pool: aún puede tener el advisory lock de sesión.
+        """
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            if invalidate:
+                connection.invalidate()
+            connection.close()
+        except Exception:
+            logger.debug("[SCHEDULER] Error cerrando conexión de liderazgo.")
+
+    def refresh(self) -> bool:
+        """Verifica el liderazgo vigente o intenta obtenerlo."""
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT 1"))
+                return True
+            except Exception:
+                logger.warning("[SCHEDULER] Se perdió la conexión del líder.")
+                self._close(invalidate=True)
+
+        connection = None
+        try:
+            connection = self._connect()
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+            ).scalar()
+        except Exception as exc:
+            logger.warning(
+                "[SCHEDULER] No se pudo intentar obtener el liderazgo.",
+                extra={"extra_data": {"error": str(exc)}},
+            )
+            acquired = False
+
+        if acquired:
+            self._connection = connection
+            logger.info(
+                "[SCHEDULER] Worker elegido líder.",
+                extra={"extra_data": {"lock_key": self.lock_key}},
+            )
+        elif connection is not None:
+            connection.close()
+        return bool(acquired)
+
+    def release(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key}
+            )
+        except Exception:
+            logger.debug("[SCHEDULER] Error liberando advisory lock.")
+            self._close(invalidate=True)
+            return
+        self._close()
+
+
+# ---------------------------------------------------------------------------
+# Scheduler
+# ---------------------------------------------------------------------------
+
+
+class Scheduler:
+    # Pausa máxima entre revisiones: acota la reacción a detenerse
+    _MAX_SLEEP_SECONDS = 1.0
+
+    def __init__(
+        self,
+        leader: AdvisoryLockLeader,
+        leader_check_seconds: float,
+        max_workers: int = 4,
+        run_job: Callable[[Job], Any] = _run_in_session,
+    ):
+        self.leader = leader
+        self.leader_check_seconds = leader_check_seconds
+        self.jobs: dict[str, Job] = {}
+        self._run_job = run_job
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Hilo propio para el liderazgo: jobs largos no retrasan la verificación
+        self._leader_executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._main_task: Optional[asyncio.Task] = None
+        self._next_leader_check = 0.0
+
+    def add_job(self, job: Job) -> None:
+        if job.name in self.jobs:
+            raise ValueError(f"Job duplicado: '{job.name}'")
+        self.jobs[job.name] = job
+
+    # -- ejecución ----------------------------------------------------------
+
+    async def _check_leadership(self) -> None:
+        loop = asyncio.get_running_loop()
+        is_leader = await loop.run_in_executor(
+            self._leader_executor, self.leader.refresh
+        )
+        record_gauge("scheduler.leader", 1 if is_leader else 0)
+
+    async def _execute(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+        job.running = True
+        started = time.monotonic()
+        future = loop.run_in_executor(self._executor, self._run_job, job)
+
+        outcome = "success"
+        try:
+            await asyncio.wait_for(asyncio.shield(future), job.timeout_seconds)
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            logger.warning(
+                "[SCHEDULER] Job excedió su timeout.",
+                extra={"extra_data": {"job": job.name, "timeout": job.timeout_seconds}},
+            )
+        except Exception:
+            outcome = "error"
+            logger.exception(
+                "[SCHEDULER] Error ejecutando job.",
+                extra={"extra_data": {"job": job.name}},
+            )
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        increment_counter(
+            "scheduler.job.runs", tags={"job": job.name, "outcome": outcome}
+        )
+        record_timing("scheduler.job.duration_ms", elapsed_ms, tags={"job": job.name})
+
+        if future.done():
+            job.running = False
+        else:
+            # Sigue corriendo en su hilo: no se redispara hasta que termine
+            future.add_done_callback(lambda _: setattr(job, "running", False))
+
+    def _dispatch_due_jobs(self, now: datetime) -> None:
+        for job in self.jobs.values():
+            if job.next_run_at is None:
+                job.schedule_next(now)
+                continue
+            if job.next_run_at > now:
+                continue
+
+            job.schedule_next(now)
+            if job.running:
+                increment_counter(
+                    "scheduler.job.skipped", tags={"job": job.name, "reason": "running"}
+                )
+                continue
+            if job.leader_only and not self.leader.is_leader:
+                continue
+
+            task = asyncio.create_task(self._execute(job), name=f"job:{job.name}")
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _sleep_seconds(self, now: datetime) -> float:
+        pending = [job.next_run_at for job in self.jobs.values() if job.next_run_at]
+        if not pending:
+            return self._MAX_SLEEP_SECONDS
+        until_next = (min(pending) - now).total_seconds()
+        return max(0.0, min(until_next, self._MAX_SLEEP_SECONDS))
+
+    async def run_pending(self) -> None:
+        """Una iteración: verifica el liderazgo si toca y despacha los jobs."""
+        if time.monotonic() >= self._next_leader_check:
+            self._next_leader_check = time.monotonic() + self.leader_check_seconds
+            await self._check_leadership()
+        self._dispatch_due_jobs(_utcnow())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_pending()
+            except Exception:
+                logger.exception("[SCHEDULER] Error en el ciclo del scheduler.")
+            await asyncio.sleep(self._sleep_seconds(_utcnow()))
+
+    # -- ciclo de vida ------------------------------------------------------
+
+    def start(self) -> None:
+        """Inicia el ciclo en el event loop en ejecución."""
+        if self._main_task is not None:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="scheduler"
+        )
+        self._leader_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="scheduler-leader"
+        )
+        self._main_task = asyncio.get_running_loop().create_task(
+            self._run(), name="scheduler"
+        )
+        logger.info(
+            "[SCHEDULER] Scheduler iniciado.",
+            extra={
+                "extra_data": {
+                    "jobs": {name: repr(job.trigger) for name, job in self.jobs.items()}
+                }
+            },
+        )
+
+    def stop(self) -> None:
+        """Cancela el ciclo, libera el liderazgo y no espera jobs en curso."""
+        if self._main_task is None:
+            return
+        self._main_task.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        self._main_task = None
+        if self._leader_executor is not None:
+            # Después de una verificación en curso, en el mismo hilo
+            self._leader_executor.submit(self.leader.release)
+            self._leader_executor.shutdown(wait=False)
+            self._leader_executor = None
+        else:
+            self.leader.release()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_scheduler: Optional[Scheduler] = None
+
+
+def start_scheduler() -> None:
+    """
+    Inicia el scheduler con los jobs registrados si SCHEDULER_ENABLED.
+
+    Debe llamarse desde el event loop (startup de la app).
+    """
+    global _scheduler
+    if not settings.SCHEDULER_ENABLED or _scheduler is not None:
+        return
+
+    from app.services.scheduled_jobs import register_default_jobs
+
+    _scheduler = Scheduler(
+        AdvisoryLockLeader(settings.SCHEDULER_LEADER_LOCK_KEY),
+        leader_check_seconds=settings.SCHEDULER_LEADER_CHECK_SECONDS,
+        max_workers=settings.SCHEDULER_MAX_WORKERS,
+    )
+    register_default_jobs(_scheduler)
+    _scheduler.start()
+
+
+def stop_scheduler() -> None:
+    global _scheduler
+    if _scheduler is None:
+        return
+
+    _scheduler.stop()
+    _scheduler = None
@@ -0,0 +1,243 @@
+"""
+Snapshot de estado para consumidores de Kafka.
+
+Cuando un consumidor (motor de alertas, matcher de geocercas) reinicia o
+recibe particiones nuevas, necesita el estado completo de reglas y geocercas.
+republish_snapshot recorre las entidades activas de una organización (o de
+todas) y las publica como eventos UPSERT con el marcador:
+
+    "snapshot": {"id": "<uuid>", "started_at": "<iso>"}
+
+  - Lectura con cursor del lado del servidor (yield_per): la memoria es
+    proporcional a SNAPSHOT_BATCH_SIZE, no al total de entidades.
+  - Unidades de reglas y celdas de geocercas se cargan por lote.
+  - Cada lote se publica con el producer compartido y se espera su ack;
+    el ritmo se limita a SNAPSHOT_MAX_EVENTS_PER_SECOND.
+
+Los eventos no pasan por el outbox: un snapshot se puede repetir y su estado
+se lee de la BD en el momento. Un consumidor que reciba un snapshot y un
+evento normal de la misma entidad conserva el de `updated_at` mayor.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Iterator, Optional, Sequence
+from uuid import UUID, uuid4
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.alert_rule import AlertRule
+from app.models.geofence import Geofence
+from app.services.entity_changes import ENTITY_ALERT_RULE, ENTITY_GEOFENCE
+from app.services.geofence_cells import load_geofence_cells
+from app.services.messaging import geofence_events, rule_events
+from app.services.messaging.kafka_producer import KafkaEventProducer
+from app.utils.datetime import to_utc_iso_z
+from app.utils.metrics import increment_counter, record_timing
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_ENTITIES = (ENTITY_ALERT_RULE, ENTITY_GEOFENCE)
+
+
+@dataclass
+class SnapshotMessage:
+    """Mensaje de snapshot con la forma que espera KafkaEventProducer.send_batch."""
+
+    topic: str
+    key: Optional[str]
+    payload: dict[str, Any]
+    event_id: str = ""
+
+    def __post_init__(self) -> None:
+        self.event_id = self.payload.setdefault("event_id", str(uuid4()))
+
+
+@dataclass
+class SnapshotResult:
+    snapshot_id: UUID
+    organization_id: Optional[UUID]
+    events: dict[str, int] = field(default_factory=dict)
+    published: int = 0
+    failed: int = 0
+    duration_ms: int = 0
+
+
+class RateLimiter:
+    """Espera lo necesario para no superar `rate` eventos por segundo (0 = sin límite)."""
+
+    def __init__(
+        self,
+        rate: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self._started = clock()
+        self._sent = 0
+
+    def wait(self, count: int) -> None:
+        self._sent += count
+        if self.rate <= 0:
+            return
+        delay = self._sent / self.rate - (self._clock() - self._started)
+        if delay > 0:
+            self._sleep(delay)
+
+
+def _stream(db: Session, statement, batch_size: int) -> Iterator[Sequence[Any]]:
+    # yield_per activa stream_results: psycopg2 usa un cursor con nombre y
+    # trae batch_size filas por viaje
+    result = db.execute(statement.execution_options(yield_per=batch_size))
+    yield from result.scalars().partitions()
+
+
+def _rule_messages(
+    db: Session,
+    organization_id: Optional[UUID],
+    snapshot: dict[str, Any],
+    batch_size: int,
+) -> Iterator[list[SnapshotMessage]]:
+    statement = select(AlertRule).where(AlertRule.is_active.is_(True))
+    if organization_id is not None:
+        statement = statement.where(AlertRule.organization_id == organization_id)
+    statement = statement.order_by(AlertRule.organization_id, AlertRule.id)
+
+    for rules in _stream(db, statement, batch_size):
+        units = rule_events.load_rule_units(db, [rule.id for rule in rules])
+        yield [
+            SnapshotMessage(
+                topic=settings.KAFKA_RULES_UPDATES_TOPIC,
+                key=str(rule.id),
+                payload=rule_events.build_upsert_event(
+                    rule, units[rule.id], snapshot=snapshot
+                ),
+            )
+            for rule in rules
+        ]
+
+
+def _geofence_messages(
+    db: Session,
+    organization_id: Optional[UUID],
+    snapshot: dict[str, Any],
+    batch_size: int,
+) -> Iterator[list[SnapshotMessage]]:
+    statement = select(Geofence).where(Geofence.is_active.is_(True))
+    if organization_id is not None:
+        statement = statement.where(Geofence.organization_id == organization_id)
+    statement = statement.order_by(Geofence.organization_id, Geofence.id)
+
+    for geofences in _stream(db, statement, batch_size):
+        cells = load_geofence_cells(db, [geofence.id for geofence in geofences])
+        yield [
+            SnapshotMessage(
+                topic=settings.KAFKA_GEOFENCES_UPDATES_TOPIC,
+                key=str(geofence.id),
+                payload=message,
+            )
+            for geofence in geofences
+            for message in geofence_events.build_upsert_event_messages(
+                geofence, cells[geofence.id], snapshot=snapshot
+            )
+        ]
+
+
+_MESSAGE_BUILDERS = {
+    ENTITY_ALERT_RULE: _rule_messages,
+    ENTITY_GEOFENCE: _geofence_messages,
+}
+
+
+def republish_snapshot(
+    db: Session,
+    producer: KafkaEventProducer,
+    organization_id: Optional[UUID] = None,
+    entities: Sequence[str] = SNAPSHOT_ENTITIES,
+    batch_size: Optional[int] = None,
+    max_events_per_second: Optional[float] = None,
+) -> SnapshotResult:
+    """
+    Publica el estado actual de las entidades activas como eventos UPSERT.
+
+    Args:
+        organization_id: Organización a publicar; None publica todas
+        entities: Subconjunto de SNAPSHOT_ENTITIES
+        batch_size: Filas por viaje al cursor (default SNAPSHOT_BATCH_SIZE)
+        max_events_per_second: Límite de ritmo (default
+            SNAPSHOT_MAX_EVENTS_PER_SECOND; 0 = sin límite)
+    """
+    batch_size = batch_size or settings.SNAPSHOT_BATCH_SIZE
+    if max_events_per_second is None:
+        max_events_per_second = settings.SNAPSHOT_MAX_EVENTS_PER_SECOND
+
+    started = time.monotonic()
+    result = SnapshotResult(snapshot_id=uuid4(), organization_id=organization_id)
+    snapshot = {
+        "id": str(result.snapshot_id),
+        "started_at": to_utc_iso_z(datetime.utcnow()),
+    }
+    limiter = RateLimiter(max_events_per_second)
+
+    logger.info(
+        "[SNAPSHOT] Inicio de republicación.",
+        extra={
+            "extra_data": {
+                "snapshot_id": snapshot["id"],
+                "organization_id": str(organization_id) if organization_id else None,
+                "entities": list(entities),
+            }
+        },
+    )
+
+    for entity in entities:
+        result.events[entity] = 0
+        for messages in _MESSAGE_BUILDERS[entity](
+            db, organization_id, snapshot, batch_size
+        ):
+            if not messages:
+                continue
+            errors = producer.send_batch(
+                messages, timeout=settings.OUTBOX_SEND_TIMEOUT_SECONDS
+            )
+            failed = sum(1 for error in errors if error is not None)
+            result.events[entity] += len(messages)
+            result.published += len(messages) - failed
+            result.failed += failed
+            increment_counter(
+                "snapshot.published",
+                value=len(messages) - failed,
+                tags={"entity": entity},
+            )
+            if failed:
+                increment_counter(
+                    "snapshot.failed", value=failed, tags={"entity": entity}
+                )
+            limiter.wait(len(messages))
+
+    # El cursor del lado del servidor vive dentro de la transacción de lectura
+    db.rollback()
+
+    result.duration_ms = int((time.monotonic() - started) * 1000)
+    record_timing("snapshot.duration_ms", result.duration_ms)
+    logger.info(
+        "[SNAPSHOT] Republicación terminada.",
+        extra={
+            "extra_data": {
+                "snapshot_id": snapshot["id"],
+                "events": result.events,
+                "published": result.published,
+                "failed": result.failed,
+                "duration_ms": result.duration_ms,
+            }
+        },
+    )
+    return result
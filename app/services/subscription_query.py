@@ -19,21 +19,37 @@ Una suscripción se considera activa si cumple TODAS las siguientes condiciones:
 Si hay múltiples suscripciones activas, la estrategia es:
 - Para obtener UNA: la más reciente por started_at (ORDER BY started_at DESC LIMIT 1)
 - Para obtener TODAS: ordenadas por started_at DESC
+- Para la principal de VARIAS organizaciones: DISTINCT ON (organization_id)
+  con el mismo orden (get_primary_active_subscriptions)
 
 NOTA: El campo `active_subscription_id` en `organizations` es LEGACY y NO se usa como
 fuente de verdad. El estado activo siempre se calcula dinámicamente.
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Sequence
 from uuid import UUID
 
 from sqlalchemy import or_
-from sqlalchemy.orm import Query, Session
+from sqlalchemy.orm import Query, Session, selectinload
 
 from app.models.subscription import Subscription, SubscriptionStatus
 
 
+def _active_subscription_conditions() -> tuple:
+    """Condiciones de la regla de suscripción activa (ver docstring del módulo)."""
+    now = datetime.utcnow()
+    return (
+        # Condición 1: Status debe ser ACTIVE o TRIAL
+        Subscription.status.in_(
+            [SubscriptionStatus.ACTIVE.value, SubscriptionStatus.TRIAL.value]
+        ),
+        # Condición 2: No debe estar expirada
+        # expires_at > now OR expires_at IS NULL (suscripción sin expiración)
+        or_(Subscription.expires_at > now, Subscription.expires_at.is_(None)),
+    )
+
+
 def _build_active_subscriptions_query(
     db: Session,
     organization_id: UUID,
@@ -50,19 +66,11 @@ def _build_active_subscriptions_query(
     Returns:
         Query configurada para filtrar suscripciones activas
     """
-    now = datetime.utcnow()
-
     return (
         db.query(Subscription)
         .filter(
             Subscription.organization_id == organization_id,
-            # Condición 1: Status debe ser ACTIVE o TRIAL
-            Subscription.status.in_(
-                [SubscriptionStatus.ACTIVE.value, SubscriptionStatus.TRIAL.value]
-            ),
-            # Condición 2: No debe estar expirada
-            # expires_at > now OR expires_at IS NULL (suscripción sin expiración)
-            or_(Subscription.expires_at > now, Subscription.expires_at.is_(None)),
+            *_active_subscription_conditions(),
         )
         .order_by(Subscription.started_at.desc())
     )
@@ -145,6 +153,119 @@ def get_active_plan_id(
     return subscription.plan_id if subscription else None
 
 
+def _primary_active_subscriptions_query(
+    db: Session,
+    organization_ids: Sequence[UUID],
+) -> Query:
+    """
+    Suscripción activa principal de cada organización en una sola consulta.
+
+    DISTINCT ON (organization_id) conserva la primera fila de cada
+    organización según el ORDER BY: la más reciente por started_at, la misma
+    regla que get_primary_active_subscription.
+    """
+    return (
+        db.query(Subscription)
+        .filter(
+            Subscription.organization_id.in_(organization_ids),
+            *_active_subscription_conditions(),
+        )
+        .distinct(Subscription.organization_id)
+        .order_by(Subscription.organization_id, Subscription.started_at.desc())
+    )
+
+
+def get_primary_active_subscriptions(
+    db: Session,
+    organization_ids: Sequence[UUID],
+    load_plan: bool = False,
+) -> dict[UUID, Subscription]:
+    """
+    Obtiene la suscripción activa PRINCIPAL de varias organizaciones.
+
+    Versión en bloque de get_primary_active_subscription para listados:
+    una consulta sin importar la cantidad de organizaciones.
+
+    Args:
+        db: Sesión de base de datos
+        organization_ids: IDs de las organizaciones
+        load_plan: Cargar también el plan de cada suscripción (una consulta
+            adicional)
+
+    Returns:
+        Diccionario organization_id -> suscripción; las organizaciones sin
+        suscripción activa no aparecen
+    """
+    if not organization_ids:
+        return {}
+
+    query = _primary_active_subscriptions_query(db, organization_ids)
+    if load_plan:
+        query = query.options(selectinload(Subscription.plan))
+    return {subscription.organization_id: subscription for subscription in query.all()}
+
+
+def get_active_plan_ids(
+    db: Session,
+    organization_ids: Sequence[UUID],
+) -> dict[UUID, UUID]:
+    """
+    Obtiene el plan_id de la suscripción activa principal de varias
+    organizaciones en una sola consulta.
+
+    Args:
+        db: Sesión de base de datos
+        organization_ids: IDs de las organizaciones
+
+    Returns:
+        Diccionario organization_id -> plan_id; las organizaciones sin
+        suscripción activa no aparecen
+    """
+    if not organization_ids:
+        return {}
+
+    rows = (
+        _primary_active_subscriptions_query(db, organization_ids)
+        .with_entities(Subscription.organization_id, Subscription.plan_id)
+        .all()
+    )
+    return dict(rows)
+
+
+def get_organization_ids_with_active_plan(
+    db: Session,
+    plan_id: UUID,
+) -> list[UUID]:
+    """
+    Obtiene las organizaciones con al menos una suscripción activa al plan.
+
+    Incluye organizaciones cuyo plan principal es otro: sirve para acotar
+    recalculos cuando cambian las capabilities del plan.
+    """
+    rows = (
+        db.query(Subscription.organization_id)
+        .filter(Subscription.plan_id == plan_id, *_active_subscription_conditions())
+        .distinct()
+        .all()
+    )
+    return [organization_id for (organization_id,) in rows]
+
+
+def active_plan_id_subquery(db: Session, organization_id: UUID):
+    """
+    Subconsulta escalar con el plan_id de la suscripción activa principal.
+
+    Permite filtrar por el plan activo (ej: plan_capabilities) en la misma
+    consulta, sin un viaje previo para obtener el plan_id.
+    """
+    return (
+        _build_active_subscriptions_query(db, organization_id)
+        .with_entities(Subscription.plan_id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
 def has_active_subscription(
     db: Session,
     organization_id: UUID,
@@ -0,0 +1,300 @@
+"""
+Servicio de Heatmap de Trips (celdas H3).
+
+Agrega los trip_points de un conjunto de dispositivos en un rango de tiempo a
+celdas H3 de la resolución solicitada: celda → puntos y velocidad promedio.
+
+Estrategia:
+  1. SQL reduce los puntos por (device_id, día UTC, coordenada) usando
+     idx_trip_points_device_time; los vehículos detenidos repiten coordenada,
+     por lo que Python solo recibe coordenadas distintas.
+  2. Python asigna cada coordenada distinta a su celda H3 una sola vez para
+     todo el resultado y acumula conteos y sumas de velocidad. La BD no tiene
+     la extensión h3-pg y h3-py no ofrece una conversión vectorizada
+     (latlng_to_cell es por punto, también en la API numpy), así que el
+     costo queda acotado por las coordenadas distintas, no por los puntos.
+  3. Los días UTC cerrados no cambian: su resultado por (device_id, día,
+     resolución) se guarda en un caché LRU en memoria y solo los tramos
+     abiertos (bordes del rango y días recientes) se consultan cada vez. Los
+     días faltantes en caché se consultan por tramos contiguos.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.schemas.trip import TripHeatmapCell
+from app.utils.h3_cells import h3
+
+logger = logging.getLogger(__name__)
+
+MIN_HEATMAP_RESOLUTION = 0
+MAX_HEATMAP_RESOLUTION = 12
+
+# Un día UTC se considera cerrado cuando terminó hace más de este margen:
+# siscom-trips escribe los puntos al cerrar el trip, que puede durar horas.
+_CLOSED_DAY_GRACE = timedelta(days=1)
+
+# [puntos, suma de velocidad, puntos con velocidad]
+CellStats = List[float]
+CellMap = Dict[int, CellStats]
+
+_POINTS_SQL = text(
+    """
+    SELECT
+        p.device_id,
+        (p.timestamp AT TIME ZONE 'UTC')::date AS day,
+        round(p.lat::numeric, 5)::float8 AS lat,
+        round(p.lng::numeric, 5)::float8 AS lng,
+        COUNT(*) AS points,
+        COALESCE(SUM(p.speed), 0) AS speed_sum,
+        COUNT(p.speed) AS speed_count
+    FROM trip_points p
+    WHERE p.device_id = ANY(:device_ids)
+      AND p.timestamp >= :start
+      AND p.timestamp < :end
+    GROUP BY 1, 2, 3, 4
+    """
+)
+
+
+# ---------------------------------------------------------------------------
+# Caché de días cerrados
+# ---------------------------------------------------------------------------
+
+
+class _ClosedDayCache:
+    """LRU thread-safe de (device_id, día, resolución) → celdas."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, date, int], CellMap]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, date, int]) -> Optional[CellMap]:
+        with self._lock:
+            cells = self._entries.get(key)
+            if cells is not None:
+                self._entries.move_to_end(key)
+            return cells
+
+    def put(self, key: Tuple[str, date, int], cells: CellMap) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = cells
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_closed_day_cache = _ClosedDayCache(settings.TRIP_HEATMAP_CACHE_MAX_ENTRIES)
+
+
+def clear_heatmap_cache() -> None:
+    _closed_day_cache.clear()
+
+
+# ---------------------------------------------------------------------------
+# Agregación
+# ---------------------------------------------------------------------------
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def split_closed_days(
+    start: datetime, end: datetime, now: datetime
+) -> Tuple[List[date], List[Tuple[datetime, datetime]]]:
+    """
+    Divide [start, end) en días UTC completos y cerrados (cacheables) y en
+    tramos abiertos que deben consultarse siempre.
+
+    Returns:
+        Tuple[closed_days, open_intervals]
+    """
+    first_full = start.astimezone(timezone.utc).date()
+    if _day_start(first_full) < start:
+        first_full += timedelta(days=1)
+
+    closed_days: List[date] = []
+    day = first_full
+    while _day_start(day + timedelta(days=1)) <= min(end, now - _CLOSED_DAY_GRACE):
+        closed_days.append(day)
+        day += timedelta(days=1)
+
+    if not closed_days:
+        return [], [(start, end)]
+
+    open_intervals = []
+    closed_start = _day_start(closed_days[0])
+    closed_end = _day_start(closed_days[-1] + timedelta(days=1))
+    if start < closed_start:
+        open_intervals.append((start, closed_start))
+    if closed_end < end:
+        open_intervals.append((closed_end, end))
+    return closed_days, open_intervals
+
+
+def _fetch_binned(
+    db: Session,
+    device_ids: Sequence[str],
+    start: datetime,
+    end: datetime,
+    resolution: int,
+) -> Dict[Tuple[str, date], CellMap]:
+    """Consulta los puntos reducidos y los asigna a celdas por (device_id, día)."""
+    rows = db.execute(
+        _POINTS_SQL,
+        {"device_ids": list(device_ids), "start": start, "end": end},
+    ).fetchall()
+
+    # Los mismos puntos se repiten entre días y dispositivos: una conversión
+    # por coordenada distinta
+    latlng_to_cell = h3.latlng_to_cell
+    cell_by_coordinate = {
+        coordinate: latlng_to_cell(coordinate[0], coordinate[1], resolution)
+        for coordinate in {(row.lat, row.lng) for row in rows}
+    }
+
+    binned: Dict[Tuple[str, date], CellMap] = {}
+    for row in rows:
+        cells = binned.setdefault((row.device_id, row.day), {})
+        cell = cell_by_coordinate[(row.lat, row.lng)]
+        stats = cells.get(cell)
+        if stats is None:
+            cells[cell] = [row.points, row.speed_sum, row.speed_count]
+        else:
+            stats[0] += row.points
+            stats[1] += row.speed_sum
+            stats[2] += row.speed_count
+    return binned
+
+
+def contiguous_day_runs(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Agrupa días en tramos contiguos [(primero, último)], ordenados."""
+    runs: List[Tuple[date, date]] = []
+    for day in sorted(set(days)):
+        if runs and day == runs[-1][1] + timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+def _merge_into(total: CellMap, cells: Iterable[Tuple[int, CellStats]]) -> None:
+    for cell, (points, speed_sum, speed_count) in cells:
+        stats = total.get(cell)
+        if stats is None:
+            total[cell] = [points, speed_sum, speed_count]
+        else:
+            stats[0] += points
+            stats[1] += speed_sum
+            stats[2] += speed_count
+
+
+def build_trip_heatmap(
+    db: Session,
+    device_ids: Sequence[str],
+    start: datetime,
+    end: datetime,
+    resolution: int,
+    now: Optional[datetime] = None,
+) -> List[TripHeatmapCell]:
+    """
+    Calcula el heatmap H3 de los dispositivos en [start, end).
+
+    Args:
+        db: Sesión de base de datos
+        device_ids: Dispositivos accesibles a incluir
+        start: Inicio del rango (inclusivo, timezone-aware)
+        end: Fin del rango (exclusivo, timezone-aware)
+        resolution: Resolución H3 de las celdas
+        now: Instante de referencia para decidir qué días están cerrados
+
+    Returns:
+        Celdas ordenadas por número de puntos (descendente)
+
+    Raises:
+        RuntimeError: Si la librería h3 no está instalada
+    """
+    if h3 is None:
+        raise RuntimeError("La librería h3 no está instalada")
+    if not device_ids:
+        return []
+
+    now = now or datetime.now(timezone.utc)
+    closed_days, open_intervals = split_closed_days(start, end, now)
+    total: CellMap = {}
+
+    # Días cerrados: caché primero
+    missing: List[Tuple[str, date]] = []
+    for device_id in device_ids:
+        for day in closed_days:
+            cells = _closed_day_cache.get((device_id, day, resolution))
+            if cells is None:
+                missing.append((device_id, day))
+            else:
+                _merge_into(total, cells.items())
+
+    # Una consulta por tramo contiguo de días faltantes, solo con los
+    # dispositivos que faltan en ese tramo
+    for run_start, run_end in contiguous_day_runs(day for _, day in missing):
+        run_missing = [
+            (device_id, day)
+            for device_id, day in missing
+            if run_start <= day <= run_end
+        ]
+        binned = _fetch_binned(
+            db,
+            sorted({device_id for device_id, _ in run_missing}),
+            _day_start(run_start),
+            _day_start(run_end + timedelta(days=1)),
+            resolution,
+        )
+        for key in run_missing:
+            cells = binned.get(key, {})
+            _closed_day_cache.put((key[0], key[1], resolution), cells)
+            _merge_into(total, cells.items())
+
+    # Tramos abiertos: siempre desde la BD
+    for interval_start, interval_end in open_intervals:
+        binned = _fetch_binned(db, device_ids, interval_start, interval_end, resolution)
+        for cells in binned.values():
+            _merge_into(total, cells.items())
+
+    logger.debug(
+        "[TRIP HEATMAP] Heatmap calculado.",
+        extra={
+            "extra_data": {
+                "devices": len(device_ids),
+                "closed_days": len(closed_days),
+                "cache_misses": len(missing),
+                "cells": len(total),
+            }
+        },
+    )
+
+    return [
+        TripHeatmapCell(
+            h3_index=cell,
+            points=int(points),
+            avg_speed=round(speed_sum / speed_count, 2) if speed_count else None,
+        )
+        for cell, (points, speed_sum, speed_count) in sorted(
+            total.items(), key=lambda item: item[1][0], reverse=True
+        )
+    ]
@@ -0,0 +1,273 @@
+"""
+Servicio de Resúmenes Diarios de Trips.
+
+Responsabilidades:
+  1. Mantener incrementalmente trip_daily_summaries a partir de trips/trip_alerts.
+  2. Consultar el rollup con paginación keyset (day DESC, device_id ASC).
+  3. Refrescar el rollup (job trip-summaries-refresh del scheduler).
+
+El día de cada trip se calcula con start_time en la zona horaria de la
+organización dueña del dispositivo. Cada corrida recalcula por completo los
+pares (device_id, day) tocados por trips o alertas creados desde la última
+marca de agua (rollup_watermarks), por lo que el upsert es idempotente y
+puede ejecutarse en varios workers sin corromper datos.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, or_, text
+from sqlalchemy.orm import Session
+
+from app.models.trip_daily_summary import RollupWatermark, TripDailySummary
+from app.schemas.trip import TripDailySummaryOut
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "trip_daily_summaries"
+
+# Margen para transacciones de siscom-trips aún no confirmadas: no se procesan
+# filas con created_at más reciente que now() - lag.
+_COMMIT_LAG = timedelta(seconds=60)
+
+# Cota sobre start_time/timestamp de las filas de origen para aprovechar los
+# índices por tiempo (un trip se escribe poco después de terminar).
+_SOURCE_LOOKBACK = timedelta(days=2)
+
+
+# ---------------------------------------------------------------------------
+# Mantenimiento incremental
+# ---------------------------------------------------------------------------
+
+
+def _build_refresh_sql(bounded: bool) -> str:
+    """
+    Construye el INSERT ... ON CONFLICT que recalcula los días tocados.
+    Si bounded=False (primera corrida) se procesa todo el histórico.
+    """
+    trips_filter = "t.created_at <= :until"
+    alerts_filter = "a.created_at <= :until"
+    if bounded:
+        trips_filter += (
+            " AND t.created_at > :since AND t.start_time >= :source_lookback"
+        )
+        alerts_filter += (
+            " AND a.created_at > :since AND a.timestamp >= :source_lookback"
+        )
+
+    return f"""
+        WITH source_trips AS (
+            SELECT t.device_id, t.start_time
+            FROM trips t
+            WHERE {trips_filter}
+            UNION
+            SELECT t.device_id, t.start_time
+            FROM trip_alerts a
+            JOIN trips t ON t.trip_id = a.trip_id
+            WHERE {alerts_filter}
+        ),
+        touched AS (
+            SELECT DISTINCT
+                s.device_id,
+                d.organization_id,
+                COALESCE(o.timezone, 'UTC') AS tz,
+                (s.start_time AT TIME ZONE COALESCE(o.timezone, 'UTC'))::date AS day
+            FROM source_trips s
+            JOIN devices d ON d.device_id = s.device_id
+            LEFT JOIN organizations o ON o.id = d.organization_id
+        )
+        INSERT INTO trip_daily_summaries (
+            device_id, day, organization_id, timezone, trip_count,
+            distance_meters, driving_minutes, max_speed, alert_count, updated_at
+        )
+        SELECT
+            tc.device_id,
+            tc.day,
+            tc.organization_id,
+            tc.tz,
+            agg.trip_count,
+            agg.distance_meters,
+            agg.driving_minutes,
+            pts.max_speed,
+            al.alert_count,
+            now()
+        FROM touched tc
+        CROSS JOIN LATERAL (
+            SELECT
+                COUNT(*) AS trip_count,
+                COALESCE(SUM(t.distance_meters), 0) AS distance_meters,
+                COALESCE(
+                    SUM(EXTRACT(EPOCH FROM (t.end_time - t.start_time))) / 60.0, 0
+                ) AS driving_minutes,
+                MIN(t.start_time) AS first_start,
+                MAX(t.end_time) AS last_end,
+                array_agg(t.trip_id) AS trip_ids
+            FROM trips t
+            WHERE t.device_id = tc.device_id
+              AND t.start_time >= (tc.day::timestamp AT TIME ZONE tc.tz)
+              AND t.start_time < ((tc.day + 1)::timestamp AT TIME ZONE tc.tz)
+        ) agg
+        CROSS JOIN LATERAL (
+            SELECT MAX(p.speed) AS max_speed
+            FROM trip_points p
+            WHERE p.device_id = tc.device_id
+              AND p.timestamp >= agg.first_start
+              AND p.timestamp <= agg.last_end
+              AND p.trip_id = ANY(agg.trip_ids)
+        ) pts
+        CROSS JOIN LATERAL (
+            SELECT COUNT(*) AS alert_count
+            FROM trip_alerts a
+            WHERE a.device_id = tc.device_id
+              AND a.timestamp >= agg.first_start
+              AND a.timestamp <= agg.last_end
+              AND a.trip_id = ANY(agg.trip_ids)
+        ) al
+        ON CONFLICT (device_id, day) DO UPDATE SET
+            organization_id = EXCLUDED.organization_id,
+            timezone = EXCLUDED.timezone,
+            trip_count = EXCLUDED.trip_count,
+            distance_meters = EXCLUDED.distance_meters,
+            driving_minutes = EXCLUDED.driving_minutes,
+            max_speed = EXCLUDED.max_speed,
+            alert_count = EXCLUDED.alert_count,
+            updated_at = now()
+    """
+
+
+def refresh_trip_daily_summaries(db: Session, until: Optional[datetime] = None) -> int:
+    """
+    Recalcula los resúmenes diarios tocados desde la última marca de agua.
+
+    Args:
+        db: Sesión de base de datos
+        until: Límite superior de created_at a procesar (default: now() - lag)
+
+    Returns:
+        int: Número de filas (device_id, day) insertadas o actualizadas
+    """
+    until = until or datetime.now(timezone.utc) - _COMMIT_LAG
+    watermark = db.get(RollupWatermark, WATERMARK_NAME)
+    since = watermark.processed_until if watermark else None
+
+    if since is not None and since >= until:
+        return 0
+
+    params = {"until": until}
+    if since is not None:
+        params["since"] = since
+        params["source_lookback"] = since - _SOURCE_LOOKBACK
+
+    result = db.execute(text(_build_refresh_sql(bounded=since is not None)), params)
+
+    if watermark is None:
+        watermark = RollupWatermark(name=WATERMARK_NAME, processed_until=until)
+    watermark.processed_until = until
+    watermark.updated_at = datetime.now(timezone.utc)
+    db.add(watermark)
+    db.commit()
+
+    return result.rowcount or 0
+
+
+# ---------------------------------------------------------------------------
+# Consulta paginada
+# ---------------------------------------------------------------------------
+
+
+def encode_summary_cursor(day: date, device_id: str) -> str:
+    """Cursor keyset: 'YYYY-MM-DD|device_id' de la última fila entregada."""
+    return f"{day.isoformat()}|{device_id}"
+
+
+def decode_summary_cursor(cursor: str) -> Tuple[date, str]:
+    """
+    Decodifica un cursor generado por encode_summary_cursor.
+
+    Raises:
+        ValueError: Si el cursor no tiene el formato esperado
+    """
+    day_part, sep, device_id = cursor.partition("|")
+    if not sep or not device_id:
+        raise ValueError(f"Cursor inválido: '{cursor}'")
+    try:
+        day = date.fromisoformat(day_part)
+    except ValueError:
+        raise ValueError(f"Cursor inválido: '{cursor}'")
+    return day, device_id
+
+
+def list_daily_summaries(
+    db: Session,
+    from_day: date,
+    to_day: date,
+    limit: int,
+    organization_id: Optional[UUID] = None,
+    device_ids: Optional[Sequence[str]] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[TripDailySummaryOut], Optional[str], bool]:
+    """
+    Retorna una página de resúmenes ordenada por (day DESC, device_id ASC).
+
+    organization_id usa el índice (organization_id, day); device_ids usa la
+    llave primaria (device_id, day). Se pueden combinar.
+
+    Returns:
+        Tuple[summaries, next_cursor, has_more]
+    """
+    query = db.query(TripDailySummary).filter(
+        TripDailySummary.day >= from_day,
+        TripDailySummary.day <= to_day,
+    )
+
+    if organization_id is not None:
+        query = query.filter(TripDailySummary.organization_id == organization_id)
+
+    if device_ids is not None:
+        query = query.filter(TripDailySummary.device_id.in_(list(device_ids)))
+
+    if cursor:
+        cursor_day, cursor_device_id = decode_summary_cursor(cursor)
+        query = query.filter(
+            or_(
+                TripDailySummary.day < cursor_day,
+                and_(
+                    TripDailySummary.day == cursor_day,
+                    TripDailySummary.device_id > cursor_device_id,
+                ),
+            )
+        )
+
+    rows = (
+        query.order_by(TripDailySummary.day.desc(), TripDailySummary.device_id.asc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    has_more = len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_summary_cursor(rows[-1].day, rows[-1].device_id)
+
+    return [build_summary_out(row) for row in rows], next_cursor, has_more
+
+
+def build_summary_out(row: TripDailySummary) -> TripDailySummaryOut:
+    """Convierte una fila del rollup al schema de salida (metros → km)."""
+    return TripDailySummaryOut(
+        device_id=row.device_id,
+        day=row.day,
+        timezone=row.timezone,
+        trip_count=row.trip_count,
+        distance_km=round((row.distance_meters or 0) / 1000, 2),
+        driving_minutes=round(row.driving_minutes or 0, 2),
+        max_speed=row.max_speed,
+        alert_count=row.alert_count,
+    )
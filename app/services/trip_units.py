@@ -0,0 +1,86 @@
+"""
+Resolución de la unidad asignada a un dispositivo durante un trip.
+
+Dado un lote de ventanas (device_id, start_time, end_time) resuelve en una sola
+consulta la unidad que tenía el dispositivo en cada ventana, usando un
+LATERAL JOIN sobre los intervalos de asignación de unit_devices.
+
+Regla (igual que el detalle de trip histórico):
+  - Asignación activa (unassigned_at IS NULL), o
+  - Asignación cuyo intervalo se traslapa con la ventana del trip.
+Si hay varias, se prefiere la que se traslapa con el trip y luego la más
+reciente.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+TripWindow = Tuple[str, datetime, datetime]
+
+
+class TripUnit(NamedTuple):
+    unit_id: UUID
+    unit_name: str
+
+
+_RESOLVE_SQL = text(
+    """
+    SELECT w.idx, u.id AS unit_id, u.name AS unit_name
+    FROM unnest(
+        CAST(:device_ids AS text[]),
+        CAST(:start_times AS timestamptz[]),
+        CAST(:end_times AS timestamptz[])
+    ) WITH ORDINALITY AS w(device_id, start_time, end_time, idx)
+    JOIN LATERAL (
+        SELECT ud.unit_id
+        FROM unit_devices ud
+        WHERE ud.device_id = w.device_id
+          AND (
+            ud.unassigned_at IS NULL
+            OR (ud.assigned_at <= w.end_time AND ud.unassigned_at >= w.start_time)
+          )
+        ORDER BY (ud.assigned_at <= w.end_time) DESC, ud.assigned_at DESC
+        LIMIT 1
+    ) a ON true
+    JOIN units u ON u.id = a.unit_id
+    """
+)
+
+
+def resolve_trip_units(
+    db: Session, windows: Sequence[TripWindow]
+) -> List[Optional[TripUnit]]:
+    """
+    Resuelve la unidad de cada ventana (device_id, start_time, end_time).
+
+    Args:
+        db: Sesión de base de datos
+        windows: Ventanas de trips a resolver
+
+    Returns:
+        Lista alineada con windows; None donde no hubo asignación
+    """
+    resolved: List[Optional[TripUnit]] = [None] * len(windows)
+    if not windows:
+        return resolved
+
+    rows = db.execute(
+        _RESOLVE_SQL,
+        {
+            "device_ids": [w[0] for w in windows],
+            "start_times": [w[1] for w in windows],
+            "end_times": [w[2] for w in windows],
+        },
+    ).fetchall()
+
+    for row in rows:
+        # WITH ORDINALITY es 1-based
+        resolved[row.idx - 1] = TripUnit(row.unit_id, row.unit_name)
+
+    return resolved
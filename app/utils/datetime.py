@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 
@@ -49,3 +49,15 @@ def calculate_expiration(
         return add_days(base_date, 365)
     else:
         raise ValueError(f"Tipo de suscripción no válido: {subscription_type}")
+
+
+def to_utc_iso_z(value: Optional[datetime] = None) -> str:
+    """
+    Formatea una fecha como ISO 8601 en UTC con sufijo 'Z' (eventos Kafka).
+
+    Las fechas sin zona horaria se asumen en UTC; None usa la fecha actual.
+    """
+    dt = value or datetime.utcnow()
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat() + "Z"
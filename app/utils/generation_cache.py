@@ -0,0 +1,88 @@
+"""
+Caché en memoria por llave con vencimiento e invalidación por generaciones.
+
+Patrón de las cachés por proceso (capabilities, índice de geocercas,
+agregados de billing):
+
+    generation = cache.generation(key)   # antes de leer la BD
+    value = construir(...)
+    cache.store(key, value, ttl, generation)
+
+Cada invalidación (de una llave o global) incrementa su generación; store()
+descarta el valor si hubo una invalidación desde `generation`, porque se
+construyó con datos previos al cambio.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+Generation = Tuple[int, int]
+
+
+class GenerationCache(Generic[K, V]):
+    """Mapa thread-safe llave → (valor, vencimiento) con generaciones."""
+
+    def __init__(self) -> None:
+        self._entries: Dict[K, Tuple[V, Optional[float]]] = {}
+        self._generations: Dict[K, int] = {}
+        self._global_generation = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: K) -> Optional[V]:
+        """Valor vigente de la llave; None si no existe o ya venció."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            return None
+        return value
+
+    def generation(self, key: K) -> Generation:
+        with self._lock:
+            return self._global_generation, self._generations.get(key, 0)
+
+    def store(
+        self,
+        key: K,
+        value: V,
+        ttl_seconds: Optional[float],
+        generation: Generation,
+    ) -> bool:
+        """
+        Guarda el valor si no hubo invalidaciones desde `generation`.
+
+        ttl_seconds None no vence; ttl_seconds <= 0 no guarda.
+
+        Returns:
+            bool: True si el valor quedó guardado
+        """
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            return False
+        expires_at = None if ttl_seconds is None else time.monotonic() + ttl_seconds
+
+        with self._lock:
+            if (self._global_generation, self._generations.get(key, 0)) != generation:
+                return False
+            self._entries[key] = (value, expires_at)
+        return True
+
+    def invalidate(self, key: Optional[K] = None) -> None:
+        """Descarta la llave (o todas con key None)."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._global_generation += 1
+                return
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
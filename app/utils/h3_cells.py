@@ -0,0 +1,126 @@
+"""
+Utilidades H3 compartidas (índices como enteros, igual que geofence_cells).
+
+La librería h3 es opcional: si no está instalada, is_h3_available() retorna
+False y los endpoints que la requieren responden 503.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    h3 = importlib.import_module("h3.api.basic_int")
+except Exception:  # pragma: no cover - import guard for environments without h3
+    h3 = None
+
+# (min_lat, min_lng, max_lat, max_lng)
+BoundingBox = Tuple[float, float, float, float]
+
+
+def is_h3_available() -> bool:
+    return h3 is not None
+
+
+def is_valid_cell(cell: int) -> bool:
+    try:
+        return bool(h3.is_valid_cell(cell))
+    except (ValueError, OverflowError, TypeError):
+        return False
+
+
+def validate_cells(cells: Sequence[int]) -> None:
+    """
+    Verifica que las celdas sean índices H3 válidos de una sola resolución.
+
+    Sin la librería h3 no se valida.
+
+    Raises:
+        ValueError: Si hay celdas inválidas o resoluciones mixtas
+    """
+    if h3 is None or not cells:
+        return
+
+    invalid = [cell for cell in cells if not is_valid_cell(cell)]
+    if invalid:
+        raise ValueError(f"Celdas H3 inválidas: {invalid[:5]}")
+
+    resolutions = {h3.get_resolution(cell) for cell in cells}
+    if len(resolutions) > 1:
+        raise ValueError(
+            f"Las celdas H3 deben tener una sola resolución: {sorted(resolutions)}"
+        )
+
+
+def compact_cells_or_none(cells: Sequence[int]) -> Optional[List[int]]:
+    """
+    Compacta las celdas; None si no se puede (celdas inválidas o de
+    resoluciones mixtas guardadas antes de validar la escritura).
+    """
+    try:
+        return sorted(h3.compact_cells(list(cells)))
+    except (ValueError, OverflowError, TypeError):
+        return None
+
+
+def cells_by_resolution(cells: Iterable[int]) -> Dict[int, Set[int]]:
+    """Agrupa celdas (posiblemente compactadas) por resolución."""
+    grouped: Dict[int, Set[int]] = {}
+    get_resolution = h3.get_resolution
+    for cell in cells:
+        grouped.setdefault(get_resolution(cell), set()).add(cell)
+    return grouped
+
+
+class CellMatcher:
+    """
+    Prueba de pertenencia de coordenadas a un conjunto de celdas H3.
+
+    Las celdas pueden tener resoluciones mixtas (conjuntos compactados): cada
+    coordenada se convierte una sola vez a la resolución más fina y se prueba
+    contra cada resolución vía cell_to_parent y búsqueda en hash-set.
+    """
+
+    def __init__(self, cells: Iterable[int]) -> None:
+        self._sets = cells_by_resolution(cells)
+        self.resolutions = sorted(self._sets, reverse=True)
+        self.finest: Optional[int] = self.resolutions[0] if self.resolutions else None
+        self.bbox = self._bounding_box()
+
+    def __bool__(self) -> bool:
+        return self.finest is not None
+
+    def _bounding_box(self) -> Optional[BoundingBox]:
+        if self.finest is None:
+            return None
+        lats = []
+        lngs = []
+        for cells in self._sets.values():
+            for cell in cells:
+                for lat, lng in h3.cell_to_boundary(cell):
+                    lats.append(lat)
+                    lngs.append(lng)
+        return min(lats), min(lngs), max(lats), max(lngs)
+
+    def match_cell(self, cell: int) -> Optional[int]:
+        """
+        Retorna la celda del conjunto que contiene a `cell` (de resolución
+        self.finest), o None.
+        """
+        if cell in self._sets[self.finest]:
+            return cell
+        cell_to_parent = h3.cell_to_parent
+        for resolution in self.resolutions[1:]:
+            parent = cell_to_parent(cell, resolution)
+            if parent in self._sets[resolution]:
+                return parent
+        return None
+
+    def contains(self, lat: float, lng: float) -> bool:
+        if self.finest is None:
+            return False
+        min_lat, min_lng, max_lat, max_lng = self.bbox
+        if not (min_lat <= lat <= max_lat and min_lng <= lng <= max_lng):
+            return False
+        return self.match_cell(h3.latlng_to_cell(lat, lng, self.finest)) is not None
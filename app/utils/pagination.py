@@ -0,0 +1,102 @@
+"""
+Paginación keyset para listados ordenados por (created_at DESC, id DESC).
+
+A diferencia de OFFSET, el costo de una página no crece con la posición:
+el cursor es la llave de la última fila entregada y la siguiente página
+empieza estrictamente después de ella, aunque se inserten filas nuevas
+entre consultas.
+
+Si created_at admite NULL se ordena por COALESCE(created_at, 1970-01-01):
+esas filas quedan al final y el cursor las puede codificar. El índice de la
+tabla debe usar la misma expresión (ver migración 019).
+"""
+
+import base64
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import func, literal, tuple_
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Valor de orden de created_at NULL
+NULL_CREATED_AT = datetime(1970, 1, 1)
+
+
+def encode_keyset_cursor(created_at: datetime, row_id: UUID) -> str:
+    """
+    Cursor keyset opaco de la última fila entregada.
+
+    Es base64url de 'created_at ISO|id': el offset de zona horaria ('+')
+    no sobrevive sin escapar en un query string.
+    """
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_keyset_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Decodifica un cursor generado por encode_keyset_cursor.
+
+    Raises:
+        ValueError: Si el cursor no tiene el formato esperado
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_part, sep, id_part = raw.decode("utf-8").partition("|")
+        if not sep:
+            raise ValueError
+        return datetime.fromisoformat(created_part), UUID(id_part)
+    except ValueError:
+        raise ValueError(f"Cursor inválido: '{cursor}'")
+
+
+def _created_at_sort_key(created_at_column):
+    if not created_at_column.expression.nullable:
+        return created_at_column
+    return func.coalesce(
+        created_at_column, literal(NULL_CREATED_AT, created_at_column.type)
+    )
+
+
+def paginate_keyset(
+    query: Query,
+    created_at_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+) -> tuple[list, Optional[str]]:
+    """
+    Aplica el cursor, el orden y el límite a `query`.
+
+    `offset` existe solo por compatibilidad con clientes previos al cursor;
+    se ignora cuando se envía un cursor.
+
+    Returns:
+        Tuple[rows, next_cursor]: next_cursor es None en la última página
+
+    Raises:
+        ValueError: Si el cursor es inválido
+    """
+    sort_key = _created_at_sort_key(created_at_column)
+    if cursor:
+        cursor_created_at, cursor_id = decode_keyset_cursor(cursor)
+        # Comparación de filas: usa el índice (created_at DESC, id DESC)
+        query = query.filter(
+            tuple_(sort_key, id_column) < tuple_(cursor_created_at, cursor_id)
+        )
+
+    query = query.order_by(sort_key.desc(), id_column.desc())
+    if offset and not cursor:
+        query = query.offset(offset)
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_keyset_cursor(last.created_at or NULL_CREATED_AT, last.id)
+    return rows, next_cursor
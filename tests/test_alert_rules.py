@@ -1,14 +1,15 @@
 import json
+from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
-import pytest
 from fastapi import status
 
-from app.api.deps import get_rules_kafka_producer
-from app.main import app
+from app.api.v1.endpoints import alert_rules
 from app.models.alert_rule import AlertRule, AlertRuleUnit
 from app.models.organization import Organization
+from app.models.outbox_event import OutboxEvent
 from app.models.unit import Unit
+from app.schemas.alert_rule import AlertRuleUnitsAssign
 
 
 def _create_unit(db_session, organization_id, name):
@@ -24,27 +25,7 @@ def _create_unit(db_session, organization_id, name):
     return unit
 
 
-class _StubRulesKafkaProducer:
-    def __init__(self):
-        self.messages = []
-        self.should_fail = False
-
-    def publish_rule_update(self, payload, key=None):
-        self.messages.append({"payload": payload, "key": key})
-        return not self.should_fail
-
-
-@pytest.fixture(scope="function")
-def kafka_stub_producer():
-    stub = _StubRulesKafkaProducer()
-    app.dependency_overrides[get_rules_kafka_producer] = lambda: stub
-    yield stub
-    app.dependency_overrides.pop(get_rules_kafka_producer, None)
-
-
-def test_alert_rules_crud_hard_delete(
-    authenticated_client, db_session, test_user_data, kafka_stub_producer
-):
+def test_alert_rules_crud_hard_delete(authenticated_client, db_session, test_user_data):
     unit_1 = _create_unit(db_session, test_user_data.organization_id, "Unidad 1")
     unit_2 = _create_unit(db_session, test_user_data.organization_id, "Unidad 2")
 
@@ -97,9 +78,7 @@ def test_alert_rules_crud_hard_delete(
     assert not any(rule["id"] == rule_id for rule in after_delete)
 
 
-def test_create_alert_rule_returns_clear_conflict_message(
-    authenticated_client, kafka_stub_producer
-):
+def test_create_alert_rule_returns_clear_conflict_message(authenticated_client):
     payload = {
         "name": "Regla duplicada 1",
         "type": "ignition_on",
@@ -131,9 +110,7 @@ def test_create_alert_rule_returns_clear_conflict_message(
     assert data["existing_rule"]["is_active"] is True
 
 
-def test_hard_delete_releases_fingerprint_for_new_rule(
-    authenticated_client, kafka_stub_producer
-):
+def test_hard_delete_releases_fingerprint_for_new_rule(authenticated_client):
     payload = {
         "name": "Regla reemplazable",
         "type": "ignition_on",
@@ -158,7 +135,6 @@ def test_alert_rule_rejects_unit_from_other_organization(
     test_account_data,
     test_organization_data,
     test_user_data,
-    kafka_stub_producer,
 ):
     valid_unit = _create_unit(
         db_session, test_user_data.organization_id, "Unidad valida"
@@ -188,7 +164,7 @@ def test_alert_rule_rejects_unit_from_other_organization(
 
 
 def test_alert_rules_hidden_when_organization_inactive(
-    authenticated_client, db_session, test_user_data, kafka_stub_producer
+    authenticated_client, db_session, test_user_data
 ):
     unit = _create_unit(db_session, test_user_data.organization_id, "Unidad 1")
 
@@ -221,7 +197,7 @@ def test_alert_rules_hidden_when_organization_inactive(
     assert response.json() == []
 
 
-def test_create_alert_rule_without_units(authenticated_client, kafka_stub_producer):
+def test_create_alert_rule_without_units(authenticated_client):
     payload = {
         "name": "Regla sin unidades",
         "type": "ignition_off",
@@ -236,7 +212,7 @@ def test_create_alert_rule_without_units(authenticated_client, kafka_stub_produc
 
 
 def test_assign_and_unassign_units_for_rule(
-    authenticated_client, db_session, test_user_data, kafka_stub_producer
+    authenticated_client, db_session, test_user_data
 ):
     unit_1 = _create_unit(db_session, test_user_data.organization_id, "Unidad 1")
     unit_2 = _create_unit(db_session, test_user_data.organization_id, "Unidad 2")
@@ -274,7 +250,7 @@ def test_assign_and_unassign_units_for_rule(
     assert get_after_unassign.json()["unit_ids"] == [str(unit_2.id)]
 
 
-def test_create_alert_rule_normalizes_config(authenticated_client, kafka_stub_producer):
+def test_create_alert_rule_normalizes_config(authenticated_client):
     payload = {
         "name": "Regla config normalizada",
         "type": "ignition_off",
@@ -312,7 +288,6 @@ def test_update_alert_rule_normalizes_only_when_config_is_sent(
     authenticated_client,
     db_session,
     test_user_data,
-    kafka_stub_producer,
 ):
     unit = _create_unit(db_session, test_user_data.organization_id, "Unidad update")
     create_payload = {
@@ -368,11 +343,10 @@ def test_update_alert_rule_normalizes_only_when_config_is_sent(
     )
 
 
-def test_alert_rule_write_endpoints_publish_kafka_events(
+def test_alert_rule_write_endpoints_enqueue_outbox_events(
     authenticated_client,
     db_session,
     test_user_data,
-    kafka_stub_producer,
 ):
     unit_1 = _create_unit(db_session, test_user_data.organization_id, "Unidad 1")
     unit_2 = _create_unit(db_session, test_user_data.organization_id, "Unidad 2")
@@ -410,8 +384,13 @@ def test_alert_rule_write_endpoints_publish_kafka_events(
     delete_response = authenticated_client.delete(f"/api/v1/alert_rules/{rule_id}")
     assert delete_response.status_code == status.HTTP_200_OK
 
-    events = kafka_stub_producer.messages
+    events = [
+        {"payload": event.payload, "key": event.key}
+        for event in db_session.query(OutboxEvent).order_by(OutboxEvent.id).all()
+    ]
     assert len(events) == 5
+    assert {event["key"] for event in events} == {rule_id}
+    assert len({event["payload"]["event_id"] for event in events}) == 5
     assert [event["payload"]["operation"] for event in events] == [
         "UPSERT",
         "UPSERT",
@@ -420,39 +399,40 @@ def test_alert_rule_write_endpoints_publish_kafka_events(
         "DELETE",
     ]
 
+    unit_ids = [event["payload"].get("rule", {}).get("unit_ids") for event in events]
+    assert unit_ids[0] == [str(unit_1.id)]
+    assert unit_ids[1] == [str(unit_2.id)]
+    assert sorted(unit_ids[2]) == sorted([str(unit_1.id), str(unit_2.id)])
+    assert unit_ids[3] == [str(unit_1.id)]
+
     delete_payload = events[-1]["payload"]
     assert delete_payload["rule_id"] == rule_id
     assert "rule" not in delete_payload
 
 
-def test_alert_rule_kafka_error_does_not_break_persistence(
-    authenticated_client,
-    caplog,
-    db_session,
-    test_user_data,
-    kafka_stub_producer,
-):
-    unit_1 = _create_unit(db_session, test_user_data.organization_id, "Unidad 1")
-    kafka_stub_producer.should_fail = True
-
-    with caplog.at_level("ERROR"):
-        response = authenticated_client.post(
-            "/api/v1/alert_rules",
-            json={
-                "name": "Regla con error kafka",
-                "type": "ignition_on",
-                "config": {"event": "Engine ON"},
-                "unit_ids": [str(unit_1.id)],
-            },
+def test_assign_units_flushes_before_building_outbox_payload():
+    rule = AlertRule(id=uuid4(), organization_id=uuid4(), name="r", type="t")
+    unit_id = uuid4()
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = []
+
+    def load_units(session, rule_ids):
+        # Sin autoflush, las filas nuevas solo son visibles tras el flush
+        assert session.flush.called
+        return {rule.id: [(unit_id, "Unidad 1")]}
+
+    with (
+        patch.object(alert_rules, "_get_active_rule_or_404", return_value=rule),
+        patch.object(alert_rules, "_validate_unit_ids", return_value=[unit_id]),
+        patch.object(alert_rules, "load_rule_units", side_effect=load_units),
+        patch.object(alert_rules, "enqueue_outbox_event") as enqueue,
+    ):
+        alert_rules.assign_units_to_rule(
+            rule.id,
+            AlertRuleUnitsAssign(unit_ids=[unit_id]),
+            db=db,
+            current_user=MagicMock(organization_id=rule.organization_id),
         )
 
-    assert response.status_code == status.HTTP_201_CREATED
-    created_rule_id = response.json()["id"]
-
-    persisted_rule = (
-        db_session.query(AlertRule).filter(AlertRule.id == created_rule_id).first()
-    )
-    assert persisted_rule is not None
-    assert any(
-        "Fallo publicando evento en Kafka" in rec.message for rec in caplog.records
-    )
+    payload = enqueue.call_args.kwargs["payload"]
+    assert payload["rule"]["unit_ids"] == [str(unit_id)]
@@ -0,0 +1,116 @@
+"""
+Tests de los agregados de pagos de /billing/summary.
+
+Estrategia: se captura el SQL compilado con el dialecto de PostgreSQL para
+verificar que los cuatro valores salen de una consulta; la caché se prueba
+con una función de cálculo simulada.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.services import billing_aggregates
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    billing_aggregates.invalidate_payment_aggregates()
+    yield
+    billing_aggregates.invalidate_payment_aggregates()
+
+
+def test_aggregates_use_a_single_query():
+    session = Session()
+    captured = []
+    paid_at = datetime(2026, 3, 1, 12, 0)
+
+    def one(query_self):
+        captured.append(str(query_self.statement.compile(dialect=postgresql.dialect())))
+        return SimpleNamespace(
+            total_paid="1200.00",
+            payments_count=3,
+            pending_amount=None,
+            last_paid_at=paid_at,
+            last_amount="400.00",
+        )
+
+    with patch("sqlalchemy.orm.Query.one", one):
+        aggregates = billing_aggregates.compute_payment_aggregates(session, uuid4())
+
+    assert len(captured) == 1
+    assert "row_number() OVER (PARTITION BY payments.status" in captured[0]
+    assert captured[0].count("FILTER (WHERE") == 5
+    assert aggregates == billing_aggregates.PaymentAggregates(
+        total_paid=Decimal("1200.00"),
+        payments_count=3,
+        pending_amount=Decimal(0),
+        last_payment_date=paid_at,
+        last_payment_amount=Decimal("400.00"),
+    )
+
+
+def test_cached_aggregates_are_dropped_on_invalidation():
+    account_id = uuid4()
+    compute = MagicMock(side_effect=["before", "after"])
+
+    with (
+        patch.object(billing_aggregates, "compute_payment_aggregates", compute),
+        patch.object(billing_aggregates.settings, "BILLING_AGGREGATES_TTL_SECONDS", 60),
+    ):
+        first = billing_aggregates.get_payment_aggregates(MagicMock(), account_id)
+        cached = billing_aggregates.get_payment_aggregates(MagicMock(), account_id)
+        billing_aggregates.invalidate_payment_aggregates(account_id)
+        refreshed = billing_aggregates.get_payment_aggregates(MagicMock(), account_id)
+
+    assert [first, cached, refreshed] == ["before", "before", "after"]
+    assert compute.call_count == 2
+
+
+def test_invalidation_during_compute_discards_stale_result():
+    account_id = uuid4()
+
+    def compute(db, account):
+        # Un pago se confirma mientras se calculan los agregados
+        billing_aggregates.invalidate_payment_aggregates(account)
+        return "stale"
+
+    with (
+        patch.object(billing_aggregates, "compute_payment_aggregates", compute),
+        patch.object(billing_aggregates.settings, "BILLING_AGGREGATES_TTL_SECONDS", 60),
+    ):
+        billing_aggregates.get_payment_aggregates(MagicMock(), account_id)
+
+    assert account_id not in billing_aggregates._cache
+
+
+def test_confirmed_payment_notifies_other_workers():
+    account_id = uuid4()
+    db = MagicMock()
+
+    with patch.object(
+        billing_aggregates.settings, "BILLING_AGGREGATES_TTL_SECONDS", 60
+    ):
+        billing_aggregates._cache.store(
+            account_id, "cached", 60, billing_aggregates._cache.generation(account_id)
+        )
+        billing_aggregates.notify_payment_aggregates_changed(db, account_id)
+
+    statement, params = db.execute.call_args.args
+    assert "pg_notify" in str(statement)
+    assert params["payload"] == str(account_id)
+    assert account_id not in billing_aggregates._cache
+
+    # El listener de cada worker invalida su copia con el payload recibido
+    generation = billing_aggregates._cache.generation(account_id)
+    billing_aggregates._cache.store(account_id, "cached", 60, generation)
+    billing_aggregates.handle_notification(str(account_id))
+    assert account_id not in billing_aggregates._cache
@@ -0,0 +1,131 @@
+"""
+Tests de la resolución de capabilities (override ?? plan ?? default).
+
+Estrategia: la sesión es un MagicMock que retorna filas por modelo; la
+subconsulta del plan activo se parchea (usa la regla de suscripción activa).
+La caché por organización se limpia entre tests.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.models.capability import Capability, OrganizationCapability, PlanCapability
+from app.services import capabilities, capability_cache
+from app.services.capabilities import (
+    CapabilityService,
+    EffectiveCapabilities,
+    ResolvedCapability,
+)
+
+
+def _db(rows_by_model):
+    db = MagicMock()
+
+    def query(model):
+        q = MagicMock()
+        q.filter.return_value = q
+        q.all.return_value = rows_by_model.get(model, [])
+        return q
+
+    db.query.side_effect = query
+    return db
+
+
+def test_get_all_capabilities_resolves_in_three_queries():
+    org_id, plan_id = uuid4(), uuid4()
+    devices, geofences, ai = (
+        Capability(id=uuid4(), code="max_devices"),
+        Capability(id=uuid4(), code="max_geofences"),
+        Capability(id=uuid4(), code="ai_features"),
+    )
+    expired = datetime.utcnow() - timedelta(days=1)
+    db = _db(
+        {
+            Capability: [devices, geofences, ai],
+            OrganizationCapability: [
+                OrganizationCapability(capability_id=devices.id, value_int=50),
+                OrganizationCapability(
+                    capability_id=geofences.id, value_int=99, expires_at=expired
+                ),
+            ],
+            PlanCapability: [
+                PlanCapability(
+                    plan_id=plan_id, capability_id=geofences.id, value_int=20
+                ),
+            ],
+        }
+    )
+
+    with patch.object(capabilities, "active_plan_id_subquery", return_value=plan_id):
+        result = CapabilityService.get_all_capabilities(db, org_id)
+
+    assert db.query.call_count == 3
+    assert (result["max_devices"].value, result["max_devices"].source) == (
+        50,
+        "organization",
+    )
+    # Override expirado: cae al plan
+    assert (result["max_geofences"].value, result["max_geofences"].plan_id) == (
+        20,
+        plan_id,
+    )
+    assert (result["ai_features"].value, result["ai_features"].source) == (
+        False,
+        "default",
+    )
+    assert result["max_users"].source == "default"
+
+
+@pytest.fixture
+def clean_cache():
+    capability_cache.invalidate()
+    yield
+    capability_cache.invalidate()
+
+
+def test_effective_capabilities_are_cached_until_invalidated(clean_cache):
+    org_id = uuid4()
+    db = _db({})
+
+    with patch.object(capabilities, "active_plan_id_subquery", return_value=None):
+        CapabilityService.get_limit(db, org_id, "max_devices")
+        CapabilityService.has_capability(db, org_id, "ai_features")
+        assert db.query.call_count == 3
+
+        capability_cache.notify_capabilities_changed(MagicMock(), org_id)
+        CapabilityService.get_limit(db, org_id, "max_devices")
+
+    assert db.query.call_count == 6
+
+
+def test_cache_ttl_is_bounded_by_nearest_override_expiry():
+    expires_at = datetime.utcnow() + timedelta(seconds=30)
+    effective = EffectiveCapabilities(
+        organization_id=uuid4(),
+        capabilities={
+            "max_devices": ResolvedCapability(
+                code="max_devices",
+                value=10,
+                source="organization",
+                expires_at=expires_at,
+            ),
+        },
+    )
+
+    assert 0 < effective.ttl_seconds(300) <= 30
+    assert effective.get("max_users").source == "default"
+
+
+def test_invalidation_during_build_discards_stale_entry(clean_cache):
+    org_id = uuid4()
+    generation = capability_cache.current_generation(org_id)
+
+    capability_cache.handle_notification("*")
+    capability_cache.store(org_id, object(), 60, generation)
+
+    assert capability_cache.get_cached(org_id) is None
@@ -0,0 +1,138 @@
+"""
+Tests de las capabilities efectivas materializadas.
+
+Estrategia: la sesión es un MagicMock; el plan activo por organización y el
+recalculo se parchean donde no son el objeto del test.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from app.models.capability import Capability, OrganizationCapability, PlanCapability
+from app.models.organization_effective_capability import (
+    OrganizationEffectiveCapability,
+)
+from app.services import capabilities, effective_capabilities
+from app.services.capabilities import CapabilityService, ResolvedCapability
+
+
+def _db(rows_by_model):
+    db = MagicMock()
+
+    def query(model):
+        q = MagicMock()
+        q.filter.return_value = q
+        q.all.return_value = rows_by_model.get(model, [])
+        return q
+
+    db.query.side_effect = query
+    return db
+
+
+def test_bulk_resolution_uses_each_organization_plan():
+    org_a, org_b, org_c = uuid4(), uuid4(), uuid4()
+    basic, pro = uuid4(), uuid4()
+    devices = Capability(id=uuid4(), code="max_devices")
+    db = _db(
+        {
+            Capability: [devices],
+            OrganizationCapability: [
+                OrganizationCapability(
+                    organization_id=org_a, capability_id=devices.id, value_int=500
+                )
+            ],
+            PlanCapability: [
+                PlanCapability(plan_id=basic, capability_id=devices.id, value_int=5),
+                PlanCapability(plan_id=pro, capability_id=devices.id, value_int=50),
+            ],
+        }
+    )
+
+    with patch.object(
+        capabilities,
+        "get_active_plan_ids",
+        return_value={org_a: basic, org_b: pro},
+    ):
+        result = CapabilityService.get_all_capabilities_bulk(db, [org_a, org_b, org_c])
+
+    assert db.query.call_count == 3
+    a, b, c = (result[org]["max_devices"] for org in (org_a, org_b, org_c))
+    assert (a.value, a.source) == (500, "organization")
+    assert (b.value, b.source, b.plan_id) == (50, "plan", pro)
+    # Sin suscripción activa: default
+    assert (c.value, c.source) == (1, "default")
+
+
+def test_row_maps_value_to_typed_column():
+    org_id = uuid4()
+
+    flag = effective_capabilities._row(
+        org_id, ResolvedCapability(code="ai_features", value=True, source="plan")
+    )
+    limit = effective_capabilities._row(
+        org_id, ResolvedCapability(code="max_users", value=0, source="default")
+    )
+
+    assert (flag["value_bool"], flag["value_int"]) == (True, None)
+    assert (limit["value_int"], limit["value_bool"]) == (0, None)
+
+
+def test_plan_change_refreshes_plan_organizations_and_invalidates_all():
+    plan_id, org_ids = uuid4(), [uuid4(), uuid4()]
+    db = MagicMock()
+
+    with (
+        patch.object(
+            effective_capabilities,
+            "get_organization_ids_with_active_plan",
+            return_value=org_ids,
+        ),
+        patch.object(
+            effective_capabilities, "refresh_effective_capabilities"
+        ) as refresh,
+        patch.object(effective_capabilities, "notify_capabilities_changed") as notify,
+    ):
+        effective_capabilities.capabilities_changed(db, plan_id=plan_id)
+
+    db.flush.assert_called_once()
+    refresh.assert_called_once_with(db, org_ids)
+    notify.assert_called_once_with(db, None)
+
+
+def test_bulk_read_refreshes_missing_and_expired_organizations():
+    fresh, expired, missing, unknown = uuid4(), uuid4(), uuid4(), uuid4()
+    past = datetime.now(timezone.utc) - timedelta(minutes=1)
+
+    def row(org_id, **kwargs):
+        return OrganizationEffectiveCapability(
+            organization_id=org_id,
+            capability_code="max_devices",
+            source="plan",
+            value_int=5,
+            **kwargs,
+        )
+
+    db = MagicMock()
+    first, second = MagicMock(), MagicMock()
+    first.filter.return_value.all.return_value = [
+        row(fresh),
+        row(expired, expires_at=past),
+    ]
+    second.filter.return_value.all.return_value = [row(expired), row(missing)]
+    db.query.side_effect = [first, second]
+    db.execute.return_value.scalars.return_value.all.return_value = [missing]
+
+    with patch.object(
+        effective_capabilities, "refresh_effective_capabilities"
+    ) as refresh:
+        result = effective_capabilities.get_effective_capabilities_bulk(
+            db, [fresh, expired, missing, unknown]
+        )
+
+    assert set(refresh.call_args.args[1]) == {expired, missing}
+    db.commit.assert_called_once()
+    assert set(result) == {fresh, expired, missing}
+    assert result[expired][0].expires_at is None
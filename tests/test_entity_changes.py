@@ -0,0 +1,202 @@
+"""
+Tests de sincronización incremental (GET /changes) y ETags de listados.
+
+Estrategia: entity_changes se alimenta por triggers PostgreSQL, así que el
+servicio se parchea en los endpoints y la sesión es un MagicMock.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.api.deps import get_current_user_full
+from app.api.v1.endpoints import alert_rules as alert_rules_endpoints
+from app.api.v1.endpoints import geofences as geofences_endpoints
+from app.db.session import get_db
+from app.main import app
+from app.models.alert_rule import AlertRule
+from app.models.geofence import Geofence
+from app.services.entity_changes import build_list_etag, etag_matches
+
+
+def _request(query: str = "", if_none_match: str | None = None) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "query_string": query.encode(),
+            "headers": headers,
+        }
+    )
+
+
+def test_etag_depends_on_version_organization_and_query():
+    organization_id = uuid4()
+    etag = build_list_etag(organization_id, 10, _request("cells_mode=count"))
+
+    assert etag.startswith('W/"10-')
+    assert etag == build_list_etag(organization_id, 10, _request("cells_mode=count"))
+    assert etag != build_list_etag(organization_id, 11, _request("cells_mode=count"))
+    assert etag != build_list_etag(organization_id, 10, _request(""))
+    assert etag != build_list_etag(uuid4(), 10, _request("cells_mode=count"))
+
+
+def test_etag_matches_if_none_match_list():
+    assert etag_matches(_request(if_none_match='W/"1-a", W/"2-b"'), 'W/"2-b"')
+    assert etag_matches(_request(if_none_match="*"), 'W/"2-b"')
+    assert not etag_matches(_request(if_none_match='W/"1-a"'), 'W/"2-b"')
+    assert not etag_matches(_request(), 'W/"2-b"')
+
+
+class TestChangesEndpoints:
+    @pytest.fixture
+    def user(self):
+        user = MagicMock()
+        user.id = uuid4()
+        user.organization_id = uuid4()
+        return user
+
+    @pytest.fixture
+    def db(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def client(self, user, db):
+        def override_get_db():
+            yield db
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user_full] = lambda: user
+        yield TestClient(app)
+        app.dependency_overrides.clear()
+
+    def test_geofence_changes_split_upserts_and_soft_deletes(self, client, user, db):
+        now = datetime.utcnow()
+        active = Geofence(
+            id=uuid4(),
+            organization_id=user.organization_id,
+            created_by=user.id,
+            name="Patio",
+            is_active=True,
+            created_at=now,
+            updated_at=now,
+        )
+        deleted_id = uuid4()
+        db.query.return_value.filter.return_value.all.return_value = [active]
+
+        with patch.object(
+            geofences_endpoints,
+            "list_changed_entities",
+            return_value=([(deleted_id, 7), (active.id, 9)], True),
+        ) as mock_changes:
+            response = client.get(
+                "/api/v1/geofences/changes",
+                params={"since": 5, "limit": 2, "cells_mode": "count"},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        body = response.json()
+        assert body["since"] == 5
+        assert body["version"] == 9
+        assert body["has_more"] is True
+        assert [geofence["id"] for geofence in body["upserted"]] == [str(active.id)]
+        assert body["deleted"] == [str(deleted_id)]
+        assert mock_changes.call_args.args[1:] == (
+            user.organization_id,
+            "geofence",
+            5,
+            2,
+        )
+
+    def test_alert_rule_changes_without_changes_keeps_version(self, client, db):
+        with (
+            patch.object(
+                alert_rules_endpoints, "_organization_is_active", return_value=True
+            ),
+            patch.object(
+                alert_rules_endpoints, "list_changed_entities", return_value=([], False)
+            ),
+        ):
+            response = client.get("/api/v1/alert_rules/changes", params={"since": 42})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "since": 42,
+            "version": 42,
+            "upserted": [],
+            "deleted": [],
+            "has_more": False,
+        }
+        db.query.assert_not_called()
+
+    def test_alert_rule_list_returns_304_for_current_etag(self, client, user, db):
+        rule = AlertRule(
+            id=uuid4(),
+            organization_id=user.organization_id,
+            created_by=user.id,
+            name="Ignición",
+            type="ignition_off",
+            config={},
+            is_active=True,
+        )
+        # Primera consulta: reglas; segunda: unidades asignadas (ninguna)
+        rows = db.query.return_value.filter.return_value.order_by.return_value
+        rows.all.side_effect = [[rule], []]
+
+        with (
+            patch.object(
+                alert_rules_endpoints, "_organization_is_active", return_value=True
+            ),
+            patch.object(alert_rules_endpoints, "get_current_version", return_value=3),
+        ):
+            first = client.get("/api/v1/alert_rules")
+            etag = first.headers["etag"]
+            second = client.get("/api/v1/alert_rules", headers={"If-None-Match": etag})
+
+        assert first.status_code == status.HTTP_200_OK
+        assert [item["id"] for item in first.json()] == [str(rule.id)]
+        assert second.status_code == status.HTTP_304_NOT_MODIFIED
+        assert second.headers["etag"] == etag
+
+
+def _load_migration(filename: str):
+    path = Path(__file__).parents[1] / "app/db/migrations/versions" / filename
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_migration_backfills_existing_entities_before_triggers():
+    migration = _load_migration("016_entity_changes.py")
+
+    with patch.object(migration, "op") as op:
+        migration.upgrade()
+
+    statements = [" ".join(str(c.args[0]).split()) for c in op.execute.call_args_list]
+    geofences = statements.index(
+        "INSERT INTO entity_changes (organization_id, entity_type, entity_id) "
+        "SELECT organization_id, 'geofence', id FROM geofences"
+    )
+    alert_rules = statements.index(
+        "INSERT INTO entity_changes (organization_id, entity_type, entity_id) "
+        "SELECT organization_id, 'alert_rule', id FROM alert_rules"
+    )
+    first_trigger = next(
+        i for i, sql in enumerate(statements) if sql.startswith("CREATE TRIGGER")
+    )
+    # Los triggers registrarían de nuevo las filas si se crearan antes
+    assert max(geofences, alert_rules) < first_trigger
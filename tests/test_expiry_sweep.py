@@ -0,0 +1,67 @@
+"""
+Tests del barrido de expiraciones por lotes.
+
+Estrategia: la sesión es un MagicMock; cada db.execute retorna el siguiente
+lote simulado y se compila la sentencia con el dialecto de PostgreSQL para
+verificar el UPDATE ... RETURNING con SKIP LOCKED.
+"""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import expiry_sweep
+
+
+def _db(*batches):
+    db = MagicMock()
+    db.execute.side_effect = [
+        MagicMock(**{"scalars.return_value.all.return_value": list(batch)})
+        for batch in batches
+    ]
+    return db
+
+
+def _compiled(db, call_index=0):
+    statement = db.execute.call_args_list[call_index].args[0]
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_device_services_expire_in_batches_until_exhausted():
+    db = _db([uuid4(), uuid4()], [uuid4()])
+
+    expired = expiry_sweep.expire_device_services(db, batch_size=2)
+
+    assert expired == 3
+    assert db.execute.call_count == 2
+    assert db.commit.call_count == 2
+    sql = _compiled(db)
+    assert sql.startswith("UPDATE device_services SET status=")
+    assert "device_services.auto_renew IS false" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "RETURNING device_services.id" in sql
+
+
+def test_expired_subscriptions_refresh_capabilities_of_their_organizations():
+    organization_id = uuid4()
+    db = _db([organization_id, organization_id])
+
+    with patch.object(expiry_sweep, "capabilities_changed") as changed:
+        expired = expiry_sweep.expire_subscriptions(db, batch_size=5)
+
+    assert expired == 2
+    changed.assert_called_once_with(db, organization_ids={organization_id})
+    assert "RETURNING subscriptions.organization_id" in _compiled(db)
+    db.commit.assert_called_once()
+
+
+def test_empty_sweep_skips_capabilities_refresh():
+    db = _db([])
+
+    with patch.object(expiry_sweep, "capabilities_changed") as changed:
+        assert expiry_sweep.expire_subscriptions(db, batch_size=5) == 0
+
+    changed.assert_not_called()
@@ -0,0 +1,148 @@
+"""
+Tests del índice en memoria de geocercas (lookup por punto).
+
+Estrategia: la carga desde geofence_cells se parchea para no depender del
+DDL PostgreSQL-específico (igual que test_telemetry).
+"""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.api.deps import AuthResult
+from app.api.v1.endpoints import geofences as geofences_endpoints
+from app.db.session import get_db
+from app.main import app
+from app.services import geofence_index
+from app.services.geofence_index import (
+    OrganizationGeofenceIndex,
+    clear_geofence_indexes,
+    get_geofence_index,
+    invalidate_geofence_index,
+    notify_geofence_index_changed,
+)
+from app.utils.h3_cells import h3, is_h3_available
+
+pytestmark = pytest.mark.skipif(not is_h3_available(), reason="h3 no instalado")
+
+CENTRO = (19.4326, -99.1332)
+GUADALAJARA = (20.6767, -103.3475)
+URL = "/api/v1/geofences/lookup"
+
+
+@pytest.fixture(autouse=True)
+def _clear_indexes():
+    clear_geofence_indexes()
+    yield
+    clear_geofence_indexes()
+
+
+def test_lookup_matches_fine_and_compacted_cells():
+    fine_geofence, coarse_geofence = uuid4(), uuid4()
+    index = OrganizationGeofenceIndex(
+        [
+            (fine_geofence, h3.latlng_to_cell(*CENTRO, 10)),
+            (coarse_geofence, h3.latlng_to_cell(*CENTRO, 6)),
+        ]
+    )
+
+    assert set(index.lookup(*CENTRO)) == {fine_geofence, coarse_geofence}
+    assert index.lookup(*GUADALAJARA) == []
+    assert index.geofence_count == 2
+
+
+def test_index_is_cached_until_invalidated():
+    organization_id = uuid4()
+    rows = [(uuid4(), h3.latlng_to_cell(*CENTRO, 9))]
+
+    with patch.object(geofence_index, "_load_rows", return_value=rows) as mock_load:
+        first = get_geofence_index(MagicMock(), organization_id)
+        assert get_geofence_index(MagicMock(), organization_id) is first
+
+        invalidate_geofence_index(organization_id)
+        assert get_geofence_index(MagicMock(), organization_id) is not first
+
+    assert mock_load.call_count == 2
+
+
+def test_invalid_stored_cells_are_skipped():
+    geofence_id = uuid4()
+    index = OrganizationGeofenceIndex(
+        [(geofence_id, 810000000001), (geofence_id, h3.latlng_to_cell(*CENTRO, 9))]
+    )
+
+    assert index.skipped_cells == 1
+    assert index.lookup(*CENTRO) == [geofence_id]
+
+
+def test_change_notifies_other_workers_and_notification_invalidates():
+    organization_id = uuid4()
+    rows = [(uuid4(), h3.latlng_to_cell(*CENTRO, 9))]
+    db = MagicMock()
+
+    notify_geofence_index_changed(db, organization_id)
+
+    statement, params = db.execute.call_args.args
+    assert "pg_notify" in str(statement)
+    assert params["payload"] == str(organization_id)
+
+    with patch.object(geofence_index, "_load_rows", return_value=rows):
+        first = get_geofence_index(MagicMock(), organization_id)
+        geofence_index.handle_notification(str(organization_id))
+        assert get_geofence_index(MagicMock(), organization_id) is not first
+
+
+class TestLookupEndpoint:
+    @pytest.fixture
+    def client_factory(self):
+        def override_get_db():
+            yield MagicMock()
+
+        def _make(auth: AuthResult) -> TestClient:
+            app.dependency_overrides[get_db] = override_get_db
+            app.dependency_overrides[
+                geofences_endpoints.get_auth_for_geofence_lookup
+            ] = lambda: auth
+            return TestClient(app)
+
+        yield _make
+        app.dependency_overrides.clear()
+
+    def test_batch_lookup_uses_user_organization(self, client_factory):
+        organization_id = uuid4()
+        geofence_id = uuid4()
+        rows = [(geofence_id, h3.latlng_to_cell(*CENTRO, 9))]
+        client = client_factory(
+            AuthResult(auth_type="cognito", payload={}, organization_id=organization_id)
+        )
+
+        with patch.object(geofence_index, "_load_rows", return_value=rows) as mock_load:
+            response = client.post(
+                URL,
+                json={
+                    "points": [
+                        {"lat": CENTRO[0], "lng": CENTRO[1]},
+                        {"lat": GUADALAJARA[0], "lng": GUADALAJARA[1]},
+                    ]
+                },
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["results"]
+        assert results[0]["geofence_ids"] == [str(geofence_id)]
+        assert results[1]["geofence_ids"] == []
+        assert mock_load.call_args.args[1] == organization_id
+
+    def test_paseto_requires_organization_id(self, client_factory):
+        client = client_factory(
+            AuthResult(auth_type="paseto", payload={}, service="gac", role="GAC_ADMIN")
+        )
+
+        response = client.get(URL, params={"lat": CENTRO[0], "lng": CENTRO[1]})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,113 @@
+"""
+Tests del Historial de Visitas a Geocercas.
+
+Estrategia: filas simuladas (como test_telemetry); la intersección H3 y la
+detección de rachas se prueban sin base de datos.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+
+from app.services.geofence_visits import detect_visits, find_geofence_visits
+from app.utils.h3_cells import CellMatcher, h3, is_h3_available
+
+pytestmark = pytest.mark.skipif(not is_h3_available(), reason="h3 no instalado")
+
+T0 = datetime(2025, 11, 29, 8, 0, 0, tzinfo=timezone.utc)
+INSIDE = (19.4326, -99.1332)
+OUTSIDE = (19.5000, -99.2000)
+
+
+def _geofence_cells(resolution: int = 9) -> list[int]:
+    return [h3.latlng_to_cell(*INSIDE, resolution)]
+
+
+def _row(seq: int, point, trip_id, device_id: str = "DEV-001"):
+    return MagicMock(
+        device_id=device_id,
+        trip_id=trip_id,
+        timestamp=T0 + timedelta(minutes=seq),
+        lat=point[0],
+        lng=point[1],
+        seq=seq,
+    )
+
+
+class TestCellMatcher:
+    def test_matches_compacted_parent_cells(self):
+        parent = h3.latlng_to_cell(*INSIDE, 7)
+        child = h3.latlng_to_cell(*OUTSIDE, 10)
+        matcher = CellMatcher([parent, child])
+
+        assert matcher.finest == 10
+        assert matcher.contains(*INSIDE)
+        assert matcher.contains(*OUTSIDE)
+        assert not matcher.contains(20.67, -103.35)
+
+    def test_empty_matcher_contains_nothing(self):
+        matcher = CellMatcher([])
+
+        assert not matcher
+        assert not matcher.contains(*INSIDE)
+
+
+class TestDetectVisits:
+    def test_splits_visits_on_exit_and_trip_change(self):
+        trip_a, trip_b = uuid4(), uuid4()
+        rows = [
+            _row(1, INSIDE, trip_a),
+            _row(2, INSIDE, trip_a),
+            _row(3, OUTSIDE, trip_a),
+            _row(4, INSIDE, trip_a),
+            _row(5, INSIDE, trip_b),
+        ]
+
+        visits = detect_visits(rows, CellMatcher(_geofence_cells()))
+
+        assert [(v.trip_id, v.points) for v in visits] == [
+            (trip_a, 2),
+            (trip_a, 1),
+            (trip_b, 1),
+        ]
+        assert visits[0].entered_at == T0 + timedelta(minutes=1)
+        assert visits[0].exited_at == T0 + timedelta(minutes=2)
+
+    def test_gap_in_sequence_closes_visit(self):
+        trip_id = uuid4()
+        # seq 2 quedó fuera del bounding box y no llegó desde SQL
+        rows = [_row(1, INSIDE, trip_id), _row(3, INSIDE, trip_id)]
+
+        visits = detect_visits(rows, CellMatcher(_geofence_cells()))
+
+        assert len(visits) == 2
+
+
+def test_find_geofence_visits_streams_batches():
+    trip_id = uuid4()
+    db = MagicMock()
+    db.execute.return_value.fetchmany.side_effect = [
+        [_row(1, INSIDE, trip_id)],
+        [_row(2, INSIDE, trip_id)],
+        [],
+    ]
+    matcher = CellMatcher(_geofence_cells())
+
+    visits = find_geofence_visits(db, matcher, ["DEV-001"], T0, T0 + timedelta(1))
+
+    assert len(visits) == 1
+    assert visits[0].points == 2
+    params = db.execute.call_args.args[1]
+    assert params["min_lat"] <= INSIDE[0] <= params["max_lat"]
+    assert params["device_ids"] == ["DEV-001"]
+
+
+def test_find_geofence_visits_skips_query_without_cells():
+    db = MagicMock()
+
+    assert find_geofence_visits(db, CellMatcher([]), ["DEV-001"], T0, T0) == []
+    db.execute.assert_not_called()
@@ -1,40 +1,28 @@
+from unittest.mock import MagicMock
 from uuid import uuid4
 
 import pytest
 from fastapi import status
 
-from app.api.deps import get_geofences_kafka_producer
-from app.main import app
 from app.models.geofence import Geofence, GeofenceCell
 from app.models.organization import Organization
-
-
-class _StubGeofencesKafkaProducer:
-    def __init__(self):
-        self.messages = []
-        self.should_fail = False
-
-    def publish_update(self, payload, key=None):
-        self.messages.append({"payload": payload, "key": key})
-        return not self.should_fail
-
-
-@pytest.fixture(scope="function")
-def geofences_kafka_stub_producer():
-    stub = _StubGeofencesKafkaProducer()
-    app.dependency_overrides[get_geofences_kafka_producer] = lambda: stub
-    yield stub
-    app.dependency_overrides.pop(get_geofences_kafka_producer, None)
-
-
-def test_geofences_crud_soft_delete(
-    authenticated_client, test_user_data, geofences_kafka_stub_producer
-):
+from app.models.outbox_event import OutboxEvent
+from app.schemas.geofence import GeofenceCreate, GeofenceUpdate
+from app.services.geofence_cells import insert_geofence_cells, sync_geofence_cells
+from app.services.messaging import geofence_events
+from app.services.messaging.geofence_events import (
+    CHUNK_EVENT_TYPE,
+    encode_event_cells,
+    split_upsert_event,
+)
+
+
+def test_geofences_crud_soft_delete(authenticated_client, test_user_data):
     create_payload = {
         "name": "Geocerca Centro",
         "description": "Zona principal",
         "config": {"color": "blue"},
-        "h3_indexes": [600000000001, 600000000002, 600000000002],
+        "h3_indexes": [618287667196723199, 618287667197247487, 618287667197247487],
     }
 
     create_response = authenticated_client.post(
@@ -47,7 +35,7 @@ def test_geofences_crud_soft_delete(
 
     assert created["name"] == "Geocerca Centro"
     assert created["is_active"] is True
-    assert created["h3_indexes"] == [600000000001, 600000000002]
+    assert created["h3_indexes"] == [618287667196723199, 618287667197247487]
 
     list_response = authenticated_client.get("/api/v1/geofences")
     assert list_response.status_code == status.HTTP_200_OK
@@ -61,7 +49,7 @@ def test_geofences_crud_soft_delete(
     update_payload = {
         "name": "Geocerca Centro Actualizada",
         "description": "Nueva descripcion",
-        "h3_indexes": [700000000001, 700000000001, 700000000003],
+        "h3_indexes": [618287667197771775, 618287667197771775, 618287667198296063],
     }
     update_response = authenticated_client.patch(
         f"/api/v1/geofences/{geofence_id}", json=update_payload
@@ -71,7 +59,7 @@ def test_geofences_crud_soft_delete(
     updated = update_response.json()
     assert updated["name"] == "Geocerca Centro Actualizada"
     assert updated["description"] == "Nueva descripcion"
-    assert updated["h3_indexes"] == [700000000001, 700000000003]
+    assert updated["h3_indexes"] == [618287667197771775, 618287667198296063]
 
     delete_response = authenticated_client.delete(f"/api/v1/geofences/{geofence_id}")
     assert delete_response.status_code == status.HTTP_200_OK
@@ -89,7 +77,6 @@ def test_geofence_patch_replaces_all_h3_cells(
     authenticated_client,
     db_session,
     test_user_data,
-    geofences_kafka_stub_producer,
 ):
     geofence = Geofence(
         id=uuid4(),
@@ -110,7 +97,7 @@ def test_geofence_patch_replaces_all_h3_cells(
 
     patch_payload = {
         "config": {"mode": "replaced"},
-        "h3_indexes": [900000000010, 900000000011],
+        "h3_indexes": [618287667235782655, 618287667949862911],
     }
 
     response = authenticated_client.patch(
@@ -120,7 +107,7 @@ def test_geofence_patch_replaces_all_h3_cells(
 
     data = response.json()
     assert data["config"] == {"mode": "replaced"}
-    assert data["h3_indexes"] == [900000000010, 900000000011]
+    assert data["h3_indexes"] == [618287667235782655, 618287667949862911]
 
     cells = (
         db_session.query(GeofenceCell)
@@ -128,14 +115,13 @@ def test_geofence_patch_replaces_all_h3_cells(
         .order_by(GeofenceCell.h3_index.asc())
         .all()
     )
-    assert [cell.h3_index for cell in cells] == [900000000010, 900000000011]
+    assert [cell.h3_index for cell in cells] == [618287667235782655, 618287667949862911]
 
 
 def test_geofence_patch_with_empty_h3_list_clears_cells(
     authenticated_client,
     db_session,
     test_user_data,
-    geofences_kafka_stub_producer,
 ):
     geofence = Geofence(
         id=uuid4(),
@@ -173,7 +159,6 @@ def test_geofences_are_isolated_by_organization(
     db_session,
     test_account_data,
     test_user_data,
-    geofences_kafka_stub_producer,
 ):
     own_geofence = Geofence(
         id=uuid4(),
@@ -220,9 +205,9 @@ def test_geofences_are_isolated_by_organization(
     assert get_foreign_response.status_code == status.HTTP_404_NOT_FOUND
 
 
-def test_geofence_write_endpoints_publish_kafka_events(
+def test_geofence_write_endpoints_enqueue_outbox_events(
     authenticated_client,
-    geofences_kafka_stub_producer,
+    db_session,
 ):
     create_response = authenticated_client.post(
         "/api/v1/geofences",
@@ -230,7 +215,7 @@ def test_geofence_write_endpoints_publish_kafka_events(
             "name": "Geocerca Kafka",
             "description": "",
             "config": {"color": "#2E86DE", "category": ""},
-            "h3_indexes": [617733123123123123, 617733123123123124],
+            "h3_indexes": [618287667196723199, 618287667197247487],
         },
     )
     assert create_response.status_code == status.HTTP_201_CREATED
@@ -241,7 +226,7 @@ def test_geofence_write_endpoints_publish_kafka_events(
         f"/api/v1/geofences/{geofence_id}",
         json={
             "name": "Geocerca Kafka Actualizada",
-            "h3_indexes": [617733123123123125],
+            "h3_indexes": [618287667950387199],
         },
     )
     assert update_response.status_code == status.HTTP_200_OK
@@ -249,8 +234,12 @@ def test_geofence_write_endpoints_publish_kafka_events(
     delete_response = authenticated_client.delete(f"/api/v1/geofences/{geofence_id}")
     assert delete_response.status_code == status.HTTP_200_OK
 
-    events = geofences_kafka_stub_producer.messages
+    events = [
+        {"payload": event.payload, "key": event.key}
+        for event in db_session.query(OutboxEvent).order_by(OutboxEvent.id).all()
+    ]
     assert len(events) == 3
+    assert {event["key"] for event in events} == {geofence_id}
     assert [event["payload"]["event_type"] for event in events] == [
         "UPSERT",
         "UPSERT",
@@ -271,7 +260,7 @@ def test_geofence_write_endpoints_publish_kafka_events(
         "color": "#2E86DE",
         "category": "",
     }
-    assert upsert_payload["data"]["cells"] == [617733123123123123, 617733123123123124]
+    assert upsert_payload["data"]["cells"] == [618287667196723199, 618287667197247487]
     assert upsert_payload["data"]["updated_at"].endswith("Z")
 
     delete_payload = events[-1]["payload"]
@@ -280,30 +269,172 @@ def test_geofence_write_endpoints_publish_kafka_events(
     assert delete_payload["data"] == {"id": geofence_id}
 
 
-def test_geofence_kafka_error_does_not_break_persistence(
-    authenticated_client,
-    caplog,
-    db_session,
-    geofences_kafka_stub_producer,
+def _add_geofence_with_cells(db_session, test_user_data, name, h3_indexes):
+    geofence = Geofence(
+        id=uuid4(),
+        organization_id=test_user_data.organization_id,
+        created_by=test_user_data.id,
+        name=name,
+        description=None,
+        config=None,
+        is_active=True,
+    )
+    db_session.add(geofence)
+    db_session.commit()
+
+    for h3_index in h3_indexes:
+        db_session.add(GeofenceCell(geofence_id=geofence.id, h3_index=h3_index))
+    db_session.commit()
+    return geofence
+
+
+def test_geofence_list_count_mode_omits_cells(
+    authenticated_client, db_session, test_user_data
+):
+    geofence = _add_geofence_with_cells(
+        db_session, test_user_data, "Geocerca conteo", [820000000001, 820000000002]
+    )
+
+    response = authenticated_client.get(
+        "/api/v1/geofences", params={"cells_mode": "count"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    item = next(i for i in response.json() if i["id"] == str(geofence.id))
+    assert item["h3_indexes"] == []
+    assert item["cell_count"] == 2
+    assert item["cells_mode"] == "count"
+
+
+def test_geofence_compact_mode_returns_parent_cell(
+    authenticated_client, db_session, test_user_data
+):
+    h3 = pytest.importorskip("h3.api.basic_int")
+    parent = h3.latlng_to_cell(19.4326, -99.1332, 8)
+    children = sorted(h3.cell_to_children(parent, 9))
+    geofence = _add_geofence_with_cells(
+        db_session, test_user_data, "Geocerca compacta", children
+    )
+
+    response = authenticated_client.get(
+        f"/api/v1/geofences/{geofence.id}", params={"cells_mode": "compact"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["h3_indexes"] == [parent]
+    assert response.json()["cell_count"] == len(children)
+
+
+def test_geofence_compact_mode_falls_back_to_full_cells_when_not_compactable(
+    authenticated_client, db_session, test_user_data
 ):
-    geofences_kafka_stub_producer.should_fail = True
-
-    with caplog.at_level("ERROR"):
-        response = authenticated_client.post(
-            "/api/v1/geofences",
-            json={
-                "name": "Geocerca con error kafka",
-                "description": "",
-                "config": {"color": "#000000"},
-                "h3_indexes": [700000000001],
-            },
-        )
-
-    assert response.status_code == status.HTTP_201_CREATED
-    created_id = response.json()["id"]
-
-    persisted = db_session.query(Geofence).filter(Geofence.id == created_id).first()
-    assert persisted is not None
-    assert any(
-        "Fallo publicando evento en Kafka" in rec.message for rec in caplog.records
+    pytest.importorskip("h3.api.basic_int")
+    cells = [810000000001, 810000000002]
+    geofence = _add_geofence_with_cells(
+        db_session, test_user_data, "Geocerca heredada", cells
+    )
+
+    response = authenticated_client.get(
+        f"/api/v1/geofences/{geofence.id}", params={"cells_mode": "compact"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["h3_indexes"] == cells
+    assert response.json()["cells_mode"] == "full"
+
+
+def test_geofence_schemas_reject_invalid_or_mixed_resolution_cells():
+    h3 = pytest.importorskip("h3.api.basic_int")
+    cell = h3.latlng_to_cell(19.4326, -99.1332, 9)
+
+    with pytest.raises(ValueError, match="inválidas"):
+        GeofenceCreate(name="Inválida", h3_indexes=[cell, 600000000001])
+    with pytest.raises(ValueError, match="una sola resolución"):
+        GeofenceUpdate(h3_indexes=[cell, h3.cell_to_parent(cell, 8)])
+    assert GeofenceUpdate(h3_indexes=None).h3_indexes is None
+
+
+def test_geofence_cells_endpoint_pages_by_h3_index(
+    authenticated_client, db_session, test_user_data
+):
+    cells = [830000000001, 830000000002, 830000000003]
+    geofence = _add_geofence_with_cells(
+        db_session, test_user_data, "Geocerca paginada", cells
+    )
+    url = f"/api/v1/geofences/{geofence.id}/cells"
+
+    first = authenticated_client.get(url, params={"limit": 2}).json()
+    assert first["h3_indexes"] == cells[:2]
+    assert first["has_more"] is True
+
+    second = authenticated_client.get(
+        url, params={"limit": 2, "cursor": first["cursor"]}
+    ).json()
+    assert second["h3_indexes"] == cells[2:]
+    assert second["has_more"] is False
+    assert second["cursor"] is None
+
+
+def test_sync_geofence_cells_applies_only_the_difference():
+    db = MagicMock()
+    db.execute.return_value.rowcount = 2
+    geofence_id = uuid4()
+
+    changes = sync_geofence_cells(db, geofence_id, [5, 6, 6, 7])
+
+    assert changes.added == 2 and changes.removed == 2
+    delete_call, insert_call = db.execute.call_args_list
+    assert "DELETE FROM geofence_cells" in str(delete_call.args[0])
+    assert "EXCEPT" in str(insert_call.args[0])
+    assert insert_call.args[1] == {"geofence_id": geofence_id, "cells": [5, 6, 7]}
+
+
+def test_insert_geofence_cells_skips_empty_list():
+    db = MagicMock()
+
+    assert insert_geofence_cells(db, uuid4(), []) == 0
+    db.execute.assert_not_called()
+
+
+def _upsert_payload(cells):
+    return {
+        "event_id": "header-event",
+        "event_type": "UPSERT",
+        "entity": "geofence",
+        "timestamp": "2026-04-16T17:59:59Z",
+        "organization_id": "org",
+        "data": {"id": "geofence", "name": "Grande", "cells": cells},
+    }
+
+
+def test_split_upsert_event_keeps_small_events_whole():
+    payload = _upsert_payload([1, 2, 3])
+
+    assert split_upsert_event(payload, version=1, chunk_cells=3) == [payload]
+
+
+def test_split_upsert_event_builds_header_and_ordered_chunks():
+    cells = list(range(1, 8))
+
+    header, *chunks = split_upsert_event(
+        _upsert_payload(cells), version=42, chunk_cells=3
     )
+
+    assert header["event_type"] == "UPSERT"
+    assert header["data"]["cells"] == []
+    assert header["data"]["chunking"] == {
+        "version": 42,
+        "chunk_count": 3,
+        "cell_count": 7,
+    }
+    assert [chunk["event_type"] for chunk in chunks] == [CHUNK_EVENT_TYPE] * 3
+    assert [chunk["data"]["chunk_index"] for chunk in chunks] == [0, 1, 2]
+    assert all(chunk["data"]["header_event_id"] == "header-event" for chunk in chunks)
+    assert [c for chunk in chunks for c in chunk["data"]["cells"]] == cells
+
+
+def test_encode_event_cells_falls_back_to_raw_when_not_compactable(monkeypatch):
+    pytest.importorskip("h3.api.basic_int")
+    monkeypatch.setattr(
+        geofence_events.settings, "KAFKA_GEOFENCES_CELLS_ENCODING", "compact"
+    )
+
+    assert encode_event_cells([2, 1]) == ([2, 1], "raw")
@@ -0,0 +1,62 @@
+"""
+Tests de las verificaciones de salud en segundo plano y de /health/ready.
+
+Estrategia: las verificaciones reales se sustituyen por funciones locales;
+el cliente no ejecuta el startup (no se inicia el hilo de verificación).
+"""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import health
+
+
+def _fail():
+    raise RuntimeError("connection refused")
+
+
+@pytest.fixture
+def probes():
+    fakes = {health.PROBE_DATABASE: lambda: None, health.PROBE_KAFKA: _fail}
+    with (
+        patch.dict(health.PROBES, fakes, clear=True),
+        patch.dict(health._results, {}, clear=True),
+        patch.object(health.settings, "HEALTH_PROBE_INTERVAL_SECONDS", 30),
+        patch.object(health.settings, "HEALTH_READY_DEPENDENCIES", "database"),
+    ):
+        yield
+
+
+def test_not_ready_until_required_probe_succeeds(probes):
+    client = TestClient(app)
+
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["dependencies"]["database"] == {"status": "pending"}
+
+    health.run_probes()
+
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    dependencies = response.json()["dependencies"]
+    assert dependencies["database"]["status"] == "up"
+    # Kafka no es requerido para readiness pero se reporta
+    assert dependencies["kafka"]["status"] == "down"
+    assert dependencies["kafka"]["error"] == "connection refused"
+
+
+def test_liveness_does_not_depend_on_probes(probes):
+    assert TestClient(app).get("/health/live").status_code == 200
+
+
+def test_state_changes_are_logged_once(probes):
+    with patch.object(health, "logger") as mock_logger:
+        health.run_probe(health.PROBE_KAFKA)
+        health.run_probe(health.PROBE_KAFKA)
+
+    mock_logger.error.assert_called_once()
@@ -0,0 +1,63 @@
+"""
+Tests de las estadísticas internas (conteos con FILTER y snapshot en caché).
+
+Estrategia: se captura el SQL compilado con el dialecto de PostgreSQL para
+verificar que cada tabla se consulta una vez; la caché se prueba con una
+función de cálculo simulada.
+"""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.services import internal_stats
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    internal_stats.clear_stats_cache()
+    yield
+    internal_stats.clear_stats_cache()
+
+
+def test_organization_stats_use_a_single_filtered_count():
+    session = Session()
+    captured = []
+
+    def one(query_self):
+        captured.append(str(query_self.statement.compile(dialect=postgresql.dialect())))
+        return SimpleNamespace(total=6, pending=1, active=3, suspended=1, deleted=1)
+
+    with patch("sqlalchemy.orm.Query.one", one):
+        stats = internal_stats.compute_organizations_stats(session)
+
+    assert len(captured) == 1
+    assert captured[0].count("FILTER (WHERE organizations.status") == 4
+    assert stats == {
+        "total": 6,
+        "by_status": {"pending": 1, "active": 3, "suspended": 1, "deleted": 1},
+    }
+
+
+def test_stats_snapshot_is_reused_until_ttl_expires():
+    compute = MagicMock(side_effect=[{"total": 1}, {"total": 2}])
+    db = MagicMock()
+    name = internal_stats.STATS_ORGANIZATIONS
+
+    with (
+        patch.dict(internal_stats._COMPUTE, {name: compute}),
+        patch.object(internal_stats.settings, "INTERNAL_STATS_TTL_SECONDS", 30),
+    ):
+        first = internal_stats.get_stats(db, name)
+        cached = internal_stats.get_stats(db, name)
+        # Vence el snapshot
+        internal_stats._snapshots[name] = (first, 0)
+        expired = internal_stats.get_stats(db, name)
+
+    assert (first, cached, expired) == ({"total": 1}, {"total": 1}, {"total": 2})
+    assert compute.call_count == 2
@@ -0,0 +1,54 @@
+"""
+Tests del producer Kafka compartido (configuración y envío por lotes).
+
+Estrategia: el cliente kafka-python se sustituye por un MagicMock, sin broker.
+"""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+from app.core.config import settings
+from app.services.messaging.kafka_producer import KafkaEventProducer
+
+
+def test_send_batch_sends_serializer_and_event_id_headers():
+    producer = MagicMock()
+    publisher = KafkaEventProducer()
+    publisher._producer = producer
+
+    publisher.send_batch(
+        [MagicMock(topic="topic", key="k", payload={}, event_id="abc")], timeout=1
+    )
+
+    headers = dict(producer.send.call_args.kwargs["headers"])
+    assert headers["content-type"] == b"application/json"
+    assert headers["schema-version"] == b"1"
+    assert headers["event_id"] == b"abc"
+
+
+def test_client_config_batches_and_keeps_order_per_key():
+    config = KafkaEventProducer()._build_client_config()
+
+    assert config["linger_ms"] == settings.KAFKA_PRODUCER_LINGER_MS
+    assert config["max_in_flight_requests_per_connection"] == 1
+
+
+def test_send_batch_reports_errors_per_message():
+    ok, failed = MagicMock(is_done=True), MagicMock(is_done=True)
+    ok.failed.return_value = False
+    failed.failed.return_value = True
+    failed.exception = RuntimeError("sin líder")
+    producer = MagicMock()
+    producer.send.side_effect = [ok, failed]
+    publisher = KafkaEventProducer()
+    publisher._producer = producer
+    messages = [
+        MagicMock(topic="a", key="1", payload={}, event_id="e1"),
+        MagicMock(topic="b", key="2", payload={}, event_id="e2"),
+    ]
+
+    errors = publisher.send_batch(messages, timeout=1)
+
+    assert errors == [None, repr(failed.exception)]
+    producer.flush.assert_called_once_with(timeout=1)
@@ -0,0 +1,38 @@
+"""
+Tests de los serializadores de valores para Kafka.
+"""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+from app.services.messaging import serializers
+from app.services.messaging.serializers import JSON_SERIALIZER, get_value_serializer
+
+
+def test_orjson_and_json_produce_equivalent_payloads():
+    payload = {"event_type": "UPSERT", "name": "Almacén", "cells": ["8a2a1072b59ffff"]}
+
+    for name in ("orjson", "json"):
+        serializer = get_value_serializer(name)
+        assert json.loads(serializer.dumps(payload)) == payload
+        assert serializer.content_type == "application/json"
+
+
+def test_unavailable_serializer_falls_back_to_json():
+    with (
+        patch.object(serializers, "msgpack", None),
+        patch.object(serializers, "logger") as mock_logger,
+    ):
+        serializer = get_value_serializer("msgpack")
+
+    assert serializer is JSON_SERIALIZER
+    mock_logger.warning.assert_called_once()
+
+
+def test_headers_include_schema_version():
+    with patch.object(serializers.settings, "KAFKA_SCHEMA_VERSION", 3):
+        headers = dict(JSON_SERIALIZER.headers())
+
+    assert headers == {"content-type": b"application/json", "schema-version": b"3"}
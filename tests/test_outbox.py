@@ -0,0 +1,92 @@
+"""
+Tests del transactional outbox (encolado y relay a Kafka).
+
+Estrategia: la sesión es un MagicMock y la selección de pendientes se parchea
+(usa advisory locks y JSONB de PostgreSQL); el producer es un doble que
+retorna el resultado por mensaje.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+from uuid import UUID, uuid4
+
+from app.models.outbox_event import OutboxEvent
+from app.services import outbox
+from app.services.outbox import drain_outbox, enqueue_outbox_event, retry_delay
+
+
+def _event(key, payload=None):
+    return OutboxEvent(
+        id=None,
+        event_id=uuid4(),
+        topic="geofences-updates",
+        key=key,
+        payload=payload or {},
+        attempts=0,
+    )
+
+
+def _locked_db(acquired=True):
+    db = MagicMock()
+    db.execute.return_value.scalar.return_value = acquired
+    return db
+
+
+def test_enqueue_keeps_existing_event_id_and_generates_missing():
+    db = MagicMock()
+    existing_id = str(uuid4())
+
+    kept = enqueue_outbox_event(db, "t", {"event_id": existing_id}, key="k")
+    generated = enqueue_outbox_event(db, "t", {"operation": "DELETE"})
+
+    assert kept.event_id == UUID(existing_id)
+    assert generated.payload["event_id"] == str(generated.event_id)
+    assert generated.payload["operation"] == "DELETE"
+    assert db.add.call_count == 2
+
+
+def test_retry_delay_is_exponential_and_capped():
+    with (
+        patch.object(outbox.settings, "OUTBOX_RETRY_BASE_SECONDS", 2),
+        patch.object(outbox.settings, "OUTBOX_RETRY_MAX_SECONDS", 30),
+    ):
+        assert retry_delay(1) == timedelta(seconds=2)
+        assert retry_delay(3) == timedelta(seconds=8)
+        assert retry_delay(10) == timedelta(seconds=30)
+
+
+def test_failed_event_holds_back_later_events_of_same_key():
+    first_a, second_a, other = _event("a"), _event("a"), _event("b")
+    producer = MagicMock()
+    producer.send_batch.return_value = ["KafkaTimeoutError()", None, None]
+    db = _locked_db()
+
+    with (
+        patch.object(
+            outbox, "_load_due_events", return_value=[first_a, second_a, other]
+        ),
+        patch.object(outbox, "increment_counter"),
+    ):
+        processed = drain_outbox(db, producer, batch_size=10)
+
+    assert processed == 3
+    assert other.published_at is not None
+    for event in (first_a, second_a):
+        assert event.published_at is None
+        assert event.attempts == 1
+        assert event.next_attempt_at is not None
+    assert first_a.last_error == "KafkaTimeoutError()"
+    db.commit.assert_called_once()
+
+
+def test_drain_skips_when_another_worker_holds_the_lock():
+    producer = MagicMock()
+    db = _locked_db(acquired=False)
+
+    with patch.object(outbox, "_load_due_events") as mock_load:
+        assert drain_outbox(db, producer, batch_size=10) == 0
+
+    mock_load.assert_not_called()
+    producer.send_batch.assert_not_called()
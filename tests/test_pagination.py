@@ -0,0 +1,119 @@
+"""
+Tests de la paginación keyset de los listados internos.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.models.account import Account
+from app.models.organization import Organization
+from app.utils.pagination import (
+    NULL_CREATED_AT,
+    decode_keyset_cursor,
+    encode_keyset_cursor,
+    paginate_keyset,
+)
+
+
+def test_cursor_roundtrip_is_query_string_safe():
+    created_at = datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)
+    row_id = uuid4()
+
+    cursor = encode_keyset_cursor(created_at, row_id)
+
+    assert set(cursor) <= set(
+        "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    )
+    assert decode_keyset_cursor(cursor) == (created_at, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "no-es-base64!", "MjAyNi0wMS0wMg"])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_keyset_cursor(cursor)
+
+
+def test_page_starts_after_cursor_and_returns_next_cursor():
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = [
+        SimpleNamespace(id=uuid4(), created_at=start - timedelta(minutes=minute))
+        for minute in range(3)
+    ]
+    query = MagicMock()
+    query.filter.return_value = query
+    query.order_by.return_value = query
+    query.limit.return_value = query
+    query.all.return_value = rows
+    cursor = encode_keyset_cursor(start + timedelta(hours=1), uuid4())
+
+    page, next_cursor = paginate_keyset(
+        query, Account.created_at, Account.id, limit=2, cursor=cursor
+    )
+
+    condition = query.filter.call_args.args[0].compile(dialect=postgresql.dialect())
+    assert "(accounts.created_at, accounts.id) < (" in str(condition)
+    query.limit.assert_called_once_with(3)
+    assert page == rows[:2]
+    assert decode_keyset_cursor(next_cursor) == (rows[1].created_at, rows[1].id)
+
+
+def test_last_page_has_no_next_cursor():
+    query = MagicMock()
+    query.order_by.return_value = query
+    query.limit.return_value = query
+    query.all.return_value = [SimpleNamespace(id=uuid4(), created_at=datetime.now())]
+
+    page, next_cursor = paginate_keyset(query, Account.created_at, Account.id, limit=2)
+
+    query.filter.assert_not_called()
+    assert len(page) == 1
+    assert next_cursor is None
+
+
+def test_legacy_offset_is_applied_after_ordering():
+    session = Session()
+    captured = []
+
+    def all_(query_self):
+        captured.append(str(query_self.statement.compile(dialect=postgresql.dialect())))
+        return []
+
+    with patch("sqlalchemy.orm.Query.all", all_):
+        paginate_keyset(
+            session.query(Account), Account.created_at, Account.id, limit=2, offset=10
+        )
+
+    assert "ORDER BY accounts.created_at DESC, accounts.id DESC" in captured[0]
+    assert "OFFSET" in captured[0]
+
+
+def test_nullable_created_at_sorts_nulls_last_and_encodes_cursor():
+    session = Session()
+    captured = []
+    rows = [SimpleNamespace(id=uuid4(), created_at=None) for _ in range(2)]
+
+    def all_(query_self):
+        captured.append(str(query_self.statement.compile(dialect=postgresql.dialect())))
+        return rows
+
+    cursor = encode_keyset_cursor(NULL_CREATED_AT, uuid4())
+    with patch("sqlalchemy.orm.Query.all", all_):
+        page, next_cursor = paginate_keyset(
+            session.query(Organization),
+            Organization.created_at,
+            Organization.id,
+            limit=1,
+            cursor=cursor,
+        )
+
+    assert "(coalesce(organizations.created_at, " in captured[0]
+    assert "ORDER BY coalesce(organizations.created_at, " in captured[0]
+    assert decode_keyset_cursor(next_cursor) == (NULL_CREATED_AT, rows[0].id)
@@ -0,0 +1,35 @@
+"""
+Tests del listener de LISTEN/NOTIFY compartido por las cachés en memoria.
+
+Estrategia: la conexión de PostgreSQL es un MagicMock; se registra el orden
+de LISTEN y on_connect sin abrir conexiones reales.
+"""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+from app.services.pg_notifications import NotificationListener
+
+
+def test_listen_runs_before_on_connect_invalidation():
+    calls = []
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.execute.side_effect = lambda sql: calls.append(sql)
+
+    def on_connect():
+        calls.append("on_connect")
+        listener._stop.set()
+
+    listener = NotificationListener(
+        "cache_invalidated", on_notify=MagicMock(), on_connect=on_connect, name="t"
+    )
+    engine = MagicMock()
+    engine.raw_connection.return_value.dbapi_connection = connection
+
+    with patch("app.db.session.engine", engine):
+        listener._run()
+
+    assert calls == ['LISTEN "cache_invalidated"', "on_connect"]
+    connection.close.assert_called_once()
@@ -0,0 +1,128 @@
+"""
+Tests del snapshot en memoria del catálogo de planes.
+
+Estrategia: la sesión es un MagicMock que retorna filas según el primer
+argumento de db.query; el snapshot global se reinicia entre tests.
+"""
+
+from __future__ import annotations
+
+import json
+from decimal import Decimal
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+from starlette.requests import Request
+
+from app.api.v1.endpoints.plans import _catalog_response
+from app.models.capability import PlanCapability
+from app.models.plan import Plan
+from app.models.product import PlanProduct, Product
+from app.services import plan_catalog
+
+
+@pytest.fixture(autouse=True)
+def clean_snapshot():
+    plan_catalog.reset_catalog_snapshot()
+    yield
+    plan_catalog.reset_catalog_snapshot()
+
+
+def _plan(code, monthly, is_active=True):
+    return Plan(
+        id=uuid4(),
+        name=code.title(),
+        code=code,
+        price_monthly=Decimal(monthly),
+        price_yearly=Decimal(monthly) * 10,
+        is_active=is_active,
+    )
+
+
+def _db(plans, capabilities=(), products=()):
+    db = MagicMock()
+
+    def query(entity, *_):
+        q = MagicMock()
+        q.join.return_value = q
+        q.filter.return_value = q
+        q.order_by.return_value = q
+        if entity is Plan:
+            q.all.return_value = list(plans)
+        elif entity is PlanCapability:
+            q.all.return_value = list(capabilities)
+        else:
+            assert entity is PlanProduct.plan_id
+            q.all.return_value = list(products)
+        return q
+
+    db.query.side_effect = query
+    return db
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "headers": headers})
+
+
+def test_snapshot_serializes_active_plans_and_indexes_by_id_and_code():
+    basic, pro, legacy = (
+        _plan("basic", 99),
+        _plan("pro", 599),
+        _plan("legacy", 49, False),
+    )
+    gps = Product(id=uuid4(), code="gps_tracker", name="GPS Tracker")
+    db = _db(
+        [legacy, basic, pro],
+        capabilities=[
+            (
+                PlanCapability(plan_id=pro.id, capability_id=uuid4(), value_int=50),
+                "max_devices",
+            ),
+            (
+                PlanCapability(plan_id=pro.id, capability_id=uuid4(), value_bool=True),
+                "ai_features",
+            ),
+        ],
+        products=[(pro.id, gps)],
+    )
+
+    snapshot = plan_catalog.build_catalog_snapshot(db)
+
+    listed = json.loads(snapshot.plans_list.body)
+    assert [plan["code"] for plan in listed["plans"]] == ["basic", "pro"]
+    assert listed["total"] == 2
+    detail = json.loads(snapshot.get_plan("pro").body)
+    assert detail["capabilities"] == {"max_devices": 50, "ai_features": True}
+    assert detail["products"] == [{"code": "gps_tracker", "name": "GPS Tracker"}]
+    assert "Hasta 50 dispositivos" in detail["highlighted_features"]
+    # Los planes inactivos siguen disponibles por ID o código
+    assert snapshot.get_plan(str(legacy.id)) is snapshot.get_plan("legacy")
+    assert snapshot.get_plan("unknown") is None
+
+
+def test_refresh_bumps_version_only_when_content_changes():
+    plans = [_plan("basic", 99)]
+    db = _db(plans)
+
+    first = plan_catalog.get_catalog_snapshot(db)
+    assert plan_catalog.refresh_catalog_snapshot(db) is first
+
+    plans[0].price_monthly = Decimal(149)
+    second = plan_catalog.refresh_catalog_snapshot(db)
+
+    assert (first.version, second.version) == (1, 2)
+    assert second.plans_list.etag != first.plans_list.etag
+    assert plan_catalog.get_catalog_snapshot(db) is second
+
+
+def test_catalog_response_returns_304_when_etag_matches():
+    response = plan_catalog.build_catalog_snapshot(_db([_plan("basic", 99)])).plans_list
+
+    full = _catalog_response(_request(), response)
+    cached = _catalog_response(_request(response.etag), response)
+
+    assert (full.status_code, full.body) == (200, response.body)
+    assert full.headers["etag"] == response.etag
+    assert (cached.status_code, cached.body) == (304, b"")
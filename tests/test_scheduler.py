@@ -0,0 +1,194 @@
+"""
+Tests del scheduler en proceso (triggers, despacho, timeouts y liderazgo).
+
+Estrategia: el liderazgo se simula con un MagicMock y los jobs se ejecutan
+con una función run_job de prueba; no se usa BD.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services import scheduler as scheduler_module
+from app.services.scheduler import (
+    AdvisoryLockLeader,
+    CronTrigger,
+    IntervalTrigger,
+    Job,
+    Scheduler,
+)
+
+
+def _at(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "expression, after, expected",
+    [
+        ("30 3 * * *", _at(2026, 10, 19, 4, 0), _at(2026, 10, 20, 3, 30)),
+        ("*/15 * * * *", _at(2026, 10, 19, 10, 7, 30), _at(2026, 10, 19, 10, 15)),
+        ("0 0 29 2 *", _at(2026, 10, 19), _at(2028, 2, 29)),
+        ("0 12 * 12 0", _at(2026, 10, 19), _at(2026, 12, 6, 12, 0)),
+        # Día-mes y día-semana restringidos: basta con uno (lunes 26)
+        ("0 9 1 * 1", _at(2026, 10, 20), _at(2026, 10, 26, 9, 0)),
+    ],
+)
+def test_cron_next_fire(expression, after, expected):
+    assert CronTrigger(expression).next_fire(after) == expected
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "*/0 * * * *"])
+def test_invalid_cron_expression_raises(expression):
+    with pytest.raises(ValueError):
+        CronTrigger(expression)
+
+
+def test_jitter_delays_next_run_within_bounds():
+    now = _at(2026, 10, 19, 12, 0)
+    job = Job("job", MagicMock(), IntervalTrigger(60), jitter_seconds=10)
+
+    for _ in range(20):
+        job.schedule_next(now)
+        assert (
+            now + timedelta(seconds=60)
+            <= job.next_run_at
+            <= now + timedelta(seconds=70)
+        )
+
+
+def _scheduler(run_job, is_leader):
+    leader = MagicMock(is_leader=is_leader)
+    leader.refresh.return_value = is_leader
+    return Scheduler(leader, leader_check_seconds=60, run_job=run_job)
+
+
+async def _dispatch(scheduler):
+    for job in scheduler.jobs.values():
+        job.next_run_at = scheduler_module._utcnow() - timedelta(seconds=1)
+    await scheduler.run_pending()
+    await asyncio.gather(*scheduler._tasks)
+
+
+def test_followers_only_run_jobs_that_are_not_leader_only():
+    ran = []
+    scheduler = _scheduler(lambda job: ran.append(job.name), is_leader=False)
+    scheduler.add_job(Job("sweep", MagicMock(), IntervalTrigger(60)))
+    scheduler.add_job(
+        Job("catalog", MagicMock(), IntervalTrigger(60), leader_only=False)
+    )
+
+    asyncio.run(_dispatch(scheduler))
+
+    assert ran == ["catalog"]
+    assert scheduler.jobs["sweep"].next_run_at > scheduler_module._utcnow()
+
+
+def test_job_timeout_is_recorded_and_blocks_reentry_until_done():
+    release = threading.Event()
+    scheduler = _scheduler(lambda job: release.wait(5), is_leader=True)
+    job = Job("slow", MagicMock(), IntervalTrigger(60), timeout_seconds=0.05)
+    scheduler.add_job(job)
+    running_after_timeout = []
+
+    async def scenario():
+        await _dispatch(scheduler)
+        running_after_timeout.append(job.running)
+        release.set()
+        while job.running:
+            await asyncio.sleep(0.01)
+
+    with patch.object(scheduler_module, "increment_counter") as counter:
+        asyncio.run(scenario())
+
+    assert running_after_timeout == [True]
+    counter.assert_called_once_with(
+        "scheduler.job.runs", tags={"job": "slow", "outcome": "timeout"}
+    )
+
+
+def test_job_error_is_recorded_and_does_not_stop_scheduler():
+    def fail(job):
+        raise RuntimeError("boom")
+
+    scheduler = _scheduler(fail, is_leader=True)
+    scheduler.add_job(Job("broken", MagicMock(), IntervalTrigger(60)))
+
+    with patch.object(scheduler_module, "increment_counter") as counter:
+        asyncio.run(_dispatch(scheduler))
+
+    counter.assert_called_once_with(
+        "scheduler.job.runs", tags={"job": "broken", "outcome": "error"}
+    )
+    assert not scheduler.jobs["broken"].running
+
+
+def test_only_the_worker_holding_the_advisory_lock_is_leader():
+    granted = MagicMock()
+    granted.execute.return_value.scalar.return_value = True
+    denied = MagicMock()
+    denied.execute.return_value.scalar.return_value = False
+
+    leader = AdvisoryLockLeader(42, connect=lambda: granted)
+    follower = AdvisoryLockLeader(42, connect=lambda: denied)
+
+    assert leader.refresh() and leader.is_leader
+    assert not follower.refresh() and not follower.is_leader
+    denied.close.assert_called_once()
+
+    # Si la conexión del líder falla, pierde el liderazgo y reintenta; la
+    # conexión se invalida para no devolver al pool una sesión con el lock
+    granted.execute.side_effect = RuntimeError("conexión perdida")
+    leader._connect = lambda: denied
+    assert not leader.refresh()
+    assert not leader.is_leader
+    granted.invalidate.assert_called_once()
+    granted.close.assert_called_once()
+
+
+def test_leadership_check_is_not_delayed_by_running_jobs():
+    release = threading.Event()
+    scheduler = _scheduler(lambda job: release.wait(5), is_leader=True)
+    scheduler._max_workers = 1
+    scheduler.add_job(Job("slow", MagicMock(), IntervalTrigger(60)))
+
+    async def scenario():
+        scheduler.start()
+        try:
+            await _dispatch_without_waiting(scheduler)
+            await asyncio.wait_for(scheduler._check_leadership(), timeout=1)
+        finally:
+            release.set()
+            scheduler.stop()
+
+    asyncio.run(scenario())
+
+    assert scheduler.leader.refresh.called
+
+
+async def _dispatch_without_waiting(scheduler):
+    for job in scheduler.jobs.values():
+        job.next_run_at = scheduler_module._utcnow() - timedelta(seconds=1)
+    scheduler._dispatch_due_jobs(scheduler_module._utcnow())
+    await asyncio.sleep(0.05)
+
+
+def test_default_jobs_skip_disabled_settings():
+    from app.services import scheduled_jobs
+
+    with (
+        patch.object(scheduled_jobs.settings, "INTERNAL_STATS_REFRESH_SECONDS", 0),
+        patch.object(scheduled_jobs.settings, "TOKEN_PURGE_CRON", ""),
+    ):
+        jobs = {job.name: job for job in scheduled_jobs.default_jobs()}
+
+    assert "internal-stats-refresh" not in jobs
+    assert "confirmation-tokens-purge" not in jobs
+    assert not jobs["plan-catalog-refresh"].leader_only
+    assert jobs["expiry-sweep"].leader_only
+    assert isinstance(jobs["outbox-purge"].trigger, CronTrigger)
@@ -0,0 +1,101 @@
+"""
+Tests del snapshot de reglas y geocercas para consumidores de Kafka.
+
+Estrategia: el cursor del lado del servidor (_stream) y las cargas por lote se
+parchean; el producer es un doble que retorna el resultado por mensaje.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from app.models.alert_rule import AlertRule
+from app.models.geofence import Geofence
+from app.services import snapshots
+from app.services.messaging.geofence_events import (
+    CHUNK_EVENT_TYPE,
+    build_upsert_event_messages,
+)
+from app.services.snapshots import RateLimiter, republish_snapshot
+
+
+def _rule():
+    return AlertRule(
+        id=uuid4(),
+        organization_id=uuid4(),
+        name="Exceso de velocidad",
+        type="speed",
+        config={"max_kmh": 90},
+        is_active=True,
+        updated_at=datetime(2026, 1, 1),
+    )
+
+
+def _geofence():
+    return Geofence(
+        id=uuid4(),
+        organization_id=uuid4(),
+        created_by=uuid4(),
+        name="Centro",
+        is_active=True,
+        updated_at=datetime(2026, 1, 1),
+    )
+
+
+def test_rate_limiter_sleeps_to_keep_rate():
+    now = [0.0]
+    sleeps = []
+    limiter = RateLimiter(100, clock=lambda: now[0], sleep=sleeps.append)
+
+    limiter.wait(50)
+    now[0] = 0.6
+    limiter.wait(50)
+
+    assert sleeps == [0.5, 0.4]
+
+
+def test_republish_marks_events_and_counts_failures():
+    rules = [_rule(), _rule()]
+    unit_id = uuid4()
+    producer = MagicMock()
+    producer.send_batch.return_value = [None, "KafkaTimeoutError()"]
+    db = MagicMock()
+
+    with (
+        patch.object(snapshots, "_stream", return_value=iter([rules])),
+        patch.object(
+            snapshots.rule_events,
+            "load_rule_units",
+            return_value={rules[0].id: [(unit_id, "Camión 1")], rules[1].id: []},
+        ),
+        patch.object(snapshots, "increment_counter"),
+    ):
+        result = republish_snapshot(
+            db, producer, entities=["alert_rule"], max_events_per_second=0
+        )
+
+    messages = producer.send_batch.call_args.args[0]
+    assert [message.key for message in messages] == [str(rule.id) for rule in rules]
+    payload = messages[0].payload
+    assert payload["operation"] == "UPSERT"
+    assert payload["snapshot"]["id"] == str(result.snapshot_id)
+    assert payload["rule"]["unit_ids"] == [str(unit_id)]
+    assert messages[0].event_id == payload["event_id"]
+    assert result.events == {"alert_rule": 2}
+    assert (result.published, result.failed) == (1, 1)
+    db.rollback.assert_called_once()
+
+
+def test_chunked_geofence_snapshot_marks_every_message():
+    snapshot = {"id": "s-1", "started_at": "2026-01-01T00:00:00Z"}
+
+    with patch.object(snapshots.settings, "KAFKA_GEOFENCES_CHUNK_CELLS", 2):
+        messages = build_upsert_event_messages(
+            _geofence(), [1, 2, 3, 4, 5], snapshot=snapshot
+        )
+
+    assert len(messages) == 4
+    assert messages[1]["event_type"] == CHUNK_EVENT_TYPE
+    assert all(message["snapshot"] == snapshot for message in messages)
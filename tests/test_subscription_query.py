@@ -0,0 +1,63 @@
+"""
+Tests de las consultas en bloque de suscripciones activas.
+
+Estrategia: se compila el SQL con el dialecto de PostgreSQL (DISTINCT ON no
+existe en SQLite) y se verifica la forma de la consulta; la ejecución se
+simula con MagicMock.
+"""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.models.subscription import Subscription
+from app.services import subscription_query
+
+
+def _sql(query) -> str:
+    return str(query.statement.compile(dialect=postgresql.dialect()))
+
+
+def test_primary_active_subscriptions_use_distinct_on_latest_started():
+    sql = _sql(
+        subscription_query._primary_active_subscriptions_query(Session(), [uuid4()])
+    )
+
+    assert "SELECT DISTINCT ON (subscriptions.organization_id)" in sql
+    assert (
+        "ORDER BY subscriptions.organization_id, subscriptions.started_at DESC" in sql
+    )
+    # Misma regla de suscripción activa que las consultas por organización
+    assert "subscriptions.status IN" in sql
+    assert "subscriptions.expires_at IS NULL" in sql
+
+
+def test_primary_active_subscriptions_are_keyed_by_organization():
+    org_a, org_b = uuid4(), uuid4()
+    sub_a = Subscription(id=uuid4(), organization_id=org_a, plan_id=uuid4())
+    sub_b = Subscription(id=uuid4(), organization_id=org_b, plan_id=uuid4())
+    query = MagicMock()
+    query.options.return_value = query
+    query.all.return_value = [sub_a, sub_b]
+
+    with patch.object(
+        subscription_query, "_primary_active_subscriptions_query", return_value=query
+    ):
+        result = subscription_query.get_primary_active_subscriptions(
+            MagicMock(), [org_a, org_b, uuid4()], load_plan=True
+        )
+
+    assert result == {org_a: sub_a, org_b: sub_b}
+    query.options.assert_called_once()
+
+
+def test_bulk_lookups_skip_query_without_organizations():
+    db = MagicMock()
+
+    assert subscription_query.get_primary_active_subscriptions(db, []) == {}
+    assert subscription_query.get_active_plan_ids(db, []) == {}
+    db.query.assert_not_called()
@@ -0,0 +1,233 @@
+"""
+Tests del Heatmap H3 de Trips.
+
+Estrategia: DB mockeada (como test_telemetry); las filas simulan el resultado
+ya reducido por coordenada que devuelve PostgreSQL.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.api.deps import AuthResult
+from app.api.v1.endpoints import trips as trips_endpoints
+from app.db.session import get_db
+from app.main import app
+from app.services import trip_heatmap
+from app.services.trip_heatmap import (
+    build_trip_heatmap,
+    clear_heatmap_cache,
+    contiguous_day_runs,
+    split_closed_days,
+)
+from app.utils.h3_cells import is_h3_available
+
+pytestmark = pytest.mark.skipif(not is_h3_available(), reason="h3 no instalado")
+
+URL = "/api/v1/trips/heatmap"
+NOW = datetime(2025, 11, 29, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _row(device_id: str, day: date, lat: float, lng: float, points: int, speed):
+    return MagicMock(
+        device_id=device_id,
+        day=day,
+        lat=lat,
+        lng=lng,
+        points=points,
+        speed_sum=(speed or 0) * points,
+        speed_count=points if speed is not None else 0,
+    )
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    clear_heatmap_cache()
+    yield
+    clear_heatmap_cache()
+
+
+class TestSplitClosedDays:
+    def test_partial_edges_and_recent_days_are_open(self):
+        start = datetime(2025, 11, 20, 6, 0, tzinfo=timezone.utc)
+
+        closed, open_intervals = split_closed_days(start, NOW, NOW)
+
+        assert closed == [date(2025, 11, d) for d in range(21, 28)]
+        assert open_intervals == [
+            (start, datetime(2025, 11, 21, tzinfo=timezone.utc)),
+            (datetime(2025, 11, 28, tzinfo=timezone.utc), NOW),
+        ]
+
+    def test_recent_range_has_no_closed_days(self):
+        start = NOW - timedelta(hours=20)
+
+        assert split_closed_days(start, NOW, NOW) == ([], [(start, NOW)])
+
+
+class TestBuildTripHeatmap:
+    def test_bins_points_and_averages_speed(self):
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [
+            _row("DEV-001", date(2025, 11, 29), 19.43, -99.13, 10, 0.0),
+            _row("DEV-002", date(2025, 11, 29), 19.43, -99.13, 30, 40.0),
+            _row("DEV-001", date(2025, 11, 29), 20.67, -103.35, 5, None),
+        ]
+
+        cells = build_trip_heatmap(
+            db, ["DEV-001", "DEV-002"], NOW - timedelta(hours=6), NOW, 9, now=NOW
+        )
+
+        assert [cell.points for cell in cells] == [40, 5]
+        assert cells[0].h3_index == trip_heatmap.h3.latlng_to_cell(19.43, -99.13, 9)
+        assert cells[0].avg_speed == 30.0
+        assert cells[1].avg_speed is None
+
+    def test_closed_days_are_served_from_cache(self):
+        start = datetime(2025, 11, 20, tzinfo=timezone.utc)
+        end = datetime(2025, 11, 22, tzinfo=timezone.utc)
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [
+            _row("DEV-001", date(2025, 11, 20), 19.43, -99.13, 4, 10.0),
+        ]
+
+        first = build_trip_heatmap(db, ["DEV-001"], start, end, 8, now=NOW)
+        second = build_trip_heatmap(db, ["DEV-001"], start, end, 8, now=NOW)
+
+        assert first == second
+        assert first[0].points == 4
+        db.execute.assert_called_once()
+
+    def test_each_distinct_coordinate_is_converted_once(self):
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [
+            _row("DEV-001", date(2025, 11, 29), 19.43, -99.13, 10, 0.0),
+            _row("DEV-002", date(2025, 11, 29), 19.43, -99.13, 30, 40.0),
+            _row("DEV-001", date(2025, 11, 28), 19.43, -99.13, 2, 5.0),
+        ]
+
+        with patch.object(
+            trip_heatmap.h3, "latlng_to_cell", wraps=trip_heatmap.h3.latlng_to_cell
+        ) as latlng_to_cell:
+            cells = build_trip_heatmap(
+                db, ["DEV-001", "DEV-002"], NOW - timedelta(hours=6), NOW, 9, now=NOW
+            )
+
+        latlng_to_cell.assert_called_once_with(19.43, -99.13, 9)
+        assert cells[0].points == 42
+
+    def test_missing_closed_days_are_fetched_by_contiguous_runs(self):
+        start = datetime(2025, 11, 20, tzinfo=timezone.utc)
+        end = datetime(2025, 11, 26, tzinfo=timezone.utc)
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = []
+        # Días 22 y 23 ya en caché: faltan los tramos 20-21 y 24-25
+        for day in (22, 23):
+            trip_heatmap._closed_day_cache.put(("DEV-001", date(2025, 11, day), 8), {})
+
+        build_trip_heatmap(db, ["DEV-001"], start, end, 8, now=NOW)
+
+        ranges = [
+            (call.args[1]["start"].day, call.args[1]["end"].day)
+            for call in db.execute.call_args_list
+        ]
+        assert ranges == [(20, 22), (24, 26)]
+
+    def test_empty_device_list_skips_query(self):
+        db = MagicMock()
+
+        assert build_trip_heatmap(db, [], NOW - timedelta(days=1), NOW, 9) == []
+        db.execute.assert_not_called()
+
+
+def test_contiguous_day_runs():
+    days = [date(2025, 11, d) for d in (5, 1, 2, 3, 7, 8)]
+
+    assert contiguous_day_runs(days) == [
+        (date(2025, 11, 1), date(2025, 11, 3)),
+        (date(2025, 11, 5), date(2025, 11, 5)),
+        (date(2025, 11, 7), date(2025, 11, 8)),
+    ]
+
+
+class TestTripsHeatmapEndpoint:
+    @pytest.fixture
+    def paseto_client(self):
+        db_mock = MagicMock()
+
+        def override_get_db():
+            yield db_mock
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[trips_endpoints.get_auth_for_trips] = (
+            lambda: AuthResult(
+                auth_type="paseto", payload={"service": "gac", "role": "GAC_ADMIN"}
+            )
+        )
+        with TestClient(app) as c:
+            yield c
+        app.dependency_overrides.clear()
+
+    def test_range_too_large_returns_400(self, paseto_client):
+        response = paseto_client.get(
+            URL,
+            params={
+                "start_date": "2025-10-01T00:00:00Z",
+                "end_date": "2025-11-15T00:00:00Z",
+                "device_id": "DEV-001",
+            },
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_full_31_day_month_is_allowed(self, paseto_client):
+        with patch.object(trips_endpoints, "build_trip_heatmap", return_value=[]):
+            response = paseto_client.get(
+                URL,
+                params={
+                    "start_date": "2026-01-01T00:00:00Z",
+                    "end_date": "2026-02-01T00:00:00Z",
+                    "device_id": "DEV-001",
+                },
+            )
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_paseto_without_scope_returns_400(self, paseto_client):
+        response = paseto_client.get(
+            URL,
+            params={
+                "start_date": "2025-11-01T00:00:00Z",
+                "end_date": "2025-11-02T00:00:00Z",
+            },
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_device_filter_builds_heatmap(self, paseto_client):
+        org_id = uuid4()
+        with patch.object(
+            trips_endpoints, "build_trip_heatmap", return_value=[]
+        ) as mock_build:
+            response = paseto_client.get(
+                URL,
+                params={
+                    "start_date": "2025-11-01T00:00:00",
+                    "end_date": "2025-11-02T00:00:00",
+                    "device_id": "DEV-001",
+                    "organization_id": str(org_id),
+                    "resolution": 7,
+                },
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        body = response.json()
+        assert body["device_count"] == 1
+        assert body["cells"] == []
+        kwargs = mock_build.call_args.kwargs
+        assert kwargs["device_ids"] == ["DEV-001"]
+        assert kwargs["resolution"] == 7
+        assert kwargs["start"].tzinfo is not None
@@ -0,0 +1,151 @@
+"""
+Tests de Resúmenes Diarios de Trips.
+
+Estrategia: igual que test_telemetry, DB mockeada y servicio parcheado para
+evitar el DDL PostgreSQL-específico incompatible con SQLite en memoria.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.api.deps import AuthResult
+from app.api.v1.endpoints import trips as trips_endpoints
+from app.db.session import get_db
+from app.main import app
+from app.models.trip_daily_summary import TripDailySummary
+from app.models.user import User
+from app.services.trip_summaries import (
+    build_summary_out,
+    decode_summary_cursor,
+    encode_summary_cursor,
+)
+
+URL = "/api/v1/trips/daily-summaries"
+
+
+def _make_user(is_master: bool = True) -> User:
+    return User(
+        id=uuid4(),
+        organization_id=uuid4(),
+        cognito_sub="test-sub",
+        email="test@test.com",
+        full_name="Test User",
+        is_master=is_master,
+    )
+
+
+@pytest.fixture
+def master_user():
+    return _make_user(is_master=True)
+
+
+@pytest.fixture
+def api_client(master_user):
+    db_mock = MagicMock()
+
+    def override_get_db():
+        yield db_mock
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[trips_endpoints.get_auth_for_trips] = lambda: AuthResult(
+        auth_type="cognito", payload={"sub": master_user.cognito_sub}
+    )
+
+    with (
+        patch.object(trips_endpoints, "get_user_from_auth", return_value=master_user),
+        TestClient(app) as c,
+    ):
+        yield c
+
+    app.dependency_overrides.clear()
+
+
+class TestSummaryCursor:
+    def test_roundtrip(self):
+        cursor = encode_summary_cursor(date(2025, 11, 29), "864537040123456")
+        assert cursor == "2025-11-29|864537040123456"
+        assert decode_summary_cursor(cursor) == (date(2025, 11, 29), "864537040123456")
+
+    @pytest.mark.parametrize("cursor", ["2025-11-29", "bad|DEV", "2025-11-29|"])
+    def test_invalid_cursor_raises(self, cursor):
+        with pytest.raises(ValueError, match="Cursor inválido"):
+            decode_summary_cursor(cursor)
+
+
+def test_build_summary_out_converts_units():
+    row = TripDailySummary(
+        device_id="DEV-001",
+        day=date(2025, 11, 29),
+        timezone="America/Mexico_City",
+        trip_count=3,
+        distance_meters=84321,
+        driving_minutes=192.456,
+        max_speed=98.0,
+        alert_count=2,
+    )
+
+    out = build_summary_out(row)
+
+    assert out.distance_km == 84.32
+    assert out.driving_minutes == 192.46
+    assert out.trip_count == 3
+    assert out.timezone == "America/Mexico_City"
+
+
+class TestListTripDailySummariesEndpoint:
+    def test_from_after_to_returns_400(self, api_client):
+        response = api_client.get(
+            URL, params={"from_day": "2025-12-01", "to_day": "2025-11-01"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_range_too_large_returns_400(self, api_client):
+        response = api_client.get(
+            URL, params={"from_day": "2024-01-01", "to_day": "2025-06-01"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_master_fleet_query_filters_by_organization(self, api_client, master_user):
+        with patch.object(
+            trips_endpoints, "list_daily_summaries", return_value=([], None, False)
+        ) as mock_list:
+            response = api_client.get(
+                URL, params={"from_day": "2025-11-01", "to_day": "2025-11-30"}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "summaries": [],
+            "limit": 100,
+            "cursor": None,
+            "has_more": False,
+        }
+        kwargs = mock_list.call_args.kwargs
+        assert kwargs["organization_id"] == master_user.organization_id
+        assert kwargs["device_ids"] is None
+        assert kwargs["from_day"] == date(2025, 11, 1)
+        assert kwargs["to_day"] == date(2025, 11, 30)
+
+    def test_invalid_cursor_returns_400(self, api_client):
+        with patch.object(
+            trips_endpoints,
+            "list_daily_summaries",
+            side_effect=ValueError("Cursor inválido: 'x'"),
+        ):
+            response = api_client.get(
+                URL,
+                params={
+                    "from_day": "2025-11-01",
+                    "to_day": "2025-11-30",
+                    "cursor": "x",
+                },
+            )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,110 @@
+"""
+Tests de listados de Trips.
+
+Estrategia: DB mockeada (como test_telemetry) para validar la proyección de
+columnas y la paginación sin depender de DDL PostgreSQL-específico.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints.trips import (
+    TRIP_OUT_COLUMNS,
+    build_trip_list_response,
+    fetch_trip_page,
+)
+from app.schemas.trip import TripOut
+from app.services.trip_units import TripUnit, resolve_trip_units
+
+NOW = datetime(2025, 11, 29, 8, 0, 0, tzinfo=timezone.utc)
+
+
+def _make_row(offset_minutes: int) -> dict:
+    start = NOW - timedelta(minutes=offset_minutes)
+    return {
+        "trip_id": uuid4(),
+        "device_id": "DEV-001",
+        "start_timestamp": start,
+        "end_timestamp": start + timedelta(minutes=30),
+        "duration_minutes": 30.0,
+        "start_lat": 19.43,
+        "start_lon": -99.13,
+        "end_lat": 19.49,
+        "end_lon": -99.12,
+        "distance_km": 12.5,
+    }
+
+
+def _mock_db(total: int, rows: list) -> MagicMock:
+    db = MagicMock()
+    count_result = MagicMock()
+    count_result.scalar_one.return_value = total
+    rows_result = MagicMock()
+    rows_result.mappings.return_value.all.return_value = rows
+    db.execute.side_effect = [count_result, rows_result]
+    return db
+
+
+def test_projection_computes_duration_and_distance_in_sql():
+    sql = str(select(*TRIP_OUT_COLUMNS).compile(dialect=postgresql.dialect()))
+
+    assert "EXTRACT(epoch FROM trips.end_time - trips.start_time)" in sql
+    assert "AS duration_minutes" in sql
+    assert "AS distance_km" in sql
+    assert "trips.created_at" not in sql
+
+
+def test_fetch_trip_page_detects_more_results():
+    rows = [_make_row(i * 60) for i in range(3)]
+    db = _mock_db(total=7, rows=rows)
+
+    trips, total, has_more = fetch_trip_page(db, [], limit=2)
+
+    assert total == 7
+    assert has_more is True
+    assert len(trips) == 2
+    assert all(isinstance(trip, TripOut) for trip in trips)
+    assert trips[0].trip_id == rows[0]["trip_id"]
+    assert trips[1].start_lon == -99.13
+
+
+def test_build_trip_list_response_sets_cursor_only_when_has_more():
+    trips = [TripOut.model_construct(**_make_row(i * 60)) for i in range(2)]
+
+    with_more = build_trip_list_response(MagicMock(), trips, 5, 2, True)
+    assert with_more.cursor == trips[-1].start_timestamp.isoformat()
+
+    last_page = build_trip_list_response(MagicMock(), trips, 2, 2, False)
+    assert last_page.cursor is None
+    assert last_page.trips == trips
+
+
+def test_resolve_trip_units_aligns_results_with_windows():
+    unit_id = uuid4()
+    row = MagicMock(idx=2, unit_id=unit_id, unit_name="Camión #45")
+    db = MagicMock()
+    db.execute.return_value.fetchall.return_value = [row]
+    windows = [
+        ("DEV-001", NOW, NOW + timedelta(minutes=30)),
+        ("DEV-002", NOW, NOW + timedelta(minutes=45)),
+    ]
+
+    resolved = resolve_trip_units(db, windows)
+
+    assert resolved == [None, TripUnit(unit_id, "Camión #45")]
+    db.execute.assert_called_once()
+    params = db.execute.call_args.args[1]
+    assert params["device_ids"] == ["DEV-001", "DEV-002"]
+
+
+def test_resolve_trip_units_skips_query_for_empty_batch():
+    db = MagicMock()
+
+    assert resolve_trip_units(db, []) == []
+    db.execute.assert_not_called()